@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Code analysis process pool benchmark.
+
+Runs pattern extraction, quality scans and the danger scan over a batch of
+large generated Python files. It compares running them on the event loop
+(the previous behaviour) with the shared analysis worker pool at several
+pool sizes. A ticker coroutine measures the longest time the event loop
+was blocked. This is the delay every other coroutine (scheduler, resource
+sampling, parallel tasks) sees while analysis runs.
+
+Usage:
+    python benchmarks/analysis_service.py [--files 8] [--functions 1500]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+import warnings
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from nocturnal_agent.core.analysis_service import AnalysisService
+from nocturnal_agent.core.config import QualityConfig
+from nocturnal_agent.engines.pattern_extractor import PatternExtractor
+from nocturnal_agent.engines.quality_evaluator import QualityEvaluator
+from nocturnal_agent.safety.danger_detector import DangerDetector
+
+
+def build_source(index: int, functions: int) -> str:
+    lines = ["import os", "import json", ""]
+    for i in range(functions):
+        lines += [
+            f"def handler_{index}_{i}(items, limit={i}):",
+            f"    \"\"\"Handle batch {i}.\"\"\"",
+            "    result = []",
+            "    for position in range(len(items)):",
+            "        if items[position] > limit and position % 3:",
+            "            result.append(json.dumps(items[position]))",
+            "    return result",
+            "",
+        ]
+    return "\n".join(lines)
+
+
+async def analyze_all(service: AnalysisService, sources):
+    extractor = PatternExtractor(service)
+    evaluator = QualityEvaluator(QualityConfig(), analysis_service=service)
+    detector = DangerDetector({}, analysis_service=service)
+
+    async def analyze(index, source):
+        await asyncio.gather(
+            extractor._analyze_python_file(source, Path(f"generated_{index}.py")),
+            evaluator._analyze_security(source, '.py'),
+            evaluator._analyze_performance(source, '.py'),
+            detector.analyze_code_async(source),
+        )
+
+    await asyncio.gather(*(analyze(i, source) for i, source in enumerate(sources)))
+
+
+async def measure(service: AnalysisService, sources):
+    max_lag = 0.0
+    done = asyncio.Event()
+
+    async def ticker():
+        nonlocal max_lag
+        interval = 0.005
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            max_lag = max(max_lag, time.perf_counter() - started - interval)
+
+    tick = asyncio.create_task(ticker())
+    await asyncio.sleep(0.02)
+    started = time.perf_counter()
+    await analyze_all(service, sources)
+    elapsed = time.perf_counter() - started
+    done.set()
+    await tick
+    return elapsed, max_lag
+
+
+async def run(files: int, functions: int):
+    sources = [build_source(i, functions) for i in range(files)]
+    size = sum(len(source) for source in sources) / files / 1024
+    print(f"{files} files of {size:.0f} KiB ({functions} functions each), {os.cpu_count()} CPUs")
+
+    inline = AnalysisService({'enabled': False})
+    elapsed, lag = await measure(inline, sources)
+    print(f"on event loop          wall {elapsed:6.2f} s   max loop lag {lag * 1000:8.1f} ms")
+
+    for workers in sorted({1, 2, 4, os.cpu_count() or 1}):
+        service = AnalysisService({'max_workers': workers})
+        warm_started = time.perf_counter()
+        service.start()
+        warm = time.perf_counter() - warm_started
+        elapsed, lag = await measure(service, sources)
+        service.shutdown()
+        print(f"pool of {workers:<2} workers     wall {elapsed:6.2f} s   max loop lag {lag * 1000:8.1f} ms"
+              f"   (warm-up {warm:.2f} s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, default=8)
+    parser.add_argument('--functions', type=int, default=1500)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    warnings.simplefilter('ignore', DeprecationWarning)
+
+    asyncio.run(run(args.files, args.functions))
+
+
+if __name__ == '__main__':
+    main()
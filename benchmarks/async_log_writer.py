@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Structured logging caller latency benchmark.
+
+Times StructuredLogger.log calls from an asyncio coroutine with the
+synchronous file handlers and with the queue-based writer, then reports
+how long the writer needed to drain the buffer afterwards.
+
+Usage:
+    python benchmarks/async_log_writer.py [--records 50000]
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from nocturnal_agent.log_system.structured_logger import StructuredLogger, LogLevel, LogCategory
+
+
+async def produce(structured_logger: StructuredLogger, records: int) -> list:
+    """Log from a coroutine and return per-call latencies in microseconds."""
+    samples = []
+    for i in range(records):
+        start = time.perf_counter()
+        structured_logger.log(
+            LogLevel.INFO, LogCategory.SCHEDULER, f"tick {i}",
+            component='nocturnal_agent.scheduler', task_id=f"task_{i % 100}",
+            extra_data={'iteration': i}
+        )
+        samples.append((time.perf_counter() - start) * 1e6)
+        if i % 1000 == 0:
+            await asyncio.sleep(0)
+    return samples
+
+
+def run(records: int, async_writer: bool, **options):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        structured_logger = StructuredLogger({
+            'output_path': temp_dir,
+            'console_output': False,
+            'async_writer': async_writer,
+            **options
+        })
+        samples = asyncio.run(produce(structured_logger, records))
+
+        start = time.perf_counter()
+        structured_logger.flush()
+        drain = (time.perf_counter() - start) * 1000
+        writer = structured_logger.get_writer_statistics()
+        structured_logger.close()
+
+    samples.sort()
+    label = "async" if async_writer else "sync"
+    print(f"{label:6s} median {statistics.median(samples):6.1f} us   "
+          f"p99 {samples[int(len(samples) * 0.99)]:7.1f} us   drain {drain:7.1f} ms")
+    if writer:
+        print(f"       batches {writer['batches']}, max depth {writer['max_queue_depth']}, "
+              f"dropped {writer['dropped_total']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--records', type=int, default=50000)
+    args = parser.parse_args()
+
+    run(args.records, async_writer=False)
+    run(args.records, async_writer=True)
+    run(args.records, async_writer=True, async_queue_size=1000, async_backpressure='sample')
+
+
+if __name__ == '__main__':
+    main()
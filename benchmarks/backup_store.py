@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Pre-execution backup benchmark.
+
+Creates a synthetic project and takes repeated full backups, the way a
+nightly run takes one before each task, changing a few files in between.
+Compares the content-addressed store with copying every file into its own
+backup directory and rehashing the copy (the previous implementation).
+
+Usage:
+    python benchmarks/backup_store.py [--files 3000] [--backups 10] [--changes 5]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import logging
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from nocturnal_agent.safety.backup_manager import BackupManager, BackupType
+
+
+def build_project(root: Path, file_count: int):
+    rng = random.Random(1)
+    for i in range(file_count):
+        path = root / "src" / f"pkg_{i % 50}" / f"module_{i}.py"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("\n".join(f"value_{j} = {rng.random()}" for j in range(rng.randint(20, 200))))
+
+
+def touch_files(root: Path, file_count: int, changes: int, rng: random.Random):
+    for i in rng.sample(range(file_count), changes):
+        path = root / "src" / f"pkg_{i % 50}" / f"module_{i}.py"
+        path.write_text(path.read_text() + f"\nchanged = {rng.random()}\n")
+
+
+def copy_backup(project: Path, backup_dir: Path):
+    """Copy every file, then hash the copy, like the previous implementation."""
+    for item in project.rglob('*'):
+        if item.is_file():
+            target = backup_dir / item.relative_to(project)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(item, target)
+    hasher = hashlib.sha256()
+    for path in sorted(backup_dir.rglob('*')):
+        if path.is_file():
+            hasher.update(path.read_bytes())
+    return hasher.hexdigest()
+
+
+def directory_size(root: Path) -> int:
+    return sum(path.stat().st_size for path in root.rglob('*') if path.is_file())
+
+
+async def run(file_count: int, backups: int, changes: int):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        project = Path(temp_dir) / "project"
+        build_project(project, file_count)
+
+        rng = random.Random(2)
+        copies = Path(temp_dir) / "copies"
+        start = time.perf_counter()
+        for i in range(backups):
+            copy_backup(project, copies / f"backup_{i}")
+            touch_files(project, file_count, changes, rng)
+        copy_seconds = time.perf_counter() - start
+
+        rng = random.Random(2)
+        manager = BackupManager(str(project), {'backup_root': str(Path(temp_dir) / "store")})
+        timings = []
+        for i in range(backups):
+            start = time.perf_counter()
+            await manager.create_backup(BackupType.FULL, backup_id=f"backup_{i}")
+            timings.append(time.perf_counter() - start)
+            touch_files(project, file_count, changes, rng)
+
+        print(f"project:        {file_count} files, {backups} backups, {changes} changed files between backups")
+        print(f"copy per file:  {copy_seconds:.2f} s, {directory_size(copies) / 2**20:.1f} MiB")
+        print(f"content store:  {sum(timings):.2f} s (first {timings[0]:.2f} s, later median "
+              f"{sorted(timings[1:])[len(timings) // 2 - 1]:.3f} s), "
+              f"{directory_size(Path(temp_dir) / 'store') / 2**20:.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, default=3000)
+    parser.add_argument('--backups', type=int, default=10)
+    parser.add_argument('--changes', type=int, default=5)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    asyncio.run(run(args.files, args.backups, args.changes))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""DangerDetector scan benchmark.
+
+Times DangerDetector.analyze_code on generated diffs of increasing size.
+It compares the previous per-pattern loop (re.compile plus findall for
+every pattern on every call) with the compiled pattern scanner. The
+scanner's matches are checked against the old loop's. Short commands
+show the per-call overhead on small inputs.
+
+Usage:
+    python benchmarks/danger_scan.py [--sizes 1,5] [--non-ascii]
+"""
+
+import argparse
+import logging
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from nocturnal_agent.safety.danger_detector import DangerDetector, compile_danger_patterns
+
+
+def build_diff(megabytes: float, non_ascii: bool) -> str:
+    source = (Path(__file__).parent.parent / "src" / "nocturnal_agent" / "safety" / "danger_detector.py").read_text()
+    hunk = "".join(f"+{line}\n" for line in source.splitlines())
+    if non_ascii:
+        hunk += "+# 生成されたコードの説明コメント\n"
+    # One real finding near the end so the scan cannot stop early
+    return hunk * max(1, int(megabytes * 1024 * 1024 / len(hunk))) + "+os.system('rm -rf /tmp/build/*')\n"
+
+
+def per_pattern_scan(detector: DangerDetector, text: str):
+    matches = {}
+    for pattern in detector.danger_patterns:
+        if pattern.enabled:
+            found = re.compile(pattern.pattern, pattern.regex_flags).findall(text)
+            if found:
+                matches[pattern.name] = found
+    return matches
+
+
+def timed(func, *args, repeat: int = 1):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = func(*args)
+    return (time.perf_counter() - started) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='1,5', help="diff sizes in MiB, comma separated")
+    parser.add_argument('--non-ascii', action='store_true', help="include non-ASCII comments in the diff")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    detector = DangerDetector({})
+    scanner = compile_danger_patterns(detector._pattern_signature(
+        [p for p in detector.danger_patterns if p.enabled]
+    ))
+
+    for size in (float(value) for value in args.sizes.split(',')):
+        text = build_diff(size, args.non_ascii)
+        old, expected = timed(per_pattern_scan, detector, text)
+        new, detection = timed(detector.analyze_code, text)
+        same = scanner.scan(text) == expected and len(detection.detected_patterns) == len(expected)
+        print(f"{len(text) / 1024 / 1024:5.1f} MiB diff   per-pattern {old * 1000:8.1f} ms   "
+              f"scanner {new * 1000:8.1f} ms   same matches {same}")
+
+    command = "git status --short && ls -la build/"
+    old, _ = timed(per_pattern_scan, detector, command, repeat=2000)
+    new, _ = timed(scanner.scan, command, repeat=2000)
+    print(f"short command      per-pattern {old * 1e6:8.1f} us   scanner {new * 1e6:8.1f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Rollback snapshot benchmark.
+
+Builds a synthetic git repository and times file snapshots the way
+RollbackManager takes them for every rollback point: hashing every file
+(the previous implementation) versus the shared file state cache, with
+and without the git fast path.
+
+Usage:
+    python benchmarks/file_state_snapshot.py [--files 20000] [--changes 20]
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from nocturnal_agent.safety.file_state import FileStateCache
+
+
+def build_repo(root: Path, file_count: int):
+    rng = random.Random(1)
+    past = time.time() - 3600
+    for i in range(file_count):
+        path = root / f"pkg_{i % 200}" / f"module_{i}.py"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("\n".join(f"value_{j} = {rng.random()}" for j in range(rng.randint(20, 200))))
+        os.utime(path, (past, past))
+    subprocess.run(['git', 'init', '-q'], cwd=root, check=True)
+    subprocess.run(['git', 'add', '.'], cwd=root, check=True)
+    subprocess.run(['git', '-c', 'user.name=bench', '-c', 'user.email=bench@example.com',
+                    'commit', '-qm', 'initial'], cwd=root, check=True)
+
+
+def hash_everything(root: Path) -> dict:
+    """Hash every non-hidden file, like the previous snapshot."""
+    snapshot = {}
+    for path in root.rglob('*'):
+        if not path.is_file() or any(part.startswith('.') for part in path.relative_to(root).parts):
+            continue
+        hasher = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(8192), b""):
+                hasher.update(chunk)
+        snapshot[str(path.relative_to(root))] = hasher.hexdigest()
+    return snapshot
+
+
+def include(rel_path: str) -> bool:
+    return not any(part.startswith('.') for part in rel_path.rstrip('/').split('/'))
+
+
+def timed(call) -> float:
+    start = time.perf_counter()
+    call()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, default=20000)
+    parser.add_argument('--changes', type=int, default=20)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        build_repo(root, args.files)
+
+        print(f"repository:            {args.files} files")
+        print(f"hash every file:       {timed(lambda: hash_everything(root)):.2f} s")
+
+        cache = FileStateCache(root)
+        print(f"cache, first snapshot: {timed(lambda: cache.snapshot(include)):.2f} s")
+        print(f"cache, git fast path:  {timed(lambda: FileStateCache(root).snapshot(include)):.2f} s")
+
+        rng = random.Random(2)
+        for i in rng.sample(range(args.files), args.changes):
+            path = root / f"pkg_{i % 200}" / f"module_{i}.py"
+            path.write_text(path.read_text() + "\nchanged = True\n")
+        print(f"  after {args.changes} edits:      {timed(lambda: FileStateCache(root).snapshot(include)):.2f} s")
+
+        subprocess.run(['rm', '-rf', str(root / '.git')], check=True)
+        print(f"cache, stat walk:      {timed(lambda: FileStateCache(root).snapshot(include)):.2f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""LLM response cache benchmark.
+
+Replays a synthetic night of LLM prompts through LLMResponseCache. Some
+prompts are exact repeats (retries, quality-improvement attempts). Some
+are near duplicates (a reprocessed requirements file with small edits).
+The rest are new. It reports the LLM calls and simulated generation time
+avoided by the exact tier and by the exact plus near-duplicate tiers. It
+also reports the per-lookup overhead with a full cache.
+
+Usage:
+    python benchmarks/llm_response_cache.py [--prompts 2000] [--latency 8]
+"""
+
+import argparse
+import logging
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from nocturnal_agent.llm.response_cache import LLMResponseCache
+
+OPTIONS = {'temperature': 0.3, 'num_predict': 512}
+
+
+def requirement_text(rng: random.Random, topic: int) -> str:
+    lines = [f"タスク{topic}: 在庫管理APIの実装"]
+    lines += [f"- 要件{i}: エンドポイント/items/{topic}/{i}で{rng.choice(['検索', '登録', '更新'])}を提供する"
+              for i in range(12)]
+    return "\n".join(lines)
+
+
+def build_workload(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    workload, seen = [], []
+    for _ in range(count):
+        roll = rng.random()
+        if seen and roll < 0.35:
+            workload.append(rng.choice(seen))  # exact repeat
+        elif seen and roll < 0.5:
+            base = rng.choice(seen)
+            workload.append(base.replace("登録", "新規登録", 1) + "\n- 補足: ログを出力する")
+        else:
+            prompt = requirement_text(rng, len(seen))
+            seen.append(prompt)
+            workload.append(prompt)
+    return workload
+
+
+def replay(workload, cache: LLMResponseCache, latency: float):
+    calls = 0
+    started = time.perf_counter()
+    for prompt in workload:
+        if cache.lookup('qwen2.5:7b', OPTIONS, prompt) is None:
+            calls += 1
+            cache.store('qwen2.5:7b', OPTIONS, prompt, "{\"plan\": \"...\"}" * 50, tokens=400, latency=latency)
+    return calls, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--prompts', type=int, default=2000)
+    parser.add_argument('--latency', type=float, default=8.0, help="simulated seconds per LLM call")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    workload = build_workload(args.prompts)
+    print(f"{len(workload)} prompts, {args.latency:.0f} s per LLM call")
+    print(f"no cache                 {len(workload):>5} LLM calls   {len(workload) * args.latency / 3600:6.2f} h generating")
+
+    for label, near in (("exact tier", False), ("exact + near-duplicate", True)):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = LLMResponseCache({'storage_path': temp_dir, 'near_duplicate': near,
+                                      'near_duplicate_threshold': 0.8})
+            calls, overhead = replay(workload, cache, args.latency)
+            print(f"{label:<24} {calls:>5} LLM calls   {calls * args.latency / 3600:6.2f} h generating   "
+                  f"cache overhead {overhead / len(workload) * 1000:5.2f} ms/prompt   "
+                  f"entries {cache.get_status()['entries']}")
+
+
+if __name__ == '__main__':
+    main()
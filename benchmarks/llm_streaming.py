@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Ollama streaming benchmark.
+
+Runs a local stand-in for Ollama's /api/generate that produces tokens at
+a fixed rate. The model answers with a JSON object and then keeps
+talking. The benchmark compares the previous non-streaming call, which
+waits for the whole completion, with stream_llm and a JSONObjectStop
+that disconnects once the object is closed. It reports time to first
+token, total time, and how many tokens the server generated.
+
+Usage:
+    python benchmarks/llm_streaming.py [--tokens 300] [--json-tokens 60] [--token-ms 10]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from nocturnal_agent.config.config_manager import LLMConfig
+from nocturnal_agent.llm.llm_transport import LLMTransport
+from nocturnal_agent.llm.local_llm_interface import JSONObjectStop, LocalLLMInterface
+
+
+class SimulatedOllama:
+    def __init__(self, tokens, token_delay: float):
+        self.tokens = tokens
+        self.token_delay = token_delay
+        self.generated = 0
+
+    async def generate(self, request):
+        payload = await request.json()
+        if not payload['stream']:
+            await asyncio.sleep(self.token_delay * len(self.tokens))
+            self.generated += len(self.tokens)
+            return web.json_response({'response': "".join(self.tokens), 'done': True})
+
+        response = web.StreamResponse()
+        await response.prepare(request)
+        for token in self.tokens:
+            await asyncio.sleep(self.token_delay)
+            self.generated += 1
+            await response.write(json.dumps({'response': token, 'done': False}).encode() + b"\n")
+        await response.write(b'{"response": "", "done": true}\n')
+        return response
+
+
+def build_tokens(total: int, json_tokens: int):
+    body = [f'"item_{i}": {i}, ' for i in range(json_tokens - 2)]
+    return ['{'] + body + ['"end": true}'] + [' 補足'] * (total - json_tokens)
+
+
+async def run(total: int, json_tokens: int, token_delay: float):
+    server = SimulatedOllama(build_tokens(total, json_tokens), token_delay)
+    app = web.Application()
+    app.router.add_post('/api/generate', server.generate)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    config = LLMConfig(api_url=f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}")
+    transport = LLMTransport()
+    llm = LocalLLMInterface(config, transport=transport)
+
+    print(f"{total} tokens, JSON closes after {json_tokens}, {token_delay * 1000:.0f} ms/token")
+    try:
+        started = time.perf_counter()
+        response = await transport.request("POST", f"{config.api_url}/api/generate",
+                                           json=llm._build_payload("plan", total, stream=False))
+        elapsed = time.perf_counter() - started
+        print(f"non-streaming         first token {elapsed:6.2f} s   total {elapsed:6.2f} s   "
+              f"generated {server.generated:>4} tokens")
+        assert response.ok
+
+        server.generated = 0
+        started = time.perf_counter()
+        stop = JSONObjectStop()
+        text = "".join([token async for token in llm.stream_llm("plan", total, stop=stop)])
+        elapsed = time.perf_counter() - started
+        await asyncio.sleep(token_delay * 3)  # let the server notice the disconnect
+        stats = llm.last_stream_stats
+        print(f"streaming + JSON stop first token {stats.time_to_first_token:6.2f} s   total {elapsed:6.2f} s   "
+              f"generated {server.generated:>4} tokens   valid JSON {bool(json.loads(text[stop.start:]))}")
+    finally:
+        await transport.close()
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tokens', type=int, default=300)
+    parser.add_argument('--json-tokens', type=int, default=60)
+    parser.add_argument('--token-ms', type=float, default=10)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    asyncio.run(run(args.tokens, args.json_tokens, args.token_ms / 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Shared LLM transport benchmark.
+
+Runs a local HTTP server that stands in for an LLM endpoint, with a fixed
+per-connection setup cost (TLS handshake) and per-request latency. It
+compares the previous pattern, where every call opened a fresh
+ClientSession and sent a connection-test request first, with calls
+through the shared LLMTransport. Both the sequential and concurrent
+cases are reported.
+
+Usage:
+    python benchmarks/llm_transport.py [--calls 50] [--concurrency 8] [--handshake-ms 40]
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from pathlib import Path
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from nocturnal_agent.llm.llm_transport import LLMTransport
+
+
+class SimulatedEndpoint:
+    """Charges the handshake cost once per new connection."""
+
+    def __init__(self, handshake: float, latency: float):
+        self.handshake = handshake
+        self.latency = latency
+        self.connections = 0
+        self._seen = set()
+
+    async def handle(self, request):
+        peer = request.transport.get_extra_info('peername')
+        if peer not in self._seen:
+            self._seen.add(peer)
+            self.connections += 1
+            await asyncio.sleep(self.handshake)
+        if request.path != '/v1/models':
+            await asyncio.sleep(self.latency)
+        return web.json_response({'content': [{'text': 'ok'}]})
+
+
+async def per_call_session(url: str):
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f"{url}/v1/models") as response:
+            await response.read()
+        async with session.post(f"{url}/v1/messages", json={'prompt': 'hi'}) as response:
+            await response.read()
+
+
+async def shared_transport(transport: LLMTransport, url: str):
+    async def probe():
+        return (await transport.request("GET", f"{url}/v1/models", retries=0)).ok
+
+    await transport.check_health(f"bench:{url}", probe)
+    await transport.request("POST", f"{url}/v1/messages", json={'prompt': 'hi'})
+
+
+async def measure(endpoint: SimulatedEndpoint, calls: int, concurrency: int, call):
+    endpoint.connections = 0
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with gate:
+            await call()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return time.perf_counter() - started, endpoint.connections
+
+
+async def run(calls: int, concurrency: int, handshake: float, latency: float):
+    endpoint = SimulatedEndpoint(handshake, latency)
+    app = web.Application()
+    app.router.add_route('*', '/{tail:.*}', endpoint.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+    print(f"{calls} calls, handshake {handshake * 1000:.0f} ms, latency {latency * 1000:.0f} ms")
+    try:
+        for parallel in (1, concurrency):
+            old, old_connections = await measure(endpoint, calls, parallel, lambda: per_call_session(url))
+            transport = LLMTransport({'limit_per_endpoint': concurrency})
+            new, new_connections = await measure(endpoint, calls, parallel, lambda: shared_transport(transport, url))
+            await transport.close()
+            print(f"concurrency {parallel:>2}   per-call session {old:6.2f} s ({old_connections:>3} connections)   "
+                  f"shared transport {new:6.2f} s ({new_connections:>3} connections)")
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--handshake-ms', type=float, default=40)
+    parser.add_argument('--latency-ms', type=float, default=20)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    asyncio.run(run(args.calls, args.concurrency, args.handshake_ms / 1000, args.latency_ms / 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Partitioned log store query benchmark.
+
+Writes synthetic structured log entries spread over several days into the
+hourly segment store and compares indexed queries with a full scan of the
+same entries in a single JSON Lines file (the previous query_logs path).
+
+Usage:
+    python benchmarks/log_store_query.py [--entries 200000] [--hours 72] [--repeat 5]
+"""
+
+import argparse
+import json
+import logging
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from nocturnal_agent.log_system.log_store import LogStore
+
+
+LEVELS = ["DEBUG"] * 40 + ["INFO"] * 50 + ["WARNING"] * 8 + ["ERROR"] * 2
+CATEGORIES = ["system", "task_execution", "cost_management", "safety", "scheduler", "api_call"]
+
+
+def build(root: Path, entry_count: int, hours: int) -> float:
+    """Write the entries to both layouts and return the first timestamp."""
+    rng = random.Random(1)
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp()
+    step = hours * 3600 / entry_count
+
+    store = LogStore(root / "segments")
+    with open(root / "nocturnal_agent.jsonl", "w", encoding="utf-8") as legacy:
+        for i in range(entry_count):
+            created = base + i * step
+            entry = {
+                'timestamp': datetime.fromtimestamp(created, tz=timezone.utc).isoformat(),
+                'level': rng.choice(LEVELS),
+                'category': rng.choice(CATEGORIES),
+                'component': f"nocturnal_agent.module_{rng.randrange(20)}",
+                'task_id': f"task_{rng.randrange(5000)}",
+                'message': f"synthetic message {i}",
+                'extra_data': {'value': rng.random()}
+            }
+            line = json.dumps(entry, ensure_ascii=False)
+            store.append(created, line, entry)
+            legacy.write(line + "\n")
+    store.close()
+    return base
+
+
+def full_scan(path: Path, start_key, end_key, filters, limit):
+    """Scan the single file like the previous query_logs implementation."""
+    results = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if len(results) >= limit:
+                break
+            entry = json.loads(line)
+            if start_key and entry['timestamp'] < start_key:
+                continue
+            if end_key and entry['timestamp'] > end_key:
+                continue
+            if any(entry.get(field) != value for field, value in filters.items()):
+                continue
+            results.append(entry)
+    return sorted(results, key=lambda entry: entry['timestamp'])[:limit]
+
+
+def median_ms(call, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--entries', type=int, default=200000)
+    parser.add_argument('--hours', type=int, default=72)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        start = time.perf_counter()
+        base = build(root, args.entries, args.hours)
+        print(f"entries:  {args.entries} over {args.hours} hours "
+              f"(written in {time.perf_counter() - start:.1f} s)")
+
+        window_start = datetime.fromtimestamp(base, tz=timezone.utc) + timedelta(hours=args.hours // 2)
+        window_end = window_start + timedelta(hours=2)
+        cases = [
+            ("errors, all time", None, None, {'level': 'ERROR'}, 1000),
+            ("one task id", None, None, {'task_id': 'task_42'}, 1000),
+            ("2h window, category", window_start, window_end, {'category': 'safety'}, 1000),
+            ("first 100, no filter", None, None, {}, 100),
+        ]
+
+        store = LogStore(root / "segments")
+        legacy = root / "nocturnal_agent.jsonl"
+        for name, start_time, end_time, filters, limit in cases:
+            start_key = start_time.isoformat() if start_time else None
+            end_key = end_time.isoformat() if end_time else None
+            indexed = median_ms(lambda: store.query(start_time, end_time, filters, limit=limit), args.repeat)
+            scanned = median_ms(lambda: full_scan(legacy, start_key, end_key, filters, limit), args.repeat)
+            print(f"{name:24s} indexed {indexed:8.2f} ms   full scan {scanned:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Nightly task executor benchmark.
+
+Runs a synthetic night of implementation tasks through NightlyTaskExecutor.
+ClaudeCodeExecutor is replaced with a simulated Claude Code run that sleeps
+for a task-specific duration. Each component has a design -> implementation
+-> test chain. It compares the previous continuous mode with the current
+one. The previous mode ran max_concurrent tasks one after another, then
+slept 30 s before the next cycle. The current mode keeps max_concurrent
+runs in flight and starts dependents as soon as they become ready.
+Simulated minutes are scaled down so the benchmark finishes quickly.
+
+Usage:
+    python benchmarks/nightly_executor.py [--components 6] [--concurrency 3] [--scale 0.02]
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from nocturnal_agent.execution.implementation_task_manager import NightlyTaskExecutor
+from nocturnal_agent.log_system.structured_logger import StructuredLogger
+
+PHASES = ("設計", "実装", "テスト")
+CYCLE_SLEEP_MINUTES = 0.5
+
+
+class SimulatedClaude:
+    """Sleeps for the task's simulated duration instead of running Claude Code."""
+
+    def __init__(self, minutes, scale):
+        self.minutes = minutes
+        self.scale = scale
+
+    async def execute_task_via_claude_code(self, task):
+        await asyncio.sleep(self.minutes[task.title] * self.scale)
+        return {'status': 'success', 'task_id': task.task_id}
+
+
+def make_executor(workspace, components, scale, seed=0):
+    logger = StructuredLogger({'output_path': str(Path(workspace) / 'logs'),
+                               'console_output': False, 'file_output': False})
+    executor = NightlyTaskExecutor(workspace, logger)
+    manager = executor.task_manager
+    rng = random.Random(seed)
+    minutes = {}
+    for component in range(components):
+        previous = None
+        for phase in PHASES:
+            title = f"コンポーネント{component} - {phase}"
+            task_id = manager.create_task_from_specification({'title': title})
+            manager.set_task_dependencies(task_id, [previous] if previous else [])
+            manager.approve_task(task_id)
+            minutes[title] = rng.uniform(4, 20)
+            previous = task_id
+    executor.claude_executor = SimulatedClaude(minutes, scale)
+    return executor, sum(minutes.values())
+
+
+async def previous_continuous_mode(executor, max_concurrent, scale):
+    """The previous loop: run up to max_concurrent ready tasks sequentially, then sleep."""
+    manager = executor.task_manager
+    while True:
+        ready = manager.get_ready_tasks()[:max_concurrent]
+        if not ready:
+            return
+        for task in ready:
+            manager.start_task_execution(task.task_id)
+            result = await executor.claude_executor.execute_task_via_claude_code(task)
+            manager.complete_task(task.task_id, result)
+        await asyncio.sleep(CYCLE_SLEEP_MINUTES * scale)
+
+
+async def main_async(args):
+    with tempfile.TemporaryDirectory() as workspace:
+        executor, total_minutes = make_executor(workspace, args.components, args.scale)
+        started = time.perf_counter()
+        await previous_continuous_mode(executor, args.concurrency, args.scale)
+        previous = (time.perf_counter() - started) / args.scale
+
+    with tempfile.TemporaryDirectory() as workspace:
+        executor, _ = make_executor(workspace, args.components, args.scale)
+        started = time.perf_counter()
+        summary = await executor.execute_nightly_tasks(max_tasks=None, max_concurrent=args.concurrency)
+        current = (time.perf_counter() - started) / args.scale
+
+    tasks = args.components * len(PHASES)
+    print(f"{tasks} tasks in {args.components} dependency chains, {total_minutes:.0f} min of Claude Code work, "
+          f"concurrency {args.concurrency}")
+    print(f"sequential cycles + 30 s sleeps   {previous:6.0f} simulated min")
+    print(f"bounded concurrent pool           {current:6.0f} simulated min   "
+          f"completed {len(summary['executed_tasks'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--components', type=int, default=6)
+    parser.add_argument('--concurrency', type=int, default=3)
+    parser.add_argument('--scale', type=float, default=0.02, help="real seconds per simulated minute")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    asyncio.run(main_async(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Obsidian knowledge search benchmark.
+
+Generates a synthetic vault of pattern notes with a Zipf-distributed
+vocabulary, then reports the index build time, the warm reload time and the
+latency of pattern and tag searches.
+
+Usage:
+    python benchmarks/obsidian_search_index.py [--notes 5000] [--queries 20]
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from nocturnal_agent.obsidian.knowledge_retriever import ObsidianKnowledgeRetriever
+
+
+PATTERN_TYPES = ["naming", "structure", "architecture"]
+
+
+def build_vault(root: Path, project: str, note_count: int) -> list:
+    """Write note_count pattern notes and return the vocabulary by frequency."""
+    rng = random.Random(1)
+    syllables = "ka ri to mu ne so pa lo vi de xu ba ze qi fo".split()
+    vocab = ["".join(rng.choices(syllables, k=rng.randint(2, 4))) for _ in range(20000)]
+    weights = [1 / (rank + 1) for rank in range(len(vocab))]
+
+    patterns_dir = root / project / "patterns"
+    patterns_dir.mkdir(parents=True)
+    for i in range(note_count):
+        pattern_type = rng.choice(PATTERN_TYPES)
+        description = " ".join(rng.choices(vocab, weights, k=12))
+        body = " ".join(rng.choices(vocab, weights, k=150))
+        (patterns_dir / f"pattern_{i}.md").write_text(
+            f"---\ntype: pattern\npattern_type: {pattern_type}\nconfidence: {rng.random():.2f}\n"
+            f"usage_count: {i % 7}\ntags: [pattern, {pattern_type}]\n---\n\n"
+            f"# Pattern {i}\n\n## Description\n{description}\n\n## Pattern Details\n{body}\n",
+            encoding='utf-8'
+        )
+    return vocab
+
+
+async def timed(coro) -> float:
+    """Await coro and return the elapsed milliseconds."""
+    start = time.perf_counter()
+    await coro
+    return (time.perf_counter() - start) * 1000
+
+
+async def run(note_count: int, query_count: int):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        vocab = build_vault(root, "bench", note_count)
+
+        retriever = ObsidianKnowledgeRetriever(str(root), "bench")
+        build_ms = await timed(retriever._refresh_search_index(force=True))
+        retriever._search_index.close()
+
+        retriever = ObsidianKnowledgeRetriever(str(root), "bench")
+        reload_ms = await timed(retriever._refresh_search_index(force=True))
+
+        print(f"notes:        {note_count}")
+        print(f"index build:  {build_ms:.1f} ms")
+        print(f"warm reload:  {reload_ms:.1f} ms")
+
+        rng = random.Random(2)
+        for label, ranks in [("common", (0, 10)), ("medium", (100, 1000)), ("rare", (5000, 20000))]:
+            samples = []
+            for _ in range(query_count):
+                query = " ".join(vocab[rng.randrange(*ranks)] for _ in range(2))
+                samples.append(await timed(retriever.search_patterns(query, limit=10)))
+            print(f"{label + ' terms:':14}median {statistics.median(samples):.2f} ms, max {max(samples):.2f} ms")
+
+        samples = [
+            await timed(retriever.search_by_tags([rng.choice(PATTERN_TYPES)], limit=20))
+            for _ in range(query_count)
+        ]
+        print(f"{'tag search:':14}median {statistics.median(samples):.2f} ms, max {max(samples):.2f} ms")
+        retriever._search_index.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--notes', type=int, default=5000)
+    parser.add_argument('--queries', type=int, default=20)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    asyncio.run(run(args.notes, args.queries))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Incremental pattern extraction benchmark.
+
+Builds a synthetic project and times
+PatternExtractor.extract_patterns_from_directory in four ways:
+- sequentially on the event loop without a cache (the previous behaviour)
+- cold through the analysis worker pool
+- again with nothing changed
+- again after a "night of small edits" to a fraction of the files
+
+Usage:
+    python benchmarks/pattern_extraction.py [--files 5000] [--changed 0.01] [--workers N]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from nocturnal_agent.core.analysis_service import AnalysisService
+from nocturnal_agent.engines.pattern_extractor import PatternExtractor
+
+
+def build_project(root: Path, file_count: int):
+    for i in range(file_count):
+        path = root / f"pkg_{i % 100}" / f"module_{i}.py"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        functions = "\n".join(
+            f"def handler_{i}_{j}(request, retries=3):\n"
+            f"    \"\"\"Handle request {j}.\"\"\"\n"
+            f"    for attempt in range(retries):\n"
+            f"        if request.ok:\n"
+            f"            return attempt\n"
+            f"    return None\n"
+            for j in range(12)
+        )
+        path.write_text(f"import os\nimport json\n\n\nclass Service{i}:\n    pass\n\n\n{functions}")
+
+
+async def timed(extractor: PatternExtractor, root: Path, use_cache: bool):
+    started = time.perf_counter()
+    result = await extractor.extract_patterns_from_directory(str(root), use_cache=use_cache)
+    return time.perf_counter() - started, result['extraction']
+
+
+async def run(file_count: int, changed: float, workers: int):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        build_project(root, file_count)
+        print(f"project: {file_count} files, {workers} workers")
+
+        elapsed, _ = await timed(PatternExtractor(AnalysisService({'enabled': False})), root, use_cache=False)
+        print(f"sequential, no cache       {elapsed:7.2f} s")
+
+        service = AnalysisService({'max_workers': workers, 'min_offload_chars': 0})
+        service.start()
+        extractor = PatternExtractor(service)
+
+        elapsed, stats = await timed(extractor, root, use_cache=True)
+        print(f"worker pool, cold cache    {elapsed:7.2f} s   parsed {stats['parsed']}")
+
+        elapsed, stats = await timed(extractor, root, use_cache=True)
+        print(f"worker pool, no changes    {elapsed:7.2f} s   parsed {stats['parsed']}")
+
+        edited = random.Random(0).sample(range(file_count), max(1, int(file_count * changed)))
+        for i in edited:
+            path = root / f"pkg_{i % 100}" / f"module_{i}.py"
+            path.write_text(path.read_text() + "\n\ndef added_tonight():\n    return True\n")
+        elapsed, stats = await timed(extractor, root, use_cache=True)
+        print(f"worker pool, {len(edited):>5} edited  {elapsed:7.2f} s   parsed {stats['parsed']}")
+
+        service.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, default=5000)
+    parser.add_argument('--changed', type=float, default=0.01)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    asyncio.run(run(args.files, args.changed, args.workers))
+
+
+if __name__ == '__main__':
+    main()
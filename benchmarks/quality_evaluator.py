@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Static analysis batch evaluation benchmark.
+
+Scores a synthetic night of generated Python files with the installed
+static analysis tools (pylint, flake8, mypy) in three ways. The first is
+the previous scheme: one subprocess per tool per file, with as many
+running at once as there are CPUs. The second is batch_evaluate on a
+cold cache, where each tool runs once per batch of files. The third is
+batch_evaluate again after a few files were edited. There only the
+edited files are analyzed and the rest come from the content-hash cache.
+
+Usage:
+    python benchmarks/quality_evaluator.py [--files 500] [--edited 10]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from nocturnal_agent.config.config_manager import QualityConfig
+from nocturnal_agent.core.analysis_service import AnalysisService
+from nocturnal_agent.engines.quality_evaluator import TOOL_ARGUMENTS, QualityEvaluator, StaticAnalysisResult
+
+SOURCE_TEMPLATE = '''"""Generated module {index}"""
+import json
+from typing import Dict, List
+
+
+def load_{index}(raw: str) -> List[Dict[str, int]]:
+    items = json.loads(raw)
+    return [{{"id": item["id"], "value": item["value"] * {index}}} for item in items]
+
+
+def total_{index}(items: List[Dict[str, int]]) -> int:
+    return sum(item["value"] for item in items)
+'''
+
+
+async def per_file_scheme(tools, code_files):
+    """The previous scheme: a temporary file and one process per tool per file."""
+    semaphore = asyncio.Semaphore(os.cpu_count() or 1)
+
+    async def run(tool, code):
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as temp_file:
+            temp_file.write(code)
+        try:
+            async with semaphore:
+                process = await asyncio.create_subprocess_exec(
+                    tool, *TOOL_ARGUMENTS[tool], temp_file.name,
+                    stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+                )
+                stdout, stderr = await process.communicate()
+            return StaticAnalysisResult(tool, process.returncode or 0, stdout.decode(), stderr.decode()).score
+        finally:
+            os.unlink(temp_file.name)
+
+    await asyncio.gather(*(run(tool, code) for code, _ in code_files for tool in tools))
+
+
+async def main_async(args):
+    tools = [tool for tool in ('pylint', 'flake8', 'mypy') if shutil.which(tool)]
+    if not tools:
+        print("no static analysis tools installed")
+        return
+    code_files = [(SOURCE_TEMPLATE.format(index=i), f"module_{i}.py") for i in range(args.files)]
+    print(f"{args.files} files, tools: {', '.join(tools)}, {os.cpu_count()} CPU")
+
+    started = time.perf_counter()
+    await per_file_scheme(tools, code_files)
+    print(f"one process per tool per file   {time.perf_counter() - started:7.2f} s")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        def evaluator():
+            return QualityEvaluator(QualityConfig(static_analysis_tools=tools),
+                                    analysis_service=AnalysisService({'enabled': False}),
+                                    cache_path=os.path.join(cache_dir, 'static_analysis_cache.json'))
+
+        cold = evaluator()
+        started = time.perf_counter()
+        await cold.batch_evaluate(code_files)
+        print(f"batch_evaluate, cold cache      {time.perf_counter() - started:7.2f} s   "
+              f"tool runs {cold.static_analysis_stats['tool_runs']}")
+
+        for i in range(args.edited):
+            code_files[i] = (code_files[i][0] + "\n\nEDITED = True\n", code_files[i][1])
+        warm = evaluator()
+        started = time.perf_counter()
+        await warm.batch_evaluate(code_files)
+        print(f"batch_evaluate, {args.edited:>3} edited      {time.perf_counter() - started:7.2f} s   "
+              f"tool runs {warm.static_analysis_stats['tool_runs']}   "
+              f"cache hits {warm.static_analysis_stats['cache_hits']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, default=500)
+    parser.add_argument('--edited', type=int, default=10)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    asyncio.run(main_async(args))
+
+
+if __name__ == '__main__':
+    main()
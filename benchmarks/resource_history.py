@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""ResourceMonitor history benchmark.
+
+Records a day of one-second resource samples and times appends, the
+hourly statistics update and an 8 hour trend query. Compares a list of
+snapshots trimmed with ``pop(0)`` and filtered on every query (the
+previous implementation, sized to hold the same day) with the ring buffer
+history.
+
+Usage:
+    python benchmarks/resource_history.py [--hours 24] [--queries 100]
+"""
+
+import argparse
+import logging
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from nocturnal_agent.scheduler.resource_history import ResourceHistory
+from nocturnal_agent.scheduler.resource_monitor import ResourceSnapshot
+
+
+def make_snapshots(seconds: int, end: float) -> list:
+    return [
+        ResourceSnapshot(
+            timestamp=datetime.fromtimestamp(end - seconds + i),
+            cpu_percent=(i * 7919) % 100,
+            memory_percent=40 + (i % 600) / 20,
+            memory_used_gb=4.0,
+            memory_available_gb=4.0,
+            disk_percent=40.0,
+            disk_free_gb=100.0,
+            network_sent_mbps=1.0,
+            network_recv_mbps=2.0,
+            open_files=20,
+            process_count=300,
+            load_average=[1.0, 1.0, 1.0]
+        )
+        for i in range(seconds)
+    ]
+
+
+def list_trends(history: list, hours: int) -> dict:
+    """Filter and aggregate like the previous get_resource_trends."""
+    cutoff_time = datetime.now() - timedelta(hours=hours)
+    recent = [s for s in history if s.timestamp >= cutoff_time]
+    cpu = [s.cpu_percent for s in recent]
+    memory = [s.memory_percent for s in recent]
+    return {
+        'cpu': (min(cpu), max(cpu), sum(cpu) / len(cpu)),
+        'memory': (min(memory), max(memory), sum(memory) / len(memory)),
+    }
+
+
+def run_list(snapshots: list, max_size: int, queries: int):
+    history = []
+    start = time.perf_counter()
+    for snapshot in snapshots:
+        history.append(snapshot)
+        if len(history) > max_size:
+            history.pop(0)
+    append_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(queries):
+        list_trends(history, 1)
+    hourly = (time.perf_counter() - start) / queries
+
+    start = time.perf_counter()
+    for _ in range(queries):
+        list_trends(history, 8)
+    trends = (time.perf_counter() - start) / queries
+    return append_seconds, hourly, trends, history
+
+
+def run_ring(snapshots: list, queries: int):
+    history = ResourceHistory()
+    start = time.perf_counter()
+    for snapshot in snapshots:
+        history.append(snapshot)
+    append_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(queries):
+        history.window_stats('cpu_percent', 3600)
+        history.window_stats('memory_percent', 3600)
+    hourly = (time.perf_counter() - start) / queries
+
+    start = time.perf_counter()
+    for _ in range(queries):
+        history.window_stats('cpu_percent', 8 * 3600)
+        history.window_stats('memory_percent', 8 * 3600)
+    trends = (time.perf_counter() - start) / queries
+    return append_seconds, hourly, trends, history
+
+
+def measure(label: str, call):
+    append_seconds, hourly, trends, history = call()
+    del history
+    # Memory is traced in a separate run; tracing distorts the timings
+    tracemalloc.start()
+    history = call()[3]
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del history
+    print(f"{label:<14} append {append_seconds:6.2f} s   hourly stats {hourly * 1000:8.2f} ms   "
+          f"8h trends {trends * 1000:8.2f} ms   retained {retained / 2**20:7.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hours', type=int, default=24)
+    parser.add_argument('--queries', type=int, default=100)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    seconds = args.hours * 3600
+    print(f"history: {seconds} one-second samples")
+    measure("snapshot list", lambda: run_list(make_snapshots(seconds, time.time()), seconds, args.queries))
+    measure("ring buffer", lambda: run_ring(make_snapshots(seconds, time.time()), args.queries))
+
+
+if __name__ == '__main__':
+    main()
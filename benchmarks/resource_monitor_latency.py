@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""ResourceMonitor event loop latency benchmark.
+
+Runs the resource monitor next to a coroutine that wakes every 10 ms and
+reports how late those wakeups are. Compares sampling inline on the event
+loop with a one second ``psutil.cpu_percent`` call (the previous
+implementation) against the background sampler.
+
+Usage:
+    python benchmarks/resource_monitor_latency.py [--seconds 5] [--interval 0.25]
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import psutil
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from nocturnal_agent.scheduler.resource_monitor import ResourceMonitor
+
+
+async def measure_lag(seconds: float) -> list:
+    """Wake every 10 ms for the given time and return the lateness of each wakeup."""
+    lags = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lags.append((time.perf_counter() - started - 0.01) * 1000)
+    return lags
+
+
+async def inline_sampling(interval: float, stop: asyncio.Event) -> int:
+    """Sample on the event loop like the previous implementation."""
+    samples = 0
+    while not stop.is_set():
+        psutil.cpu_percent(interval=1)
+        psutil.virtual_memory()
+        psutil.disk_usage('/')
+        psutil.net_io_counters()
+        len(psutil.Process().open_files())
+        len(psutil.pids())
+        samples += 1
+        await asyncio.sleep(interval)
+    return samples
+
+
+def report(name: str, lags: list, samples: int):
+    lags = sorted(lags)
+    print(f"{name:<18} samples {samples:4d}   loop lag p50 {statistics.median(lags):7.2f} ms   "
+          f"p99 {lags[int(len(lags) * 0.99)]:7.2f} ms   max {lags[-1]:7.2f} ms")
+
+
+async def run(seconds: float, interval: float):
+    stop = asyncio.Event()
+    sampler_task = asyncio.create_task(inline_sampling(interval, stop))
+    lags = await measure_lag(seconds)
+    stop.set()
+    report("inline sampling", lags, await sampler_task)
+
+    monitor = ResourceMonitor({'monitor_interval_seconds': interval})
+    await monitor.start_monitoring()
+    lags = await measure_lag(seconds)
+    await monitor.stop_monitoring()
+    report("sampler thread", lags, monitor.sampler.stats['samples'])
+    print(f"{'':<18} sample cost max {monitor.sampler.stats['max_sample_ms']:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--interval', type=float, default=0.25)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    asyncio.run(run(args.seconds, args.interval))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""TaskQueue persistence benchmark.
+
+Measures the per-operation cost of add_task/complete_task as the queue grows.
+With the write-ahead log the cost should stay flat from 100 to 100k entries.
+
+Usage:
+    python benchmarks/task_queue_persistence.py [--sizes 100 1000 10000 100000] [--fsync]
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from nocturnal_agent.core.models import Task
+from nocturnal_agent.scheduler.task_queue import TaskQueue
+
+
+async def measure(size: int, operations: int, fsync: bool) -> tuple:
+    """Return (median, amortized) cost in microseconds of one add/start/complete cycle.
+
+    The amortized figure includes snapshot compaction, so enough operations
+    are run to cover at least one full compaction cycle at this queue size.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        queue = TaskQueue(temp_dir, {
+            'max_queue_size': size + operations + 1,
+            'max_concurrent_tasks': operations + 1,
+            'wal_fsync': False
+        })
+        for i in range(size):
+            await queue.add_task(Task(id=f"fill_{i}"), priority_override=10.0)
+
+        queue.wal_fsync = fsync
+        timings = []
+        for i in range(operations):
+            start = time.perf_counter()
+            await queue.add_task(Task(id=f"op_{i}"), priority_override=1.0)
+            next_task = await queue.get_next_task()
+            await queue.complete_task(next_task.task.id, success=True)
+            timings.append(time.perf_counter() - start)
+
+        return statistics.median(timings) * 1_000_000, sum(timings) / operations * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000, 100000])
+    parser.add_argument('--operations', type=int, default=2000)
+    parser.add_argument('--fsync', action='store_true', help='fsync every logged event')
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    print(f"{'queue size':>12} {'median us':>12} {'amortized us':>14}")
+    for size in args.sizes:
+        operations = max(args.operations, size)
+        median, amortized = asyncio.run(measure(size, operations, args.fsync))
+        print(f"{size:>12} {median:>12.1f} {amortized:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
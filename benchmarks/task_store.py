@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Implementation task store benchmark.
+
+Builds a workspace with a large backlog of implementation tasks in chains
+of dependent tasks and measures the hot paths of a nightly run. The first
+is a state transition (start + complete). Previously each transition
+rewrote the whole tasks.json; now it is a single row update in the SQLite
+store. The second is get_ready_tasks, previously a Python scan that checked
+every dependency and now one indexed query. The third is the cost for a
+second process (the dashboard) to see the changes. Previously it had to
+reload the whole JSON file; now it reads only the rows that changed.
+
+Usage:
+    python benchmarks/task_store.py [--tasks 3000] [--transitions 100]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from nocturnal_agent.execution.implementation_task_manager import (
+    ImplementationTaskManager, TaskPriority, TaskStatus, task_from_record, task_to_record
+)
+from nocturnal_agent.log_system.structured_logger import StructuredLogger
+
+CHAIN_LENGTH = 4
+PRIORITIES = ('CRITICAL', 'HIGH', 'MEDIUM', 'LOW')
+
+
+def make_manager(workspace):
+    logger = StructuredLogger({'output_path': str(Path(workspace) / 'logs'),
+                               'console_output': False, 'file_output': False})
+    return ImplementationTaskManager(workspace, logger)
+
+
+def legacy_tasks(count):
+    """A tasks.json in the previous format with approved dependency chains."""
+    tasks = {}
+    for index in range(count):
+        task_id = f"impl_20250101_000000_{index:05d}"
+        tasks[task_id] = {
+            'title': f"コンポーネント{index // CHAIN_LENGTH} - 工程{index % CHAIN_LENGTH}",
+            'description': "ベンチマーク用のタスク",
+            'priority': PRIORITIES[index % len(PRIORITIES)],
+            'status': 'APPROVED',
+            'dependencies': [f"impl_20250101_000000_{index - 1:05d}"] if index % CHAIN_LENGTH else [],
+            'estimated_hours': 2.0,
+            'technical_requirements': ["コーディング規約に準拠する", "適切なテストを実装する"],
+            'acceptance_criteria': ["正常に動作する"],
+            'created_at': f"2025-01-01T00:00:{index % 60:02d}",
+            'updated_at': f"2025-01-01T00:00:{index % 60:02d}",
+            'assigned_to': None,
+            'execution_log': [{'action': 'approved', 'timestamp': '2025-01-01T00:00:00', 'approver': 'system'}],
+            'started_at': None,
+        }
+    return tasks
+
+
+class PreviousJsonScheme:
+    """The previous persistence: the whole task table is rewritten on every transition."""
+
+    def __init__(self, path, tasks):
+        self.path = Path(path)
+        self.tasks = {task_id: task_from_record({**record, 'task_id': task_id})
+                      for task_id, record in tasks.items()}
+
+    def save(self):
+        data = {task_id: task_to_record(task) for task_id, task in self.tasks.items()}
+        with open(f"{self.path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(f"{self.path}.tmp", self.path)
+
+    def transition(self, task_id, status, entry):
+        task = self.tasks[task_id]
+        task.status = status
+        task.execution_log.append(entry)
+        self.save()
+
+    def ready_tasks(self):
+        order = {TaskPriority.CRITICAL: 0, TaskPriority.HIGH: 1, TaskPriority.MEDIUM: 2, TaskPriority.LOW: 3}
+        ready = [task for task in self.tasks.values()
+                 if task.status == TaskStatus.APPROVED and all(
+                     dep not in self.tasks or self.tasks[dep].status == TaskStatus.COMPLETED
+                     for dep in task.dependencies)]
+        return sorted(ready, key=lambda t: (order[t.priority], t.created_at))
+
+    def reload(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return {task_id: task_from_record({**record, 'task_id': task_id})
+                    for task_id, record in json.load(f).items()}
+
+
+def timed(function, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=3000)
+    parser.add_argument('--transitions', type=int, default=100)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    tasks = legacy_tasks(args.tasks)
+
+    with tempfile.TemporaryDirectory() as workspace:
+        previous = PreviousJsonScheme(Path(workspace) / 'tasks.json', tasks)
+        previous.save()
+        ready = [task.task_id for task in previous.ready_tasks()][:args.transitions]
+        started = time.perf_counter()
+        for task_id in ready:
+            previous.transition(task_id, TaskStatus.IN_PROGRESS, {'action': 'started'})
+            previous.transition(task_id, TaskStatus.COMPLETED, {'action': 'completed'})
+        old_transition = (time.perf_counter() - started) / len(ready) * 1000
+        old_ready = timed(previous.ready_tasks, 20)
+        old_reload = timed(previous.reload, 5)
+
+    with tempfile.TemporaryDirectory() as workspace:
+        tasks_dir = Path(workspace) / '.nocturnal' / 'implementation_tasks'
+        tasks_dir.mkdir(parents=True)
+        (tasks_dir / 'tasks.json').write_text(json.dumps(tasks, ensure_ascii=False), encoding='utf-8')
+
+        started = time.perf_counter()
+        manager = make_manager(workspace)
+        migration = time.perf_counter() - started
+        dashboard = make_manager(workspace)
+
+        ready = [task.task_id for task in manager.get_ready_tasks()][:args.transitions]
+        refresh = 0.0
+        started = time.perf_counter()
+        for task_id in ready:
+            manager.start_task_execution(task_id)
+            manager.complete_task(task_id, {'status': 'success'})
+            refreshed = time.perf_counter()
+            len(dashboard.tasks)
+            refresh += time.perf_counter() - refreshed
+        new_transition = (time.perf_counter() - started - refresh) / len(ready) * 1000
+        new_ready = timed(manager.get_ready_tasks, 20)
+        assert dashboard.get_task_summary()['status_counts']['COMPLETED'] == len(ready)
+
+    print(f"{args.tasks} tasks in chains of {CHAIN_LENGTH}, {len(ready)} tasks started and completed "
+          f"(legacy tasks.json imported in {migration:.2f} s)")
+    print(f"{'':28}{'tasks.json':>12}{'SQLite':>12}")
+    print(f"{'start + complete':28}{old_transition:10.2f}ms{new_transition:10.2f}ms")
+    print(f"{'get_ready_tasks':28}{old_ready:10.2f}ms{new_ready:10.2f}ms")
+    print(f"{'dashboard sees one task':28}{old_reload:10.2f}ms{refresh / len(ready) * 1000:10.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""UsageTracker recording throughput benchmark.
+
+Records usage entries through the append-only ledger and reports the
+per-call cost at increasing volumes; with the ledger it should stay flat
+instead of growing with the number of entries already recorded that day.
+
+Usage:
+    python benchmarks/usage_tracker_ledger.py [--records 20000]
+"""
+
+import argparse
+import logging
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from nocturnal_agent.cost.usage_tracker import ServiceType, UsageTracker
+
+
+SERVICES = [ServiceType.CLAUDE_API, ServiceType.OPENAI_API, ServiceType.LOCAL_LLM]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--records', type=int, default=20000)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config = {'storage_path': temp_dir, 'monthly_budget': 1e9}
+        tracker = UsageTracker(config)
+
+        window = []
+        checkpoints = {args.records // 10, args.records // 2, args.records}
+        for i in range(1, args.records + 1):
+            start = time.perf_counter()
+            tracker.record_usage(SERVICES[i % 3], f"op_{i % 7}", 0.001, 100, task_id=f"task_{i}")
+            window.append((time.perf_counter() - start) * 1e6)
+            if i in checkpoints:
+                print(f"after {i:>8} records: median {statistics.median(window):7.1f} us/record")
+                window = []
+
+        today = date.today()
+        start = time.perf_counter()
+        tracker.get_usage_by_date_range(today - timedelta(days=30), today)
+        tracker.get_service_breakdown(days=30)
+        tracker.get_usage_trends(days=30)
+        print(f"range queries:         {(time.perf_counter() - start) * 1000:7.2f} ms")
+
+        tracker.close()
+        start = time.perf_counter()
+        UsageTracker(config)
+        print(f"reload from index:     {(time.perf_counter() - start) * 1000:7.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -6,9 +6,12 @@ import logging
 import os
 import tempfile
 import time
+from contextvars import ContextVar
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Union
 
+import psutil
+
 from nocturnal_agent.core.models import Task, ExecutionResult, QualityScore, AgentType
 from nocturnal_agent.agents.agent_detector import DetectedAgent
 
@@ -16,6 +19,33 @@ from nocturnal_agent.agents.agent_detector import DetectedAgent
 logger = logging.getLogger(__name__)
 
 
+class ProcessUsage:
+    """CPU time and peak memory of the commands run for one task."""
+    
+    def __init__(self):
+        """Initialize usage counters."""
+        self.cpu_seconds = 0.0
+        self.peak_rss_mb = 0.0
+        self.commands = 0
+        self._running_rss: Dict[int, float] = {}
+    
+    def observe(self, command: 'CLICommand', rss_mb: float):
+        """Record the current memory of a running command."""
+        self._running_rss[id(command)] = rss_mb
+        self.peak_rss_mb = max(self.peak_rss_mb, sum(self._running_rss.values()))
+    
+    def finish(self, command: 'CLICommand'):
+        """Add a finished command to the totals."""
+        self._running_rss.pop(id(command), None)
+        self.cpu_seconds += command.cpu_seconds
+        self.peak_rss_mb = max(self.peak_rss_mb, command.peak_rss_mb)
+        self.commands += 1
+
+
+# Usage accumulator of the task whose commands are being executed
+current_task_usage: ContextVar[Optional[ProcessUsage]] = ContextVar('current_task_usage', default=None)
+
+
 class CLIExecutionContext:
     """Context for CLI execution with temporary file management."""
     
@@ -94,14 +124,19 @@ class CLICommand:
         self.stderr: str = ""
         self.execution_time: float = 0.0
         self.success: bool = False
+        
+        # Process accounting (the process and all of its descendants)
+        self.cpu_seconds: float = 0.0
+        self.peak_rss_mb: float = 0.0
 
 
 class CLIExecutor:
     """Executes CLI commands with proper process management."""
     
-    def __init__(self, max_concurrent: int = 3):
+    def __init__(self, max_concurrent: int = 3, usage_sample_interval: float = 0.5):
         """Initialize CLI executor."""
         self.max_concurrent = max_concurrent
+        self.usage_sample_interval = usage_sample_interval
         self._semaphore = asyncio.Semaphore(max_concurrent)
         self.execution_history: List[Dict[str, Any]] = []
     
@@ -133,6 +168,7 @@ class CLIExecutor:
                 cwd=command.working_dir,
                 env=env
             )
+            usage_monitor = asyncio.create_task(self._monitor_usage(process.pid, command))
             
             # Execute with timeout
             try:
@@ -147,6 +183,8 @@ class CLIExecutor:
                 process.kill()
                 await process.wait()
                 raise asyncio.TimeoutError(f"Command timed out after {command.timeout} seconds")
+            finally:
+                usage_monitor.cancel()
             
             # Store results
             command.returncode = process.returncode
@@ -162,6 +200,9 @@ class CLIExecutor:
         
         finally:
             command.execution_time = time.time() - start_time
+            usage = current_task_usage.get()
+            if usage is not None:
+                usage.finish(command)
         
         # Log execution summary
         logger.info(f"Command completed in {command.execution_time:.2f}s, "
@@ -176,12 +217,54 @@ class CLIExecutor:
             "working_dir": command.working_dir,
             "returncode": command.returncode,
             "execution_time": command.execution_time,
+            "cpu_seconds": command.cpu_seconds,
+            "peak_rss_mb": command.peak_rss_mb,
             "success": command.success,
             "timestamp": time.time()
         })
         
         return command
     
+    async def _monitor_usage(self, pid: int, command: CLICommand):
+        """Sample CPU time and memory of a command's process tree until cancelled.
+        
+        CPU time of each live process includes its reaped children, so
+        short-lived descendants are counted once they have been waited for.
+        """
+        try:
+            root = psutil.Process(pid)
+        except psutil.Error:
+            return
+        
+        usage = current_task_usage.get()
+        # Sample quickly at first so short commands are measured too
+        delay = min(0.05, self.usage_sample_interval)
+        while True:
+            try:
+                processes = [root] + root.children(recursive=True)
+            except psutil.Error:
+                return
+            
+            cpu_seconds = 0.0
+            rss = 0
+            for proc in processes:
+                try:
+                    with proc.oneshot():
+                        times = proc.cpu_times()
+                        cpu_seconds += times.user + times.system + times.children_user + times.children_system
+                        rss += proc.memory_info().rss
+                except psutil.Error:
+                    continue
+            
+            rss_mb = rss / (1024 * 1024)
+            command.cpu_seconds = max(command.cpu_seconds, cpu_seconds)
+            command.peak_rss_mb = max(command.peak_rss_mb, rss_mb)
+            if usage is not None:
+                usage.observe(command, rss_mb)
+            
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.usage_sample_interval)
+    
     async def execute_batch(self, commands: List[CLICommand]) -> List[CLICommand]:
         """Execute multiple commands concurrently."""
         tasks = [self.execute_command(cmd) for cmd in commands]
@@ -285,7 +368,26 @@ class AgentManager:
         if not selected_agent:
             raise RuntimeError("No agent available for task execution")
         
-        # Execute with context
+        # Account the CPU time and memory of every command run for the task
+        usage = ProcessUsage()
+        token = current_task_usage.set(usage)
+        try:
+            result = await self._execute_in_context(task, selected_agent, fallback)
+        finally:
+            current_task_usage.reset(token)
+        
+        if usage.commands:
+            result.cpu_seconds = usage.cpu_seconds
+            result.peak_memory_mb = usage.peak_rss_mb
+        return result
+    
+    async def _execute_in_context(
+        self,
+        task: Task,
+        selected_agent: AgentCLIInterface,
+        fallback: bool
+    ) -> ExecutionResult:
+        """Execute task with the selected agent, falling back on failure."""
         async with CLIExecutionContext(task.working_directory) as context:
             try:
                 result = await selected_agent.execute_task(task, context)
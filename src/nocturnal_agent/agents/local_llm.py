@@ -13,6 +13,9 @@ from nocturnal_agent.core.config import LLMConfig
 from nocturnal_agent.core.models import (
     Task, TaskAnalysis, QualityScore, ImprovementPlan, FailureInfo, AgentType
 )
+from nocturnal_agent.cost.usage_tracker import ServiceType
+from nocturnal_agent.llm.llm_transport import LLMTransport, get_llm_transport
+from nocturnal_agent.llm.response_cache import LLMResponseCache, get_response_cache
 
 
 logger = logging.getLogger(__name__)
@@ -40,11 +43,20 @@ class LLMResponse(BaseModel):
 class LocalLLMAgent:
     """Local LLM agent for task orchestration and analysis."""
     
-    def __init__(self, config: LLMConfig):
-        """Initialize the Local LLM agent."""
+    def __init__(self, config: LLMConfig, transport: Optional[LLMTransport] = None,
+                 response_cache: Optional[LLMResponseCache] = None):
+        """Initialize the Local LLM agent.
+        
+        Args:
+            config: LLM configuration
+            transport: HTTP transport (default: the process-wide one)
+            response_cache: LLM response cache (default: the process-wide one)
+        """
         self.config = config
         self.model_name = "local"
-        self.session: Optional[aiohttp.ClientSession] = None
+        self.transport = transport or get_llm_transport()
+        self.response_cache = response_cache or get_response_cache()
+        self.health_key = f"lmstudio:{self.config.api_url}"
         self._connection_verified = False
     
     async def __aenter__(self):
@@ -62,32 +74,23 @@ class LocalLLMAgent:
             logger.warning("Local LLM is disabled in configuration")
             return
         
-        self.session = aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=self.config.timeout)
-        )
+        # The verification result is cached, so reconnecting is cheap
+        if not await self.transport.check_health(self.health_key, self._verify_connection):
+            logger.error(f"Failed to connect to LM Studio at {self.config.api_url}")
+            raise RuntimeError(f"LLM API verification failed: {self.config.api_url}")
         
-        # Verify connection
-        try:
-            await self._verify_connection()
-            self._connection_verified = True
-            logger.info(f"Connected to LM Studio at {self.config.api_url}")
-        except Exception as e:
-            logger.error(f"Failed to connect to LM Studio: {e}")
-            await self.disconnect()
-            raise
+        self._connection_verified = True
+        logger.debug(f"Connected to LM Studio at {self.config.api_url}")
     
     async def disconnect(self) -> None:
-        """Close connection to LM Studio."""
-        if self.session:
-            await self.session.close()
-            self.session = None
-            self._connection_verified = False
+        """Close connection to LM Studio.
+        
+        Pooled connections belong to the shared transport and stay open.
+        """
+        self._connection_verified = False
     
-    async def _verify_connection(self) -> None:
+    async def _verify_connection(self) -> bool:
         """Verify connection to LM Studio API."""
-        if not self.session:
-            raise RuntimeError("No active session")
-        
         # Try a simple request to verify the API is responding
         test_request = LLMRequest(
             messages=[{"role": "user", "content": "Hello"}],
@@ -96,36 +99,58 @@ class LocalLLMAgent:
         )
         
         try:
-            response = await self._make_request(test_request)
+            response = await self._post_completion(test_request, retries=1)
             if not response.choices:
                 raise RuntimeError("Empty response from LLM API")
+            return True
         except Exception as e:
             raise RuntimeError(f"LLM API verification failed: {e}")
     
     async def _make_request(self, request: LLMRequest) -> LLMResponse:
         """Make HTTP request to LM Studio API."""
-        if not self.session or not self._connection_verified:
+        if not self._connection_verified:
             raise RuntimeError("LLM agent not connected")
         
-        url = f"{self.config.api_url}/chat/completions"
-        headers = {"Content-Type": "application/json"}
+        # Retries and repeated evaluations send identical requests
+        prompt = json.dumps(request.messages, ensure_ascii=False)
+        options = {'temperature': request.temperature, 'max_tokens': request.max_tokens}
+        cached = self.response_cache.lookup(request.model, options, prompt, service=ServiceType.LOCAL_LLM.value)
+        if cached is not None:
+            logger.debug(f"Using cached LLM response (similarity={cached.similarity:.2f})")
+            return LLMResponse(**json.loads(cached.response))
         
         try:
-            async with self.session.post(
-                url, 
-                json=request.dict(), 
-                headers=headers
-            ) as response:
-                response.raise_for_status()
-                data = await response.json()
-                return LLMResponse(**data)
+            started = time.time()
+            response = await self._post_completion(request)
+            self.response_cache.store(
+                request.model, options, prompt, response.json(),
+                service=ServiceType.LOCAL_LLM.value,
+                tokens=response.usage.get('total_tokens', 0),
+                latency=time.time() - started
+            )
+            return response
         except aiohttp.ClientError as e:
             logger.error(f"HTTP request failed: {e}")
+            self.transport.invalidate_health(self.health_key)
             raise
         except Exception as e:
             logger.error(f"Unexpected error in LLM request: {e}")
             raise
     
+    async def _post_completion(self, request: LLMRequest, retries: Optional[int] = None) -> LLMResponse:
+        """POST a chat completion through the shared transport."""
+        response = await self.transport.request(
+            "POST",
+            f"{self.config.api_url}/chat/completions",
+            json=request.dict(),
+            headers={"Content-Type": "application/json"},
+            timeout=self.config.timeout,
+            retries=retries
+        )
+        if not response.ok:
+            raise aiohttp.ClientError(f"LM Studio returned {response.status}: {response.text()[:200]}")
+        return LLMResponse(**response.json())
+    
     async def analyze_task(self, task: Task) -> TaskAnalysis:
         """Analyze task and generate execution plan."""
         prompt = self._build_task_analysis_prompt(task)
@@ -12,6 +12,7 @@ from typing import Optional, Dict, Any
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from nocturnal_agent.config.config_manager import ConfigManager
+from nocturnal_agent.llm.response_cache import configure_response_cache
 from nocturnal_agent.log_system.structured_logger import StructuredLogger, LogLevel, LogCategory
 from nocturnal_agent.reporting.report_generator import ReportGenerator
 from nocturnal_agent.scheduler.night_scheduler import NightScheduler
@@ -1106,8 +1107,17 @@ class NocturnalAgentCLI:
             'console_output': self.config.logging.console_output,
             'file_output': self.config.logging.file_output,
             'retention_days': self.config.logging.retention_days,
-            'max_file_size_mb': self.config.logging.max_file_size_mb
+            'max_file_size_mb': self.config.logging.max_file_size_mb,
+            'async_writer': self.config.logging.async_writer,
+            'async_queue_size': self.config.logging.async_queue_size,
+            'async_batch_size': self.config.logging.async_batch_size,
+            'async_flush_interval': self.config.logging.async_flush_interval,
+            'async_backpressure': self.config.logging.async_backpressure,
+            'async_sample_rate': self.config.logging.async_sample_rate
         })
+        
+        # LLM応答キャッシュ（ワークスペース配下に作成し、llm_cache.enabled で無効化できる）
+        configure_response_cache(self.config.llm_cache.__dict__, self.config.workspace_path)
 
     def _get_current_project_info(self) -> Dict[str, str]:
         """カレントディレクトリから対象プロジェクト情報を取得"""
@@ -2678,8 +2688,7 @@ nocturnal report daily
                             print(f"⚠️ 依存タスクIDが見つかりません（スキップ）: {dep_id}")
                     
                     # タスクの依存関係を更新
-                    if task_id in task_manager.tasks:
-                        task_manager.tasks[task_id].dependencies = valid_dependencies
+                    task_manager.set_task_dependencies(task_id, valid_dependencies)
             
             print(f"✅ {len(created_task_ids)}個のタスクを登録・承認完了")
             
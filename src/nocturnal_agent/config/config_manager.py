@@ -160,6 +160,35 @@ class LoggingConfig:
     retention_days: int = 30
     console_output: bool = True
     file_output: bool = True
+    async_writer: bool = False  # ログ書き込みを専用スレッドで行う
+    async_queue_size: int = 10000
+    async_batch_size: int = 256
+    async_flush_interval: float = 0.5
+    async_backpressure: str = "block"  # block, drop_debug, sample
+    async_sample_rate: float = 0.1
+
+
+@dataclass
+class LLMCacheConfig:
+    """LLM応答キャッシュ設定"""
+    enabled: bool = True
+    storage_path: str = ".nocturnal/llm_cache"  # 相対パスはワークスペース基準
+    max_entries: int = 2000
+    max_bytes: int = 64 * 1024 * 1024
+    ttl_seconds: int = 7 * 24 * 3600
+    near_duplicate: bool = False
+    near_duplicate_threshold: float = 0.9
+
+
+@dataclass
+class DesignSyncConfig:
+    """設計書同期設定"""
+    auto_sync_enabled: bool = False
+    auto_sync_on_immediate: bool = True
+    auto_sync_on_nightly: bool = True
+    auto_sync_on_scheduled: bool = True
+    create_backup: bool = True
+    quiet_mode: bool = False
 
 
 @dataclass
@@ -186,6 +215,7 @@ class NocturnalConfig:
     scheduler: SchedulerConfig = None
     obsidian: ObsidianConfig = None
     design_sync: DesignSyncConfig = None
+    llm_cache: LLMCacheConfig = None
     
     # 高度な設定
     debug_mode: bool = False
@@ -222,6 +252,8 @@ class NocturnalConfig:
             self.scheduler = SchedulerConfig()
         if self.obsidian is None:
             self.obsidian = ObsidianConfig()
+        if self.llm_cache is None:
+            self.llm_cache = LLMCacheConfig()
 
 
 class ConfigManager:
@@ -456,6 +488,7 @@ class ConfigManager:
             scheduler_config = self._safe_create_config(SchedulerConfig, config_dict.get('scheduler', {}))
             obsidian_config = self._safe_create_config(ObsidianConfig, config_dict.get('obsidian', {}))
             design_sync_config = self._safe_create_config(DesignSyncConfig, config_dict.get('design_sync', {}))
+            llm_cache_config = self._safe_create_config(LLMCacheConfig, config_dict.get('llm_cache', {}))
             
             # メイン設定の作成（新形式の追加フィールドは無視）
             excluded_keys = {
@@ -463,7 +496,7 @@ class ConfigManager:
                 'parallel_execution', 'parallel', 'logging', 'execution', 'quality', 
                 'notifications', 'integrations', 'development', 'advanced',
                 'project_specific', 'project_type', 'created_at', 'llm',
-                'scheduler', 'obsidian', 'design_sync'
+                'scheduler', 'obsidian', 'design_sync', 'llm_cache'
             }
             main_config = {k: v for k, v in config_dict.items() if k not in excluded_keys}
             
@@ -479,6 +512,7 @@ class ConfigManager:
                 scheduler=scheduler_config,
                 obsidian=obsidian_config,
                 design_sync=design_sync_config,
+                llm_cache=llm_cache_config,
                 **main_config
             )
             
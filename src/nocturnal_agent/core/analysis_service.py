@@ -0,0 +1,274 @@
+"""Process pool for CPU-bound code analysis.
+
+AST parsing, pattern extraction and regex scans over generated code are
+pure CPU work. Run inside coroutines they hold the event loop for as long
+as they take, so one large generated file stalls the scheduler. This
+module runs them in a shared pool of warm worker processes instead.
+
+Jobs are a module-level function plus an ``AnalysisRequest``. Both are
+pickled to the worker, and the function's ``AnalysisResponse`` comes back
+the same way. Inputs smaller than ``min_offload_chars`` run inline,
+because for them the round trip costs more than the analysis.
+"""
+
+import asyncio
+import atexit
+import concurrent.futures
+import importlib
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+# Imported by every worker up front so the first real job does not pay for it
+DEFAULT_PRELOAD_MODULES = (
+    'nocturnal_agent.engines.pattern_extractor',
+    'nocturnal_agent.engines.quality_evaluator',
+    'nocturnal_agent.safety.danger_detector',
+)
+
+
+@dataclass
+class AnalysisRequest:
+    """Input of one analysis job. Must stay picklable."""
+    code: str
+    file_path: Optional[str] = None
+    options: Dict[str, Any] = field(default_factory=dict)
+    # Characters the job will process when it reads its input itself
+    input_size: Optional[int] = None
+
+
+@dataclass
+class AnalysisResponse:
+    """Outcome of one analysis job."""
+    ok: bool
+    result: Any = None
+    error: Optional[str] = None
+    duration_seconds: float = 0.0
+    worker_pid: Optional[int] = None
+    offloaded: bool = False
+
+
+def _execute(func: Callable[[AnalysisRequest], Any], request: AnalysisRequest) -> AnalysisResponse:
+    """Run a job and capture its result or error."""
+    started = time.perf_counter()
+    try:
+        result = func(request)
+        return AnalysisResponse(ok=True, result=result, duration_seconds=time.perf_counter() - started,
+                                worker_pid=os.getpid())
+    except Exception as e:
+        return AnalysisResponse(ok=False, error=f"{type(e).__name__}: {e}",
+                                duration_seconds=time.perf_counter() - started, worker_pid=os.getpid())
+
+
+def _warm_up(modules: List[str]) -> int:
+    """Import the analysis modules in a worker."""
+    for module in modules:
+        importlib.import_module(module)
+    return os.getpid()
+
+
+class AnalysisService:
+    """Runs analysis jobs off the event loop in a warm process pool.
+
+    Each job has a timeout. A job that runs past it cannot be interrupted
+    inside its worker, so the pool is torn down and recreated. Other jobs
+    that were running in it are resubmitted once. Cancelling the awaiting
+    coroutine drops a job that has not started; a job that already
+    started finishes in the background and its result is discarded.
+
+    If worker processes cannot be started, jobs run inline as before.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """Initialize the service. Workers start on first use or via start().
+
+        Args:
+            config: Service configuration
+        """
+        config = config or {}
+        self.enabled = config.get('enabled', True)
+        self.max_workers = config.get('max_workers') or os.cpu_count() or 1
+        self.job_timeout = config.get('job_timeout_seconds', 120.0)
+        self.min_offload_chars = config.get('min_offload_chars', 4096)
+        self.preload_modules = list(config.get('preload_modules', DEFAULT_PRELOAD_MODULES))
+        available = multiprocessing.get_all_start_methods()
+        self.start_method = config.get('start_method', 'forkserver' if 'forkserver' in available else 'spawn')
+
+        self._pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._start_failed = False
+
+        self.stats = {
+            'offloaded_jobs': 0,
+            'inline_jobs': 0,
+            'failed_jobs': 0,
+            'timeouts': 0,
+            'cancelled_jobs': 0,
+            'pool_restarts': 0,
+            'worker_seconds': 0.0,
+        }
+
+    def start(self) -> bool:
+        """Start and warm the worker pool.
+
+        Blocks until every worker has imported the analysis modules.
+
+        Returns:
+            True if workers are available
+        """
+        return self._ensure_pool() is not None
+
+    def _ensure_pool(self) -> Optional[concurrent.futures.ProcessPoolExecutor]:
+        """Get the pool, creating and warming it if needed."""
+        with self._lock:
+            if self._pool is not None:
+                return self._pool
+            if not self.enabled or self._start_failed:
+                return None
+
+            try:
+                context = multiprocessing.get_context(self.start_method)
+                if self.start_method == 'forkserver':
+                    context.set_forkserver_preload(self.preload_modules)
+                pool = concurrent.futures.ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+                warm_ups = [pool.submit(_warm_up, self.preload_modules) for _ in range(self.max_workers)]
+                pids = {future.result(timeout=60) for future in warm_ups}
+            except Exception as e:
+                logger.warning(f"Analysis workers unavailable, running analysis inline: {e}")
+                self._start_failed = True
+                return None
+
+            logger.info(f"Analysis service started {len(pids)} workers ({self.start_method})")
+            self._pool = pool
+            return pool
+
+    def _restart(self, pool: concurrent.futures.ProcessPoolExecutor):
+        """Tear down a pool with stuck or dead workers."""
+        with self._lock:
+            if self._pool is not pool:
+                return  # already replaced
+            self._pool = None
+            self.stats['pool_restarts'] += 1
+
+        # ProcessPoolExecutor has no public way to stop a running job
+        for process in list(getattr(pool, '_processes', {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def should_offload(self, request: AnalysisRequest) -> bool:
+        """Whether a request is large enough to be worth a worker round trip."""
+        size = len(request.code) if request.input_size is None else request.input_size
+        return self.enabled and not self._start_failed and size >= self.min_offload_chars
+
+    async def run(self, func: Callable[[AnalysisRequest], Any], request: AnalysisRequest,
+                  timeout: Optional[float] = None) -> AnalysisResponse:
+        """Run a job and wait for its response.
+
+        Args:
+            func: Module-level function taking the request
+            request: Job input
+            timeout: Seconds before the job is abandoned (default: job_timeout_seconds)
+
+        Returns:
+            Job response; failures and timeouts are reported in it, not raised
+        """
+        if not self.should_offload(request):
+            return self._run_inline(func, request)
+
+        loop = asyncio.get_running_loop()
+        pool = self._pool or await loop.run_in_executor(None, self._ensure_pool)
+        if pool is None:
+            return self._run_inline(func, request)
+
+        timeout = self.job_timeout if timeout is None else timeout
+        for attempt in range(2):
+            try:
+                future = pool.submit(_execute, func, request)
+                response = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+            except asyncio.TimeoutError:
+                self.stats['timeouts'] += 1
+                self.stats['failed_jobs'] += 1
+                logger.warning(f"Analysis of {request.file_path or 'code'} timed out after {timeout}s")
+                self._restart(pool)
+                return AnalysisResponse(ok=False, error=f"timed out after {timeout}s", offloaded=True)
+            except asyncio.CancelledError:
+                self.stats['cancelled_jobs'] += 1
+                raise
+            except (BrokenProcessPool, RuntimeError) as e:
+                # Another job's timeout restarted the pool under this one
+                self._restart(pool)
+                pool = await loop.run_in_executor(None, self._ensure_pool)
+                if pool is None or attempt == 1:
+                    self.stats['failed_jobs'] += 1
+                    return AnalysisResponse(ok=False, error=f"worker pool failed: {e}", offloaded=True)
+                continue
+
+            response.offloaded = True
+            self.stats['offloaded_jobs'] += 1
+            self.stats['worker_seconds'] += response.duration_seconds
+            if not response.ok:
+                self.stats['failed_jobs'] += 1
+            return response
+
+    def _run_inline(self, func: Callable[[AnalysisRequest], Any], request: AnalysisRequest) -> AnalysisResponse:
+        """Run a job on the calling thread."""
+        self.stats['inline_jobs'] += 1
+        response = _execute(func, request)
+        if not response.ok:
+            self.stats['failed_jobs'] += 1
+        return response
+
+    def shutdown(self):
+        """Stop the worker pool."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get pool state and job counters."""
+        return {
+            'enabled': self.enabled and not self._start_failed,
+            'running': self._pool is not None,
+            'max_workers': self.max_workers,
+            'start_method': self.start_method,
+            'min_offload_chars': self.min_offload_chars,
+            'statistics': dict(self.stats),
+        }
+
+
+_shared_service: Optional[AnalysisService] = None
+_shared_lock = threading.Lock()
+
+
+def get_analysis_service(config: Optional[Dict[str, Any]] = None) -> AnalysisService:
+    """Get the process-wide analysis service, creating it on first call.
+
+    Args:
+        config: Configuration used if the service does not exist yet
+    """
+    global _shared_service
+    with _shared_lock:
+        if _shared_service is None:
+            _shared_service = AnalysisService(config)
+        return _shared_service
+
+
+def shutdown_analysis_service():
+    """Stop the process-wide analysis service."""
+    global _shared_service
+    with _shared_lock:
+        service, _shared_service = _shared_service, None
+    if service is not None:
+        service.shutdown()
+
+
+atexit.register(shutdown_analysis_service)
@@ -207,6 +207,10 @@ class ExecutionResult:
     api_calls_made: int = 0
     cost_incurred: float = 0.0
     
+    # Resource accounting of the agent processes (None when not measured)
+    cpu_seconds: Optional[float] = None
+    peak_memory_mb: Optional[float] = None
+    
     created_at: datetime = field(default_factory=datetime.now)
 
 
@@ -73,6 +73,16 @@ class CostManager:
             'alerts_sent': 0
         }
         
+        # LLM応答キャッシュの集計
+        self.llm_cache_stats = {
+            'hits': 0,
+            'near_duplicate_hits': 0,
+            'misses': 0,
+            'saved_cost': 0.0,
+            'saved_seconds': 0.0,
+            'saved_tokens': 0
+        }
+        
         # アラートコールバックを設定
         if self.alert_enabled:
             self.usage_tracker.add_alert_callback(self._handle_usage_alert)
@@ -162,6 +172,45 @@ class CostManager:
             logger.error(f"実行結果記録エラー: {e}")
             return False
     
+    def attach_response_cache(self, cache) -> None:
+        """
+        LLM応答キャッシュのヒット・ミスを集計対象にする
+        
+        Args:
+            cache: LLMResponseCache
+        """
+        cache.add_listener(self.record_cache_event)
+    
+    def record_cache_event(self, event: Dict[str, Any]) -> None:
+        """
+        LLM応答キャッシュのイベントを記録
+        
+        ヒット時は元の呼び出しのトークン数をコスト最適化の単価で換算し、
+        節約額として計上する（無料ツールは0）。
+        
+        Args:
+            event: キャッシュイベント（event, service, saved_tokens, saved_seconds）
+        """
+        kind = event.get('event')
+        if kind == 'miss':
+            self.llm_cache_stats['misses'] += 1
+            return
+        
+        self.llm_cache_stats['near_duplicate_hits' if kind == 'near_duplicate_hit' else 'hits'] += 1
+        tokens = event.get('saved_tokens', 0)
+        saved_cost = 0.0
+        if event.get('service') not in self.usage_tracker.free_tools:
+            try:
+                service = ServiceType(event.get('service'))
+            except ValueError:
+                service = ServiceType.OTHER
+            saved_cost = self.cost_optimizer._estimate_api_cost(service, {'estimated_tokens': tokens})
+        
+        self.llm_cache_stats['saved_tokens'] += tokens
+        self.llm_cache_stats['saved_seconds'] += event.get('saved_seconds', 0.0)
+        self.llm_cache_stats['saved_cost'] += saved_cost
+        self.manager_stats['cost_savings_achieved'] += saved_cost
+    
     def get_cost_dashboard(self) -> Dict[str, Any]:
         """コスト管理ダッシュボード情報を取得"""
         budget_status = self.usage_tracker.get_budget_status()
@@ -204,6 +253,10 @@ class CostManager:
                 'free_tool_selections': optimizer_status['optimization_statistics']['free_tool_selections'],
                 'paid_tool_selections': optimizer_status['optimization_statistics']['paid_tool_selections']
             },
+            'llm_cache': {
+                **self.llm_cache_stats,
+                'hit_rate': self._calculate_cache_hit_rate()
+            },
             'recommendations': recommendations,
             'system_status': {
                 'cost_management_active': self.cost_management_active,
@@ -246,7 +299,7 @@ class CostManager:
             # サービス効率性分析
             for service, cost in service_breakdown.items():
                 requests = sum(
-                    len([r for r in day.records if r.service_type.value == service])
+                    day.service_requests.get(service, 0)
                     for day in usage_data.values()
                 )
                 analysis['service_efficiency'][service] = {
@@ -434,6 +487,12 @@ class CostManager:
             'recommendations': ['エラーによりローカルLLMにフォールバック']
         }
     
+    def _calculate_cache_hit_rate(self) -> float:
+        """LLM応答キャッシュのヒット率"""
+        hits = self.llm_cache_stats['hits'] + self.llm_cache_stats['near_duplicate_hits']
+        lookups = hits + self.llm_cache_stats['misses']
+        return hits / lookups if lookups else 0.0
+    
     def _calculate_cost_trend(self, costs: List[float]) -> str:
         """コストトレンドを計算"""
         if len(costs) < 7:
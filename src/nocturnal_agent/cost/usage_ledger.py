@@ -0,0 +1,140 @@
+"""使用量レコードの追記専用台帳"""
+
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Any, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class UsageLedger:
+    """月単位のセグメントファイルに使用量を追記する台帳
+
+    1行1レコードで、列順を固定したJSON配列として書き込む。各レコードは
+    書き込み直後にOSへフラッシュされるためプロセスのクラッシュでは失われない。
+    fsyncは一定件数または一定時間ごとにまとめて行う。
+    """
+
+    def __init__(self, directory: Path, fsync_interval: int = 32, fsync_seconds: float = 1.0):
+        """
+        台帳を初期化
+
+        Args:
+            directory: セグメントファイルの保存ディレクトリ
+            fsync_interval: fsyncまでの最大レコード数
+            fsync_seconds: fsyncまでの最大経過秒数
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.fsync_interval = max(1, fsync_interval)
+        self.fsync_seconds = fsync_seconds
+
+        self._segment: Optional[str] = None
+        self._handle: Optional[IO[bytes]] = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    @staticmethod
+    def segment_name(timestamp: datetime) -> str:
+        """レコードを格納するセグメント名を取得"""
+        return f"usage_{timestamp.year}_{timestamp.month:02d}.ledger"
+
+    def segments(self) -> List[str]:
+        """既存セグメントを時系列順に取得"""
+        return sorted(path.name for path in self.directory.glob("usage_*.ledger"))
+
+    def segment_size(self, segment: str) -> int:
+        """セグメントのバイト数を取得"""
+        path = self.directory / segment
+        return path.stat().st_size if path.exists() else 0
+
+    def append(self, timestamp: datetime, row: List[Any]) -> Tuple[str, int, int]:
+        """
+        レコードを追記
+
+        Args:
+            timestamp: セグメントを決めるレコードの時刻
+            row: 列順に並べたレコードの値
+
+        Returns:
+            (セグメント名, 開始オフセット, 終了オフセット)
+        """
+        segment = self.segment_name(timestamp)
+        if segment != self._segment:
+            self._open_segment(segment)
+
+        data = (json.dumps(row, ensure_ascii=False, default=str) + '\n').encode('utf-8')
+        start = self._handle.tell()
+        self._handle.write(data)
+        self._handle.flush()
+        self._unsynced += 1
+
+        if (self._unsynced >= self.fsync_interval or
+                time.monotonic() - self._last_sync >= self.fsync_seconds):
+            self.sync()
+
+        return segment, start, start + len(data)
+
+    def _open_segment(self, segment: str):
+        """追記先セグメントを切り替え"""
+        self.sync()
+        if self._handle is not None:
+            self._handle.close()
+        self._handle = open(self.directory / segment, 'ab')
+        self._segment = segment
+
+    def sync(self):
+        """未同期のレコードをディスクに書き込む"""
+        if self._handle is not None and self._unsynced:
+            self._handle.flush()
+            os.fsync(self._handle.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def read(self, segment: str, start: int, end: int) -> List[List[Any]]:
+        """セグメントのバイト範囲からレコードを読み込み"""
+        with open(self.directory / segment, 'rb') as f:
+            f.seek(start)
+            data = f.read(end - start)
+        return [json.loads(line) for line in data.splitlines() if line]
+
+    def scan(self, segment: str, start: int = 0) -> Iterator[Tuple[List[Any], int, int]]:
+        """
+        セグメントを先頭（または指定オフセット）から走査
+
+        書き込み途中で途切れた末尾の行は切り詰める。
+
+        Yields:
+            (レコード, 開始オフセット, 終了オフセット)
+        """
+        path = self.directory / segment
+        offset = start
+        with open(path, 'rb') as f:
+            f.seek(start)
+            for line in f:
+                end = offset + len(line)
+                try:
+                    if not line.endswith(b'\n'):
+                        raise ValueError("incomplete row")
+                    row = json.loads(line)
+                except ValueError as e:
+                    logger.warning(f"台帳の破損行を切り詰め ({segment}@{offset}): {e}")
+                    break
+                yield row, offset, end
+                offset = end
+
+        if offset < path.stat().st_size:
+            with open(path, 'r+b') as f:
+                f.truncate(offset)
+
+    def close(self):
+        """台帳を閉じる"""
+        self.sync()
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+            self._segment = None
@@ -1,13 +1,18 @@
 """使用量追跡機能の実装"""
 
+import asyncio
+import bisect
 import json
 import logging
+import os
 from datetime import datetime, date, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional, Any, Tuple
+from dataclasses import dataclass, field, replace
 from enum import Enum
 
+from nocturnal_agent.cost.usage_ledger import UsageLedger
+
 logger = logging.getLogger(__name__)
 
 
@@ -44,6 +49,7 @@ class DayUsage:
     total_requests: int = 0
     service_breakdown: Dict[str, float] = field(default_factory=dict)
     operation_breakdown: Dict[str, float] = field(default_factory=dict)
+    service_requests: Dict[str, int] = field(default_factory=dict)
     records: List[UsageRecord] = field(default_factory=list)
 
 
@@ -57,10 +63,15 @@ class MonthUsage:
     total_requests: int = 0
     daily_usage: Dict[str, DayUsage] = field(default_factory=dict)
     service_breakdown: Dict[str, float] = field(default_factory=dict)
+    operation_breakdown: Dict[str, float] = field(default_factory=dict)
+    service_requests: Dict[str, int] = field(default_factory=dict)
     free_tool_usage_rate: float = 0.0
     budget_utilization: float = 0.0
 
 
+INDEX_VERSION = 1
+
+
 class UsageTracker:
     """使用量追跡システム"""
     
@@ -74,6 +85,9 @@ class UsageTracker:
                 - monthly_budget: 月額予算（USD）
                 - alert_thresholds: アラート閾値
                 - free_tools: 無料ツールリスト
+                - ledger_fsync_interval: 台帳をfsyncするまでの最大レコード数
+                - ledger_fsync_seconds: 台帳をfsyncするまでの最大経過秒数
+                - index_checkpoint_interval: 集計インデックスを保存する間隔（レコード数）
         """
         self.storage_path = Path(config.get('storage_path', './data/usage'))
         self.monthly_budget = config.get('monthly_budget', 10.0)  # デフォルト$10
@@ -86,9 +100,21 @@ class UsageTracker:
         # データ保存パスを作成
         self.storage_path.mkdir(parents=True, exist_ok=True)
         
-        # 現在の使用量キャッシュ
-        self.current_month_cache: Optional[MonthUsage] = None
-        self.current_day_cache: Optional[DayUsage] = None
+        # 追記専用の使用量台帳（1呼び出し1行、fsyncはまとめて実行）
+        self.ledger = UsageLedger(
+            self.storage_path / 'ledger',
+            fsync_interval=config.get('ledger_fsync_interval', 32),
+            fsync_seconds=config.get('ledger_fsync_seconds', 1.0)
+        )
+        
+        # 日次・月次の集計インデックス（台帳から再構築可能）
+        self.index_file = self.storage_path / 'usage_index.json'
+        self.checkpoint_interval = config.get('index_checkpoint_interval', 1000)
+        self.daily_usage: Dict[date, DayUsage] = {}
+        self.monthly_usage: Dict[Tuple[int, int], MonthUsage] = {}
+        self._sorted_dates: List[date] = []
+        self._day_ranges: Dict[date, List[List[Any]]] = {}  # 日付 -> [[セグメント, 開始, 終了], ...]
+        self._records_since_checkpoint = 0
         
         # アラートコールバック
         self.alert_callbacks: List[callable] = []
@@ -100,6 +126,8 @@ class UsageTracker:
             'alerts_sent': 0,
             'last_alert_time': None
         }
+        
+        self._load_usage()
     
     def record_usage(self, 
                     service_type: ServiceType,
@@ -139,50 +167,19 @@ class UsageTracker:
                 metadata=metadata or {}
             )
             
-            # 日次使用量を更新
-            day_usage = self._get_or_create_day_usage(now.date())
-            day_usage.total_cost += cost
-            day_usage.total_tokens += tokens_used
-            day_usage.total_requests += 1
-            day_usage.records.append(record)
-            
-            # サービス別内訳を更新
-            service_name = service_type.value
-            day_usage.service_breakdown[service_name] = (
-                day_usage.service_breakdown.get(service_name, 0.0) + cost
-            )
-            
-            # 操作別内訳を更新
-            day_usage.operation_breakdown[operation_type] = (
-                day_usage.operation_breakdown.get(operation_type, 0.0) + cost
-            )
-            
-            # 月次使用量を更新
-            month_usage = self._get_or_create_month_usage(now.year, now.month)
-            month_usage.total_cost += cost
-            month_usage.total_tokens += tokens_used
-            month_usage.total_requests += 1
-            month_usage.daily_usage[str(now.date())] = day_usage
-            
-            # 月次サービス別内訳を更新
-            month_usage.service_breakdown[service_name] = (
-                month_usage.service_breakdown.get(service_name, 0.0) + cost
-            )
-            
-            # 無料ツール使用率を更新
-            month_usage.free_tool_usage_rate = self._calculate_free_tool_rate(month_usage)
-            
-            # 予算使用率を更新
-            month_usage.budget_utilization = month_usage.total_cost / self.monthly_budget
-            
-            # データを保存
-            self._save_day_usage(day_usage)
-            self._save_month_usage(month_usage)
+            # 台帳に追記し、集計を更新
+            location = self.ledger.append(now, _record_to_row(record))
+            month_usage = self._apply_record(record, location)
             
             # 統計を更新
             self.tracker_stats['total_records'] += 1
             self.tracker_stats['total_cost_tracked'] += cost
             
+            # 集計インデックスを定期的に保存
+            self._records_since_checkpoint += 1
+            if self._records_since_checkpoint >= self.checkpoint_interval:
+                self._save_index()
+            
             # 予算アラートをチェック
             self._check_budget_alerts(month_usage)
             
@@ -200,32 +197,46 @@ class UsageTracker:
     
     def get_current_day_usage(self) -> DayUsage:
         """現在の日の使用量を取得"""
-        return self._get_or_create_day_usage(date.today())
+        today = date.today()
+        return self.daily_usage.get(today) or DayUsage(date=today)
     
-    def get_usage_by_date_range(self, start_date: date, end_date: date) -> Dict[str, DayUsage]:
-        """日付範囲の使用量を取得"""
+    def get_usage_by_date_range(self, start_date: date, end_date: date,
+                                include_records: bool = False) -> Dict[str, DayUsage]:
+        """
+        日付範囲の使用量を取得
+        
+        Args:
+            start_date: 開始日
+            end_date: 終了日（含む）
+            include_records: 台帳から個別レコードも読み込むか
+            
+        Returns:
+            日付文字列 -> 日次使用量
+        """
         usage_data = {}
-        current_date = start_date
         
-        while current_date <= end_date:
-            try:
-                day_usage = self._load_day_usage(current_date)
-                if day_usage:
-                    usage_data[str(current_date)] = day_usage
-            except Exception as e:
-                logger.warning(f"日次データ読込エラー ({current_date}): {e}")
+        for day in self._dates_in_range(start_date, end_date):
+            day_usage = self.daily_usage[day]
+            records = []
+            if include_records:
+                try:
+                    records = self._read_day_records(day)
+                except Exception as e:
+                    logger.warning(f"日次データ読込エラー ({day}): {e}")
             
-            current_date += timedelta(days=1)
+            usage_data[str(day)] = replace(
+                day_usage,
+                service_breakdown=dict(day_usage.service_breakdown),
+                operation_breakdown=dict(day_usage.operation_breakdown),
+                service_requests=dict(day_usage.service_requests),
+                records=records
+            )
         
         return usage_data
     
     def get_monthly_report(self, year: int, month: int) -> Optional[MonthUsage]:
         """月次レポートを取得"""
-        try:
-            return self._load_month_usage(year, month)
-        except Exception as e:
-            logger.error(f"月次レポート取得エラー ({year}-{month:02d}): {e}")
-            return None
+        return self.monthly_usage.get((year, month))
     
     def get_budget_status(self) -> Dict[str, Any]:
         """予算状況を取得"""
@@ -258,11 +269,10 @@ class UsageTracker:
         end_date = date.today()
         start_date = end_date - timedelta(days=days)
         
-        usage_data = self.get_usage_by_date_range(start_date, end_date)
         service_totals = {}
         
-        for day_usage in usage_data.values():
-            for service, cost in day_usage.service_breakdown.items():
+        for day in self._dates_in_range(start_date, end_date):
+            for service, cost in self.daily_usage[day].service_breakdown.items():
                 service_totals[service] = service_totals.get(service, 0.0) + cost
         
         return service_totals
@@ -272,8 +282,6 @@ class UsageTracker:
         end_date = date.today()
         start_date = end_date - timedelta(days=days)
         
-        usage_data = self.get_usage_by_date_range(start_date, end_date)
-        
         dates = []
         costs = []
         tokens = []
@@ -282,7 +290,7 @@ class UsageTracker:
         current_date = start_date
         while current_date <= end_date:
             dates.append(str(current_date))
-            day_usage = usage_data.get(str(current_date))
+            day_usage = self.daily_usage.get(current_date)
             
             if day_usage:
                 costs.append(day_usage.total_cost)
@@ -302,81 +310,208 @@ class UsageTracker:
             'requests': requests
         }
     
+    def flush(self):
+        """台帳をディスクに同期し、集計インデックスを保存"""
+        self._save_index()
+    
+    def close(self):
+        """台帳を閉じる"""
+        self._save_index()
+        self.ledger.close()
+    
+    def _dates_in_range(self, start_date: date, end_date: date) -> List[date]:
+        """使用量のある日付を範囲検索"""
+        lo = bisect.bisect_left(self._sorted_dates, start_date)
+        hi = bisect.bisect_right(self._sorted_dates, end_date)
+        return self._sorted_dates[lo:hi]
+    
+    def _read_day_records(self, target_date: date) -> List[UsageRecord]:
+        """台帳から指定日のレコードを読み込み"""
+        records = []
+        for segment, start, end in self._day_ranges.get(target_date, []):
+            for row in self.ledger.read(segment, start, end):
+                record = _row_to_record(row)
+                if record.timestamp.date() == target_date:
+                    records.append(record)
+        return records
+    
+    def _get_or_create_month_usage(self, year: int, month: int) -> MonthUsage:
+        """月次使用量データを取得または作成"""
+        month_usage = self.monthly_usage.get((year, month))
+        if month_usage is None:
+            month_usage = MonthUsage(year=year, month=month)
+            self.monthly_usage[(year, month)] = month_usage
+        return month_usage
+    
     def _get_or_create_day_usage(self, target_date: date) -> DayUsage:
         """日次使用量データを取得または作成"""
-        if (self.current_day_cache and 
-            self.current_day_cache.date == target_date):
-            return self.current_day_cache
-        
-        # ディスクから読み込み
-        day_usage = self._load_day_usage(target_date)
+        day_usage = self.daily_usage.get(target_date)
         if day_usage is None:
             day_usage = DayUsage(date=target_date)
-        
-        self.current_day_cache = day_usage
+            self.daily_usage[target_date] = day_usage
+            bisect.insort(self._sorted_dates, target_date)
+            self._get_or_create_month_usage(
+                target_date.year, target_date.month
+            ).daily_usage[str(target_date)] = day_usage
         return day_usage
     
-    def _get_or_create_month_usage(self, year: int, month: int) -> MonthUsage:
-        """月次使用量データを取得または作成"""
-        if (self.current_month_cache and 
-            self.current_month_cache.year == year and
-            self.current_month_cache.month == month):
-            return self.current_month_cache
+    def _apply_record(self, record: UsageRecord, location: Tuple[str, int, int]) -> MonthUsage:
+        """レコードを日次・月次の集計に反映"""
+        target_date = record.timestamp.date()
+        service_name = record.service_type.value
         
-        # ディスクから読み込み
-        month_usage = self._load_month_usage(year, month)
-        if month_usage is None:
-            month_usage = MonthUsage(year=year, month=month)
+        # 日次使用量を更新
+        day_usage = self._get_or_create_day_usage(target_date)
+        _add_to_usage(day_usage, record, service_name)
+        day_usage.operation_breakdown[record.operation_type] = (
+            day_usage.operation_breakdown.get(record.operation_type, 0.0) + record.cost
+        )
+        
+        # 台帳上の位置を記録（同じ日の連続した行は1つの範囲にまとめる）
+        segment, start, end = location
+        ranges = self._day_ranges.setdefault(target_date, [])
+        if ranges and ranges[-1][0] == segment and ranges[-1][2] == start:
+            ranges[-1][2] = end
+        else:
+            ranges.append([segment, start, end])
+        
+        # 月次使用量を更新
+        month_usage = self._get_or_create_month_usage(target_date.year, target_date.month)
+        _add_to_usage(month_usage, record, service_name)
+        month_usage.operation_breakdown[record.operation_type] = (
+            month_usage.operation_breakdown.get(record.operation_type, 0.0) + record.cost
+        )
+        
+        # 無料ツール使用率と予算使用率を更新
+        month_usage.free_tool_usage_rate = self._calculate_free_tool_rate(month_usage)
+        month_usage.budget_utilization = month_usage.total_cost / self.monthly_budget
         
-        self.current_month_cache = month_usage
         return month_usage
     
-    def _save_day_usage(self, day_usage: DayUsage):
-        """日次使用量を保存"""
-        file_path = self.storage_path / f"daily_{day_usage.date}.json"
+    def _load_usage(self):
+        """集計インデックスを読み込み、未反映の台帳レコードを適用"""
+        applied = self._load_index()
+        segments = self.ledger.segments()
+        
+        if not applied and not segments:
+            self._import_legacy_usage()
+            return
+        
+        # インデックスが台帳より新しい場合（台帳の切り詰め等）は全件から再構築
+        if any(self.ledger.segment_size(segment) < offset for segment, offset in applied.items()):
+            logger.warning("使用量インデックスが台帳と一致しないため再構築します")
+            self._reset_aggregates()
+            applied = {}
+        
+        replayed = 0
+        for segment in segments:
+            for row, start, end in self.ledger.scan(segment, applied.get(segment, 0)):
+                self._apply_record(_row_to_record(row), (segment, start, end))
+                replayed += 1
+        
+        if replayed:
+            logger.debug(f"台帳から{replayed}件の使用量を反映")
+            self._save_index()
+    
+    def _reset_aggregates(self):
+        """集計をすべて破棄"""
+        self.daily_usage.clear()
+        self.monthly_usage.clear()
+        self._sorted_dates.clear()
+        self._day_ranges.clear()
+    
+    def _load_index(self) -> Dict[str, int]:
+        """
+        集計インデックスを読み込み
+        
+        Returns:
+            セグメント名 -> 反映済みのバイト数
+        """
+        if not self.index_file.exists():
+            return {}
+        
         try:
-            # UsageRecordのserializationのためにdatetimeを文字列に変換
-            data = asdict(day_usage)
-            data['records'] = []
-            for record in day_usage.records:
-                record_data = asdict(record)
-                record_data['timestamp'] = record.timestamp.isoformat()
-                record_data['service_type'] = record.service_type.value
-                data['records'].append(record_data)
-            data['date'] = str(day_usage.date)
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != INDEX_VERSION:
+                return {}
+            
+            for date_str, day_data in data['days'].items():
+                day_usage = self._get_or_create_day_usage(datetime.strptime(date_str, '%Y-%m-%d').date())
+                day_usage.total_cost = day_data['total_cost']
+                day_usage.total_tokens = day_data['total_tokens']
+                day_usage.total_requests = day_data['total_requests']
+                day_usage.service_breakdown = day_data['service_breakdown']
+                day_usage.operation_breakdown = day_data['operation_breakdown']
+                day_usage.service_requests = day_data['service_requests']
+                self._day_ranges[day_usage.date] = day_data['ranges']
+            
+            # 月次集計は日次集計から導出
+            for month_usage in self.monthly_usage.values():
+                for day_usage in month_usage.daily_usage.values():
+                    _merge_usage(month_usage, day_usage)
+                month_usage.free_tool_usage_rate = self._calculate_free_tool_rate(month_usage)
+                month_usage.budget_utilization = month_usage.total_cost / self.monthly_budget
+            
+            return data['segments']
             
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-                
         except Exception as e:
-            logger.error(f"日次データ保存エラー: {e}")
+            logger.error(f"使用量インデックス読み込みエラー: {e}")
+            self._reset_aggregates()
+            return {}
     
-    def _save_month_usage(self, month_usage: MonthUsage):
-        """月次使用量を保存"""
-        file_path = self.storage_path / f"monthly_{month_usage.year}_{month_usage.month:02d}.json"
+    def _save_index(self):
+        """台帳を同期してから集計インデックスを保存"""
         try:
-            data = asdict(month_usage)
-            # DayUsageを辞書形式に変換
-            data['daily_usage'] = {}
-            for date_str, day_usage in month_usage.daily_usage.items():
-                day_data = asdict(day_usage)
-                day_data['date'] = str(day_usage.date)
-                day_data['records'] = []  # レコードは日次ファイルに保存されるので省略
-                data['daily_usage'][date_str] = day_data
+            self.ledger.sync()
+            data = {
+                'version': INDEX_VERSION,
+                'segments': {
+                    segment: self.ledger.segment_size(segment) for segment in self.ledger.segments()
+                },
+                'days': {
+                    str(day): {
+                        'total_cost': day_usage.total_cost,
+                        'total_tokens': day_usage.total_tokens,
+                        'total_requests': day_usage.total_requests,
+                        'service_breakdown': day_usage.service_breakdown,
+                        'operation_breakdown': day_usage.operation_breakdown,
+                        'service_requests': day_usage.service_requests,
+                        'ranges': self._day_ranges.get(day, [])
+                    }
+                    for day, day_usage in self.daily_usage.items()
+                }
+            }
+            
+            tmp_file = self.index_file.with_suffix('.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(data, ensure_ascii=False))
+            os.replace(tmp_file, self.index_file)
+            self._records_since_checkpoint = 0
             
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-                
         except Exception as e:
-            logger.error(f"月次データ保存エラー: {e}")
+            logger.error(f"使用量インデックス保存エラー: {e}")
     
-    def _load_day_usage(self, target_date: date) -> Optional[DayUsage]:
-        """日次使用量を読み込み"""
-        file_path = self.storage_path / f"daily_{target_date}.json"
+    def _import_legacy_usage(self):
+        """旧形式の日次JSONファイルを台帳に取り込む"""
+        legacy_files = sorted(self.storage_path.glob("daily_*.json"))
+        if not legacy_files:
+            return
+        
+        records = []
+        for file_path in legacy_files:
+            records.extend(self._load_legacy_day_records(file_path))
+        records.sort(key=lambda record: record.timestamp)
         
-        if not file_path.exists():
-            return None
+        for record in records:
+            location = self.ledger.append(record.timestamp, _record_to_row(record))
+            self._apply_record(record, location)
         
+        self._save_index()
+        logger.info(f"旧形式の使用量データを台帳に取り込み: {len(records)}件")
+    
+    def _load_legacy_day_records(self, file_path: Path) -> List[UsageRecord]:
+        """旧形式の日次JSONファイルからレコードを読み込み"""
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
                 data = json.load(f)
@@ -396,72 +531,21 @@ class UsageTracker:
                     metadata=record_data.get('metadata', {})
                 )
                 records.append(record)
-            
-            return DayUsage(
-                date=datetime.strptime(data['date'], '%Y-%m-%d').date(),
-                total_cost=data['total_cost'],
-                total_tokens=data['total_tokens'],
-                total_requests=data['total_requests'],
-                service_breakdown=data['service_breakdown'],
-                operation_breakdown=data['operation_breakdown'],
-                records=records
-            )
-            
-        except Exception as e:
-            logger.error(f"日次データ読み込みエラー: {e}")
-            return None
-    
-    def _load_month_usage(self, year: int, month: int) -> Optional[MonthUsage]:
-        """月次使用量を読み込み"""
-        file_path = self.storage_path / f"monthly_{year}_{month:02d}.json"
-        
-        if not file_path.exists():
-            return None
-        
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            # DayUsageを復元
-            daily_usage = {}
-            for date_str, day_data in data.get('daily_usage', {}).items():
-                day_usage = DayUsage(
-                    date=datetime.strptime(day_data['date'], '%Y-%m-%d').date(),
-                    total_cost=day_data['total_cost'],
-                    total_tokens=day_data['total_tokens'],
-                    total_requests=day_data['total_requests'],
-                    service_breakdown=day_data['service_breakdown'],
-                    operation_breakdown=day_data['operation_breakdown'],
-                    records=[]  # 詳細レコードは日次ファイルから読み込み
-                )
-                daily_usage[date_str] = day_usage
-            
-            return MonthUsage(
-                year=data['year'],
-                month=data['month'],
-                total_cost=data['total_cost'],
-                total_tokens=data['total_tokens'],
-                total_requests=data['total_requests'],
-                daily_usage=daily_usage,
-                service_breakdown=data['service_breakdown'],
-                free_tool_usage_rate=data['free_tool_usage_rate'],
-                budget_utilization=data['budget_utilization']
-            )
+            return records
             
         except Exception as e:
-            logger.error(f"月次データ読み込みエラー: {e}")
-            return None
+            logger.error(f"日次データ読み込みエラー ({file_path.name}): {e}")
+            return []
     
     def _calculate_free_tool_rate(self, month_usage: MonthUsage) -> float:
         """無料ツール使用率を計算"""
         if month_usage.total_requests == 0:
             return 1.0
         
-        free_requests = 0
-        for day_usage in month_usage.daily_usage.values():
-            for record in day_usage.records:
-                if record.service_type.value in self.free_tools:
-                    free_requests += record.request_count
+        free_requests = sum(
+            count for service, count in month_usage.service_requests.items()
+            if service in self.free_tools
+        )
         
         return free_requests / month_usage.total_requests
     
@@ -528,4 +612,59 @@ class UsageTracker:
             'statistics': self.tracker_stats,
             'alert_thresholds': self.alert_thresholds,
             'free_tools': list(self.free_tools)
-        }
\ No newline at end of file
+        }
+
+
+def _add_to_usage(usage: Any, record: UsageRecord, service_name: str):
+    """日次・月次使用量にレコードの値を加算"""
+    usage.total_cost += record.cost
+    usage.total_tokens += record.tokens_used
+    usage.total_requests += 1
+    usage.service_breakdown[service_name] = usage.service_breakdown.get(service_name, 0.0) + record.cost
+    usage.service_requests[service_name] = usage.service_requests.get(service_name, 0) + record.request_count
+
+
+def _merge_usage(month_usage: MonthUsage, day_usage: DayUsage):
+    """日次使用量を月次使用量に合算"""
+    month_usage.total_cost += day_usage.total_cost
+    month_usage.total_tokens += day_usage.total_tokens
+    month_usage.total_requests += day_usage.total_requests
+    for target, source in (
+        (month_usage.service_breakdown, day_usage.service_breakdown),
+        (month_usage.operation_breakdown, day_usage.operation_breakdown),
+        (month_usage.service_requests, day_usage.service_requests)
+    ):
+        for key, value in source.items():
+            target[key] = target.get(key, 0) + value
+
+
+def _record_to_row(record: UsageRecord) -> List[Any]:
+    """UsageRecordを台帳の列順に並べる"""
+    return [
+        record.timestamp.isoformat(),
+        record.service_type.value,
+        record.operation_type,
+        record.cost,
+        record.tokens_used,
+        record.request_count,
+        record.task_id,
+        record.agent_type,
+        record.metadata or None
+    ]
+
+
+def _row_to_record(row: List[Any]) -> UsageRecord:
+    """台帳の行をUsageRecordに復元"""
+    (timestamp, service_type, operation_type, cost, tokens_used,
+     request_count, task_id, agent_type, metadata) = row
+    return UsageRecord(
+        timestamp=datetime.fromisoformat(timestamp),
+        service_type=ServiceType(service_type),
+        operation_type=operation_type,
+        cost=cost,
+        tokens_used=tokens_used,
+        request_count=request_count,
+        task_id=task_id,
+        agent_type=agent_type,
+        metadata=metadata or {}
+    )
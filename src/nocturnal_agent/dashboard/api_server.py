@@ -19,8 +19,10 @@ from ..execution.implementation_task_manager import (
     ImplementationTaskManager,
     TaskStatus,
     TaskPriority,
-    ImplementationTask
+    ImplementationTask,
+    task_from_record
 )
+from ..execution.task_store import read_legacy_tasks
 from ..log_system.structured_logger import StructuredLogger, LogLevel, LogCategory
 from ..config.config_manager import ConfigManager
 
@@ -130,40 +132,16 @@ class DashboardAPIServer:
             return
         
         try:
-            with open(legacy_tasks_file, 'r', encoding='utf-8') as f:
-                legacy_tasks = json.load(f)
-            
-            # 配列形式のレガシータスクを処理
-            if isinstance(legacy_tasks, list):
-                for task_data in legacy_tasks:
-                    # レガシータスクを新しい形式に変換
-                    task_id = f"legacy_{task_data.get('id', 'unknown')}"
-                    
-                    # 既に存在する場合はスキップ
-                    if task_id in self.task_manager.tasks:
-                        continue
-                    
-                    # 新しいタスク形式に変換
-                    from datetime import datetime
-                    new_task = ImplementationTask(
-                        task_id=task_id,
-                        title=task_data.get('description', 'Legacy Task')[:100],
-                        description=task_data.get('description', ''),
-                        priority=TaskPriority(task_data.get('priority', 'MEDIUM').upper()),
-                        status=TaskStatus(task_data.get('status', 'PENDING').upper()),
-                        dependencies=[],
-                        estimated_hours=task_data.get('estimated_hours', 1.0),
-                        technical_requirements=task_data.get('requirements', []),
-                        acceptance_criteria=[],
-                        created_at=datetime.fromisoformat(task_data.get('created_at', datetime.now().isoformat())),
-                        updated_at=datetime.fromisoformat(task_data.get('created_at', datetime.now().isoformat())),
-                        assigned_to=None
-                    )
-                    
-                    self.task_manager.tasks[task_id] = new_task
+            # 配列形式のレガシータスクを新しい形式に変換（ストアには書き込まない）
+            legacy_records = read_legacy_tasks(legacy_tasks_file)
+            tasks = self.task_manager.tasks
+            for record in legacy_records:
+                # 既に存在する場合（インポート済みを含む）はスキップ
+                if record['task_id'] not in tasks:
+                    tasks[record['task_id']] = task_from_record(record)
             
             self.logger.log(LogLevel.INFO, LogCategory.SYSTEM, 
-                          f"📋 レガシータスクファイルから {len(legacy_tasks) if isinstance(legacy_tasks, list) else 0}個のタスクを読み込み")
+                          f"📋 レガシータスクファイルから {len(legacy_records)}個のタスクを読み込み")
         except Exception as e:
             self.logger.log(LogLevel.WARNING, LogCategory.SYSTEM, 
                           f"レガシータスク読み込みエラー: {e}")
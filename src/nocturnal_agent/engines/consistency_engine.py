@@ -5,10 +5,11 @@ import logging
 import re
 from typing import Any, Dict, List, Optional, Tuple
 
+from nocturnal_agent.core.analysis_service import AnalysisRequest, AnalysisService, get_analysis_service
 from nocturnal_agent.core.models import (
     CodePattern, ConsistencyRule, ConsistencyScore, Violation, Correction, ProjectContext
 )
-from nocturnal_agent.engines.pattern_extractor import PatternExtractor, CodeAnalyzer
+from nocturnal_agent.engines.pattern_extractor import PatternExtractor, CodeAnalyzer, parse_python_source
 
 
 logger = logging.getLogger(__name__)
@@ -17,9 +18,15 @@ logger = logging.getLogger(__name__)
 class ConsistencyChecker:
     """Real-time consistency checker for generated code."""
     
-    def __init__(self, project_context: ProjectContext):
-        """Initialize consistency checker."""
+    def __init__(self, project_context: ProjectContext, analysis_service: Optional[AnalysisService] = None):
+        """Initialize consistency checker.
+        
+        Args:
+            project_context: Project patterns and rules to check against
+            analysis_service: Process pool for parsing and text scans (default: the shared service)
+        """
         self.project_context = project_context
+        self.analysis_service = analysis_service or get_analysis_service()
         self.consistency_threshold = 0.85
         self.cached_violations: Dict[str, List[Violation]] = {}
         
@@ -137,84 +144,54 @@ class ConsistencyChecker:
         """Check Python code consistency using AST analysis."""
         violations = []
         
-        try:
-            tree = ast.parse(code)
-            analyzer = CodeAnalyzer()
-            analyzer.visit(tree)
-            
-            # Check function naming
-            for func_info in analyzer.patterns['functions']:
-                violations.extend(self._check_function_consistency(func_info, file_path))
-            
-            # Check class naming
-            for class_info in analyzer.patterns['classes']:
-                violations.extend(self._check_class_consistency(class_info, file_path))
-            
-            # Check variable naming
-            for var_info in analyzer.patterns['variables']:
-                violations.extend(self._check_variable_consistency(var_info, file_path))
-            
-            # Check documentation
-            violations.extend(self._check_documentation_consistency(analyzer.patterns, file_path))
-            
-        except SyntaxError as e:
+        # Parsing dominates the cost; large files are parsed in an analysis worker
+        response = await self.analysis_service.run(
+            parse_python_source, AnalysisRequest(code=code, file_path=file_path)
+        )
+        if not response.ok:
+            raise RuntimeError(f"Python analysis failed: {response.error}")
+        parsed = response.result
+        
+        if 'syntax_error' in parsed:
+            error = parsed['syntax_error']
             violations.append(Violation(
-                violation_id=f"syntax_error_{hash(str(e))}",
+                violation_id=f"syntax_error_{hash(error['message'])}",
                 rule_id="syntax_error",
                 severity="error",
-                message=f"Syntax error: {e}",
+                message=f"Syntax error: {error['message']}",
                 file_path=file_path or "",
-                line_number=getattr(e, 'lineno', 0)
+                line_number=error['line_number']
             ))
+            return violations
         
-        return violations
-    
-    async def _check_text_consistency(self, code: str, file_path: Optional[str]) -> List[Violation]:
-        """Check consistency using text-based rules."""
-        violations = []
+        patterns = parsed['patterns']
         
-        lines = code.split('\n')
+        # Check function naming
+        for func_info in patterns['functions']:
+            violations.extend(self._check_function_consistency(func_info, file_path))
         
-        for line_num, line in enumerate(lines, 1):
-            # Check for common anti-patterns
-            if re.search(r'\btodo\b|\bfixme\b|\bhack\b', line.lower()):
-                violations.append(Violation(
-                    violation_id=f"todo_comment_{file_path}_{line_num}",
-                    rule_id="no_todo_comments",
-                    severity="info",
-                    message="TODO/FIXME comment found",
-                    file_path=file_path or "",
-                    line_number=line_num,
-                    suggestion="Complete the TODO item or create a proper issue"
-                ))
-            
-            # Check line length (configurable)
-            if len(line) > 100:
-                violations.append(Violation(
-                    violation_id=f"line_length_{file_path}_{line_num}",
-                    rule_id="max_line_length",
-                    severity="info",
-                    message=f"Line too long ({len(line)} characters)",
-                    file_path=file_path or "",
-                    line_number=line_num,
-                    suggestion="Break long line into multiple lines"
-                ))
-            
-            # Check for trailing whitespace
-            if line.endswith(' ') or line.endswith('\t'):
-                violations.append(Violation(
-                    violation_id=f"trailing_whitespace_{file_path}_{line_num}",
-                    rule_id="no_trailing_whitespace",
-                    severity="info",
-                    message="Trailing whitespace found",
-                    file_path=file_path or "",
-                    line_number=line_num,
-                    auto_fixable=True,
-                    suggestion="Remove trailing whitespace"
-                ))
+        # Check class naming
+        for class_info in patterns['classes']:
+            violations.extend(self._check_class_consistency(class_info, file_path))
+        
+        # Check variable naming
+        for var_info in patterns['variables']:
+            violations.extend(self._check_variable_consistency(var_info, file_path))
+        
+        # Check documentation
+        violations.extend(self._check_documentation_consistency(patterns, file_path))
         
         return violations
     
+    async def _check_text_consistency(self, code: str, file_path: Optional[str]) -> List[Violation]:
+        """Check consistency using text-based rules."""
+        response = await self.analysis_service.run(
+            check_text_consistency, AnalysisRequest(code=code, file_path=file_path)
+        )
+        if not response.ok:
+            raise RuntimeError(f"Text consistency check failed: {response.error}")
+        return response.result
+    
     async def _check_pattern_consistency(self, code: str, file_path: Optional[str]) -> List[Violation]:
         """Check consistency against project-specific patterns."""
         violations = []
@@ -555,4 +532,52 @@ class ConsistencyChecker:
                                 for file_path, violations in self.cached_violations.items()}
         }
         
-        return stats
\ No newline at end of file
+        return stats
+
+
+def check_text_consistency(request: AnalysisRequest) -> List[Violation]:
+    """Analysis job: line-based consistency violations of any source."""
+    code, file_path = request.code, request.file_path
+    violations = []
+    
+    lines = code.split('\n')
+    
+    for line_num, line in enumerate(lines, 1):
+        # Check for common anti-patterns
+        if re.search(r'\btodo\b|\bfixme\b|\bhack\b', line.lower()):
+            violations.append(Violation(
+                violation_id=f"todo_comment_{file_path}_{line_num}",
+                rule_id="no_todo_comments",
+                severity="info",
+                message="TODO/FIXME comment found",
+                file_path=file_path or "",
+                line_number=line_num,
+                suggestion="Complete the TODO item or create a proper issue"
+            ))
+    
+        # Check line length (configurable)
+        if len(line) > 100:
+            violations.append(Violation(
+                violation_id=f"line_length_{file_path}_{line_num}",
+                rule_id="max_line_length",
+                severity="info",
+                message=f"Line too long ({len(line)} characters)",
+                file_path=file_path or "",
+                line_number=line_num,
+                suggestion="Break long line into multiple lines"
+            ))
+    
+        # Check for trailing whitespace
+        if line.endswith(' ') or line.endswith('\t'):
+            violations.append(Violation(
+                violation_id=f"trailing_whitespace_{file_path}_{line_num}",
+                rule_id="no_trailing_whitespace",
+                severity="info",
+                message="Trailing whitespace found",
+                file_path=file_path or "",
+                line_number=line_num,
+                auto_fixable=True,
+                suggestion="Remove trailing whitespace"
+            ))
+    
+    return violations
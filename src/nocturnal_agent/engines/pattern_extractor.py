@@ -1,17 +1,31 @@
 """Code pattern extraction engine for consistency analysis."""
 
 import ast
+import asyncio
+import hashlib
+import json
 import logging
+import os
 import re
+import stat
+import time
 from collections import Counter, defaultdict
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Set, Tuple
 
+from nocturnal_agent.core.analysis_service import AnalysisRequest, AnalysisService, get_analysis_service
 from nocturnal_agent.core.models import CodePattern, ConsistencyRule, ProjectContext
 
 
 logger = logging.getLogger(__name__)
 
+# Bump when extraction output changes so cached per-file patterns are dropped
+PATTERN_CACHE_VERSION = 1
+
+# Files modified this recently may change again within the same mtime tick,
+# so their stat is not trusted on the next run (same window as FileStateCache)
+_RACY_WINDOW_NS = 2_000_000_000
+
 
 class CodeAnalyzer(ast.NodeVisitor):
     """AST-based code analyzer for extracting patterns."""
@@ -183,8 +197,13 @@ class CodeAnalyzer(ast.NodeVisitor):
 class PatternExtractor:
     """Extracts code patterns from codebases."""
     
-    def __init__(self):
-        """Initialize pattern extractor."""
+    def __init__(self, analysis_service: Optional[AnalysisService] = None):
+        """Initialize pattern extractor.
+        
+        Args:
+            analysis_service: Process pool for AST analysis (default: the shared service)
+        """
+        self.analysis_service = analysis_service or get_analysis_service()
         self.supported_extensions = {'.py', '.js', '.ts', '.jsx', '.tsx'}
         self.analyzers = {
             '.py': self._analyze_python_file,
@@ -195,19 +214,59 @@ class PatternExtractor:
     async def extract_patterns_from_directory(
         self, 
         directory: str, 
-        exclude_patterns: Optional[List[str]] = None
+        exclude_patterns: Optional[List[str]] = None,
+        use_cache: bool = True
     ) -> Dict[str, Any]:
-        """Extract patterns from entire directory."""
+        """Extract patterns from entire directory.
+        
+        Files are parsed in batches by the analysis workers. Per-file results
+        are cached in ``.nocturnal/pattern_cache.json`` keyed by content hash,
+        so a later run only re-parses files that changed.
+        
+        Args:
+            directory: Directory to analyze
+            exclude_patterns: Path fragments of files to skip
+            use_cache: Whether to reuse and update the per-file pattern cache
+            
+        Returns:
+            Merged patterns, statistics and insights
+        """
         
         exclude_patterns = exclude_patterns or [
             '__pycache__', 'node_modules', '.git', '.env',
-            'venv', 'env', 'dist', 'build', '.pytest_cache'
+            'venv', 'env', 'dist', 'build', '.pytest_cache', '.nocturnal'
         ]
         
         directory_path = Path(directory)
         if not directory_path.exists():
             raise ValueError(f"Directory does not exist: {directory}")
         
+        started = time.perf_counter()
+        files = self._collect_files(directory_path, exclude_patterns)
+        cache = self._load_pattern_cache(directory_path) if use_cache else {}
+        
+        # Files whose size and mtime match the cache are not even read. Files
+        # that were modified just before they were cached have no mtime_ns.
+        results = {}
+        pending = []
+        for relative, file_stat in files:
+            entry = cache.get(relative)
+            if (entry and entry.get('size') == file_stat.st_size and
+                    entry.get('mtime_ns') == file_stat.st_mtime_ns):
+                results[relative] = entry
+            else:
+                pending.append((relative, entry.get('digest') if entry else None, file_stat.st_size))
+        
+        parsed_count = 0
+        parsed = await self._analyze_files_batched(directory_path, pending)
+        for relative, entry in parsed.items():
+            if entry.pop('unchanged', False):
+                # Touched but identical content
+                entry['patterns'] = cache[relative]['patterns']
+            else:
+                parsed_count += 1
+            results[relative] = entry
+        
         extracted_patterns = {
             'naming_patterns': defaultdict(list),
             'structure_patterns': defaultdict(list),
@@ -217,19 +276,33 @@ class PatternExtractor:
             'files_analyzed': []
         }
         
-        # Recursively analyze files
-        for file_path in directory_path.rglob('*'):
-            if (file_path.is_file() and 
-                file_path.suffix in self.supported_extensions and
-                not self._should_exclude_file(file_path, exclude_patterns)):
-                
-                try:
-                    file_patterns = await self._analyze_file(file_path)
-                    self._merge_patterns(extracted_patterns, file_patterns, str(file_path))
-                    extracted_patterns['files_analyzed'].append(str(file_path))
-                    
-                except Exception as e:
-                    logger.warning(f"Failed to analyze {file_path}: {e}")
+        # Reduce per-file results in path order so the output is deterministic
+        for relative, _ in files:
+            entry = results.get(relative)
+            if entry is None:
+                continue
+            file_path = str(directory_path / relative)
+            if entry.get('error'):
+                logger.warning(f"Failed to analyze {file_path}: {entry['error']}")
+            self._merge_patterns(extracted_patterns, entry['patterns'], file_path)
+            extracted_patterns['files_analyzed'].append(file_path)
+        
+        # Rewrite only when files were re-read or removed
+        if use_cache and (parsed or len(results) != len(cache)):
+            self._save_pattern_cache(directory_path, {
+                relative: entry for relative, entry in results.items() if entry.get('digest')
+            })
+        
+        extracted_patterns['extraction'] = {
+            'files': len(files),
+            'parsed': parsed_count,
+            'cache_hits': len(results) - parsed_count,
+            'duration_seconds': time.perf_counter() - started
+        }
+        logger.info(
+            f"Extracted patterns from {len(files)} files in {directory_path} "
+            f"({parsed_count} parsed, {len(results) - parsed_count} from cache)"
+        )
         
         # Generate insights from patterns
         insights = self._generate_pattern_insights(extracted_patterns)
@@ -237,6 +310,92 @@ class PatternExtractor:
         
         return extracted_patterns
     
+    def _collect_files(self, directory_path: Path, exclude_patterns: List[str]) -> List[Tuple[str, os.stat_result]]:
+        """List supported files under a directory with their stat, sorted by relative path."""
+        files = []
+        for current, dirnames, filenames in os.walk(directory_path):
+            current_path = Path(current)
+            # Prune excluded directories instead of walking into them
+            dirnames[:] = [
+                name for name in dirnames
+                if not self._should_exclude_file(current_path / name, exclude_patterns)
+            ]
+            for filename in filenames:
+                file_path = current_path / filename
+                if (file_path.suffix not in self.supported_extensions or
+                        self._should_exclude_file(file_path, exclude_patterns)):
+                    continue
+                try:
+                    file_stat = file_path.stat()
+                except OSError:
+                    continue
+                if stat.S_ISREG(file_stat.st_mode):
+                    files.append((file_path.relative_to(directory_path).as_posix(), file_stat))
+        
+        files.sort(key=lambda item: item[0])
+        return files
+    
+    async def _analyze_files_batched(self, directory_path: Path, pending: List[Tuple[str, Optional[str], int]]) -> Dict[str, Dict]:
+        """Analyze files in batches spread over the analysis workers."""
+        if not pending:
+            return {}
+        
+        # Several batches per worker so one slow batch does not hold up the rest
+        batch_count = min(len(pending), max(self.analysis_service.max_workers, 1) * 4)
+        batches = [pending[i::batch_count] for i in range(batch_count)]
+        
+        async def run_batch(batch):
+            request = AnalysisRequest(
+                code='',
+                file_path=str(directory_path),
+                options={'root': str(directory_path), 'files': [(relative, digest) for relative, digest, _ in batch]},
+                input_size=sum(size for _, _, size in batch)
+            )
+            response = await self.analysis_service.run(analyze_source_files, request)
+            if not response.ok:
+                logger.warning(f"Pattern extraction of {len(batch)} files failed: {response.error}")
+                return {}
+            return response.result
+        
+        results = {}
+        for batch_result in await asyncio.gather(*(run_batch(batch) for batch in batches)):
+            results.update(batch_result)
+        return results
+    
+    def _pattern_cache_path(self, directory_path: Path) -> Path:
+        """Path of the per-file pattern cache of a directory."""
+        return directory_path / '.nocturnal' / 'pattern_cache.json'
+    
+    def _load_pattern_cache(self, directory_path: Path) -> Dict[str, Dict]:
+        """Load cached per-file patterns keyed by relative path."""
+        cache_path = self._pattern_cache_path(directory_path)
+        if not cache_path.exists():
+            return {}
+        
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable pattern cache {cache_path}: {e}")
+            return {}
+        
+        if data.get('version') != PATTERN_CACHE_VERSION:
+            return {}
+        return data.get('files', {})
+    
+    def _save_pattern_cache(self, directory_path: Path, entries: Dict[str, Dict]) -> None:
+        """Persist per-file patterns; files no longer present are dropped."""
+        cache_path = self._pattern_cache_path(directory_path)
+        temp_path = cache_path.with_name(cache_path.name + '.tmp')
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                # dumps uses the C encoder; dump streams through the slow pure-Python one
+                f.write(json.dumps({'version': PATTERN_CACHE_VERSION, 'files': entries}, default=str))
+            os.replace(temp_path, cache_path)
+        except OSError as e:
+            logger.warning(f"Failed to save pattern cache {cache_path}: {e}")
+    
     async def _analyze_file(self, file_path: Path) -> Dict[str, Any]:
         """Analyze single file for patterns."""
         extension = file_path.suffix
@@ -253,7 +412,17 @@ class PatternExtractor:
             return {}
     
     async def _analyze_python_file(self, content: str, file_path: Path) -> Dict[str, Any]:
-        """Analyze Python file using AST."""
+        """Analyze Python file using AST, in an analysis worker for large files."""
+        response = await self.analysis_service.run(
+            analyze_python_source, AnalysisRequest(code=content, file_path=str(file_path))
+        )
+        if not response.ok:
+            logger.warning(f"Pattern analysis of {file_path} failed: {response.error}")
+            return {}
+        return response.result
+    
+    def _analyze_python_source(self, content: str, file_path: Path) -> Dict[str, Any]:
+        """Extract patterns from Python source."""
         try:
             tree = ast.parse(content)
             analyzer = CodeAnalyzer()
@@ -276,6 +445,22 @@ class PatternExtractor:
     
     async def _analyze_javascript_file(self, content: str, file_path: Path) -> Dict[str, Any]:
         """Analyze JavaScript/TypeScript file using regex patterns."""
+        return self._javascript_patterns(content)
+    
+    async def _analyze_generic_file(self, content: str, file_path: Path) -> Dict[str, Any]:
+        """Generic file analysis using text patterns."""
+        return self._generic_patterns(content)
+    
+    def _analyze_source(self, content: str, file_path: Path) -> Dict[str, Any]:
+        """Extract patterns from the source of one file, picking the analyzer by extension."""
+        if file_path.suffix == '.py':
+            return self._analyze_python_source(content, file_path)
+        if file_path.suffix in ('.js', '.ts'):
+            return self._javascript_patterns(content)
+        return self._generic_patterns(content)
+    
+    def _javascript_patterns(self, content: str) -> Dict[str, Any]:
+        """Extract JavaScript/TypeScript patterns using regex."""
         # Basic regex-based analysis for JS/TS files
         patterns = {
             'naming_patterns': self._extract_js_naming_patterns(content),
@@ -287,8 +472,8 @@ class PatternExtractor:
         
         return patterns
     
-    async def _analyze_generic_file(self, content: str, file_path: Path) -> Dict[str, Any]:
-        """Generic file analysis using text patterns."""
+    def _generic_patterns(self, content: str) -> Dict[str, Any]:
+        """Extract basic text statistics."""
         return {
             'statistics': {
                 'line_count': len(content.split('\n')),
@@ -698,4 +883,74 @@ class PatternExtractor:
                 project_specific=True
             ))
         
-        return code_patterns
\ No newline at end of file
+        return code_patterns
+
+
+def parse_python_source(request: AnalysisRequest) -> Dict[str, Any]:
+    """Analysis job: raw CodeAnalyzer patterns of Python source.
+
+    Returns:
+        Dictionary with patterns and statistics, or syntax_error with
+        message and line number if the source does not parse
+    """
+    try:
+        tree = ast.parse(request.code)
+    except SyntaxError as e:
+        return {'syntax_error': {'message': str(e), 'line_number': e.lineno or 0}}
+    analyzer = CodeAnalyzer()
+    analyzer.visit(tree)
+    return {'patterns': analyzer.patterns, 'statistics': analyzer.statistics}
+
+
+def analyze_python_source(request: AnalysisRequest) -> Dict[str, Any]:
+    """Analysis job: extracted patterns of one Python file."""
+    return _local_extractor()._analyze_python_source(request.code, Path(request.file_path or '<string>'))
+
+
+def analyze_source_files(request: AnalysisRequest) -> Dict[str, Dict[str, Any]]:
+    """Analysis job: patterns of a batch of files read from disk.
+    
+    ``request.options['files']`` holds ``(relative_path, cached_digest)``
+    pairs under ``request.options['root']``. Files whose content still has
+    the cached digest are reported as unchanged instead of parsed again.
+    
+    Returns:
+        Entry per relative path with digest, size, mtime_ns (None if the
+        file was modified too recently to trust it) and patterns (or
+        unchanged), plus error if the file could not be analyzed
+    """
+    extractor = _local_extractor()
+    root = Path(request.options['root'])
+    results = {}
+    for relative, cached_digest in request.options['files']:
+        file_path = root / relative
+        try:
+            # stat before reading: a concurrent edit then only causes a re-hash next time
+            file_stat = file_path.stat()
+            data = file_path.read_bytes()
+        except OSError as e:
+            results[relative] = {'digest': None, 'patterns': {}, 'error': str(e)}
+            continue
+        
+        entry = {
+            'digest': hashlib.sha256(data).hexdigest(),
+            'size': file_stat.st_size,
+            # A racy mtime forces a digest comparison on the next run
+            'mtime_ns': (None if time.time_ns() - file_stat.st_mtime_ns < _RACY_WINDOW_NS
+                         else file_stat.st_mtime_ns)
+        }
+        if entry['digest'] == cached_digest:
+            entry['unchanged'] = True
+        else:
+            try:
+                entry['patterns'] = extractor._analyze_source(data.decode('utf-8'), file_path)
+            except Exception as e:
+                entry['patterns'] = {}
+                entry['error'] = f"{type(e).__name__}: {e}"
+        results[relative] = entry
+    return results
+
+
+def _local_extractor() -> PatternExtractor:
+    """Extractor for use inside analysis jobs, never offloading further."""
+    return PatternExtractor(AnalysisService({'enabled': False}))
@@ -1,14 +1,17 @@
 """Quality evaluation engine with static analysis integration."""
 
 import asyncio
+import hashlib
 import json
 import logging
 import os
 import subprocess
 import tempfile
+import time
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional, Tuple
 
+from nocturnal_agent.core.analysis_service import AnalysisRequest, AnalysisService, get_analysis_service
 from nocturnal_agent.core.config import QualityConfig
 from nocturnal_agent.core.models import QualityScore, ProjectContext
 from nocturnal_agent.agents.local_llm import LocalLLMAgent
@@ -16,6 +19,22 @@ from nocturnal_agent.agents.local_llm import LocalLLMAgent
 
 logger = logging.getLogger(__name__)
 
+PYTHON_ANALYSIS_TOOLS = ('pylint', 'flake8', 'mypy')
+
+# Tool arguments other than the files; part of the cache key
+TOOL_ARGUMENTS = {
+    'pylint': ['--output-format=json'],
+    'flake8': [],
+    'mypy': [],
+}
+
+# Bump when tool output parsing or splitting changes so cached results are dropped
+STATIC_ANALYSIS_CACHE_VERSION = 1
+STATIC_ANALYSIS_CACHE_MAX_ENTRIES = 50000
+
+# Files handed to one tool invocation by batch_evaluate
+STATIC_ANALYSIS_BATCH_SIZE = 100
+
 
 class StaticAnalysisResult:
     """Result from static analysis tools."""
@@ -44,8 +63,8 @@ class StaticAnalysisResult:
     def _parse_pylint_output(self) -> None:
         """Parse pylint output."""
         try:
-            # Try to parse as JSON first
-            if self.stdout.strip().startswith('{'):
+            # Try to parse as JSON first (--output-format=json prints a list)
+            if self.stdout.strip().startswith(('[', '{')):
                 data = json.loads(self.stdout)
                 self.issues = data if isinstance(data, list) else []
             else:
@@ -63,9 +82,11 @@ class StaticAnalysisResult:
                                 "message": parts[4].strip()
                             })
             
-            # Calculate score based on issue severity
-            error_count = sum(1 for issue in self.issues if issue.get("type", "").startswith("E"))
-            warning_count = sum(1 for issue in self.issues if issue.get("type", "").startswith("W"))
+            # Calculate score based on issue severity; JSON reports "error",
+            # text output "E0401", so compare the first letter only
+            severities = [str(issue.get("type", ""))[:1].upper() for issue in self.issues]
+            error_count = severities.count("E")
+            warning_count = severities.count("W")
             total_issues = len(self.issues)
             
             if total_issues == 0:
@@ -126,14 +147,54 @@ class StaticAnalysisResult:
             self.score = 0.5
 
 
+def split_tool_output(tool: str, stdout: str, file_names: List[str]) -> Dict[str, str]:
+    """Split the output of one tool run over several files into per-file output.
+
+    Each part has the format the tool prints for a single file, so it can be
+    parsed by ``StaticAnalysisResult`` unchanged. Summary lines are dropped.
+    """
+    if tool == "pylint" and stdout.strip().startswith('['):
+        issues: Dict[str, List[Dict[str, Any]]] = {name: [] for name in file_names}
+        for issue in json.loads(stdout):
+            name = os.path.normpath(issue.get("path", ""))
+            if name in issues:
+                issues[name].append(issue)
+        return {name: json.dumps(found) if found else "" for name, found in issues.items()}
+
+    lines: Dict[str, List[str]] = {name: [] for name in file_names}
+    for line in stdout.splitlines():
+        name = os.path.normpath(line.split(':', 1)[0])
+        if name in lines:
+            lines[name].append(line)
+    return {name: "\n".join(found) for name, found in lines.items()}
+
+
 class QualityEvaluator:
     """Comprehensive quality evaluation engine."""
     
-    def __init__(self, config: QualityConfig, llm_agent: Optional[LocalLLMAgent] = None):
-        """Initialize quality evaluator."""
+    def __init__(self, config: QualityConfig, llm_agent: Optional[LocalLLMAgent] = None,
+                 analysis_service: Optional[AnalysisService] = None,
+                 cache_path: Optional[str] = None):
+        """Initialize quality evaluator.
+        
+        Args:
+            config: Quality evaluation configuration
+            llm_agent: Optional local LLM used for review
+            analysis_service: Process pool for the pattern scans (default: the shared service)
+            cache_path: File persisting static analysis results across runs
+                (default: ``.nocturnal/static_analysis_cache.json``)
+        """
         self.config = config
         self.llm_agent = llm_agent
-        self.static_analysis_cache: Dict[str, StaticAnalysisResult] = {}
+        self.analysis_service = analysis_service or get_analysis_service()
+        self.cache_path = Path(cache_path or Path('.nocturnal') / 'static_analysis_cache.json')
+        # Raw tool output per file, keyed by content hash and tool configuration
+        self.static_analysis_cache: Dict[str, Dict[str, Any]] = {}
+        self._cache_loaded = False
+        self._cache_dirty = False
+        self._tool_versions: Dict[str, Optional[str]] = {}
+        self._tool_semaphore = asyncio.Semaphore(os.cpu_count() or 1)
+        self.static_analysis_stats = {'files_analyzed': 0, 'cache_hits': 0, 'tool_runs': 0}
     
     async def evaluate_code(
         self, 
@@ -145,13 +206,28 @@ class QualityEvaluator:
         
         # Determine file type for appropriate analysis
         file_extension = self._get_file_extension(file_path, code)
+        static_analysis = None
+        if self.config.enable_static_analysis:
+            static_analysis = self._run_static_analysis(code, file_extension, file_path)
+        
+        return await self._evaluate(code, file_path, file_extension, project_context, static_analysis)
+    
+    async def _evaluate(
+        self,
+        code: str,
+        file_path: Optional[str],
+        file_extension: str,
+        project_context: Optional[ProjectContext],
+        static_analysis: Optional[Awaitable[Dict[str, float]]]
+    ) -> QualityScore:
+        """Combine static analysis with the other assessments of one file."""
         
         # Parallel evaluation
         tasks = []
         
         # Static analysis
-        if self.config.enable_static_analysis:
-            tasks.append(self._run_static_analysis(code, file_extension, file_path))
+        if static_analysis is not None:
+            tasks.append(static_analysis)
         
         # LLM-based evaluation
         if self.llm_agent:
@@ -196,94 +272,197 @@ class QualityEvaluator:
         if file_extension not in ['.py', '.js', '.ts', '.jsx', '.tsx']:
             return {}
         
-        scores = {}
-        
-        # Create temporary file for analysis
-        with tempfile.NamedTemporaryFile(
-            mode='w', 
-            suffix=file_extension, 
-            delete=False
-        ) as temp_file:
-            temp_file.write(code)
-            temp_path = temp_file.name
+        scores = await self._run_static_analysis_batch([(code, file_extension)])
+        return scores[0]
+    
+    async def _run_static_analysis_batch(self, sources: List[Tuple[str, str]]) -> List[Dict[str, float]]:
+        """Run static analysis tools over ``(code, file_extension)`` pairs.
+        
+        Each tool runs once over all Python sources that are not cached yet.
+        """
+        scores: List[Dict[str, float]] = [{} for _ in sources]
+        python_indices = [i for i, (_, extension) in enumerate(sources) if extension == '.py']
+        
+        script_indices = [i for i, (_, extension) in enumerate(sources)
+                          if extension in ['.js', '.ts', '.jsx', '.tsx']]
+        if script_indices:
+            # Future implementation for JavaScript tools
+            logger.info("JavaScript static analysis not yet implemented")
+            for i in script_indices:
+                scores[i]['eslint'] = 0.7  # Placeholder
+        
+        if not python_indices:
+            return scores
+        
+        tools = [tool for tool in self.config.static_analysis_tools if tool in PYTHON_ANALYSIS_TOOLS]
+        codes = [sources[i][0] for i in python_indices]
+        tool_results = await asyncio.gather(
+            *(self._analyze_sources(tool, codes) for tool in tools), return_exceptions=True
+        )
         
-        try:
-            # Run appropriate tools based on file type
-            if file_extension == '.py':
-                await self._run_python_analysis(temp_path, scores)
-            elif file_extension in ['.js', '.ts', '.jsx', '.tsx']:
-                await self._run_javascript_analysis(temp_path, scores)
-            
-        finally:
-            # Clean up temporary file
-            try:
-                os.unlink(temp_path)
-            except OSError:
-                pass
+        for tool, results in zip(tools, tool_results):
+            if isinstance(results, Exception):
+                logger.error(f"Failed to run {tool}: {results}")
+                for i in python_indices:
+                    scores[i][tool] = 0.5
+                continue
+            for i, result in zip(python_indices, results):
+                scores[i][tool] = result.score
+            logger.debug(f"{tool} analysis: {len(results)} files, "
+                         f"issues={sum(len(result.issues) for result in results)}")
         
+        self.static_analysis_stats['files_analyzed'] += len(python_indices)
+        self._save_static_analysis_cache()
         return scores
     
-    async def _run_python_analysis(self, file_path: str, scores: Dict[str, float]) -> None:
-        """Run Python static analysis tools."""
-        for tool in self.config.static_analysis_tools:
-            if tool not in ['pylint', 'flake8', 'mypy']:
-                continue
+    async def _run_analysis_tool(self, tool: str, file_path: str) -> StaticAnalysisResult:
+        """Run a specific static analysis tool."""
+        if tool not in PYTHON_ANALYSIS_TOOLS:
+            raise ValueError(f"Unknown tool: {tool}")
+        
+        code = Path(file_path).read_text(encoding='utf-8', errors='ignore')
+        results = await self._analyze_sources(tool, [code])
+        self._save_static_analysis_cache()
+        return results[0]
+    
+    async def _analyze_sources(self, tool: str, codes: List[str]) -> List[StaticAnalysisResult]:
+        """Analyze sources with one tool, running it once over the uncached ones."""
+        version = await self._tool_version(tool)
+        if version is None:
+            # Return empty results if tool not available; nothing is cached
+            return [StaticAnalysisResult(tool=tool, exit_code=127, stdout="", stderr=f"{tool} not found")
+                    for _ in codes]
+        
+        self._load_static_analysis_cache()
+        now = time.time()
+        keys = [self._static_analysis_key(tool, version, code) for code in codes]
+        
+        # Identical sources are analyzed once
+        missing: Dict[str, str] = {}
+        for key, code in zip(keys, codes):
+            entry = self.static_analysis_cache.get(key)
+            if entry is not None:
+                entry['used'] = now
+                self.static_analysis_stats['cache_hits'] += 1
+            else:
+                missing.setdefault(key, code)
+        
+        if missing:
+            outputs = await self._run_tool(tool, list(missing.values()))
+            for key, (exit_code, stdout) in zip(missing, outputs):
+                self.static_analysis_cache[key] = {'exit_code': exit_code, 'stdout': stdout, 'used': now}
+            self._cache_dirty = True
+        
+        results = []
+        for key in keys:
+            entry = self.static_analysis_cache[key]
+            results.append(StaticAnalysisResult(
+                tool=tool, exit_code=entry['exit_code'], stdout=entry['stdout'], stderr=""
+            ))
+        return results
+    
+    async def _run_tool(self, tool: str, codes: List[str]) -> List[Tuple[int, str]]:
+        """Run a tool once over sources and split its output per source.
+        
+        The sources are written to a scratch directory that is also the
+        working directory, so no project configuration changes the result.
+        """
+        names = [f"module_{i}.py" for i in range(len(codes))]
+        with tempfile.TemporaryDirectory(prefix='nocturnal_analysis_') as work_dir:
+            for name, code in zip(names, codes):
+                with open(os.path.join(work_dir, name), 'w', encoding='utf-8') as f:
+                    f.write(code)
             
+            cmd = [tool, *TOOL_ARGUMENTS[tool], *names]
+            async with self._tool_semaphore:
+                process = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    cwd=work_dir,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
+                stdout, _ = await process.communicate()
+            self.static_analysis_stats['tool_runs'] += 1
+        
+        exit_code = process.returncode or 0
+        per_file = split_tool_output(tool, stdout.decode('utf-8', errors='ignore'), names)
+        outputs = [(exit_code if per_file[name] else 0, per_file[name]) for name in names]
+
+        if tool == 'mypy' and exit_code == 2 and len(codes) > 1:
+            # A blocking error such as a syntax error stops mypy before it checks
+            # the other files; only the blocked files reported anything
+            rest = [i for i, name in enumerate(names) if not per_file[name]]
+            if len(rest) == len(codes):
+                retried = await asyncio.gather(*(self._run_tool(tool, [code]) for code in codes))
+                return [output[0] for output in retried]
+            for i, output in zip(rest, await self._run_tool(tool, [codes[i] for i in rest])):
+                outputs[i] = output
+
+        return outputs
+    
+    async def _tool_version(self, tool: str) -> Optional[str]:
+        """Version string of a tool, or None when it is not installed."""
+        if tool not in self._tool_versions:
             try:
-                result = await self._run_analysis_tool(tool, file_path)
-                scores[tool] = result.score
-                logger.debug(f"{tool} analysis: score={result.score:.3f}, issues={len(result.issues)}")
-            except Exception as e:
-                logger.error(f"Failed to run {tool}: {e}")
-                scores[tool] = 0.5
+                process = await asyncio.create_subprocess_exec(
+                    tool, '--version',
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.DEVNULL
+                )
+                stdout, _ = await process.communicate()
+                self._tool_versions[tool] = stdout.decode('utf-8', errors='ignore').strip()
+            except FileNotFoundError:
+                logger.warning(f"Static analysis tool '{tool}' not found")
+                self._tool_versions[tool] = None
+        return self._tool_versions[tool]
     
-    async def _run_javascript_analysis(self, file_path: str, scores: Dict[str, float]) -> None:
-        """Run JavaScript/TypeScript static analysis tools."""
-        # Future implementation for JavaScript tools
-        logger.info("JavaScript static analysis not yet implemented")
-        scores['eslint'] = 0.7  # Placeholder
+    def _static_analysis_key(self, tool: str, version: str, code: str) -> str:
+        """Cache key from the source content and the tool configuration."""
+        digest = hashlib.sha256()
+        digest.update(json.dumps([tool, TOOL_ARGUMENTS[tool], version]).encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(code.encode('utf-8', errors='surrogatepass'))
+        return digest.hexdigest()
     
-    async def _run_analysis_tool(self, tool: str, file_path: str) -> StaticAnalysisResult:
-        """Run a specific static analysis tool."""
-        cache_key = f"{tool}:{file_path}"
-        if cache_key in self.static_analysis_cache:
-            return self.static_analysis_cache[cache_key]
-        
-        # Build command
-        if tool == "pylint":
-            cmd = ["pylint", "--output-format=json", file_path]
-        elif tool == "flake8":
-            cmd = ["flake8", file_path]
-        elif tool == "mypy":
-            cmd = ["mypy", file_path]
-        else:
-            raise ValueError(f"Unknown tool: {tool}")
+    def _load_static_analysis_cache(self) -> None:
+        """Load persisted tool results once."""
+        if self._cache_loaded:
+            return
+        self._cache_loaded = True
+        if not self.cache_path.exists():
+            return
         
-        # Run tool
         try:
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            stdout, stderr = await process.communicate()
-            
-            result = StaticAnalysisResult(
-                tool=tool,
-                exit_code=process.returncode or 0,
-                stdout=stdout.decode('utf-8', errors='ignore'),
-                stderr=stderr.decode('utf-8', errors='ignore')
-            )
-            
-            # Cache result
-            self.static_analysis_cache[cache_key] = result
-            
-            return result
-            
-        except FileNotFoundError:
-            logger.warning(f"Static analysis tool '{tool}' not found")
-            # Return empty result if tool not available
-            return StaticAnalysisResult(tool=tool, exit_code=127, stdout="", stderr=f"{tool} not found")
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable static analysis cache {self.cache_path}: {e}")
+            return
+        
+        if data.get('version') == STATIC_ANALYSIS_CACHE_VERSION:
+            # Results produced in this run take precedence
+            self.static_analysis_cache = {**data.get('entries', {}), **self.static_analysis_cache}
+    
+    def _save_static_analysis_cache(self) -> None:
+        """Persist tool results, keeping the most recently used entries."""
+        if not self._cache_dirty:
+            return
+        self._cache_dirty = False
+        
+        if len(self.static_analysis_cache) > STATIC_ANALYSIS_CACHE_MAX_ENTRIES:
+            recent = sorted(self.static_analysis_cache.items(), key=lambda item: item[1]['used'],
+                            reverse=True)[:STATIC_ANALYSIS_CACHE_MAX_ENTRIES]
+            self.static_analysis_cache = dict(recent)
+        
+        temp_path = self.cache_path.with_name(self.cache_path.name + '.tmp')
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps({'version': STATIC_ANALYSIS_CACHE_VERSION,
+                                    'entries': self.static_analysis_cache}))
+            os.replace(temp_path, self.cache_path)
+        except OSError as e:
+            logger.warning(f"Failed to save static analysis cache {self.cache_path}: {e}")
     
     async def _analyze_test_coverage(self, code: str, file_path: Optional[str]) -> float:
         """Analyze test coverage."""
@@ -308,73 +487,20 @@ class QualityEvaluator:
     
     async def _analyze_security(self, code: str, file_extension: str) -> float:
         """Analyze code for security issues."""
-        security_issues = []
-        
-        # Common security patterns to check
-        security_patterns = {
-            'hardcoded_secrets': [
-                'password', 'secret', 'api_key', 'token', 'credential'
-            ],
-            'sql_injection': [
-                'execute(', 'query(', 'raw(', 'format('
-            ],
-            'command_injection': [
-                'os.system', 'subprocess.call', 'eval(', 'exec('
-            ],
-            'path_traversal': [
-                '../', '..\\', 'os.path.join'
-            ]
-        }
-        
-        code_lower = code.lower()
-        
-        for category, patterns in security_patterns.items():
-            for pattern in patterns:
-                if pattern in code_lower:
-                    security_issues.append({
-                        'category': category,
-                        'pattern': pattern,
-                        'severity': 'medium'
-                    })
-        
-        # Calculate security score
-        if not security_issues:
-            return 1.0
-        
-        # Penalty based on number and severity of issues
-        penalty = len(security_issues) * 0.1
-        return max(0.0, 1.0 - penalty)
+        return await self._run_scan(score_security, code, file_extension)
     
     async def _analyze_performance(self, code: str, file_extension: str) -> float:
         """Analyze code for performance issues."""
-        performance_issues = []
-        
-        # Performance anti-patterns
-        if file_extension == '.py':
-            antipatterns = [
-                ('for.*in.*range.*len', 'Use enumerate() instead of range(len())'),
-                ('\.append.*for.*in', 'Consider list comprehension'),
-                ('import.*\\*', 'Avoid wildcard imports'),
-                ('global ', 'Avoid global variables')
-            ]
-        else:
-            antipatterns = []
-        
-        import re
-        for pattern, description in antipatterns:
-            if re.search(pattern, code, re.IGNORECASE):
-                performance_issues.append({
-                    'pattern': pattern,
-                    'description': description,
-                    'severity': 'low'
-                })
-        
-        # Calculate performance score
-        if not performance_issues:
-            return 1.0
-        
-        penalty = len(performance_issues) * 0.05
-        return max(0.0, 1.0 - penalty)
+        return await self._run_scan(score_performance, code, file_extension)
+    
+    async def _run_scan(self, scan, code: str, file_extension: str) -> float:
+        """Run a scoring scan, in an analysis worker for large code."""
+        response = await self.analysis_service.run(
+            scan, AnalysisRequest(code=code, options={'file_extension': file_extension})
+        )
+        if not response.ok:
+            raise RuntimeError(f"{scan.__name__} failed: {response.error}")
+        return response.result
     
     def _calculate_final_score(
         self, 
@@ -460,8 +586,14 @@ class QualityEvaluator:
         return "\n".join(context_parts)
     
     def clear_cache(self) -> None:
-        """Clear static analysis cache."""
+        """Clear static analysis cache, including the persisted results."""
         self.static_analysis_cache.clear()
+        self._cache_loaded = True
+        self._cache_dirty = False
+        try:
+            self.cache_path.unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning(f"Failed to remove static analysis cache {self.cache_path}: {e}")
         logger.info("Static analysis cache cleared")
     
     async def batch_evaluate(
@@ -470,20 +602,138 @@ class QualityEvaluator:
         project_context: Optional[ProjectContext] = None
     ) -> List[QualityScore]:
         """Evaluate multiple code files in batch."""
-        tasks = []
-        for code, file_path in code_files:
-            tasks.append(self.evaluate_code(code, file_path, project_context))
+        quality_scores: List[Optional[QualityScore]] = [None] * len(code_files)
+        async for index, score in self.iter_batch_evaluate(code_files, project_context):
+            quality_scores[index] = score
         
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        return quality_scores
+    
+    async def iter_batch_evaluate(
+        self,
+        code_files: List[Tuple[str, str]],
+        project_context: Optional[ProjectContext] = None
+    ) -> AsyncIterator[Tuple[int, QualityScore]]:
+        """Evaluate multiple code files, yielding ``(index, score)`` as each finishes.
+        
+        Static analysis runs each tool once per ``STATIC_ANALYSIS_BATCH_SIZE``
+        files, and the files of a batch are yielded as soon as its output
+        has been parsed rather than after the whole batch evaluation.
+        
+        Args:
+            code_files: ``(code, file_path)`` pairs
+            project_context: Optional project context for the LLM review
+        """
+        extensions = [self._get_file_extension(file_path, code) for code, file_path in code_files]
         
-        # Filter out exceptions and return valid results
-        quality_scores = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                logger.error(f"Failed to evaluate file {code_files[i][1]}: {result}")
+        batches = []
+        static_batches: Dict[int, Tuple[asyncio.Future, int]] = {}
+        if self.config.enable_static_analysis:
+            indices = [i for i, extension in enumerate(extensions)
+                       if extension in ['.py', '.js', '.ts', '.jsx', '.tsx']]
+            for start in range(0, len(indices), STATIC_ANALYSIS_BATCH_SIZE):
+                chunk = indices[start:start + STATIC_ANALYSIS_BATCH_SIZE]
+                batch = asyncio.ensure_future(self._run_static_analysis_batch(
+                    [(code_files[i][0], extensions[i]) for i in chunk]
+                ))
+                batches.append(batch)
+                for position, i in enumerate(chunk):
+                    static_batches[i] = (batch, position)
+        
+        async def static_scores(index: int) -> Dict[str, float]:
+            if index not in static_batches:
+                return {}
+            batch, position = static_batches[index]
+            return (await batch)[position]
+        
+        async def evaluate(index: int) -> Tuple[int, QualityScore]:
+            code, file_path = code_files[index]
+            static_analysis = static_scores(index) if self.config.enable_static_analysis else None
+            try:
+                score = await self._evaluate(code, file_path, extensions[index], project_context, static_analysis)
+            except Exception as e:
+                logger.error(f"Failed to evaluate file {file_path}: {e}")
                 # Create default score for failed evaluation
-                quality_scores.append(QualityScore(overall=0.5))
-            else:
-                quality_scores.append(result)
+                score = QualityScore(overall=0.5)
+            return index, score
         
-        return quality_scores
\ No newline at end of file
+        tasks = [asyncio.ensure_future(evaluate(i)) for i in range(len(code_files))]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks + batches:
+                task.cancel()
+
+
+def score_security(request: AnalysisRequest) -> float:
+    """Analysis job: security score of code from risky pattern hits."""
+    code = request.code
+    security_issues = []
+    
+    # Common security patterns to check
+    security_patterns = {
+        'hardcoded_secrets': [
+            'password', 'secret', 'api_key', 'token', 'credential'
+        ],
+        'sql_injection': [
+            'execute(', 'query(', 'raw(', 'format('
+        ],
+        'command_injection': [
+            'os.system', 'subprocess.call', 'eval(', 'exec('
+        ],
+        'path_traversal': [
+            '../', '..\\', 'os.path.join'
+        ]
+    }
+    
+    code_lower = code.lower()
+    
+    for category, patterns in security_patterns.items():
+        for pattern in patterns:
+            if pattern in code_lower:
+                security_issues.append({
+                    'category': category,
+                    'pattern': pattern,
+                    'severity': 'medium'
+                })
+    
+    # Calculate security score
+    if not security_issues:
+        return 1.0
+    
+    # Penalty based on number and severity of issues
+    penalty = len(security_issues) * 0.1
+    return max(0.0, 1.0 - penalty)
+
+
+def score_performance(request: AnalysisRequest) -> float:
+    """Analysis job: performance score of code from anti-pattern hits."""
+    code, file_extension = request.code, request.options.get('file_extension', '')
+    performance_issues = []
+    
+    # Performance anti-patterns
+    if file_extension == '.py':
+        antipatterns = [
+            ('for.*in.*range.*len', 'Use enumerate() instead of range(len())'),
+            ('\.append.*for.*in', 'Consider list comprehension'),
+            ('import.*\\*', 'Avoid wildcard imports'),
+            ('global ', 'Avoid global variables')
+        ]
+    else:
+        antipatterns = []
+    
+    import re
+    for pattern, description in antipatterns:
+        if re.search(pattern, code, re.IGNORECASE):
+            performance_issues.append({
+                'pattern': pattern,
+                'description': description,
+                'severity': 'low'
+            })
+    
+    # Calculate performance score
+    if not performance_issues:
+        return 1.0
+    
+    penalty = len(performance_issues) * 0.05
+    return max(0.0, 1.0 - penalty)
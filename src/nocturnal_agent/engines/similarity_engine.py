@@ -0,0 +1,359 @@
+"""Vectorized similarity search over patterns and notes.
+
+Texts are embedded with the hashing trick (signed, sublinear-tf word unigrams
+and bigrams) into fixed-width float32 vectors, so a whole candidate set is
+scored with one matrix product instead of per-candidate set arithmetic.
+
+NumPy is optional; callers check ``NUMPY_AVAILABLE`` and keep their
+pure-Python scoring when it is missing.
+"""
+
+import json
+import logging
+import math
+import os
+import re
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None
+
+
+logger = logging.getLogger(__name__)
+
+NUMPY_AVAILABLE = np is not None
+
+TOKEN_PATTERN = re.compile(r'\w+')
+DEFAULT_DIMENSIONS = 1024
+
+_MIN_CAPACITY = 64
+_HASH_CACHE_LIMIT = 200_000
+
+
+class HashingVectorizer:
+    """Embed texts into L2-normalized hashed n-gram vectors."""
+
+    def __init__(self, dimensions: int = DEFAULT_DIMENSIONS):
+        """Initialize the vectorizer.
+
+        Args:
+            dimensions: Vector width; must be a power of two
+        """
+        if not NUMPY_AVAILABLE:
+            raise ImportError("numpy is required for vectorized similarity: pip install numpy")
+        if dimensions <= 0 or dimensions & (dimensions - 1):
+            raise ValueError(f"dimensions must be a power of two, got {dimensions}")
+
+        self.dimensions = dimensions
+        self._mask = dimensions - 1
+        self._hash_cache: Dict[str, Tuple[int, float]] = {}
+
+    def _bucket(self, feature: str) -> Tuple[int, float]:
+        """Map a feature to a (bucket, sign) pair with a process-stable hash."""
+        cached = self._hash_cache.get(feature)
+        if cached is not None:
+            return cached
+
+        digest = zlib.crc32(feature.encode('utf-8'))
+        cached = (digest & self._mask, 1.0 if digest & 0x80000000 else -1.0)
+        if len(self._hash_cache) >= _HASH_CACHE_LIMIT:
+            self._hash_cache.clear()
+        self._hash_cache[feature] = cached
+        return cached
+
+    def _fill(self, text: str, row: 'np.ndarray'):
+        """Accumulate the features of text into row and normalize it."""
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        features = Counter(tokens)
+        features.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+        if not features:
+            return
+
+        buckets = np.empty(len(features), dtype=np.intp)
+        weights = np.empty(len(features), dtype=np.float32)
+        for i, (feature, count) in enumerate(features.items()):
+            bucket, sign = self._bucket(feature)
+            buckets[i] = bucket
+            weights[i] = sign * (1.0 + math.log(count))
+
+        np.add.at(row, buckets, weights)
+        norm = float(np.linalg.norm(row))
+        if norm > 0:
+            row /= norm
+
+    def transform(self, texts: Sequence[str]) -> 'np.ndarray':
+        """Embed several texts.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            Array of shape (len(texts), dimensions)
+        """
+        matrix = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for i, text in enumerate(texts):
+            self._fill(text, matrix[i])
+        return matrix
+
+    def transform_one(self, text: str) -> 'np.ndarray':
+        """Embed a single text."""
+        return self.transform([text])[0]
+
+
+class VectorIndex:
+    """Keyed matrix of vectors with batched cosine top-k queries.
+
+    With a ``path`` the matrix is a memory-mapped ``.npy`` file and the
+    row -> key mapping plus a per-key state (e.g. file mtime/size) live in a
+    JSON sidecar, so the index survives restarts and callers can tell which
+    keys are stale. Without a path the matrix is kept in memory.
+    """
+
+    def __init__(
+        self,
+        dimensions: int = DEFAULT_DIMENSIONS,
+        path: Optional[Path] = None,
+        vectorizer: Optional[HashingVectorizer] = None
+    ):
+        """Initialize the vector index.
+
+        Args:
+            dimensions: Vector width
+            path: Memory-mapped matrix file, or None for an in-memory index
+            vectorizer: Vectorizer to embed texts with
+        """
+        self.vectorizer = vectorizer or HashingVectorizer(dimensions)
+        self.dimensions = self.vectorizer.dimensions
+        self.path = Path(path) if path is not None else None
+        self.meta_path = self.path.with_suffix('.json') if self.path is not None else None
+
+        self.keys: List[Optional[str]] = []  # row -> key, None for free rows
+        self.states: Dict[str, Any] = {}
+        self._rows: Dict[str, int] = {}
+        self._free_rows: List[int] = []
+        # Rows freed since the last flush are not reused until the sidecar no
+        # longer maps them to their old key, so a crash cannot pair a stale
+        # key with another note's vector.
+        self._released_rows: List[int] = []
+        self._matrix = np.zeros((0, self.dimensions), dtype=np.float32)
+        self._dirty = False
+
+        if self.path is not None:
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._rows
+
+    def _load(self):
+        """Open the persisted matrix, starting empty if it is missing or unusable."""
+        if not (self.path.exists() and self.meta_path.exists()):
+            return
+
+        try:
+            meta = json.loads(self.meta_path.read_text(encoding='utf-8'))
+            matrix = np.lib.format.open_memmap(str(self.path), mode='r+')
+            if meta.get('dimensions') != self.dimensions or matrix.shape[1] != self.dimensions:
+                logger.info(f"Vector index {self.path} has different dimensions, rebuilding")
+                return
+            if len(meta['keys']) > matrix.shape[0]:
+                raise ValueError("more keys than matrix rows")
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Discarding unreadable vector index {self.path}: {e}")
+            return
+
+        self._matrix = matrix
+        self.keys = meta['keys']
+        for row, key in enumerate(self.keys):
+            if key is None:
+                self._free_rows.append(row)
+            else:
+                self._rows[key] = row
+        self.states = {
+            key: tuple(state) if isinstance(state, list) else state
+            for key, state in meta.get('states', {}).items()
+            if key in self._rows
+        }
+
+    def _allocate_row(self) -> int:
+        """Return a free row, growing the matrix when it is full."""
+        if self._free_rows:
+            return self._free_rows.pop()
+
+        row = len(self.keys)
+        if row >= self._matrix.shape[0]:
+            self._grow(max(_MIN_CAPACITY, self._matrix.shape[0] * 2))
+        self.keys.append(None)
+        return row
+
+    def _grow(self, capacity: int):
+        """Resize the matrix to capacity rows, preserving existing rows."""
+        used = len(self.keys)
+        if self.path is None:
+            matrix = np.zeros((capacity, self.dimensions), dtype=np.float32)
+            matrix[:used] = self._matrix[:used]
+            self._matrix = matrix
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        matrix = np.lib.format.open_memmap(
+            str(tmp_path), mode='w+', dtype=np.float32, shape=(capacity, self.dimensions)
+        )
+        matrix[:used] = self._matrix[:used]
+        matrix.flush()
+        del self._matrix
+        os.replace(tmp_path, self.path)
+        self._matrix = matrix
+        self._dirty = True
+
+    def upsert(self, key: str, text: str, state: Any = None):
+        """Embed text and store it under key."""
+        self.upsert_vectors([key], self.vectorizer.transform([text]), [state])
+
+    def upsert_many(self, items: Iterable[Tuple[str, str, Any]]):
+        """Embed and store several (key, text, state) items in one batch."""
+        items = list(items)
+        if items:
+            keys, texts, states = zip(*items)
+            self.upsert_vectors(keys, self.vectorizer.transform(texts), states)
+
+    def upsert_vectors(self, keys: Sequence[str], vectors: 'np.ndarray', states: Optional[Sequence[Any]] = None):
+        """Store precomputed vectors under keys."""
+        for i, key in enumerate(keys):
+            row = self._rows.get(key)
+            if row is None:
+                row = self._allocate_row()
+                self._rows[key] = row
+                self.keys[row] = key
+            self._matrix[row] = vectors[i]
+            if states is not None and states[i] is not None:
+                self.states[key] = states[i]
+            else:
+                self.states.pop(key, None)
+        self._dirty = True
+
+    def remove(self, key: str) -> bool:
+        """Drop the vector stored under key."""
+        row = self._rows.pop(key, None)
+        if row is None:
+            return False
+
+        self._matrix[row] = 0.0
+        self.keys[row] = None
+        self.states.pop(key, None)
+        (self._released_rows if self.path is not None else self._free_rows).append(row)
+        self._dirty = True
+        return True
+
+    def clear(self):
+        """Drop every vector."""
+        for key in list(self._rows):
+            self.remove(key)
+
+    def flush(self):
+        """Persist pending changes of a file-backed index."""
+        if self.path is None or not self._dirty:
+            return
+
+        if isinstance(self._matrix, np.memmap):
+            self._matrix.flush()
+        else:
+            self._grow(max(_MIN_CAPACITY, len(self.keys)))
+
+        meta = {
+            'dimensions': self.dimensions,
+            'keys': self.keys,
+            'states': {key: list(state) if isinstance(state, tuple) else state
+                       for key, state in self.states.items()}
+        }
+        tmp_path = self.meta_path.with_name(self.meta_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(meta, ensure_ascii=False))
+        os.replace(tmp_path, self.meta_path)
+        self._free_rows.extend(self._released_rows)
+        self._released_rows.clear()
+        self._dirty = False
+
+    def search(
+        self,
+        queries: Sequence[str],
+        limit: int,
+        predicate: Optional[Callable[[str], bool]] = None,
+        min_score: float = 0.0
+    ) -> List[List[Tuple[str, float]]]:
+        """Embed queries and find their nearest stored vectors.
+
+        Args:
+            queries: Query texts
+            limit: Maximum results per query
+            predicate: Only keys for which this returns True are returned
+            min_score: Minimum cosine similarity
+
+        Returns:
+            Per query, a list of (key, cosine similarity) sorted by descending score
+        """
+        return self.search_vectors(self.vectorizer.transform(queries), limit, predicate, min_score)
+
+    def search_vectors(
+        self,
+        query_vectors: 'np.ndarray',
+        limit: int,
+        predicate: Optional[Callable[[str], bool]] = None,
+        min_score: float = 0.0
+    ) -> List[List[Tuple[str, float]]]:
+        """Find the nearest stored vectors for already embedded queries.
+
+        All queries are scored with a single matrix product; the predicate is
+        only evaluated on the best-scoring rows, widening the window when too
+        many of them are rejected.
+        """
+        used = len(self.keys)
+        if used == 0 or limit <= 0:
+            return [[] for _ in range(len(query_vectors))]
+
+        scores = np.asarray(query_vectors, dtype=np.float32) @ self._matrix[:used].T
+        return [self._top_k(row_scores, limit, predicate, min_score) for row_scores in scores]
+
+    def _top_k(
+        self,
+        scores: 'np.ndarray',
+        limit: int,
+        predicate: Optional[Callable[[str], bool]],
+        min_score: float
+    ) -> List[Tuple[str, float]]:
+        """Select the best rows of one score vector."""
+        total = len(scores)
+        window = min(total, limit * 4)
+        results: List[Tuple[str, float]] = []
+        accepted = set()
+
+        while True:
+            if window < total:
+                candidates = np.argpartition(-scores, window - 1)[:window]
+            else:
+                candidates = np.arange(total)
+            candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+
+            for row in candidates:
+                score = float(scores[row])
+                if score < min_score or len(results) >= limit:
+                    return results
+                key = self.keys[row]
+                if key is None or row in accepted or (predicate is not None and not predicate(key)):
+                    continue
+                accepted.add(row)
+                results.append((key, score))
+
+            if window >= total:
+                return results
+            results.clear()
+            accepted.clear()
+            window = min(total, window * 4)
@@ -12,6 +12,7 @@ from nocturnal_agent.core.models import (
 from nocturnal_agent.engines.pattern_extractor import PatternExtractor
 from nocturnal_agent.engines.consistency_engine import ConsistencyChecker
 from nocturnal_agent.engines.learning_engine import ContinuousLearner
+from nocturnal_agent.engines.similarity_engine import NUMPY_AVAILABLE, VectorIndex
 
 
 logger = logging.getLogger(__name__)
@@ -37,6 +38,11 @@ class UnifiedConsistencyEngine:
         # Cache for performance
         self._pattern_cache: Dict[str, Dict] = {}
         self._consistency_cache: Dict[str, ConsistencyScore] = {}
+        
+        # Pattern vectors for relevance ranking, rebuilt when the pattern list changes
+        self._pattern_vectors: Optional[VectorIndex] = VectorIndex() if NUMPY_AVAILABLE else None
+        self._pattern_vector_ids: List[int] = []
+        self.pattern_suggestion_limit = 5
     
     async def initialize_project_patterns(
         self, 
@@ -217,16 +223,56 @@ class UnifiedConsistencyEngine:
         
         suggestions = []
         
-        # Suggest patterns based on project history
-        for pattern in self.project_context.patterns[:5]:  # Top 5 patterns
-            if pattern.confidence > 0.8 and pattern.usage_count > 3:
-                if pattern.pattern_type == "naming" and consistency_score.naming_conventions < 0.8:
-                    suggestions.append(f"Consider applying {pattern.description}")
-                elif pattern.pattern_type == "structure" and consistency_score.code_structure < 0.8:
-                    suggestions.append(f"Consider using {pattern.description}")
+        def is_applicable(pattern: CodePattern) -> bool:
+            if pattern.confidence <= 0.8 or pattern.usage_count <= 3:
+                return False
+            if pattern.pattern_type == "naming":
+                return consistency_score.naming_conventions < 0.8
+            if pattern.pattern_type == "structure":
+                return consistency_score.code_structure < 0.8
+            return False
+        
+        if self._pattern_vectors is not None:
+            # Rank applicable patterns by similarity to the code in one matrix product
+            patterns = self._index_pattern_vectors()
+            matches = self._pattern_vectors.search(
+                [code],
+                self.pattern_suggestion_limit,
+                predicate=lambda key: is_applicable(patterns[int(key)]),
+                min_score=-1.0
+            )[0]
+            candidates = [patterns[int(key)] for key, _ in matches]
+        else:
+            # Suggest patterns based on project history
+            candidates = [p for p in self.project_context.patterns[:self.pattern_suggestion_limit] if is_applicable(p)]
+        
+        for pattern in candidates:
+            if pattern.pattern_type == "naming":
+                suggestions.append(f"Consider applying {pattern.description}")
+            else:
+                suggestions.append(f"Consider using {pattern.description}")
         
         return suggestions
     
+    def _index_pattern_vectors(self) -> List[CodePattern]:
+        """Embed project patterns, re-embedding when patterns are added or replaced.
+        
+        Returns:
+            The pattern list; vector keys are indexes into it
+        """
+        patterns = self.project_context.patterns
+        pattern_ids = [id(pattern) for pattern in patterns]
+        
+        if pattern_ids != self._pattern_vector_ids:
+            self._pattern_vectors.clear()
+            self._pattern_vectors.upsert_many(
+                (str(i), f"{p.name} {p.description} {' '.join(p.examples)}", None)
+                for i, p in enumerate(patterns)
+            )
+            self._pattern_vector_ids = pattern_ids
+        
+        return patterns
+    
     async def auto_fix_violations(
         self, 
         code: str, 
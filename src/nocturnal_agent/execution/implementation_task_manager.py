@@ -5,13 +5,24 @@
 
 import json
 import asyncio
+import os
+import signal
+import sqlite3
+import subprocess
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, asdict
 from enum import Enum
 
 from ..log_system.structured_logger import StructuredLogger, LogLevel, LogCategory
+from .task_store import TaskStore, read_legacy_tasks
+
+
+# ClaudeCode本体（30分）と厳格モード再実行（10分）が収まり、
+# 停止タスクとみなす45分より前に打ち切る
+DEFAULT_TASK_TIMEOUT_SECONDS = 40 * 60
+DEFAULT_MAX_CONCURRENT_TASKS = 3
 
 
 class TaskStatus(Enum):
@@ -55,74 +66,145 @@ class ImplementationTask:
             self.execution_log = []
 
 
+def task_to_record(task: ImplementationTask) -> Dict[str, Any]:
+    """タスクをJSON互換の辞書に変換（旧 tasks.json の1件と同じ形）"""
+    task_dict = asdict(task)
+    task_dict['created_at'] = task.created_at.isoformat()
+    task_dict['updated_at'] = task.updated_at.isoformat()
+    # started_atもiso形式に変換（Noneの場合はそのまま）
+    if task.started_at:
+        task_dict['started_at'] = task.started_at.isoformat()
+    task_dict['priority'] = task.priority.value
+    task_dict['status'] = task.status.value
+    return task_dict
+
+
+def task_from_record(task_data: Dict[str, Any]) -> ImplementationTask:
+    """JSON互換の辞書からタスクを復元"""
+    task_data = dict(task_data)
+    # datetime フィールドを復元
+    task_data['created_at'] = datetime.fromisoformat(task_data['created_at'])
+    task_data['updated_at'] = datetime.fromisoformat(task_data['updated_at'])
+    # started_atがNoneでない場合のみiso形式から復元
+    if task_data.get('started_at'):
+        task_data['started_at'] = datetime.fromisoformat(task_data['started_at'])
+    task_data['priority'] = TaskPriority(task_data['priority'])
+    task_data['status'] = TaskStatus(task_data['status'])
+    return ImplementationTask(**task_data)
+
+
 class ImplementationTaskManager:
-    """実装タスク管理システム"""
+    """実装タスク管理システム
+    
+    タスクはワークスペースのSQLiteストア（tasks.db）に保存し、状態遷移は
+    行単位で書き込む。tasks はメモリ上の一覧で、他のプロセス（ダッシュボード
+    や別の実行系）がストアを更新していれば参照時に変更分だけ読み直す。
+    """
     
     def __init__(self, workspace_path: str, logger: StructuredLogger):
         self.workspace_path = Path(workspace_path)
         self.logger = logger
-        self.tasks: Dict[str, ImplementationTask] = {}
+        self._tasks: Dict[str, ImplementationTask] = {}
+        self._revision = 0
         
         # タスク保存ディレクトリを設定
         self.tasks_dir = self.workspace_path / '.nocturnal' / 'implementation_tasks'
         self.tasks_dir.mkdir(parents=True, exist_ok=True)
+        self.store = TaskStore(self.tasks_dir / 'tasks.db')
         
         # 既存のタスクを読み込み
         self._load_tasks()
     
+    @property
+    def tasks(self) -> Dict[str, ImplementationTask]:
+        """タスク一覧（他プロセスの更新があれば反映してから返す）"""
+        if self.store.changed_externally():
+            self._refresh()
+        return self._tasks
+    
     def _load_tasks(self):
-        """既存のタスクファイルを読み込み"""
+        """既存のタスクを読み込み（旧形式のtasks.jsonがあれば先に取り込む）"""
         try:
-            tasks_file = self.tasks_dir / 'tasks.json'
-            if tasks_file.exists():
-                with open(tasks_file, 'r', encoding='utf-8') as f:
-                    tasks_data = json.load(f)
-                
-                for task_id, task_data in tasks_data.items():
-                    # datetime フィールドを復元
-                    task_data['created_at'] = datetime.fromisoformat(task_data['created_at'])
-                    task_data['updated_at'] = datetime.fromisoformat(task_data['updated_at'])
-                    # started_atがNoneでない場合のみiso形式から復元
-                    if task_data.get('started_at'):
-                        task_data['started_at'] = datetime.fromisoformat(task_data['started_at'])
-                    task_data['priority'] = TaskPriority(task_data['priority'])
-                    task_data['status'] = TaskStatus(task_data['status'])
-                    
-                    self.tasks[task_id] = ImplementationTask(**task_data)
-                
+            legacy_file = self.tasks_dir / 'tasks.json'
+            if legacy_file.exists():
+                self._import_legacy_file(legacy_file)
+            
+            self._refresh()
+            
+            if self._tasks:
                 self.logger.log(LogLevel.INFO, LogCategory.SYSTEM, 
-                              f"📋 {len(self.tasks)}個の実装タスクを読み込み完了")
+                              f"📋 {len(self._tasks)}個の実装タスクを読み込み完了")
             else:
                 self.logger.log(LogLevel.INFO, LogCategory.SYSTEM, "📋 新規タスク管理システムを初期化")
         except Exception as e:
             self.logger.log(LogLevel.ERROR, LogCategory.SYSTEM, f"タスク読み込みエラー: {e}")
-            self.tasks = {}
+            self._tasks = {}
+    
+    def _import_legacy_file(self, legacy_file: Path):
+        """旧形式のtasks.jsonをストアに移行し、取り込み済みの名前に変える"""
+        imported = self.import_legacy_tasks(legacy_file)
+        if imported is None:
+            return
+        
+        legacy_file.replace(legacy_file.with_name(legacy_file.name + '.imported'))
+        self.logger.log(LogLevel.INFO, LogCategory.SYSTEM, 
+                      f"📦 旧形式のタスクファイルから{imported}個のタスクを移行: {legacy_file}")
     
-    def _save_tasks(self):
-        """タスクをファイルに保存"""
+    def import_legacy_tasks(self, json_path: Path) -> Optional[int]:
+        """旧形式のタスクJSONを取り込む（既にあるタスクはそのまま）
+        
+        Returns:
+            取り込んだタスク数。読み込めなかった場合はNone
+        """
         try:
-            tasks_file = self.tasks_dir / 'tasks.json'
-            
-            # シリアライズ可能な形式に変換
-            tasks_data = {}
-            for task_id, task in self.tasks.items():
-                task_dict = asdict(task)
-                task_dict['created_at'] = task.created_at.isoformat()
-                task_dict['updated_at'] = task.updated_at.isoformat()
-                # started_atもiso形式に変換（Noneの場合はそのまま）
-                if task.started_at:
-                    task_dict['started_at'] = task.started_at.isoformat()
-                task_dict['priority'] = task.priority.value
-                task_dict['status'] = task.status.value
-                tasks_data[task_id] = task_dict
-            
-            with open(tasks_file, 'w', encoding='utf-8') as f:
-                json.dump(tasks_data, f, ensure_ascii=False, indent=2)
-            
-            self.logger.log(LogLevel.INFO, LogCategory.SYSTEM, 
-                          f"💾 {len(self.tasks)}個のタスクを保存完了")
+            records = read_legacy_tasks(json_path)
+            # 変換できないタスクは取り込む前に弾く
+            records = [task_to_record(task_from_record(record)) for record in records]
         except Exception as e:
+            self.logger.log(LogLevel.WARNING, LogCategory.SYSTEM, 
+                          f"旧形式タスクファイルを読み込めません: {json_path} - {e}")
+            return None
+        
+        imported = self.store.import_records(records)
+        self._refresh()
+        return imported
+    
+    def _refresh(self):
+        """ストアで更新されたタスクだけを読み直してメモリ上の一覧に反映"""
+        records, self._revision = self.store.load(self._revision)
+        for record in records:
+            task = task_from_record(record)
+            current = self._tasks.get(task.task_id)
+            if current is None:
+                self._tasks[task.task_id] = task
+            else:
+                # 実行系が保持しているオブジェクトをそのまま最新にする
+                current.__dict__.update(task.__dict__)
+    
+    def _transition(self, task_id: str, status: TaskStatus, started_at: Optional[datetime],
+                    log_entry: Dict, expected_status: Optional[TaskStatus] = None) -> bool:
+        """ステータスを行単位で保存し、保存できたらメモリ上のタスクにも反映"""
+        task = self.tasks.get(task_id)
+        if task is None:
+            return False
+        
+        updated_at = datetime.now()
+        try:
+            updated = self.store.update_state(
+                task_id, status.value, updated_at.isoformat(),
+                started_at.isoformat() if started_at else None, log_entry,
+                expected_status=expected_status.value if expected_status else None
+            )
+        except sqlite3.Error as e:
             self.logger.log(LogLevel.ERROR, LogCategory.SYSTEM, f"タスク保存エラー: {e}")
+            return False
+        
+        if updated:
+            task.status = status
+            task.updated_at = updated_at
+            task.started_at = started_at
+            task.execution_log.append(log_entry)
+        return updated
     
     def create_task_from_specification(self, spec_section: Dict, parent_task_id: Optional[str] = None) -> str:
         """仕様書のセクションから実装タスクを作成"""
@@ -143,14 +225,39 @@ class ImplementationTaskManager:
             assigned_to=spec_section.get('assigned_to')
         )
         
-        self.tasks[task_id] = task
-        self._save_tasks()
+        try:
+            # 別のプロセスが同じIDで作成していたら連番を進める
+            sequence = len(self.tasks)
+            while not self.store.insert_task(task_to_record(task)):
+                sequence += 1
+                task.task_id = task_id = f"{task_id.rsplit('_', 1)[0]}_{sequence:03d}"
+        except sqlite3.Error as e:
+            self.logger.log(LogLevel.ERROR, LogCategory.SYSTEM, f"タスク保存エラー: {e}")
+        self._tasks[task_id] = task
         
         self.logger.log(LogLevel.INFO, LogCategory.SYSTEM, 
                       f"📝 新規実装タスク作成: {task_id} - {task.title}")
         
         return task_id
     
+    def set_task_dependencies(self, task_id: str, dependencies: List[str]) -> bool:
+        """タスクの依存関係を設定"""
+        task = self.tasks.get(task_id)
+        if task is None:
+            return False
+        
+        updated_at = datetime.now()
+        try:
+            if not self.store.set_dependencies(task_id, dependencies, updated_at.isoformat()):
+                return False
+        except sqlite3.Error as e:
+            self.logger.log(LogLevel.ERROR, LogCategory.SYSTEM, f"タスク保存エラー: {e}")
+            return False
+        
+        task.dependencies = list(dependencies)
+        task.updated_at = updated_at
+        return True
+    
     def break_down_specification_into_tasks(self, design_document: Dict) -> List[str]:
         """設計書を実装タスクに分割"""
         self.logger.log(LogLevel.INFO, LogCategory.SYSTEM, "🔧 仕様書からタスク分割を開始...")
@@ -216,47 +323,40 @@ class ImplementationTaskManager:
         return created_task_ids
     
     def get_ready_tasks(self) -> List[ImplementationTask]:
-        """実行可能なタスクを取得（依存関係を考慮）"""
-        ready_tasks = []
+        """実行可能なタスクを取得（依存関係を考慮）
         
-        for task in self.tasks.values():
-            if task.status in [TaskStatus.APPROVED] and self._are_dependencies_completed(task):
-                ready_tasks.append(task)
+        承認済みで依存タスクがすべて完了しているタスクを、ストアの索引を使う
+        1回の問い合わせで優先度順・作成順に取り出す。
+        """
+        tasks = self.tasks
+        try:
+            ready_ids = self.store.ready_task_ids()
+        except sqlite3.Error as e:
+            self.logger.log(LogLevel.ERROR, LogCategory.SYSTEM, f"タスク読み込みエラー: {e}")
+            return []
         
-        # 優先度順にソート
-        priority_order = {TaskPriority.CRITICAL: 0, TaskPriority.HIGH: 1, 
-                         TaskPriority.MEDIUM: 2, TaskPriority.LOW: 3}
-        ready_tasks.sort(key=lambda t: (priority_order[t.priority], t.created_at))
+        ready_tasks = [tasks[task_id] for task_id in ready_ids if task_id in tasks]
+        for task in ready_tasks:
+            for dep_id in task.dependencies:
+                if dep_id not in tasks:
+                    # 依存タスクが存在しない場合は警告
+                    self.logger.log(LogLevel.WARNING, LogCategory.SYSTEM, 
+                                  f"依存タスクが見つかりません: {dep_id}")
         
         return ready_tasks
     
-    def _are_dependencies_completed(self, task: ImplementationTask) -> bool:
-        """タスクの依存関係が完了しているかチェック"""
-        for dep_id in task.dependencies:
-            if dep_id in self.tasks:
-                if self.tasks[dep_id].status != TaskStatus.COMPLETED:
-                    return False
-            else:
-                # 依存タスクが存在しない場合は警告
-                self.logger.log(LogLevel.WARNING, LogCategory.SYSTEM, 
-                              f"依存タスクが見つかりません: {dep_id}")
-        return True
-    
     def approve_task(self, task_id: str, approver: str = "system") -> bool:
         """タスクを承認"""
-        if task_id not in self.tasks:
+        task = self.tasks.get(task_id)
+        if task is None:
             return False
         
-        task = self.tasks[task_id]
-        task.status = TaskStatus.APPROVED
-        task.updated_at = datetime.now()
-        task.execution_log.append({
+        if not self._transition(task_id, TaskStatus.APPROVED, task.started_at, {
             'action': 'approved',
             'timestamp': datetime.now().isoformat(),
             'approver': approver
-        })
-        
-        self._save_tasks()
+        }):
+            return False
         
         self.logger.log(LogLevel.INFO, LogCategory.SYSTEM, 
                       f"✅ タスク承認: {task_id} - {task.title}")
@@ -264,41 +364,34 @@ class ImplementationTaskManager:
         return True
     
     def start_task_execution(self, task_id: str) -> bool:
-        """タスクの実行を開始"""
-        if task_id not in self.tasks:
-            return False
+        """タスクの実行を開始
         
-        task = self.tasks[task_id]
-        task.status = TaskStatus.IN_PROGRESS
-        task.updated_at = datetime.now()
-        task.started_at = datetime.now()  # 実行開始時刻を記録
-        task.execution_log.append({
+        承認済みのタスクだけを実行中にする。他のプロセスが先に開始していた
+        場合はFalseを返す。
+        """
+        if not self._transition(task_id, TaskStatus.IN_PROGRESS, datetime.now(), {
             'action': 'started',
             'timestamp': datetime.now().isoformat()
-        })
-        
-        self._save_tasks()
+        }, expected_status=TaskStatus.APPROVED):
+            return False
         
         self.logger.log(LogLevel.INFO, LogCategory.SYSTEM, 
-                      f"🚀 タスク実行開始: {task_id} - {task.title}")
+                      f"🚀 タスク実行開始: {task_id} - {self.tasks[task_id].title}")
         
         return True
     
     def complete_task(self, task_id: str, execution_result: Dict) -> bool:
         """タスクを完了"""
-        if task_id not in self.tasks:
+        task = self.tasks.get(task_id)
+        if task is None:
             return False
         
-        task = self.tasks[task_id]
-        task.status = TaskStatus.COMPLETED
-        task.updated_at = datetime.now()
-        task.execution_log.append({
+        if not self._transition(task_id, TaskStatus.COMPLETED, task.started_at, {
             'action': 'completed',
             'timestamp': datetime.now().isoformat(),
             'result': execution_result
-        })
-        
-        self._save_tasks()
+        }):
+            return False
         
         self.logger.log(LogLevel.INFO, LogCategory.SYSTEM, 
                       f"✅ タスク完了: {task_id} - {task.title}")
@@ -307,25 +400,36 @@ class ImplementationTaskManager:
     
     def fail_task(self, task_id: str, error_info: Dict) -> bool:
         """タスクを失敗として記録"""
-        if task_id not in self.tasks:
+        task = self.tasks.get(task_id)
+        if task is None:
             return False
         
-        task = self.tasks[task_id]
-        task.status = TaskStatus.FAILED
-        task.updated_at = datetime.now()
-        task.execution_log.append({
+        if not self._transition(task_id, TaskStatus.FAILED, task.started_at, {
             'action': 'failed',
             'timestamp': datetime.now().isoformat(),
             'error': error_info
-        })
-        
-        self._save_tasks()
+        }):
+            return False
         
         self.logger.log(LogLevel.ERROR, LogCategory.SYSTEM, 
                       f"❌ タスク失敗: {task_id} - {task.title}")
         
         return True
     
+    def requeue_task(self, task_id: str, reason: str) -> bool:
+        """実行中のタスクを承認済みに戻す（中断された実行の再キュー）"""
+        if not self._transition(task_id, TaskStatus.APPROVED, None, {
+            'action': 'requeued',
+            'timestamp': datetime.now().isoformat(),
+            'reason': reason
+        }, expected_status=TaskStatus.IN_PROGRESS):
+            return False
+        
+        self.logger.log(LogLevel.WARNING, LogCategory.SYSTEM, 
+                      f"↩️ タスク再キュー: {task_id} - {reason}")
+        
+        return True
+    
     def get_task_summary(self) -> Dict[str, Any]:
         """タスクの統計情報を取得"""
         status_counts = {}
@@ -353,35 +457,35 @@ class ImplementationTaskManager:
         current_time = datetime.now()
         stall_threshold = timedelta(minutes=45)  # 45分を超えたら停止と判断
         
-        for task in self.tasks.values():  # .values()を追加
-            if task.status == TaskStatus.IN_PROGRESS:  # 正しいenum値を使用
-                # タスクが実行開始された時刻を確認
-                if hasattr(task, 'started_at') and task.started_at:
-                    elapsed_time = current_time - task.started_at
-                    if elapsed_time > stall_threshold:
-                        self.logger.log(LogLevel.WARNING, LogCategory.SYSTEM, 
-                                      f"停止したタスクを検出: {task.task_id} (実行時間: {elapsed_time})")
-                        task.status = TaskStatus.APPROVED  # 正しいenum値を使用
-                        task.started_at = None
-                        if hasattr(task, 'assigned_agent'):
-                            task.assigned_agent = None
-                        reset_count += 1
-                        self.logger.log(LogLevel.INFO, LogCategory.SYSTEM, 
-                                      f"タスク {task.task_id} をリセットしました")
-                else:
-                    # started_atが設定されていない古いrunningタスクもリセット
-                    self.logger.log(LogLevel.WARNING, LogCategory.SYSTEM, 
-                                  f"実行時刻不明のタスクを検出: {task.task_id}")
-                    task.status = TaskStatus.APPROVED  # 正しいenum値を使用
-                    task.started_at = None
-                    if hasattr(task, 'assigned_agent'):
-                        task.assigned_agent = None
-                    reset_count += 1
-                    self.logger.log(LogLevel.INFO, LogCategory.SYSTEM, 
-                                  f"タスク {task.task_id} をリセットしました")
+        for task in list(self.tasks.values()):
+            if task.status != TaskStatus.IN_PROGRESS:
+                continue
+            
+            # タスクが実行開始された時刻を確認
+            if task.started_at:
+                elapsed_time = current_time - task.started_at
+                if elapsed_time <= stall_threshold:
+                    continue
+                self.logger.log(LogLevel.WARNING, LogCategory.SYSTEM, 
+                              f"停止したタスクを検出: {task.task_id} (実行時間: {elapsed_time})")
+                reason = f"停止検出 (実行時間: {elapsed_time})"
+            else:
+                # started_atが設定されていない古いrunningタスクもリセット
+                self.logger.log(LogLevel.WARNING, LogCategory.SYSTEM, 
+                              f"実行時刻不明のタスクを検出: {task.task_id}")
+                reason = "実行時刻不明"
+            
+            # 別のプロセスが先に完了・リセットしていれば何もしない
+            if self._transition(task.task_id, TaskStatus.APPROVED, None, {
+                'action': 'reset',
+                'timestamp': current_time.isoformat(),
+                'reason': reason
+            }, expected_status=TaskStatus.IN_PROGRESS):
+                reset_count += 1
+                self.logger.log(LogLevel.INFO, LogCategory.SYSTEM, 
+                              f"タスク {task.task_id} をリセットしました")
         
         if reset_count > 0:
-            self._save_tasks()
             self.logger.log(LogLevel.INFO, LogCategory.SYSTEM, 
                           f"合計 {reset_count} 個のタスクをリセットしました")
         
@@ -795,9 +899,6 @@ playwright.config.ts (E2E用)
     
     async def _execute_with_strict_mode(self, task: ImplementationTask, instruction: str) -> Dict:
         """厳格モードでタスクを実行"""
-        import subprocess
-        import os
-        
         try:
             # 指示ファイルを作成
             strict_instruction_path = self.execution_dir / f"{task.task_id}_strict_retry.md"
@@ -823,14 +924,10 @@ playwright.config.ts (E2E用)
                 'PWD': str(self.workspace_path)
             })
             
-            result = subprocess.run(
+            result = await self._run_claude_process(
                 cmd,
-                capture_output=True,
-                text=True,
-                encoding='utf-8',
-                timeout=600,  # 10分タイムアウト（短縮）
-                cwd=self.workspace_path,
-                env=env
+                env=env,
+                timeout=600  # 10分タイムアウト（短縮）
             )
             
             # ファイル作成確認
@@ -875,19 +972,15 @@ playwright.config.ts (E2E用)
     
     async def _simulate_claude_execution(self, task: ImplementationTask, instruction: str) -> Dict:
         """ClaudeCodeを実際に実行してタスクを処理"""
-        import subprocess
         import tempfile
-        import psutil
-        import signal
         import time
-        import os
         
         try:
             self.logger.log(LogLevel.INFO, LogCategory.SYSTEM, 
                           f"🔄 ClaudeCode実行開始: {task.title}")
             
-            # 既存の長時間実行中のClaudeプロセスをクリーンアップ
-            self._cleanup_stale_claude_processes()
+            # 既存の長時間実行中のClaudeプロセスをクリーンアップ（終了待ちでループを止めない）
+            await asyncio.to_thread(self._cleanup_stale_claude_processes)
             
             # 指示ファイルを一時作成
             with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False, encoding='utf-8') as f:
@@ -924,15 +1017,11 @@ playwright.config.ts (E2E用)
             })
             
             # 指示を標準入力として渡す
-            result = subprocess.run(
+            result = await self._run_claude_process(
                 cmd,
-                input=instruction,  # 指示を標準入力として渡す
-                capture_output=True,
-                text=True,
-                encoding='utf-8',
+                env=env,
                 timeout=1800,  # 30分タイムアウト
-                cwd=self.workspace_path,
-                env=env
+                input_text=instruction  # 指示を標準入力として渡す
             )
             
             # 一時ファイル削除
@@ -1001,22 +1090,9 @@ playwright.config.ts (E2E用)
                     'message': f'タスク「{task.title}」のClaudeCode実行でエラーが発生しました'
                 }
                 
-        except subprocess.TimeoutExpired as e:
-            # タイムアウト時にプロセスを強制終了
-            if hasattr(e, 'process') and e.process:
-                try:
-                    # プロセスグループを終了
-                    process = psutil.Process(e.process.pid)
-                    for child in process.children(recursive=True):
-                        child.kill()
-                    process.kill()
-                    self.logger.log(LogLevel.WARNING, LogCategory.SYSTEM, 
-                                  f"🔪 タイムアウトによりClaudeプロセス(PID: {e.process.pid})を強制終了")
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    pass
-            
-            # 追加のクリーンアップ
-            self._cleanup_stale_claude_processes()
+        except subprocess.TimeoutExpired:
+            # プロセスグループは_run_claude_processで終了済み。残った古いプロセスも片付ける
+            await asyncio.to_thread(self._cleanup_stale_claude_processes)
             
             self.logger.log(LogLevel.ERROR, LogCategory.SYSTEM, 
                           f"⏰ ClaudeCode実行タイムアウト: {task.title}")
@@ -1047,6 +1123,51 @@ playwright.config.ts (E2E用)
                 'message': f'ClaudeCode実行中に予期しないエラーが発生しました: {e}'
             }
 
+    async def _run_claude_process(self, cmd: List[str], env: Dict[str, str], timeout: float,
+                                  input_text: Optional[str] = None) -> subprocess.CompletedProcess:
+        """ClaudeCodeをイベントループを止めずに実行する
+        
+        タイムアウトや呼び出し側のキャンセルでは、子プロセスを含む
+        プロセスグループごと終了させる。
+        """
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.PIPE if input_text is not None else asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=self.workspace_path,
+            env=env,
+            start_new_session=True
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(
+                process.communicate(input_text.encode('utf-8') if input_text is not None else None),
+                timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        finally:
+            if process.returncode is None:
+                self._kill_process_group(process)
+                await process.wait()
+        
+        return subprocess.CompletedProcess(
+            cmd, process.returncode,
+            stdout.decode('utf-8', errors='replace'), stderr.decode('utf-8', errors='replace')
+        )
+    
+    def _kill_process_group(self, process) -> None:
+        """プロセスとその子プロセスを強制終了"""
+        try:
+            if hasattr(os, 'killpg'):
+                os.killpg(process.pid, signal.SIGKILL)
+            else:
+                process.kill()
+            self.logger.log(LogLevel.WARNING, LogCategory.SYSTEM, 
+                          f"🔪 Claudeプロセス(PID: {process.pid})を強制終了")
+        except (ProcessLookupError, PermissionError):
+            pass
+    
     def _extract_modified_files(self, claude_output: str) -> List[str]:
         """ClaudeCode出力から変更されたファイル一覧を抽出"""
         modified_files = []
@@ -1147,9 +1268,20 @@ playwright.config.ts (E2E用)
 class NightlyTaskExecutor:
     """夜間タスク実行システム（ローカルLLM → ClaudeCode）"""
     
-    def __init__(self, workspace_path: str, logger):
+    def __init__(self, workspace_path: str, logger,
+                 max_concurrent: int = DEFAULT_MAX_CONCURRENT_TASKS,
+                 task_timeout: float = DEFAULT_TASK_TIMEOUT_SECONDS):
+        """
+        Args:
+            workspace_path: ワークスペースのパス
+            logger: 構造化ロガー
+            max_concurrent: 同時に実行するClaudeCodeの最大数
+            task_timeout: 1タスクあたりの制限時間（秒）
+        """
         self.workspace_path = workspace_path
         self.logger = logger
+        self.max_concurrent = max_concurrent
+        self.task_timeout = task_timeout
         self.task_manager = ImplementationTaskManager(workspace_path, logger)
         self.claude_executor = ClaudeCodeExecutor(workspace_path, logger)
 
@@ -1161,10 +1293,22 @@ class NightlyTaskExecutor:
         """
         return self.task_manager._detect_and_reset_stalled_tasks()
     
-    async def execute_nightly_tasks(self, max_tasks: int = 5) -> Dict:
-        """夜間タスク実行メイン処理"""
+    async def execute_nightly_tasks(self, max_tasks: Optional[int] = 5,
+                                    max_concurrent: Optional[int] = None) -> Dict:
+        """夜間タスク実行メイン処理
+        
+        実行可能なタスクを最大 max_concurrent 件まで同時に実行する。
+        タスクが終わるたびに実行可能なタスクを取り直すので、依存先の
+        完了を待っていたタスクは空いた枠ですぐに開始される。
+        
+        Args:
+            max_tasks: この呼び出しで開始するタスクの上限（Noneで無制限）
+            max_concurrent: 同時実行数（省略時はコンストラクタの値）
+        """
+        max_concurrent = max(1, max_concurrent or self.max_concurrent)
         self.logger.log(LogLevel.INFO, LogCategory.SYSTEM, 
-                      f"🌙 夜間タスク実行開始 (最大{max_tasks}タスク)")
+                      f"🌙 夜間タスク実行開始 (最大{max_tasks if max_tasks is not None else '無制限'}タスク, "
+                      f"同時{max_concurrent}タスク)")
         
         execution_summary = {
             'start_time': datetime.now().isoformat(),
@@ -1172,8 +1316,11 @@ class NightlyTaskExecutor:
             'failed_tasks': [],
             'skipped_tasks': [],
             'reset_tasks': [],
-            'total_execution_time': 0
+            'total_execution_time': 0,
+            'max_concurrent': max_concurrent
         }
+        run_start = datetime.now()
+        in_flight: Dict[asyncio.Task, ImplementationTask] = {}
         
         try:
             # 🔄 途中停止タスクの検出と自動リセット
@@ -1183,81 +1330,43 @@ class NightlyTaskExecutor:
                 self.logger.log(LogLevel.INFO, LogCategory.SYSTEM, 
                               f"🔄 {reset_count}個の途中停止タスクをリセットしました")
             
-            # 実行可能なタスクを取得
-            ready_tasks = self.task_manager.get_ready_tasks()
-            
-            if not ready_tasks:
-                self.logger.log(LogLevel.INFO, LogCategory.SYSTEM, 
-                              "📋 実行可能なタスクがありません")
-                execution_summary['message'] = '実行可能なタスクがありません'
-                return execution_summary
-            
-            # 実行するタスクを制限
-            tasks_to_execute = ready_tasks[:max_tasks]
-            
-            self.logger.log(LogLevel.INFO, LogCategory.SYSTEM, 
-                          f"🎯 {len(tasks_to_execute)}個のタスクを実行開始")
-            
-            for task in tasks_to_execute:
-                execution_start = datetime.now()
-                
-                try:
-                    # ローカルLLMがClaudeCodeに実行指示を送信
-                    self.logger.log(LogLevel.INFO, LogCategory.SYSTEM, 
-                                  f"🤖 ローカルLLM → ClaudeCode: {task.title}")
-                    
-                    # タスク実行開始をマーク
-                    self.task_manager.start_task_execution(task.task_id)
-                    
-                    # ClaudeCodeでタスク実行
-                    execution_result = await self.claude_executor.execute_task_via_claude_code(task)
-                    
-                    execution_time = (datetime.now() - execution_start).total_seconds()
-                    
-                    if execution_result['status'] == 'success':
-                        # タスク完了をマーク
-                        self.task_manager.complete_task(task.task_id, execution_result)
-                        execution_summary['executed_tasks'].append({
-                            'task_id': task.task_id,
-                            'title': task.title,
-                            'execution_time': execution_time,
-                            'result': execution_result
-                        })
+            launched = 0
+            while True:
+                # 空いた枠に実行可能なタスクを投入（依存先の完了で増えたものも含む）
+                if max_tasks is None or launched < max_tasks:
+                    for task in self.task_manager.get_ready_tasks():
+                        if len(in_flight) >= max_concurrent or (max_tasks is not None and launched >= max_tasks):
+                            break
                         
+                        # ローカルLLMがClaudeCodeに実行指示を送信
                         self.logger.log(LogLevel.INFO, LogCategory.SYSTEM, 
-                                      f"✅ タスク完了: {task.title} ({execution_time:.1f}秒)")
-                    else:
-                        # タスク失敗をマーク
-                        self.task_manager.fail_task(task.task_id, execution_result)
-                        execution_summary['failed_tasks'].append({
-                            'task_id': task.task_id,
-                            'title': task.title,
-                            'execution_time': execution_time,
-                            'error': execution_result.get('error', 'Unknown error')
-                        })
+                                      f"🤖 ローカルLLM → ClaudeCode: {task.title}")
                         
-                        self.logger.log(LogLevel.ERROR, LogCategory.SYSTEM, 
-                                      f"❌ タスク失敗: {task.title}")
+                        # タスク実行開始をマーク（次のget_ready_tasksには含まれなくなる）
+                        if not self.task_manager.start_task_execution(task.task_id):
+                            # 別のプロセスが先に開始したタスクは飛ばす
+                            continue
+                        in_flight[asyncio.create_task(self._run_task(task))] = task
+                        launched += 1
                 
-                except Exception as e:
-                    execution_time = (datetime.now() - execution_start).total_seconds()
-                    error_info = {'error': str(e), 'type': 'execution_error'}
-                    self.task_manager.fail_task(task.task_id, error_info)
-                    
-                    execution_summary['failed_tasks'].append({
-                        'task_id': task.task_id,
-                        'title': task.title,
-                        'execution_time': execution_time,
-                        'error': str(e)
-                    })
-                    
-                    self.logger.log(LogLevel.ERROR, LogCategory.SYSTEM, 
-                                  f"❌ タスク実行エラー: {task.title} - {e}")
+                if not in_flight:
+                    break
                 
-                execution_summary['total_execution_time'] += execution_time
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for finished in done:
+                    task = in_flight.pop(finished)
+                    execution_result, execution_time = finished.result()
+                    self._record_task_result(task, execution_result, execution_time, execution_summary)
+            
+            if launched == 0:
+                self.logger.log(LogLevel.INFO, LogCategory.SYSTEM, 
+                              "📋 実行可能なタスクがありません")
+                execution_summary['message'] = '実行可能なタスクがありません'
+                return execution_summary
             
             # 実行結果サマリー
             task_summary = self.task_manager.get_task_summary()
+            execution_summary['total_execution_time'] = (datetime.now() - run_start).total_seconds()
             execution_summary['end_time'] = datetime.now().isoformat()
             execution_summary['task_summary'] = task_summary
             
@@ -1277,10 +1386,68 @@ class NightlyTaskExecutor:
             self.logger.log(LogLevel.ERROR, LogCategory.SYSTEM, 
                           f"夜間タスク実行システムエラー: {e}")
             return execution_summary
+        
+        finally:
+            # 中断された場合は実行中のタスクを止め、次回実行できるよう承認済みに戻す
+            for running, task in in_flight.items():
+                running.cancel()
+                self.task_manager.requeue_task(task.task_id, "夜間タスク実行が中断されました")
+            if in_flight:
+                await asyncio.gather(*in_flight, return_exceptions=True)
+    
+    async def _run_task(self, task: ImplementationTask) -> Tuple[Dict, float]:
+        """1タスクを制限時間付きでClaudeCodeに実行させる（例外は結果に変換）"""
+        execution_start = datetime.now()
+        try:
+            # ClaudeCodeでタスク実行
+            execution_result = await asyncio.wait_for(
+                self.claude_executor.execute_task_via_claude_code(task),
+                timeout=self.task_timeout
+            )
+        except asyncio.TimeoutError:
+            execution_result = {
+                'error': f'タスク実行がタイムアウトしました（{self.task_timeout:g}秒）',
+                'type': 'timeout'
+            }
+        except Exception as e:
+            execution_result = {'error': str(e), 'type': 'execution_error'}
+        
+        return execution_result, (datetime.now() - execution_start).total_seconds()
+    
+    def _record_task_result(self, task: ImplementationTask, execution_result: Dict,
+                            execution_time: float, execution_summary: Dict) -> None:
+        """タスクの結果を状態とサマリーに反映"""
+        if execution_result.get('status') == 'success':
+            # タスク完了をマーク
+            self.task_manager.complete_task(task.task_id, execution_result)
+            execution_summary['executed_tasks'].append({
+                'task_id': task.task_id,
+                'title': task.title,
+                'execution_time': execution_time,
+                'result': execution_result
+            })
+            
+            self.logger.log(LogLevel.INFO, LogCategory.SYSTEM, 
+                          f"✅ タスク完了: {task.title} ({execution_time:.1f}秒)")
+        else:
+            # タスク失敗をマーク
+            self.task_manager.fail_task(task.task_id, execution_result)
+            execution_summary['failed_tasks'].append({
+                'task_id': task.task_id,
+                'title': task.title,
+                'execution_time': execution_time,
+                'error': execution_result.get('error', 'Unknown error')
+            })
+            
+            self.logger.log(LogLevel.ERROR, LogCategory.SYSTEM, 
+                          f"❌ タスク失敗: {task.title} - {execution_result.get('error', 'Unknown error')}")
 
     async def execute_continuous_tasks(self, max_concurrent: int = 3, check_interval: int = 300) -> Dict:
         """継続的なタスク実行（自動再開機能付き）
         
+        実行可能なタスクがある間は max_concurrent 件ずつ途切れなく実行し、
+        なくなったときだけ check_interval 秒待って再チェックする。
+        
         Args:
             max_concurrent: 最大同時実行タスク数
             check_interval: チェック間隔（秒）
@@ -1298,60 +1465,36 @@ class NightlyTaskExecutor:
         
         try:
             while True:
-                cycle_start = datetime.now()
-                
-                # 🧹 停止タスクのリセット + プロセスクリーンアップ
-                reset_count = await self._detect_and_reset_stalled_tasks()
-                if reset_count > 0:
-                    total_summary['total_reset'] += reset_count
-                    self.logger.log(LogLevel.INFO, LogCategory.SYSTEM, 
-                                  f"🔄 {reset_count}個のタスクをリセットしました")
-                
-                # 実行可能タスクをチェック
-                ready_tasks = self.task_manager.get_ready_tasks()
-                
-                if not ready_tasks:
-                    self.logger.log(LogLevel.INFO, LogCategory.SYSTEM, 
-                                  f"✅ 全タスク完了または実行可能タスクなし。{check_interval}秒後に再チェック...")
-                    
-                    # 完了率をチェック
-                    task_summary = self.task_manager.get_task_summary()
-                    if task_summary['completion_rate'] >= 1.0:
-                        self.logger.log(LogLevel.INFO, LogCategory.SYSTEM, 
-                                      "🎉 全タスクが完了しました！")
-                        break
-                    
-                    await asyncio.sleep(check_interval)
-                    continue
-                
-                # 実行するタスクを選択
-                tasks_to_execute = ready_tasks[:max_concurrent]
-                
+                # 実行可能なタスクがなくなるまで実行（停止タスクのリセットを含む）
                 self.logger.log(LogLevel.INFO, LogCategory.SYSTEM, 
-                              f"🎯 サイクル#{total_summary['execution_cycles'] + 1}: "
-                              f"{len(tasks_to_execute)}個のタスクを実行開始")
-                
-                # タスク実行
-                cycle_result = await self.execute_nightly_tasks(max_tasks=max_concurrent)
+                              f"🎯 サイクル#{total_summary['execution_cycles'] + 1}を開始")
+                cycle_result = await self.execute_nightly_tasks(max_tasks=None, max_concurrent=max_concurrent)
                 
                 # サマリー更新
                 total_summary['total_executed'] += len(cycle_result.get('executed_tasks', []))
                 total_summary['total_failed'] += len(cycle_result.get('failed_tasks', []))
+                total_summary['total_reset'] += cycle_result.get('reset_tasks_count', 0)
                 total_summary['execution_cycles'] += 1
                 
                 # 進捗状況を表示
                 task_summary = self.task_manager.get_task_summary()
+                status_counts = task_summary['status_counts']
                 self.logger.log(LogLevel.INFO, LogCategory.SYSTEM, 
                               f"📊 現在の進捗: {task_summary['completion_rate']:.1%} "
-                              f"(完了: {task_summary['completed']}, "
-                              f"実行中: {task_summary['in_progress']}, "
-                              f"待機中: {task_summary['pending']})")
+                              f"(完了: {status_counts[TaskStatus.COMPLETED.value]}, "
+                              f"実行中: {status_counts[TaskStatus.IN_PROGRESS.value]}, "
+                              f"待機中: {status_counts[TaskStatus.PENDING.value]})")
                 
-                # 次のサイクルまで待機
-                if ready_tasks:  # まだタスクがある場合は短い間隔
-                    await asyncio.sleep(30)
-                else:
-                    await asyncio.sleep(check_interval)
+                # 完了率をチェック
+                if task_summary['completion_rate'] >= 1.0:
+                    self.logger.log(LogLevel.INFO, LogCategory.SYSTEM, 
+                                  "🎉 全タスクが完了しました！")
+                    break
+                
+                # 実行可能なタスクは使い切ったので、承認や停止タスクのリセットを待つ
+                self.logger.log(LogLevel.INFO, LogCategory.SYSTEM, 
+                              f"✅ 実行可能タスクなし。{check_interval}秒後に再チェック...")
+                await asyncio.sleep(check_interval)
                     
         except KeyboardInterrupt:
             self.logger.log(LogLevel.INFO, LogCategory.SYSTEM, 
@@ -0,0 +1,369 @@
+"""
+実装タスクストア
+実装タスクをSQLite（WALモード）に保存し、状態遷移を行単位で更新する。
+夜間実行とダッシュボードのように別プロセスから同じワークスペースの
+タスクを読み書きしても安全に共有できる。
+
+ストアはタスクをJSON互換の辞書（旧 tasks.json の1件と同じ形）で
+受け渡しするので、ImplementationTask には依存しない。
+"""
+
+import json
+import logging
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+TASK_STORE_SCHEMA_VERSION = 1
+
+# get_ready_tasks の並び順（小さいほど先）
+PRIORITY_RANKS = {'CRITICAL': 0, 'HIGH': 1, 'MEDIUM': 2, 'LOW': 3}
+
+_TASK_COLUMNS = (
+    'task_id', 'title', 'description', 'priority', 'status', 'estimated_hours',
+    'technical_requirements', 'acceptance_criteria', 'created_at', 'updated_at',
+    'assigned_to', 'started_at'
+)
+
+
+class TaskStore:
+    """SQLiteに保存する実装タスクストア
+
+    書き込みは BEGIN IMMEDIATE のトランザクションで行い、更新した行の
+    revision をストア全体で単調増加させる。読み手は PRAGMA data_version で
+    他の接続のコミットを検出し、revision が進んだ行だけを読み直せる。
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._data_version: Optional[int] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """データベースを開き、必要ならスキーマを作成"""
+        if self._conn is not None:
+            return self._conn
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # トランザクションは明示的に開始する。ロック待ちは最大30秒
+        conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None,
+                               check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, TASK_STORE_SCHEMA_VERSION):
+            raise RuntimeError(f"未対応のタスクストアのバージョンです: {version} ({self.db_path})")
+
+        conn.executescript(f"""
+            BEGIN;
+            CREATE TABLE IF NOT EXISTS tasks (
+                task_id TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                description TEXT NOT NULL,
+                priority TEXT NOT NULL,
+                priority_rank INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                estimated_hours REAL NOT NULL,
+                technical_requirements TEXT NOT NULL,
+                acceptance_criteria TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                assigned_to TEXT,
+                started_at TEXT,
+                revision INTEGER NOT NULL
+            );
+            -- get_ready_tasks はこの2つの索引だけで答えられる
+            CREATE INDEX IF NOT EXISTS idx_tasks_ready ON tasks(status, priority_rank, created_at, task_id);
+            CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(task_id, status);
+            CREATE INDEX IF NOT EXISTS idx_tasks_revision ON tasks(revision);
+            CREATE TABLE IF NOT EXISTS task_dependencies (
+                task_id TEXT NOT NULL REFERENCES tasks(task_id) ON DELETE CASCADE,
+                depends_on TEXT NOT NULL,
+                PRIMARY KEY (task_id, depends_on)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_dependencies_target ON task_dependencies(depends_on);
+            CREATE TABLE IF NOT EXISTS task_log (
+                entry_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                task_id TEXT NOT NULL REFERENCES tasks(task_id) ON DELETE CASCADE,
+                entry TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_task_log_task ON task_log(task_id, entry_id);
+            PRAGMA user_version = {TASK_STORE_SCHEMA_VERSION};
+            COMMIT;
+        """)
+
+        self._conn = conn
+        return conn
+
+    def close(self):
+        """接続を閉じる"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _write(self):
+        """書き込みトランザクション（他プロセスの書き込みとは直列化される）"""
+        return _WriteTransaction(self._connect())
+
+    def _next_revision(self, conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT COALESCE(MAX(revision), 0) + 1 FROM tasks").fetchone()[0]
+
+    def _insert_record(self, conn: sqlite3.Connection, record: Dict[str, Any], revision: int) -> bool:
+        """まだないタスク1件を依存関係と実行ログを含めて書き込む"""
+        values = _row_values(record)
+        cursor = conn.execute(
+            f"INSERT OR IGNORE INTO tasks ({', '.join(_TASK_COLUMNS)}, priority_rank, revision) "
+            f"VALUES ({', '.join('?' * len(_TASK_COLUMNS))}, ?, ?)",
+            (*values, PRIORITY_RANKS.get(record['priority'], len(PRIORITY_RANKS)), revision)
+        )
+        if cursor.rowcount == 0:
+            return False
+
+        task_id = record['task_id']
+        conn.execute("DELETE FROM task_dependencies WHERE task_id = ?", (task_id,))
+        conn.execute("DELETE FROM task_log WHERE task_id = ?", (task_id,))
+        conn.executemany(
+            "INSERT OR IGNORE INTO task_dependencies (task_id, depends_on) VALUES (?, ?)",
+            [(task_id, dependency) for dependency in record.get('dependencies') or []]
+        )
+        conn.executemany(
+            "INSERT INTO task_log (task_id, entry) VALUES (?, ?)",
+            [(task_id, _dump(entry)) for entry in record.get('execution_log') or []]
+        )
+        return True
+
+    def insert_task(self, record: Dict[str, Any]) -> bool:
+        """タスク1件を作成する（同じIDのタスクが既にあれば何もせずFalse）"""
+        with self._write() as conn:
+            return self._insert_record(conn, record, self._next_revision(conn))
+
+    def import_records(self, records: Iterable[Dict[str, Any]]) -> int:
+        """まだないタスクだけをまとめて取り込み、取り込んだ件数を返す"""
+        imported = 0
+        with self._write() as conn:
+            revision = self._next_revision(conn)
+            for record in records:
+                imported += self._insert_record(conn, record, revision)
+        return imported
+
+    def update_state(
+        self,
+        task_id: str,
+        status: str,
+        updated_at: str,
+        started_at: Optional[str],
+        log_entry: Dict[str, Any],
+        expected_status: Optional[str] = None
+    ) -> bool:
+        """ステータスを行単位で更新し、実行ログを1件追記する
+
+        Args:
+            expected_status: 指定した場合、現在のステータスが一致するときだけ更新する
+
+        Returns:
+            bool: 更新した場合True
+        """
+        with self._write() as conn:
+            query = "UPDATE tasks SET status = ?, updated_at = ?, started_at = ?, revision = ? WHERE task_id = ?"
+            params = [status, updated_at, started_at, self._next_revision(conn), task_id]
+            if expected_status is not None:
+                query += " AND status = ?"
+                params.append(expected_status)
+            if conn.execute(query, params).rowcount == 0:
+                return False
+            conn.execute("INSERT INTO task_log (task_id, entry) VALUES (?, ?)", (task_id, _dump(log_entry)))
+        return True
+
+    def set_dependencies(self, task_id: str, dependencies: List[str], updated_at: str) -> bool:
+        """依存関係を置き換える"""
+        with self._write() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET updated_at = ?, revision = ? WHERE task_id = ?",
+                (updated_at, self._next_revision(conn), task_id)
+            )
+            if cursor.rowcount == 0:
+                return False
+            conn.execute("DELETE FROM task_dependencies WHERE task_id = ?", (task_id,))
+            conn.executemany(
+                "INSERT OR IGNORE INTO task_dependencies (task_id, depends_on) VALUES (?, ?)",
+                [(task_id, dependency) for dependency in dependencies]
+            )
+        return True
+
+    def load(self, since_revision: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        """revision が since_revision より新しいタスクを読み込む
+
+        Returns:
+            (タスクの辞書のリスト, 読み込んだ中で最大のrevision)
+        """
+        conn = self._connect()
+        # 1つの読み取りトランザクションで一貫したスナップショットを読む
+        conn.execute("BEGIN")
+        try:
+            self._data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+            rows = conn.execute(
+                f"SELECT {', '.join(_TASK_COLUMNS)}, revision FROM tasks WHERE revision > ? ORDER BY revision",
+                (since_revision,)
+            ).fetchall()
+            if not rows:
+                return [], since_revision
+
+            records = {row[0]: _record_from_row(row) for row in rows}
+            for task_id, dependency in conn.execute("""
+                SELECT d.task_id, d.depends_on FROM task_dependencies d
+                JOIN tasks t ON t.task_id = d.task_id
+                WHERE t.revision > ?
+            """, (since_revision,)):
+                records[task_id]['dependencies'].append(dependency)
+            for task_id, entry in conn.execute("""
+                SELECT l.task_id, l.entry FROM task_log l
+                JOIN tasks t ON t.task_id = l.task_id
+                WHERE t.revision > ?
+                ORDER BY l.entry_id
+            """, (since_revision,)):
+                records[task_id]['execution_log'].append(json.loads(entry))
+            return list(records.values()), rows[-1][-1]
+        finally:
+            conn.execute("COMMIT")
+
+    def changed_externally(self) -> bool:
+        """前回の load 以降に他の接続がコミットしたか"""
+        if self._data_version is None:
+            return True
+        return self._connect().execute("PRAGMA data_version").fetchone()[0] != self._data_version
+
+    def ready_task_ids(self) -> List[str]:
+        """承認済みで、依存先がすべて完了したタスクのIDを優先度順に返す
+
+        存在しない依存先は完了扱いにする（従来の get_ready_tasks と同じ）。
+        """
+        return [row[0] for row in self._connect().execute("""
+            SELECT t.task_id FROM tasks t
+            WHERE t.status = 'APPROVED'
+              AND NOT EXISTS (
+                  SELECT 1 FROM task_dependencies d
+                  JOIN tasks dep ON dep.task_id = d.depends_on
+                  WHERE d.task_id = t.task_id AND dep.status != 'COMPLETED'
+              )
+            ORDER BY t.priority_rank, t.created_at
+        """)]
+
+
+class _WriteTransaction:
+    """BEGIN IMMEDIATE ... COMMIT（例外時はROLLBACK）"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+def _dump(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+def _row_values(record: Dict[str, Any]) -> Tuple:
+    values = []
+    for column in _TASK_COLUMNS:
+        value = record.get(column)
+        if column in ('technical_requirements', 'acceptance_criteria'):
+            value = _dump(value or [])
+        values.append(value)
+    return tuple(values)
+
+
+def _record_from_row(row: Tuple) -> Dict[str, Any]:
+    record = dict(zip(_TASK_COLUMNS, row))
+    record['technical_requirements'] = json.loads(record['technical_requirements'])
+    record['acceptance_criteria'] = json.loads(record['acceptance_criteria'])
+    record['dependencies'] = []
+    record['execution_log'] = []
+    return record
+
+
+def read_legacy_tasks(json_path: Path) -> List[Dict[str, Any]]:
+    """旧形式のタスクJSONをストアの辞書形式に変換する
+
+    次の2形式に対応する。
+    - .nocturnal/implementation_tasks/tasks.json（task_id をキーにした辞書）
+    - nocturnal_tasks/tasks.json（配列。IDには legacy_ を付ける）
+    """
+    with open(json_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    if isinstance(data, dict):
+        records = []
+        for task_id, task_data in data.items():
+            records.append({**task_data, 'task_id': task_id})
+        return records
+
+    records = []
+    now = datetime.now().isoformat()
+    for task_data in data:
+        created_at = task_data.get('created_at', now)
+        records.append({
+            'task_id': f"legacy_{task_data.get('id', 'unknown')}",
+            'title': task_data.get('description', 'Legacy Task')[:100],
+            'description': task_data.get('description', ''),
+            'priority': task_data.get('priority', 'MEDIUM').upper(),
+            'status': task_data.get('status', 'PENDING').upper(),
+            'dependencies': [],
+            'estimated_hours': task_data.get('estimated_hours', 1.0),
+            'technical_requirements': task_data.get('requirements', []),
+            'acceptance_criteria': [],
+            'created_at': created_at,
+            'updated_at': created_at,
+            'assigned_to': None,
+            'execution_log': [],
+            'started_at': None
+        })
+    return records
+
+
+# CLI実行用
+def main():
+    """旧形式のタスクJSONをワークスペースのタスクストアに取り込む"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="旧形式タスクJSONのインポーター")
+    parser.add_argument("workspace", help="ワークスペースのパス")
+    parser.add_argument("json_files", nargs="*",
+                        help="取り込むJSON（省略時はワークスペース内の旧tasks.json）")
+    args = parser.parse_args()
+
+    workspace = Path(args.workspace)
+    json_files = [Path(path) for path in args.json_files] or [
+        path for path in (workspace / '.nocturnal' / 'implementation_tasks' / 'tasks.json',
+                          workspace / 'nocturnal_tasks' / 'tasks.json')
+        if path.exists()
+    ]
+
+    store = TaskStore(workspace / '.nocturnal' / 'implementation_tasks' / 'tasks.db')
+    try:
+        for json_path in json_files:
+            records = read_legacy_tasks(json_path)
+            imported = store.import_records(records)
+            print(f"📋 {json_path}: {imported}/{len(records)}件を取り込みました")
+    finally:
+        store.close()
+
+    if not json_files:
+        print("取り込むタスクJSONがありません")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -174,6 +174,8 @@ class AICollaborativeSpecGenerator:
                     "components_identified": len(analysis.required_components),
                     "risks_identified": len(analysis.risk_factors)
                 }
+                if llm.last_stream_stats:
+                    phase_report["llm_stream"] = llm.last_stream_stats.to_dict()
                 
                 self.logger.info(f"📊 分析完了: 複雑性スコア {analysis.complexity_score:.2f}")
                 return analysis, phase_report
@@ -218,6 +220,8 @@ class AICollaborativeSpecGenerator:
                     "instruction_length": len(instruction),
                     "based_on_analysis": True
                 }
+                if llm.last_stream_stats:
+                    phase_report["llm_stream"] = llm.last_stream_stats.to_dict()
                 
                 self.logger.info(f"📋 指示生成完了: {len(instruction)}文字")
                 return instruction, phase_report
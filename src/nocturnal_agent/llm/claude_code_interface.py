@@ -12,9 +12,11 @@ from typing import Dict, List, Optional, Any
 from datetime import datetime
 from dataclasses import dataclass
 from pathlib import Path
-import aiohttp
 
 from ..core.models import Task
+from ..cost.usage_tracker import ServiceType
+from .llm_transport import LLMTransport, get_llm_transport
+from .response_cache import LLMResponseCache, get_response_cache
 
 
 @dataclass
@@ -43,10 +45,18 @@ class SpecificationDocument:
 class ClaudeCodeInterface:
     """ClaudeCode指示・通信システム"""
     
-    def __init__(self, config: ClaudeCodeConfig):
+    def __init__(self, config: ClaudeCodeConfig, transport: Optional[LLMTransport] = None,
+                 response_cache: Optional[LLMResponseCache] = None):
         self.config = config
         self.logger = logging.getLogger(__name__)
-        self.session: Optional[aiohttp.ClientSession] = None
+        # 接続はプロセス共通のトランスポートで使い回す
+        self.transport = transport or get_llm_transport()
+        self.response_cache = response_cache or get_response_cache()
+        self.headers = {
+            "x-api-key": self.config.api_key,
+            "content-type": "application/json",
+            "anthropic-version": "2023-06-01"
+        }
         
         # API キーの検証
         if not self.config.api_key or self.config.api_key.startswith("sk-"):
@@ -56,28 +66,18 @@ class ClaudeCodeInterface:
     async def __aenter__(self):
         """Async context manager entry"""
         if self.config.enabled:
-            self.session = aiohttp.ClientSession(
-                timeout=aiohttp.ClientTimeout(total=self.config.timeout),
-                headers={
-                    "x-api-key": self.config.api_key,
-                    "content-type": "application/json",
-                    "anthropic-version": "2023-06-01"
-                }
-            )
-            
-            try:
-                await self._test_api_connection()
-                self.logger.info("ClaudeCode APIに正常に接続しました")
-            except Exception as e:
-                self.logger.error(f"ClaudeCode API接続失敗: {e}")
+            # 接続テストの結果はキャッシュされ、TTL内は再実行しない
+            if await self.transport.check_health(f"claude:{self.config.api_url}", self._test_api_connection):
+                self.logger.debug("ClaudeCode APIに接続済みです")
+            else:
+                self.logger.error("ClaudeCode API接続失敗")
                 self.config.enabled = False
         
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Async context manager exit"""
-        if self.session:
-            await self.session.close()
+        """Async context manager exit（共有トランスポートは閉じない）"""
+        pass
     
     async def _test_api_connection(self) -> bool:
         """ClaudeCode API接続テスト"""
@@ -93,11 +93,14 @@ class ClaudeCodeInterface:
         }
         
         try:
-            async with self.session.post(self.config.api_url, json=test_payload) as response:
-                if response.status == 200:
-                    return True
-                else:
-                    raise Exception(f"API テストエラー: {response.status}")
+            response = await self.transport.request(
+                "POST", self.config.api_url, json=test_payload, headers=self.headers,
+                timeout=self.config.timeout, retries=1
+            )
+            if response.status == 200:
+                return True
+            else:
+                raise Exception(f"API テストエラー: {response.status}")
         except Exception as e:
             raise ConnectionError(f"ClaudeCode API接続失敗: {e}")
     
@@ -106,9 +109,6 @@ class ClaudeCodeInterface:
         if not self.config.enabled:
             return self._generate_fallback_spec()
         
-        if not self.session:
-            raise RuntimeError("ClaudeCodeセッションが初期化されていません")
-        
         payload = {
             "model": self.config.model,
             "max_tokens": self.config.max_tokens,
@@ -118,14 +118,32 @@ class ClaudeCodeInterface:
         if system_prompt:
             payload["system"] = system_prompt
         
+        # 同じ指示の再送（再試行・要件ファイルの再処理）はキャッシュから返す
+        prompt = json.dumps(messages, ensure_ascii=False)
+        options = {"max_tokens": self.config.max_tokens, "system": system_prompt}
+        cached = self.response_cache.lookup(self.config.model, options, prompt, service=ServiceType.CLAUDE_API.value)
+        if cached is not None:
+            self.logger.info(f"ClaudeCode応答キャッシュを使用しました (類似度 {cached.similarity:.2f})")
+            return cached.response
+        
         try:
-            async with self.session.post(self.config.api_url, json=payload) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return data["content"][0]["text"]
-                else:
-                    error_text = await response.text()
-                    raise Exception(f"API エラー {response.status}: {error_text}")
+            started = datetime.now()
+            response = await self.transport.request(
+                "POST", self.config.api_url, json=payload, headers=self.headers, timeout=self.config.timeout
+            )
+            if response.status == 200:
+                data = response.json()
+                text = data["content"][0]["text"]
+                usage = data.get("usage", {})
+                self.response_cache.store(
+                    self.config.model, options, prompt, text,
+                    service=ServiceType.CLAUDE_API.value,
+                    tokens=usage.get("input_tokens", 0) + usage.get("output_tokens", 0),
+                    latency=(datetime.now() - started).total_seconds()
+                )
+                return text
+            else:
+                raise Exception(f"API エラー {response.status}: {response.text()}")
                     
         except Exception as e:
             self.logger.error(f"ClaudeCode API呼び出しエラー: {e}")
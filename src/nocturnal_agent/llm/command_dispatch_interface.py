@@ -14,6 +14,7 @@ from enum import Enum
 
 from ..core.config import LLMConfig
 from ..core.models import Task, TaskPriority
+from .local_llm_interface import JSONObjectStop, LocalLLMInterface, StreamStats
 
 
 class CommandType(Enum):
@@ -82,6 +83,9 @@ class CommandDispatchInterface:
         self.max_concurrent_commands = 3
         self.quality_threshold = 0.85
         self.risk_tolerance = "medium"
+        
+        # 直近の戦略相談のストリーミング計測結果
+        self.last_stream_stats: Optional[StreamStats] = None
     
     async def initiate_strategic_campaign(self, task: Task) -> str:
         """戦略キャンペーンの開始"""
@@ -394,15 +398,30 @@ class CommandDispatchInterface:
         )
     
     async def _strategic_consultation(self, prompt: str) -> str:
-        """戦略的相談（ローカルLLM呼び出し）"""
+        """戦略的相談（ローカルLLM呼び出し）
+        
+        応答はストリーミングで受け取り、最初のJSONオブジェクトが閉じた
+        時点で生成を打ち切る。JSONが得られなければフォールバック応答を返す。
+        """
         if not self.config.enabled:
             return self._generate_fallback_strategic_response(prompt)
         
-        # 実際のローカルLLM呼び出し（簡略化）
-        # 実装では local_llm_interface の _call_llm を使用
-        await asyncio.sleep(0.1)  # 模擬処理時間
+        stop = JSONObjectStop()
+        try:
+            async with LocalLLMInterface(self.config) as llm:
+                tokens = []
+                async for token in llm.stream_llm(prompt, max_tokens=512, stop=stop):
+                    if not tokens:
+                        self.logger.info(f"🎖️ 指揮官応答受信開始 ({llm.last_stream_stats.time_to_first_token:.2f}秒)")
+                    tokens.append(token)
+                self.last_stream_stats = llm.last_stream_stats
+            
+            if stop.start is not None and llm.last_stream_stats.stopped_early:
+                return "".join(tokens)[stop.start:]
+            self.logger.warning("ローカルLLMの応答にJSONが含まれていません（フォールバック使用）")
+        except Exception as e:
+            self.logger.warning(f"戦略相談でLLMエラー（フォールバック使用）: {e}")
         
-        # フォールバック応答（実際の実装では適切なLLM応答）
         return self._generate_fallback_strategic_response(prompt)
     
     def _generate_fallback_strategic_response(self, prompt: str) -> str:
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+LLM Transport - LLM呼び出し共通のHTTPトランスポート
+Claude・Ollama・LM Studioへの接続をプロセス全体で共有する
+"""
+
+import asyncio
+import json
+import logging
+import random
+import time
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import aiohttp
+
+
+logger = logging.getLogger(__name__)
+
+# 一時的な失敗として再試行するステータス
+RETRY_STATUSES = frozenset({408, 429, 500, 502, 503, 504, 529})
+
+
+@dataclass
+class TransportResponse:
+    """本文まで読み込んだHTTPレスポンス"""
+    status: int
+    body: bytes
+    headers: Dict[str, str]
+    attempts: int = 1
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+    def text(self) -> str:
+        return self.body.decode('utf-8', errors='replace')
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+
+@dataclass
+class _LoopState:
+    """イベントループごとのセッションと同時実行制限"""
+    session: aiohttp.ClientSession
+    limits: Dict[str, asyncio.Semaphore] = field(default_factory=dict)
+    health_locks: Dict[str, asyncio.Lock] = field(default_factory=dict)
+
+
+class LLMTransport:
+    """LLM APIへのHTTP接続をプロセス全体で共有するトランスポート
+
+    呼び出しごとにClientSessionを作り直すと、毎回TCP/TLSハンドシェイクと
+    接続確認のリクエストが発生する。トランスポートはイベントループごとに
+    1つのセッションを持ち、エンドポイント（オリジン）ごとのkeep-alive接続を
+    使い回す。
+
+    - エンドポイントごとの同時リクエスト数を制限する。aiohttpはHTTP/1.1の
+      パイプライン化を行わないため、1接続に流れるリクエストは常に1つで、
+      同時リクエスト数がそのまま接続数の上限になる。
+    - 接続確認の結果はTTL付きでキャッシュし、呼び出しごとのプローブを省く。
+    - 接続エラーと一時的なステータス（429/5xx）はジッター付き指数
+      バックオフで再試行する。
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        トランスポートを初期化
+
+        Args:
+            config: トランスポート設定
+        """
+        config = config or {}
+        self.limit_per_endpoint = config.get('limit_per_endpoint', 8)
+        # オリジン（scheme://host:port）ごとの個別上限
+        self.endpoint_limits = dict(config.get('endpoint_limits', {}))
+        self.keepalive_timeout = config.get('keepalive_timeout_seconds', 60)
+        self.connect_timeout = config.get('connect_timeout_seconds', 30)
+        self.health_ttl = config.get('health_ttl_seconds', 300)
+        self.health_failure_ttl = config.get('health_failure_ttl_seconds', 15)
+        self.max_retries = config.get('max_retries', 3)
+        self.backoff_base = config.get('backoff_base_seconds', 0.5)
+        self.backoff_max = config.get('backoff_max_seconds', 20.0)
+
+        self._loops: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = weakref.WeakKeyDictionary()
+        self._health: Dict[str, Tuple[bool, float]] = {}
+
+        self.stats = {
+            'requests': 0,
+            'retries': 0,
+            'failures': 0,
+            'connections_created': 0,
+            'connections_reused': 0,
+            'health_probes': 0,
+            'health_cache_hits': 0,
+        }
+
+    async def request(self, method: str, url: str, *, json: Any = None,
+                      headers: Optional[Dict[str, str]] = None,
+                      timeout: Optional[float] = None,
+                      retries: Optional[int] = None) -> TransportResponse:
+        """
+        リクエストを送信してレスポンス全体を読み込む
+
+        接続エラーと一時的なステータスは再試行する。それ以外のステータスは
+        そのまま返すので、呼び出し側で判定する。読み取りタイムアウトは
+        生成の途中で起きるため再試行しない。
+
+        Args:
+            method: HTTPメソッド
+            url: リクエストURL
+            json: JSONボディ
+            headers: リクエストヘッダー
+            timeout: 全体のタイムアウト秒数
+            retries: 最大再試行回数（既定: max_retries）
+
+        Returns:
+            レスポンス
+
+        Raises:
+            aiohttp.ClientError: 再試行しても接続できなかった場合
+            asyncio.TimeoutError: タイムアウトした場合
+        """
+        state = self._state()
+        limit = self._endpoint_limit(state, url)
+        client_timeout = aiohttp.ClientTimeout(total=timeout, sock_connect=self.connect_timeout)
+        retries = self.max_retries if retries is None else retries
+
+        attempt = 0
+        while True:
+            attempt += 1
+            self.stats['requests'] += 1
+            try:
+                async with limit:
+                    async with state.session.request(method, url, json=json, headers=headers,
+                                                     timeout=client_timeout) as response:
+                        result = TransportResponse(
+                            status=response.status,
+                            body=await response.read(),
+                            headers=dict(response.headers),
+                            attempts=attempt
+                        )
+            except aiohttp.ClientConnectionError as e:
+                if not self._is_retryable_error(e) or attempt > retries:
+                    self.stats['failures'] += 1
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"LLM接続エラーのため再試行します ({attempt}/{retries}, {delay:.1f}秒後): {url}: {e!r}")
+            else:
+                if result.status not in RETRY_STATUSES or attempt > retries:
+                    return result
+                delay = max(self._backoff(attempt), self._retry_after(result))
+                logger.warning(f"LLM APIが{result.status}を返したため再試行します ({attempt}/{retries}, {delay:.1f}秒後): {url}")
+
+            self.stats['retries'] += 1
+            await asyncio.sleep(delay)
+
+    async def stream_lines(self, method: str, url: str, *, json: Any = None,
+                           headers: Optional[Dict[str, str]] = None,
+                           idle_timeout: Optional[float] = None,
+                           retries: Optional[int] = None) -> AsyncIterator[bytes]:
+        """
+        レスポンス本文を行ごとに受け取る（NDJSONのストリーミング用）
+
+        再試行はレスポンスヘッダーを受け取るまでに限る。受信途中で
+        ジェネレーターを閉じると接続も閉じるため、サーバー側の生成は
+        そこで打ち切られる。ストリームを読み終えるまで、エンドポイントの
+        同時リクエスト枠を1つ占有する。
+
+        Args:
+            method: HTTPメソッド
+            url: リクエストURL
+            json: JSONボディ
+            headers: リクエストヘッダー
+            idle_timeout: チャンク間の最大待機秒数（全体の時間は制限しない）
+            retries: 最大再試行回数（既定: max_retries）
+
+        Yields:
+            空行を除いた本文の各行
+
+        Raises:
+            aiohttp.ClientResponseError: エラーステータスが返った場合
+            aiohttp.ClientError: 再試行しても接続できなかった場合
+        """
+        state = self._state()
+        limit = self._endpoint_limit(state, url)
+        client_timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.connect_timeout, sock_read=idle_timeout)
+        retries = self.max_retries if retries is None else retries
+
+        attempt = 0
+        while True:
+            attempt += 1
+            self.stats['requests'] += 1
+            await limit.acquire()
+            try:
+                response = await state.session.request(method, url, json=json, headers=headers,
+                                                       timeout=client_timeout)
+            except aiohttp.ClientConnectionError as e:
+                limit.release()
+                if not self._is_retryable_error(e) or attempt > retries:
+                    self.stats['failures'] += 1
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"LLM接続エラーのため再試行します ({attempt}/{retries}, {delay:.1f}秒後): {url}: {e!r}")
+            except BaseException:
+                limit.release()
+                raise
+            else:
+                if response.status not in RETRY_STATUSES or attempt > retries:
+                    break
+                response.release()
+                limit.release()
+                delay = max(self._backoff(attempt), self._retry_after(
+                    TransportResponse(status=response.status, body=b'', headers=dict(response.headers))
+                ))
+                logger.warning(f"LLM APIが{response.status}を返したため再試行します ({attempt}/{retries}, {delay:.1f}秒後): {url}")
+
+            self.stats['retries'] += 1
+            await asyncio.sleep(delay)
+
+        try:
+            async with response:
+                if response.status >= 400:
+                    body = await response.text(errors='replace')
+                    raise aiohttp.ClientResponseError(
+                        response.request_info, response.history,
+                        status=response.status, message=body[:200]
+                    )
+                async for line in response.content:
+                    if line.strip():
+                        yield line
+        finally:
+            limit.release()
+
+    async def check_health(self, key: str, probe: Callable[[], Awaitable[bool]],
+                           ttl: Optional[float] = None) -> bool:
+        """
+        TTL付きでキャッシュした接続確認の結果を取得
+
+        キャッシュが切れている場合だけプローブを実行する。同じキーの
+        同時呼び出しではプローブは1回だけ実行される。失敗はより短い
+        health_failure_ttl_seconds だけキャッシュする。
+
+        Args:
+            key: キャッシュキー（例: "ollama:http://localhost:11434"）
+            probe: 接続できればTrueを返すコルーチン関数。例外は失敗扱い
+            ttl: 成功結果のキャッシュ秒数（既定: health_ttl_seconds）
+
+        Returns:
+            接続できるかどうか
+        """
+        cached = self._cached_health(key)
+        if cached is not None:
+            self.stats['health_cache_hits'] += 1
+            return cached
+
+        state = self._state()
+        lock = state.health_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            cached = self._cached_health(key)
+            if cached is not None:
+                self.stats['health_cache_hits'] += 1
+                return cached
+
+            self.stats['health_probes'] += 1
+            try:
+                healthy = bool(await probe())
+            except Exception as e:
+                logger.warning(f"接続確認に失敗しました ({key}): {e}")
+                healthy = False
+
+            lifetime = (self.health_ttl if ttl is None else ttl) if healthy else self.health_failure_ttl
+            self._health[key] = (healthy, time.monotonic() + lifetime)
+            return healthy
+
+    def invalidate_health(self, key: str):
+        """接続確認のキャッシュを破棄（呼び出し失敗時など）"""
+        self._health.pop(key, None)
+
+    async def close(self):
+        """現在のイベントループのセッションを閉じる"""
+        loop = asyncio.get_running_loop()
+        state = self._loops.pop(loop, None)
+        if state is not None and not state.session.closed:
+            await state.session.close()
+
+    def get_status(self) -> Dict[str, Any]:
+        """トランスポートの状態を取得"""
+        now = time.monotonic()
+        return {
+            'active_sessions': sum(1 for state in self._loops.values() if not state.session.closed),
+            'limit_per_endpoint': self.limit_per_endpoint,
+            'endpoint_limits': dict(self.endpoint_limits),
+            'health': {key: healthy for key, (healthy, expires) in self._health.items() if expires > now},
+            'statistics': dict(self.stats),
+        }
+
+    def _state(self) -> _LoopState:
+        """実行中のイベントループのセッションを取得（なければ作成）"""
+        loop = asyncio.get_running_loop()
+        state = self._loops.get(loop)
+        if state is None or state.session.closed:
+            trace = aiohttp.TraceConfig()
+            trace.on_connection_create_end.append(self._on_connection_created)
+            trace.on_connection_reuseconn.append(self._on_connection_reused)
+            # 接続数はエンドポイントごとのセマフォで制限する
+            connector = aiohttp.TCPConnector(limit=0, limit_per_host=0, keepalive_timeout=self.keepalive_timeout)
+            state = _LoopState(session=aiohttp.ClientSession(connector=connector, trace_configs=[trace]))
+            self._loops[loop] = state
+        return state
+
+    def _endpoint_limit(self, state: _LoopState, url: str) -> asyncio.Semaphore:
+        """エンドポイントの同時リクエスト数制限を取得"""
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        limit = state.limits.get(origin)
+        if limit is None:
+            limit = asyncio.Semaphore(self.endpoint_limits.get(origin, self.limit_per_endpoint))
+            state.limits[origin] = limit
+        return limit
+
+    def _cached_health(self, key: str) -> Optional[bool]:
+        """有効期限内のキャッシュ結果"""
+        cached = self._health.get(key)
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+        return None
+
+    def _backoff(self, attempt: int) -> float:
+        """フルジッター付き指数バックオフの待機秒数"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+    def _retry_after(self, response: TransportResponse) -> float:
+        """Retry-Afterヘッダーの秒数（上限 backoff_max_seconds）"""
+        try:
+            return min(float(response.headers.get('Retry-After', 0)), self.backoff_max)
+        except ValueError:
+            return 0.0
+
+    @staticmethod
+    def _is_retryable_error(error: aiohttp.ClientConnectionError) -> bool:
+        """再試行してよい接続エラーか（接続タイムアウト以外のタイムアウトは除く）"""
+        if isinstance(error, asyncio.TimeoutError):
+            return isinstance(error, getattr(aiohttp, 'ConnectionTimeoutError', ()))
+        return True
+
+    async def _on_connection_created(self, session, context, params):
+        self.stats['connections_created'] += 1
+
+    async def _on_connection_reused(self, session, context, params):
+        self.stats['connections_reused'] += 1
+
+
+_shared_transport: Optional[LLMTransport] = None
+
+
+def get_llm_transport(config: Optional[Dict[str, Any]] = None) -> LLMTransport:
+    """
+    プロセス共通のトランスポートを取得（初回呼び出し時に作成）
+
+    Args:
+        config: 未作成の場合に使うトランスポート設定
+    """
+    global _shared_transport
+    if _shared_transport is None:
+        _shared_transport = LLMTransport(config)
+    return _shared_transport
+
+
+async def close_llm_transport():
+    """現在のイベントループで共有トランスポートのセッションを閉じる"""
+    if _shared_transport is not None:
+        await _shared_transport.close()
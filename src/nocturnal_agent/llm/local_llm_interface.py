@@ -8,14 +8,16 @@ import asyncio
 import json
 import logging
 import time
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Callable, Dict, List, Optional, Any
 from datetime import datetime
 from dataclasses import dataclass
-import aiohttp
 
 from ..core.config import LLMConfig
 from ..core.models import Task, TaskPriority
 from ..core.stability_manager import get_stability_manager
+from ..cost.usage_tracker import ServiceType
+from .llm_transport import LLMTransport, get_llm_transport
+from .response_cache import LLMResponseCache, get_response_cache
 from .ollama_manager import OllamaManager
 
 
@@ -31,6 +33,107 @@ class TaskAnalysis:
     claude_code_instruction: str
 
 
+@dataclass
+class StreamStats:
+    """ストリーミング生成の計測結果"""
+    time_to_first_token: Optional[float] = None
+    duration: float = 0.0
+    tokens: int = 0
+    stopped_early: bool = False
+    
+    @property
+    def tokens_per_second(self) -> float:
+        """最初のトークン以降の生成速度"""
+        generating = self.duration - (self.time_to_first_token or 0.0)
+        return self.tokens / generating if generating > 0 else 0.0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "time_to_first_token": self.time_to_first_token,
+            "duration": self.duration,
+            "tokens": self.tokens,
+            "tokens_per_second": self.tokens_per_second,
+            "stopped_early": self.stopped_early
+        }
+
+
+class JSONObjectStop:
+    """最初のJSONオブジェクトが閉じた時点で生成を止める停止条件
+    
+    生成済みテキストを渡すと、オブジェクトが完結していればその終端位置を
+    返す。前回までに調べた位置を覚えているため、トークンごとに呼んでも
+    全体の走査は1回で済む。文字列中の括弧は数えない。
+    """
+    
+    def __init__(self):
+        self.start: Optional[int] = None  # オブジェクト開始位置（前置きの説明文を除く）
+        self._position = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+    
+    def __repr__(self) -> str:
+        return "JSONObjectStop()"
+    
+    def __call__(self, text: str) -> Optional[int]:
+        for index in range(self._position, len(text)):
+            char = text[index]
+            if self.start is None:
+                if char == '{':
+                    self.start = index
+                    self._depth = 1
+            elif self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == '{':
+                self._depth += 1
+            elif char == '}':
+                self._depth -= 1
+                if self._depth == 0:
+                    self._position = index + 1
+                    return index + 1
+        self._position = len(text)
+        return None
+
+
+class SectionStop:
+    """指定した見出しのセクションが終わった時点で生成を止める停止条件
+    
+    見出しの後に同じかより上位の見出しが現れたら、その行の先頭位置を返す。
+    見出しは行が完結してから判定する。
+    """
+    
+    def __init__(self, heading: str):
+        self.heading = heading.strip()
+        self.level = len(self.heading) - len(self.heading.lstrip('#'))
+        self._position = 0
+        self._found = False
+    
+    def __repr__(self) -> str:
+        return f"SectionStop({self.heading!r})"
+    
+    def __call__(self, text: str) -> Optional[int]:
+        while True:
+            newline = text.find('\n', self._position)
+            if newline < 0:
+                return None
+            line_start = self._position
+            line = text[line_start:newline].strip()
+            self._position = newline + 1
+            if not self._found:
+                self._found = line.startswith(self.heading)
+            elif line.startswith('#'):
+                level = len(line) - len(line.lstrip('#'))
+                if not self.level or level <= self.level:
+                    return line_start
+
+
 @dataclass
 class SpecReview:
     """仕様書レビュー結果"""
@@ -46,11 +149,22 @@ class SpecReview:
 class LocalLLMInterface:
     """ローカルLLMとの通信インターフェース"""
     
-    def __init__(self, config: LLMConfig):
+    # 生成リクエストのタイムアウト: 10分固定
+    REQUEST_TIMEOUT_SECONDS = 600
+    # ストリーミング時のトークン間の最大待機秒数（モデルのロード時間を含む）
+    STREAM_IDLE_TIMEOUT_SECONDS = 120
+    
+    def __init__(self, config: LLMConfig, transport: Optional[LLMTransport] = None,
+                 response_cache: Optional[LLMResponseCache] = None):
         self.config = config
         self.logger = logging.getLogger(__name__)
-        self.session: Optional[aiohttp.ClientSession] = None
-        self.ollama_manager = OllamaManager(self.config.api_url)
+        # 接続はプロセス共通のトランスポートで使い回す
+        self.transport = transport or get_llm_transport()
+        self.response_cache = response_cache or get_response_cache()
+        self.ollama_manager = OllamaManager(self.config.api_url, transport=self.transport)
+        self.health_key = f"ollama:{self.config.api_url}"
+        # 直近のストリーミング生成の計測結果
+        self.last_stream_stats: Optional[StreamStats] = None
     
     async def __aenter__(self):
         """Async context manager entry"""
@@ -58,50 +172,139 @@ class LocalLLMInterface:
             self.logger.warning("ローカルLLMが無効化されています")
             return self
             
-        # Ollamaサーバーの確実な起動確認
-        self.logger.info("🔍 Ollamaサーバー状況確認中...")
-        if not self.ollama_manager.ensure_server_running():
+        # Ollamaサーバーの確実な起動確認（結果はTTL内キャッシュされる）
+        if not await self.transport.check_health(self.health_key, self._ensure_server):
             raise RuntimeError("Ollamaサーバーの起動に失敗しました")
             
-        # 10分タイムアウト設定（確実な適用）
-        timeout_seconds = 600  # 10分固定
-        timeout = aiohttp.ClientTimeout(
-            total=timeout_seconds,               # 全体のタイムアウト: 10分
-            sock_connect=60,                     # 接続タイムアウト: 1分
-            sock_read=timeout_seconds            # 読み取りタイムアウト: 10分
-        )
-        self.session = aiohttp.ClientSession(timeout=timeout)
-        
-        # LLM接続テスト
-        try:
-            await self._test_connection()
-            self.logger.info("ローカルLLMに正常に接続しました")
-        except Exception as e:
-            self.logger.error(f"ローカルLLM接続失敗: {e}")
-            
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Async context manager exit"""
-        if self.session:
-            await self.session.close()
+        """Async context manager exit（共有トランスポートは閉じない）"""
+        pass
+    
+    async def _ensure_server(self) -> bool:
+        """Ollamaサーバーの動作確認、停止中なら起動"""
+        self.logger.info("🔍 Ollamaサーバー状況確認中...")
+        if await self.ollama_manager.async_check_server_status():
+            self.logger.info("Ollama サーバーが正常に動作しています")
+            return True
+        # 起動処理はプロセス起動と待機を伴うためスレッドで実行
+        return await asyncio.get_running_loop().run_in_executor(None, self.ollama_manager.ensure_server_running)
     
     async def _test_connection(self) -> bool:
         """LLM接続テスト（サーバーのみ確認）"""
         try:
             # Test with Ollama's /api/tags endpoint to check if server is running
-            async with self.session.get(f"{self.config.api_url}/api/tags") as response:
-                if response.status == 200:
-                    self.logger.info("Ollama サーバーが正常に動作しています")
-                    return True
-                else:
-                    raise ConnectionError(f"Ollama server not responding: {response.status}")
+            response = await self.transport.request("GET", f"{self.config.api_url}/api/tags", timeout=60)
+            if response.status == 200:
+                self.logger.info("Ollama サーバーが正常に動作しています")
+                return True
+            else:
+                raise ConnectionError(f"Ollama server not responding: {response.status}")
         except Exception as e:
             self.logger.error(f"接続テストエラー: {e}")
             raise ConnectionError("ローカルLLMとの接続に失敗しました")
     
-    async def _call_llm(self, prompt: str, max_tokens: int = None) -> str:
-        """ローカルLLMを呼び出し"""
+    @property
+    def model_name(self) -> str:
+        return self.config.model_path or "llama3.2:3b"
+    
+    def _build_payload(self, prompt: str, num_predict: int, stream: bool) -> Dict[str, Any]:
+        """Ollama /api/generate のリクエストボディ"""
+        return {
+            "model": self.model_name,
+            "prompt": prompt,
+            "stream": stream,
+            "options": {
+                "num_predict": num_predict,
+                "temperature": 0.3,
+                "top_p": 0.8,
+                "repeat_penalty": 1.1
+            }
+        }
+    
+    async def stream_llm(self, prompt: str, max_tokens: int = None,
+                         stop: Optional[Callable[[str], Optional[int]]] = None) -> AsyncIterator[str]:
+        """
+        ローカルLLMの応答をトークンごとに受け取る
+        
+        停止条件が終端位置を返すと、そこまでを返して接続を閉じる。
+        Ollamaは接続が閉じると生成を打ち切るため、不要なトークンを
+        生成しない。計測結果は last_stream_stats に記録する。
+        
+        Args:
+            prompt: プロンプト
+            max_tokens: 最大生成トークン数（既定: 512）。早期停止があるため
+                通常モードの512トークン上限は適用しない
+            stop: 生成済みテキストを受け取り、完結していれば終端位置を返す
+                停止条件（JSONObjectStop, SectionStop など）
+        
+        Yields:
+            生成されたトークン
+        
+        Raises:
+            aiohttp.ClientError: 接続できない場合やエラーステータスの場合
+            RuntimeError: Ollamaが生成中にエラーを返した場合
+        """
+        stats = StreamStats()
+        self.last_stream_stats = stats
+        payload = self._build_payload(prompt, max_tokens or 512, stream=True)
+        lines = self.transport.stream_lines(
+            "POST",
+            f"{self.config.api_url}/api/generate",
+            json=payload,
+            headers={"Content-Type": "application/json"},
+            idle_timeout=self.STREAM_IDLE_TIMEOUT_SECONDS
+        )
+        text = ""
+        start_time = time.perf_counter()
+        
+        try:
+            async for line in lines:
+                chunk = json.loads(line)
+                if "error" in chunk:
+                    raise RuntimeError(f"Ollama 生成エラー: {chunk['error']}")
+                
+                token = chunk.get("response", "")
+                if token:
+                    if stats.time_to_first_token is None:
+                        stats.time_to_first_token = time.perf_counter() - start_time
+                    stats.tokens += 1
+                    text += token
+                    end = stop(text) if stop is not None else None
+                    if end is not None:
+                        # 終端より後ろの部分は返さない
+                        token = token[:len(token) - (len(text) - end)]
+                        stats.stopped_early = True
+                        if token:
+                            yield token
+                        break
+                    yield token
+                
+                if chunk.get("done"):
+                    stats.tokens = chunk.get("eval_count", stats.tokens)
+                    break
+        finally:
+            await lines.aclose()
+            stats.duration = time.perf_counter() - start_time
+            if stats.time_to_first_token is not None:
+                self.logger.info(
+                    f"ストリーミング生成: 初回トークン {stats.time_to_first_token:.2f}秒, "
+                    f"{stats.tokens}トークン ({stats.tokens_per_second:.1f} tokens/秒)"
+                    f"{', 早期停止' if stats.stopped_early else ''}"
+                )
+    
+    async def _call_llm(self, prompt: str, max_tokens: int = None, stream: bool = False,
+                        stop: Optional[Callable[[str], Optional[int]]] = None) -> str:
+        """
+        ローカルLLMを呼び出し
+        
+        Args:
+            prompt: プロンプト
+            max_tokens: 最大生成トークン数
+            stream: ストリーミングで受信するか（stop はストリーミング時のみ有効）
+            stop: 早期停止条件
+        """
         start_time = time.time()
         success = False
         result = ""
@@ -113,41 +316,56 @@ class LocalLLMInterface:
                 success = True
                 return result
             
-            if not self.session:
-                raise RuntimeError("LLMセッションが初期化されていません")
+            # 同じプロンプト・生成条件の応答はキャッシュから返す
+            num_predict = (max_tokens or 512) if stream else min(max_tokens or 512, 512)
+            payload = self._build_payload(prompt, num_predict, stream=stream)
+            cache_options = {**payload["options"], "stop": repr(stop) if stop is not None else None}
+            cached = self.response_cache.lookup(self.model_name, cache_options, prompt,
+                                                service=ServiceType.LOCAL_LLM.value)
+            if cached is not None:
+                self.logger.info(f"LLM応答キャッシュを使用しました (類似度 {cached.similarity:.2f})")
+                self.last_stream_stats = None
+                success = True
+                result = cached.response
+                return result
             
-            # Ollama API format - 通常モード（ストリーミング無効）
-            payload = {
-                "model": self.config.model_path or "llama3.2:3b",
-                "prompt": prompt,
-                "stream": False,  # 通常モードに戻す
-                "options": {
-                    "num_predict": min(max_tokens or 512, 512),
-                    "temperature": 0.3,
-                    "top_p": 0.8,
-                    "repeat_penalty": 1.1
-                }
-            }
+            generation_start = time.time()
+            if stream:
+                tokens = [token async for token in self.stream_llm(prompt, max_tokens, stop=stop)]
+                success = True
+                result = "".join(tokens).strip()
+                self.response_cache.store(self.model_name, cache_options, prompt, result,
+                                          service=ServiceType.LOCAL_LLM.value,
+                                          tokens=self.last_stream_stats.tokens,
+                                          latency=time.time() - generation_start)
+                return result
             
             # Ollama uses /api/generate endpoint
-            async with self.session.post(
+            response = await self.transport.request(
+                "POST",
                 f"{self.config.api_url}/api/generate",
                 json=payload,
-                headers={"Content-Type": "application/json"}
-            ) as response:
-                if response.status == 200:
-                    # 通常モード
-                    data = await response.json()
-                    success = True
-                    result = data["response"].strip()
-                    return result
-                else:
-                    error_text = await response.text()
-                    self.logger.error(f"Ollama API エラー: {response.status} - {error_text}")
-                    raise Exception(f"LLM API エラー: {response.status}")
+                headers={"Content-Type": "application/json"},
+                timeout=self.REQUEST_TIMEOUT_SECONDS
+            )
+            if response.status == 200:
+                # 通常モード
+                data = response.json()
+                success = True
+                result = data["response"].strip()
+                self.response_cache.store(self.model_name, cache_options, prompt, result,
+                                          service=ServiceType.LOCAL_LLM.value,
+                                          tokens=data.get("eval_count", 0),
+                                          latency=time.time() - generation_start)
+                return result
+            else:
+                self.logger.error(f"Ollama API エラー: {response.status} - {response.text()}")
+                raise Exception(f"LLM API エラー: {response.status}")
                     
         except Exception as e:
             self.logger.error(f"ローカルLLM呼び出しエラー: {e}")
+            # 次の呼び出しでサーバー状態を確認し直す
+            self.transport.invalidate_health(self.health_key)
             result = self._generate_fallback_response(prompt)
             success = False
             return result
@@ -194,7 +412,8 @@ class LocalLLMInterface:
         
         # 直接フォールバック分析を使用（LLM応答は参考程度）
         try:
-            response = await self._call_llm(analysis_prompt, max_tokens=512)
+            # JSONが閉じた時点で生成を打ち切る
+            response = await self._call_llm(analysis_prompt, max_tokens=512, stream=True, stop=JSONObjectStop())
             self.logger.info(f"LLM応答を受信: {response[:100]}...")
         except Exception as e:
             self.logger.warning(f"LLM呼び出しエラー（フォールバック使用）: {e}")
@@ -218,7 +437,7 @@ class LocalLLMInterface:
         
         # LLM応答を試行
         try:
-            instruction = await self._call_llm(instruction_prompt, max_tokens=256)
+            instruction = await self._call_llm(instruction_prompt, max_tokens=256, stream=True)
             self.logger.info(f"指示生成LLM応答: {instruction[:100]}...")
         except Exception as e:
             self.logger.warning(f"指示生成でLLMエラー（フォールバック使用）: {e}")
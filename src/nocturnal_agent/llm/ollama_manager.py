@@ -10,14 +10,16 @@ import asyncio
 import subprocess
 import logging
 from typing import Optional
-import aiohttp
+
+from .llm_transport import LLMTransport, get_llm_transport
 
 
 class OllamaManager:
     """Ollamaサーバーの起動・管理クラス"""
     
-    def __init__(self, api_url: str = "http://localhost:11434"):
+    def __init__(self, api_url: str = "http://localhost:11434", transport: Optional[LLMTransport] = None):
         self.api_url = api_url
+        self.transport = transport or get_llm_transport()
         self.logger = logging.getLogger(__name__)
         self._process: Optional[subprocess.Popen] = None
         
@@ -107,10 +109,8 @@ class OllamaManager:
     async def async_check_server_status(self) -> bool:
         """非同期でサーバーの動作状況確認"""
         try:
-            timeout = aiohttp.ClientTimeout(total=5)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.get(f"{self.api_url}/api/tags") as response:
-                    return response.status == 200
+            response = await self.transport.request("GET", f"{self.api_url}/api/tags", timeout=5, retries=0)
+            return response.status == 200
         except:
             return False
     
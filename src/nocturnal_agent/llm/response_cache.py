@@ -0,0 +1,489 @@
+#!/usr/bin/env python3
+"""
+LLM Response Cache - LLM応答の永続キャッシュ
+同じプロンプトへの応答を (モデル, オプション, 正規化プロンプト) のハッシュで再利用する
+"""
+
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import random
+import time
+import unicodedata
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
+
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+
+# MinHashの置換に使う固定マスク（プロセス間で署名を比較できるよう固定シード）
+_MINHASH_SEED = 0x6E6F6374
+
+# bypass_response_cache() の中ではキャッシュを読まない
+_bypass_lookup: contextvars.ContextVar[bool] = contextvars.ContextVar('llm_cache_bypass', default=False)
+
+
+def normalize_prompt(prompt: str) -> str:
+    """キャッシュキー用にプロンプトを正規化（NFKC + 空白の畳み込み）"""
+    return " ".join(unicodedata.normalize('NFKC', prompt).split())
+
+
+@dataclass
+class CacheEntry:
+    """キャッシュエントリのメタデータ（応答本文は別ファイル）"""
+    key: str
+    namespace: str
+    created_at: float
+    last_access: float
+    size: int
+    service: str
+    tokens: int = 0
+    latency: float = 0.0
+    signature: Optional[List[int]] = None
+
+
+@dataclass
+class CacheHit:
+    """キャッシュヒットの結果"""
+    response: str
+    entry: CacheEntry
+    similarity: float = 1.0
+
+    @property
+    def near_duplicate(self) -> bool:
+        return self.similarity < 1.0
+
+
+@dataclass
+class _MinHashIndex:
+    """LSHバンドによる近似重複候補の索引"""
+    buckets: Dict[Tuple[str, int, Tuple[int, ...]], Set[str]] = field(default_factory=dict)
+
+    def add(self, entry: CacheEntry, bands: int):
+        for band_key in _band_keys(entry.namespace, entry.signature, bands):
+            self.buckets.setdefault(band_key, set()).add(entry.key)
+
+    def remove(self, entry: CacheEntry, bands: int):
+        for band_key in _band_keys(entry.namespace, entry.signature, bands):
+            bucket = self.buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(entry.key)
+                if not bucket:
+                    del self.buckets[band_key]
+
+    def candidates(self, namespace: str, signature: List[int], bands: int) -> Set[str]:
+        found: Set[str] = set()
+        for band_key in _band_keys(namespace, signature, bands):
+            found |= self.buckets.get(band_key, set())
+        return found
+
+
+def _band_keys(namespace: str, signature: List[int], bands: int):
+    rows = len(signature) // bands
+    for band in range(bands):
+        yield namespace, band, tuple(signature[band * rows:(band + 1) * rows])
+
+
+class LLMResponseCache:
+    """LLM応答の永続キャッシュ
+
+    完全一致の階層は (モデル, 生成オプション, 正規化したプロンプト) の
+    SHA-256をキーにする。任意で、文字シングルのMinHashによる近似重複の
+    階層を有効にできる。こちらは同じモデル・オプションの範囲で、推定
+    Jaccard類似度がしきい値以上のプロンプトの応答を返す。
+
+    応答本文はキーをファイル名にして保存し、メタデータは index.json に
+    まとめる。件数・合計サイズ・TTLを超えたエントリは最終参照の古い順に
+    削除する。ヒット・ミスのたびに登録したリスナーへイベントを通知する
+    （CostManager が節約額の集計に使う）。
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        キャッシュを初期化
+
+        Args:
+            config: キャッシュ設定
+                - enabled: キャッシュを使うか
+                - storage_path: 保存ディレクトリ（指定がなければキャッシュは無効）
+                - max_entries / max_bytes: 件数・合計サイズの上限
+                - ttl_seconds: エントリの有効期間
+                - near_duplicate: 近似重複の階層を使うか
+                - near_duplicate_threshold: 近似重複とみなす類似度
+        """
+        config = config or {}
+        storage_path = config.get('storage_path')
+        # 保存先の指定がなければ作業ディレクトリには何も書き出さない
+        self.enabled = bool(config.get('enabled', True) and storage_path)
+        self.storage_path: Optional[Path] = Path(storage_path) if storage_path else None
+        self.max_entries = config.get('max_entries', 2000)
+        self.max_bytes = config.get('max_bytes', 64 * 1024 * 1024)
+        self.ttl_seconds = config.get('ttl_seconds', 7 * 24 * 3600)
+        self.near_duplicate = config.get('near_duplicate', False)
+        self.near_duplicate_threshold = config.get('near_duplicate_threshold', 0.9)
+        self.shingle_size = config.get('shingle_size', 5)
+        self.num_perm = config.get('num_perm', 64)
+        self.bands = config.get('bands', 16)
+        # 参照時刻だけの変更は一定間隔でまとめて保存する
+        self.index_save_interval = config.get('index_save_interval_seconds', 30)
+
+        rng = random.Random(_MINHASH_SEED)
+        self._masks = [rng.getrandbits(64) for _ in range(self.num_perm)]
+
+        self._entries: Dict[str, CacheEntry] = {}
+        self._minhash = _MinHashIndex()
+        self._total_bytes = 0
+        self._loaded = False
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+        self.stats = {
+            'hits': 0,
+            'near_duplicate_hits': 0,
+            'misses': 0,
+            'bypassed': 0,
+            'stores': 0,
+            'evictions': 0,
+            'saved_seconds': 0.0,
+            'saved_tokens': 0,
+        }
+
+    def add_listener(self, callback: Callable[[Dict[str, Any]], None]):
+        """ヒット・ミスのイベントを受け取るコールバックを登録"""
+        self._listeners.append(callback)
+
+    def make_key(self, model: str, options: Dict[str, Any], prompt: str) -> Tuple[str, str]:
+        """
+        キャッシュキーを作成
+
+        Returns:
+            (名前空間, キー)。名前空間はモデルとオプションのハッシュ
+        """
+        namespace = hashlib.sha256(
+            json.dumps({'model': model, 'options': options}, sort_keys=True, default=str).encode('utf-8')
+        ).hexdigest()
+        key = hashlib.sha256(f"{namespace}\0{normalize_prompt(prompt)}".encode('utf-8')).hexdigest()
+        return namespace, key
+
+    def lookup(self, model: str, options: Dict[str, Any], prompt: str,
+               service: str = "local_llm", near_duplicate: Optional[bool] = None) -> Optional[CacheHit]:
+        """
+        キャッシュされた応答を検索
+
+        Args:
+            model: モデル名
+            options: 生成オプション（応答に影響するものすべて）
+            prompt: プロンプト
+            service: 呼び出し先サービス（ServiceTypeの値）
+            near_duplicate: 近似重複を探すか（既定: 設定値）
+
+        Returns:
+            ヒットした場合はその結果、なければNone
+        """
+        if not self.enabled:
+            return None
+        if _bypass_lookup.get():
+            self.stats['bypassed'] += 1
+            return None
+        self._ensure_loaded()
+
+        namespace, key = self.make_key(model, options, prompt)
+        hit = self._read_hit(key, 1.0)
+        if hit is None and (self.near_duplicate if near_duplicate is None else near_duplicate):
+            hit = self._lookup_near_duplicate(namespace, prompt)
+
+        if hit is None:
+            self.stats['misses'] += 1
+            self._notify({'event': 'miss', 'service': service})
+            return None
+
+        now = time.time()
+        hit.entry.last_access = now
+        self._dirty = True
+        if time.monotonic() - self._last_save > self.index_save_interval:
+            self._save_index()
+
+        self.stats['near_duplicate_hits' if hit.near_duplicate else 'hits'] += 1
+        self.stats['saved_seconds'] += hit.entry.latency
+        self.stats['saved_tokens'] += hit.entry.tokens
+        self._notify({
+            'event': 'near_duplicate_hit' if hit.near_duplicate else 'hit',
+            'service': hit.entry.service,
+            'saved_seconds': hit.entry.latency,
+            'saved_tokens': hit.entry.tokens,
+            'similarity': hit.similarity,
+        })
+        return hit
+
+    def store(self, model: str, options: Dict[str, Any], prompt: str, response: str,
+              service: str = "local_llm", tokens: int = 0, latency: float = 0.0):
+        """
+        応答を保存
+
+        フォールバック応答など、LLMが実際に生成していない応答は保存しないこと。
+
+        Args:
+            model: モデル名
+            options: 生成オプション
+            prompt: プロンプト
+            response: LLMの応答
+            service: 呼び出し先サービス（ServiceTypeの値）
+            tokens: 消費トークン数（節約額の算出に使う）
+            latency: 生成にかかった秒数
+        """
+        if not self.enabled:
+            return
+        self._ensure_loaded()
+
+        namespace, key = self.make_key(model, options, prompt)
+        body = json.dumps({'version': CACHE_VERSION, 'response': response}, ensure_ascii=False).encode('utf-8')
+        try:
+            self._write_atomic(self._entry_path(key), body)
+        except OSError as e:
+            logger.warning(f"LLM応答キャッシュの保存に失敗しました: {e}")
+            return
+
+        previous = self._entries.get(key)
+        if previous is not None:
+            self._forget(previous)
+
+        now = time.time()
+        entry = CacheEntry(
+            key=key,
+            namespace=namespace,
+            created_at=now,
+            last_access=now,
+            size=len(body),
+            service=service,
+            tokens=tokens,
+            latency=latency,
+            signature=self._signature(prompt) if self.near_duplicate else None
+        )
+        self._remember(entry)
+        self.stats['stores'] += 1
+
+        self._evict(now)
+        self._save_index()
+
+    def flush(self):
+        """未保存の参照時刻をインデックスに書き込む"""
+        if self._dirty:
+            self._save_index()
+
+    def clear(self):
+        """すべてのエントリを削除"""
+        self._ensure_loaded()
+        for entry in list(self._entries.values()):
+            self._delete(entry)
+        self._save_index()
+
+    def get_status(self) -> Dict[str, Any]:
+        """キャッシュの状態を取得"""
+        self._ensure_loaded()
+        lookups = self.stats['hits'] + self.stats['near_duplicate_hits'] + self.stats['misses']
+        return {
+            'enabled': self.enabled,
+            'storage_path': str(self.storage_path) if self.storage_path else None,
+            'entries': len(self._entries),
+            'total_bytes': self._total_bytes,
+            'near_duplicate': self.near_duplicate,
+            'hit_rate': (self.stats['hits'] + self.stats['near_duplicate_hits']) / lookups if lookups else 0.0,
+            'statistics': dict(self.stats),
+        }
+
+    def _read_hit(self, key: str, similarity: float) -> Optional[CacheHit]:
+        """エントリの応答本文を読み込む（期限切れ・欠損は削除）"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry.created_at > self.ttl_seconds:
+            self._delete(entry)
+            return None
+        try:
+            data = json.loads(self._entry_path(key).read_bytes())
+            if data.get('version') != CACHE_VERSION:
+                raise ValueError(f"unsupported version {data.get('version')}")
+            return CacheHit(response=data['response'], entry=entry, similarity=similarity)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Discarding unreadable LLM cache entry {key[:12]}: {e}")
+            self._delete(entry)
+            return None
+
+    def _lookup_near_duplicate(self, namespace: str, prompt: str) -> Optional[CacheHit]:
+        """同じ名前空間で最も類似度の高いエントリを検索"""
+        signature = self._signature(prompt)
+        best: Optional[Tuple[float, str]] = None
+        for key in self._minhash.candidates(namespace, signature, self.bands):
+            entry = self._entries.get(key)
+            if entry is None or entry.signature is None:
+                continue
+            similarity = sum(a == b for a, b in zip(signature, entry.signature)) / self.num_perm
+            if similarity >= self.near_duplicate_threshold and (best is None or similarity > best[0]):
+                best = (similarity, key)
+        if best is None:
+            return None
+        return self._read_hit(best[1], best[0])
+
+    def _signature(self, prompt: str) -> List[int]:
+        """正規化したプロンプトの文字シングルからMinHash署名を作成"""
+        text = normalize_prompt(prompt)
+        size = self.shingle_size
+        shingles = {text[i:i + size] for i in range(max(1, len(text) - size + 1))}
+        hashes = [
+            int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little')
+            for shingle in shingles
+        ]
+        return [min(map(mask.__xor__, hashes)) for mask in self._masks]
+
+    def _evict(self, now: float):
+        """期限切れと上限超過のエントリを削除"""
+        for entry in [e for e in self._entries.values() if now - e.created_at > self.ttl_seconds]:
+            self._delete(entry)
+            self.stats['evictions'] += 1
+
+        if len(self._entries) <= self.max_entries and self._total_bytes <= self.max_bytes:
+            return
+        for entry in sorted(self._entries.values(), key=lambda e: e.last_access):
+            if len(self._entries) <= self.max_entries and self._total_bytes <= self.max_bytes:
+                break
+            self._delete(entry)
+            self.stats['evictions'] += 1
+
+    def _remember(self, entry: CacheEntry):
+        self._entries[entry.key] = entry
+        self._total_bytes += entry.size
+        if entry.signature is not None:
+            self._minhash.add(entry, self.bands)
+
+    def _forget(self, entry: CacheEntry):
+        self._entries.pop(entry.key, None)
+        self._total_bytes -= entry.size
+        if entry.signature is not None:
+            self._minhash.remove(entry, self.bands)
+
+    def _delete(self, entry: CacheEntry):
+        self._forget(entry)
+        self._dirty = True
+        try:
+            self._entry_path(entry.key).unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"LLM応答キャッシュの削除に失敗しました: {e}")
+
+    def _entry_path(self, key: str) -> Path:
+        return self.storage_path / 'entries' / f"{key}.json"
+
+    def _ensure_loaded(self):
+        """インデックスを読み込む（初回のみ）"""
+        if self._loaded:
+            return
+        self._loaded = True
+        if self.storage_path is None:
+            return
+        index_path = self.storage_path / 'index.json'
+        if not index_path.exists():
+            return
+        try:
+            data = json.loads(index_path.read_text(encoding='utf-8'))
+            if data.get('version') != CACHE_VERSION:
+                raise ValueError(f"unsupported version {data.get('version')}")
+            entries = [CacheEntry(**item) for item in data['entries']]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Discarding unreadable LLM cache index {index_path}: {e}")
+            return
+
+        # 署名のないエントリ（近似重複を後から有効にした場合）は完全一致でだけ使う
+        for entry in entries:
+            self._remember(entry)
+
+    def _save_index(self):
+        """インデックスを保存"""
+        if self.storage_path is None:
+            return
+        data = {'version': CACHE_VERSION, 'entries': [asdict(entry) for entry in self._entries.values()]}
+        try:
+            self._write_atomic(self.storage_path / 'index.json',
+                               json.dumps(data, ensure_ascii=False).encode('utf-8'))
+            self._dirty = False
+            self._last_save = time.monotonic()
+        except OSError as e:
+            logger.warning(f"LLM応答キャッシュのインデックス保存に失敗しました: {e}")
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        temp_path.write_bytes(data)
+        os.replace(temp_path, path)
+
+    def _notify(self, event: Dict[str, Any]):
+        for callback in self._listeners:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.warning(f"LLM応答キャッシュのリスナーでエラーが発生しました: {e}")
+
+
+@contextmanager
+def bypass_response_cache():
+    """
+    このコンテキスト内（そこから起動したタスクを含む）ではキャッシュを読まない
+
+    検証に失敗したタスクの再試行のように、同じプロンプトでも新しい生成が
+    必要な呼び出しを囲む。新しい応答はキャッシュに保存される。
+    """
+    token = _bypass_lookup.set(True)
+    try:
+        yield
+    finally:
+        _bypass_lookup.reset(token)
+
+
+_shared_cache: Optional[LLMResponseCache] = None
+
+
+def get_response_cache() -> LLMResponseCache:
+    """
+    プロセス共通の応答キャッシュを取得
+
+    エントリーポイントが configure_response_cache で作成していない場合は
+    無効なキャッシュを返す（どこにも書き出さない）。
+    """
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = LLMResponseCache({'enabled': False})
+    return _shared_cache
+
+
+def configure_response_cache(config: Optional[Dict[str, Any]],
+                             workspace_path: Union[str, Path]) -> LLMResponseCache:
+    """
+    設定からプロセス共通の応答キャッシュを作成する（エントリーポイントで呼ぶ）
+
+    Args:
+        config: キャッシュ設定（llm_cache セクション）。相対の storage_path はワークスペース基準
+        workspace_path: ワークスペースのパス
+    """
+    config = dict(config or {})
+    storage_path = Path(config.get('storage_path') or '.nocturnal/llm_cache')
+    if not storage_path.is_absolute():
+        storage_path = Path(workspace_path) / storage_path
+    config['storage_path'] = str(storage_path)
+
+    cache = LLMResponseCache(config)
+    set_response_cache(cache)
+    return cache
+
+
+def set_response_cache(cache: Optional[LLMResponseCache]):
+    """プロセス共通の応答キャッシュを差し替える（Noneで次回作成し直す）"""
+    global _shared_cache
+    _shared_cache = cache
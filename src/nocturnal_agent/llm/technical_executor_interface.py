@@ -64,6 +64,7 @@ class TechnicalExecutorInterface:
         """対象プロジェクトディレクトリでの実行専用初期化"""
         self.target_project_path = Path(target_project_path).resolve()
         self.claude_config = claude_config or load_claude_config()
+        self._claude_interface = None
         self.logger = logging.getLogger(__name__)
         
         # 対象プロジェクトの検証
@@ -850,7 +851,10 @@ class TechnicalExecutorInterface:
         # 実際のAPI呼び出し（既存のclaudeCodeインターフェース使用）
         try:
             from .claude_code_interface import ClaudeCodeInterface
-            async with ClaudeCodeInterface(self.claude_config) as claude:
+            # インターフェースは使い回し、接続と接続テスト結果は共有トランスポートに任せる
+            if self._claude_interface is None:
+                self._claude_interface = ClaudeCodeInterface(self.claude_config)
+            async with self._claude_interface as claude:
                 messages = [{"role": "user", "content": prompt}]
                 response = await claude._call_claude_api(messages)
                 return response
@@ -0,0 +1,205 @@
+"""キューベースの非同期ログ書き込み
+
+呼び出し元スレッド（asyncioのイベントループを含む）ではログレコードを
+固定長のリングバッファに積むだけにし、フォーマット・ファイル書き込み・
+ローテーション時の圧縮はバックグラウンドの書き込みスレッドがまとめて行う。
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from enum import Enum
+from typing import Any, Deque, Dict, List, Optional
+
+
+class BackpressurePolicy(Enum):
+    """バッファが詰まったときの挙動"""
+    BLOCK = "block"            # 空きができるまで呼び出し元を待たせる
+    DROP_DEBUG = "drop_debug"  # 満杯時はDEBUGを破棄し、それ以外は待たせる
+    SAMPLE = "sample"          # 高水位以上ではWARNING未満を間引き、それ以外は待たせる
+
+
+class AsyncLogHandler(logging.Handler):
+    """ログレコードをバッファに積み、書き込みスレッドでバッチ出力するハンドラー"""
+
+    def __init__(self, handlers: List[logging.Handler],
+                 capacity: int = 10000,
+                 batch_size: int = 256,
+                 flush_interval: float = 0.5,
+                 policy: BackpressurePolicy = BackpressurePolicy.BLOCK,
+                 sample_rate: float = 0.1,
+                 high_watermark: float = 0.75):
+        """
+        非同期ハンドラーを初期化
+
+        Args:
+            handlers: 実際に出力するハンドラー
+            capacity: バッファの最大レコード数
+            batch_size: 1回の書き込みでまとめるレコード数
+            flush_interval: バッファにレコードがあるときの最大待ち秒数
+            policy: バックプレッシャーの方針
+            sample_rate: SAMPLE方針で高水位以上のときに残す割合
+            high_watermark: SAMPLE方針で間引きを始めるバッファ使用率
+        """
+        super().__init__()
+        self.handlers = handlers
+        self.capacity = max(1, capacity)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.sample_every = max(1, round(1 / sample_rate)) if sample_rate > 0 else 0
+        self.sample_threshold = max(1, int(self.capacity * high_watermark))
+
+        self._buffer: Deque[logging.LogRecord] = deque()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._flush_requested = False
+        self._sample_counter = 0
+
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.max_depth = 0
+        self.blocked = 0
+        self.dropped: Dict[str, int] = {'debug': 0, 'sampled': 0, 'closed': 0}
+
+        self._writer = threading.Thread(target=self._run, name='nocturnal-log-writer', daemon=True)
+        self._writer.start()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """書き込みスレッドで安全にフォーマットできるようにレコードを確定させる"""
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def emit(self, record: logging.LogRecord):
+        """レコードをバッファに積む"""
+        try:
+            record = self.prepare(record)
+        except Exception:
+            self.handleError(record)
+            return
+
+        with self._condition:
+            if self._closed:
+                self.dropped['closed'] += 1
+                return
+
+            depth = len(self._buffer)
+            if depth >= self.capacity:
+                if self.policy is BackpressurePolicy.DROP_DEBUG and record.levelno <= logging.DEBUG:
+                    self.dropped['debug'] += 1
+                    return
+            if (self.policy is BackpressurePolicy.SAMPLE and depth >= self.sample_threshold and
+                    record.levelno < logging.WARNING):
+                self._sample_counter += 1
+                if not self.sample_every or self._sample_counter % self.sample_every:
+                    self.dropped['sampled'] += 1
+                    return
+
+            if depth >= self.capacity:
+                self.blocked += 1
+                while len(self._buffer) >= self.capacity and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    self.dropped['closed'] += 1
+                    return
+
+            self._buffer.append(record)
+            self.enqueued += 1
+            self.max_depth = max(self.max_depth, len(self._buffer))
+            # 空から積まれたとき（待ち時間の計測開始）とバッチが揃ったときに書き込みスレッドを起こす
+            if depth == 0 or len(self._buffer) >= self.batch_size:
+                self._condition.notify_all()
+
+    def _run(self):
+        """書き込みスレッド本体"""
+        while True:
+            with self._condition:
+                while not self._buffer and not self._closed:
+                    self._condition.wait()
+                # 少量ならバッチが溜まるまで最大 flush_interval 待つ（flush() 要求中は待たない）
+                deadline = time.monotonic() + self.flush_interval
+                while (self._buffer and len(self._buffer) < self.batch_size and
+                       not self._closed and not self._flush_requested):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                if not self._buffer and self._closed:
+                    self._condition.notify_all()
+                    return
+                batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+                if not self._buffer:
+                    self._flush_requested = False
+                # 空きを待っている呼び出し元を起こす
+                self._condition.notify_all()
+
+            if not batch:
+                continue
+            self._write_batch(batch)
+
+            with self._condition:
+                self.written += len(batch)
+                self.batches += 1
+                self._condition.notify_all()
+
+    def _write_batch(self, batch: List[logging.LogRecord]):
+        """バッチを各ハンドラーに出力"""
+        for handler in self.handlers:
+            emit_batch = getattr(handler, 'emit_batch', None)
+            if emit_batch is not None:
+                records = [record for record in batch
+                           if record.levelno >= handler.level and handler.filter(record)]
+                if records:
+                    with handler.lock:
+                        emit_batch(records)
+                continue
+            for record in batch:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+
+    def flush(self, timeout: Optional[float] = None):
+        """バッファ内のレコードが書き込まれるまで待つ"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._condition:
+            target = self.enqueued
+            if self.written < target:
+                self._flush_requested = True
+                self._condition.notify_all()
+            while self.written < target and self._writer.is_alive():
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+        for handler in self.handlers:
+            handler.flush()
+
+    def close(self):
+        """残りを書き出して書き込みスレッドと出力先ハンドラーを閉じる"""
+        with self._condition:
+            already_closed = self._closed
+            self._closed = True
+            self._condition.notify_all()
+        if not already_closed:
+            self._writer.join()
+            for handler in self.handlers:
+                handler.close()
+        super().close()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """キュー深さとドロップ数などの統計"""
+        with self._condition:
+            return {
+                'policy': self.policy.value,
+                'capacity': self.capacity,
+                'queue_depth': len(self._buffer),
+                'max_queue_depth': self.max_depth,
+                'enqueued': self.enqueued,
+                'written': self.written,
+                'batches': self.batches,
+                'blocked': self.blocked,
+                'dropped': dict(self.dropped),
+                'dropped_total': sum(self.dropped.values())
+            }
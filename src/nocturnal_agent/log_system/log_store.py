@@ -0,0 +1,615 @@
+"""時間単位で分割されたインデックス付きログストア
+
+ログは1時間ごと・書き込み元（プロセスとストアのインスタンス）ごとのセグメントファイル（JSON Lines）に書き込まれ、
+各セグメントには件数・最小/最大タイムスタンプ・フィールド値ごとの件数を持つ
+サマリー行と、level/category/component/task_id ごとに1行ずつのポスティング
+リスト（行のバイトオフセット）からなるサイドカーインデックスが付く。
+
+クエリは条件に合わないセグメントをサマリーだけで除外し、残りのセグメントを
+タイムスタンプ順にk-wayマージしながら必要な件数だけ読み込む。
+"""
+
+import heapq
+import itertools
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+INDEXED_FIELDS = ('level', 'category', 'component', 'task_id')
+SEGMENT_SUFFIX = '.jsonl'
+INDEX_SUFFIX = '.idx'
+INDEX_VERSION = 1
+
+_HOUR_FORMAT = '%Y%m%d-%H'
+
+# 同じプロセス内の複数のLogStoreが同じセグメントファイルに追記しないための連番
+_instance_ids = itertools.count()
+
+
+def segment_hour(created: float) -> str:
+    """UNIX時刻が属するセグメントの時間キー（UTC）を取得"""
+    return datetime.fromtimestamp(created, tz=timezone.utc).strftime(_HOUR_FORMAT)
+
+
+def time_key(value: datetime) -> str:
+    """datetimeをログのタイムスタンプと比較可能な文字列に変換
+
+    タイムゾーンのないdatetimeはローカル時刻として扱う。
+    """
+    return value.astimezone(timezone.utc).isoformat()
+
+
+class SegmentIndex:
+    """1セグメント分のインデックス"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.hour_start = datetime.strptime(name.split('.')[0], _HOUR_FORMAT).replace(tzinfo=timezone.utc)
+        self.size = 0  # インデックス済みのバイト数
+        self.count = 0
+        self.min_ts: Optional[str] = None
+        self.max_ts: Optional[str] = None
+        self.ordered = True  # 行がタイムスタンプ順に並んでいるか
+        self.values: Dict[str, Dict[str, int]] = {field: {} for field in INDEXED_FIELDS}
+        self.postings: Optional[Dict[str, Dict[str, List[int]]]] = None
+
+    @property
+    def hour_end(self) -> datetime:
+        return self.hour_start + timedelta(hours=1)
+
+    def add(self, offset: int, length: int, timestamp: str, fields: Dict[str, Any]):
+        """行をインデックスに追加"""
+        if self.max_ts is not None and timestamp < self.max_ts:
+            self.ordered = False
+        if self.min_ts is None or timestamp < self.min_ts:
+            self.min_ts = timestamp
+        if self.max_ts is None or timestamp > self.max_ts:
+            self.max_ts = timestamp
+
+        for field in INDEXED_FIELDS:
+            value = fields.get(field)
+            if value is None:
+                continue
+            value = str(value)
+            counts = self.values[field]
+            counts[value] = counts.get(value, 0) + 1
+            if self.postings is not None:
+                self.postings[field].setdefault(value, []).append(offset)
+
+        self.count += 1
+        self.size = offset + length
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'version': INDEX_VERSION,
+            'size': self.size,
+            'count': self.count,
+            'min_ts': self.min_ts,
+            'max_ts': self.max_ts,
+            'ordered': self.ordered,
+            'values': self.values
+        }
+
+    def load_summary(self, data: Dict[str, Any]):
+        self.size = data['size']
+        self.count = data['count']
+        self.min_ts = data['min_ts']
+        self.max_ts = data['max_ts']
+        self.ordered = data['ordered']
+        self.values = data['values']
+
+    def may_match(self, start_key: Optional[str], end_key: Optional[str], filters: Dict[str, str]) -> bool:
+        """サマリーだけで一致する可能性を判定"""
+        if self.count == 0:
+            return False
+        if start_key is not None and self.max_ts < start_key:
+            return False
+        if end_key is not None and self.min_ts > end_key:
+            return False
+        return all(value in self.values[field] for field, value in filters.items())
+
+
+class LogStore:
+    """時間分割されたログセグメントの書き込みと検索"""
+
+    def __init__(self, directory: Path, index_interval: int = 1000, postings_cache_size: int = 256):
+        """
+        ログストアを初期化
+
+        Args:
+            directory: セグメントの保存ディレクトリ
+            index_interval: 書き込み中セグメントのインデックスを保存する間隔（行数）
+            postings_cache_size: メモリに保持するポスティングリスト数（セグメント×フィールド）
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.index_interval = index_interval
+        self.postings_cache_size = postings_cache_size
+        # 書き込み先はプロセスとインスタンスごとに分ける（他の書き込み元のセグメントは読むだけ）
+        self.suffix = f".{os.getpid()}.{next(_instance_ids)}"
+
+        self._lock = threading.RLock()
+        self._summaries: Dict[str, SegmentIndex] = {}
+        self._postings_cache: 'OrderedDict[Tuple[str, str], Dict[str, List[int]]]' = OrderedDict()
+
+        self._active: Optional[SegmentIndex] = None
+        self._active_hour: Optional[str] = None
+        self._handle = None
+        self._unindexed = 0
+
+    # ---- 書き込み ----
+
+    def append(self, created: float, line: str, fields: Dict[str, Any]):
+        """
+        ログ行を追記
+
+        Args:
+            created: ログレコードのUNIX時刻
+            line: JSON Lines形式の1行（改行なし）
+            fields: インデックス対象フィールドの値
+        """
+        self.append_many([(created, line, fields)])
+
+    def append_many(self, items: List[Tuple[float, str, Dict[str, Any]]]):
+        """
+        複数のログ行をまとめて追記
+
+        同じ時間帯の連続した行は1回の書き込みとフラッシュで出力する。
+
+        Args:
+            items: (UNIX時刻, JSON Lines形式の1行, インデックス対象フィールド) のリスト
+        """
+        with self._lock:
+            for hour, group in itertools.groupby(items, key=lambda item: segment_hour(item[0])):
+                if hour != self._active_hour:
+                    self._open_segment(hour)
+
+                chunks = [(created, (line + '\n').encode('utf-8'), fields) for created, line, fields in group]
+                offset = self._handle.tell()
+                self._handle.write(b''.join(data for _, data, _ in chunks))
+                self._handle.flush()
+
+                # 書き込み後にインデックスへ反映し、読み込み側が途中の行を見ないようにする
+                for created, data, fields in chunks:
+                    timestamp = datetime.fromtimestamp(created, tz=timezone.utc).isoformat()
+                    self._active.add(offset, len(data), timestamp, fields)
+                    offset += len(data)
+                self._unindexed += len(chunks)
+
+            if self._unindexed >= self.index_interval:
+                self._write_index(self._active)
+
+    def _open_segment(self, hour: str):
+        """書き込み先セグメントを切り替え"""
+        self._close_segment()
+
+        name = f"{hour}{self.suffix}"
+        index = self._load_index(name, with_postings=True)
+        self._handle = open(self.directory / f"{name}{SEGMENT_SUFFIX}", 'ab')
+        if self._handle.tell() > index.size:
+            # 前回の書き込みが途中で終わっていた場合は未インデックス部分を取り込む
+            self._scan_tail(index)
+
+        self._active = index
+        self._active_hour = hour
+        self._summaries[name] = index
+
+    def _close_segment(self):
+        if self._handle is None:
+            return
+        self._write_index(self._active)
+        self._handle.close()
+        self._handle = None
+        self._active.postings = None
+        self._active = None
+        self._active_hour = None
+
+    def flush(self):
+        """書き込み中セグメントのインデックスを保存"""
+        with self._lock:
+            if self._active is not None and self._unindexed:
+                self._write_index(self._active)
+
+    def close(self):
+        """ストアを閉じる"""
+        with self._lock:
+            self._close_segment()
+
+    def _write_index(self, index: SegmentIndex):
+        """サイドカーインデックスを書き込む（1行目サマリー、以降フィールドごとのポスティング）"""
+        path = self.directory / f"{index.name}{INDEX_SUFFIX}"
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(index.summary(), ensure_ascii=False))
+            for field in INDEXED_FIELDS:
+                postings = {value: _delta_encode(offsets) for value, offsets in index.postings[field].items()}
+                f.write('\n')
+                f.write(json.dumps(postings, ensure_ascii=False))
+        os.replace(tmp_path, path)
+        self._unindexed = 0
+
+    # ---- インデックス読み込み ----
+
+    def _segment_names(self) -> List[str]:
+        return sorted(
+            path.name[:-len(SEGMENT_SUFFIX)] for path in self.directory.glob(f"*{SEGMENT_SUFFIX}")
+        )
+
+    def _load_index(self, name: str, with_postings: bool = False) -> SegmentIndex:
+        """サイドカーを読み込み、セグメントの未インデックス部分があれば追加で走査"""
+        index = SegmentIndex(name)
+        index_path = self.directory / f"{name}{INDEX_SUFFIX}"
+        segment_path = self.directory / f"{name}{SEGMENT_SUFFIX}"
+
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                summary = json.loads(f.readline())
+                if summary.get('version') == INDEX_VERSION:
+                    index.load_summary(summary)
+                    if with_postings:
+                        index.postings = {
+                            field: _decode_postings(json.loads(f.readline())) for field in INDEXED_FIELDS
+                        }
+        except (OSError, ValueError, KeyError):
+            index = SegmentIndex(name)
+
+        if with_postings and index.postings is None:
+            index = SegmentIndex(name)
+            index.postings = {field: {} for field in INDEXED_FIELDS}
+
+        if segment_path.exists() and segment_path.stat().st_size > index.size:
+            if index.postings is None and index.size > 0:
+                # 末尾を追加するためにポスティングも必要
+                return self._load_index(name, with_postings=True)
+            self._scan_tail(index)
+
+        return index
+
+    def _scan_tail(self, index: SegmentIndex):
+        """セグメントのインデックス済み位置以降を走査してインデックスに追加"""
+        if index.postings is None:
+            index.postings = {field: {} for field in INDEXED_FIELDS}
+
+        with open(self.directory / f"{index.name}{SEGMENT_SUFFIX}", 'rb') as f:
+            f.seek(index.size)
+            offset = index.size
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # 書き込み途中の行
+                try:
+                    entry = json.loads(line)
+                    index.add(offset, len(line), entry['timestamp'], entry)
+                except (ValueError, KeyError):
+                    index.size = offset + len(line)
+                offset += len(line)
+
+    def _summary(self, name: str) -> SegmentIndex:
+        """セグメントのサマリーを取得（キャッシュ付き）"""
+        with self._lock:
+            index = self._summaries.get(name)
+            if index is not None and (index is self._active or
+                                      index.size >= (self.directory / f"{name}{SEGMENT_SUFFIX}").stat().st_size):
+                return index
+
+            index = self._load_index(name)
+            if index.postings is not None:
+                for field, postings in index.postings.items():
+                    self._postings_cache[(name, field)] = postings
+                self._trim_postings_cache()
+                index.postings = None
+            self._summaries[name] = index
+            return index
+
+    def _candidate_lists(self, index: SegmentIndex, filters: Dict[str, str]) -> List[List[int]]:
+        """フィルタ条件ごとのポスティングリストを取得（LRUキャッシュ付き）"""
+        with self._lock:
+            if index is self._active:
+                # 書き込み中のリストは必要な分だけコピーする
+                return [list(index.postings[field].get(value, [])) for field, value in filters.items()]
+
+            candidates = []
+            for field, value in filters.items():
+                key = (index.name, field)
+                postings = self._postings_cache.get(key)
+                if postings is None:
+                    postings = self._read_postings(index.name, field)
+                    self._postings_cache[key] = postings
+                    self._trim_postings_cache()
+                else:
+                    self._postings_cache.move_to_end(key)
+                candidates.append(postings.get(value, []))
+            return candidates
+
+    def _read_postings(self, name: str, field: str) -> Dict[str, List[int]]:
+        """サイドカーから1フィールド分のポスティングリストだけを読み込む"""
+        with open(self.directory / f"{name}{INDEX_SUFFIX}", 'r', encoding='utf-8') as f:
+            for _ in range(INDEXED_FIELDS.index(field) + 1):
+                f.readline()
+            return _decode_postings(json.loads(f.readline()))
+
+    def _trim_postings_cache(self):
+        while len(self._postings_cache) > self.postings_cache_size:
+            self._postings_cache.popitem(last=False)
+
+    # ---- 検索 ----
+
+    def query(self,
+              start_time: Optional[datetime] = None,
+              end_time: Optional[datetime] = None,
+              filters: Optional[Dict[str, str]] = None,
+              predicate: Optional[Callable[[Dict[str, Any]], bool]] = None,
+              limit: int = 1000,
+              newest_first: bool = False,
+              extra_sources: Optional[List[Path]] = None) -> List[Dict[str, Any]]:
+        """
+        ログを検索
+
+        Args:
+            start_time: 開始時刻（含む）
+            end_time: 終了時刻（含む）
+            filters: インデックス対象フィールドの一致条件
+            predicate: インデックス対象外の追加条件
+            limit: 最大件数
+            newest_first: 新しい順に返すか
+            extra_sources: インデックスのない旧形式ログファイル
+
+        Returns:
+            タイムスタンプ順のログエントリ
+        """
+        entries = self.iter_entries(start_time, end_time, filters, predicate, newest_first, extra_sources)
+        return list(itertools.islice(entries, limit))
+
+    def iter_entries(self,
+                     start_time: Optional[datetime] = None,
+                     end_time: Optional[datetime] = None,
+                     filters: Optional[Dict[str, str]] = None,
+                     predicate: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                     newest_first: bool = False,
+                     extra_sources: Optional[List[Path]] = None) -> Iterator[Dict[str, Any]]:
+        """条件に合うログエントリをタイムスタンプ順に逐次返す"""
+        filters = {field: str(value) for field, value in (filters or {}).items() if value is not None}
+        start_key = time_key(start_time) if start_time else None
+        end_key = time_key(end_time) if end_time else None
+
+        streams = []
+        for name in self._segment_names():
+            hour_start = datetime.strptime(name.split('.')[0], _HOUR_FORMAT).replace(tzinfo=timezone.utc)
+            # ファイル名の時間帯だけで範囲外のセグメントを除外
+            if start_time and hour_start + timedelta(hours=1) <= start_time.astimezone(timezone.utc):
+                continue
+            if end_time and hour_start > end_time.astimezone(timezone.utc):
+                continue
+
+            try:
+                index = self._summary(name)
+            except OSError:
+                continue  # 保持期間切れで削除された
+            if not index.may_match(start_key, end_key, filters):
+                continue
+
+            bound = index.max_ts if newest_first else index.min_ts
+            streams.append((bound, index.name, self._segment_stream(
+                index, start_key, end_key, filters, predicate, newest_first
+            )))
+
+        for source in extra_sources or []:
+            streams.append(('\uffff' if newest_first else '', str(source), self._legacy_stream(
+                source, start_key, end_key, filters, predicate, newest_first
+            )))
+
+        return _merge_streams(streams, newest_first)
+
+    def _segment_stream(self, index: SegmentIndex, start_key: Optional[str], end_key: Optional[str],
+                        filters: Dict[str, str], predicate: Optional[Callable[[Dict[str, Any]], bool]],
+                        newest_first: bool) -> Iterator[Dict[str, Any]]:
+        """1セグメント内の一致エントリをタイムスタンプ順に返す"""
+        offsets = None
+        if filters:
+            candidate_lists = sorted(self._candidate_lists(index, filters), key=len)
+            offsets = candidate_lists[0]
+            for other in candidate_lists[1:]:
+                other_set = set(other)
+                offsets = [offset for offset in offsets if offset in other_set]
+            if not offsets:
+                return
+
+        # セグメント全体が時間範囲内なら行ごとの時刻比較は不要
+        check_time = ((start_key is not None and index.min_ts < start_key) or
+                      (end_key is not None and index.max_ts > end_key))
+
+        def matches(entry: Dict[str, Any]) -> bool:
+            if check_time:
+                timestamp = entry.get('timestamp', '')
+                if (start_key is not None and timestamp < start_key) or (end_key is not None and timestamp > end_key):
+                    return False
+            return predicate is None or predicate(entry)
+
+        entries = (
+            entry for entry in self._read_segment(index, offsets) if matches(entry)
+        )
+
+        if index.ordered and not newest_first:
+            yield from entries
+            return
+
+        # 逆順・順序の乱れたセグメントは1時間分をメモリ上で並べ替える
+        yield from sorted(entries, key=_timestamp_key, reverse=newest_first)
+
+    def _read_segment(self, index: SegmentIndex, offsets: Optional[List[int]]) -> Iterator[Dict[str, Any]]:
+        """セグメントから全行または指定オフセットの行を読み込む"""
+        path = self.directory / f"{index.name}{SEGMENT_SUFFIX}"
+        try:
+            f = open(path, 'rb')
+        except OSError:
+            return
+
+        with f:
+            if offsets is None or len(offsets) * 8 > index.count:
+                # 候補が多い場合はシークせずに順次読み込む
+                wanted = set(offsets) if offsets is not None else None
+                position = 0
+                for line in f:
+                    if position >= index.size:
+                        break
+                    if wanted is None or position in wanted:
+                        entry = _parse_line(line)
+                        if entry is not None:
+                            yield entry
+                    position += len(line)
+            else:
+                for offset in offsets:
+                    f.seek(offset)
+                    entry = _parse_line(f.readline())
+                    if entry is not None:
+                        yield entry
+
+    def _legacy_stream(self, path: Path, start_key: Optional[str], end_key: Optional[str],
+                       filters: Dict[str, str], predicate: Optional[Callable[[Dict[str, Any]], bool]],
+                       newest_first: bool) -> Iterator[Dict[str, Any]]:
+        """インデックスのない旧形式ログファイルを全件走査"""
+        import gzip
+
+        opener = gzip.open if path.suffix == '.gz' else open
+        entries = []
+        try:
+            with opener(path, 'rb') as f:
+                for line in f:
+                    entry = _parse_line(line)
+                    if entry is None:
+                        continue
+                    timestamp = entry.get('timestamp', '')
+                    if (start_key is not None and timestamp < start_key) or (end_key is not None and timestamp > end_key):
+                        continue
+                    if any(str(entry.get(field)) != value for field, value in filters.items()):
+                        continue
+                    if predicate is not None and not predicate(entry):
+                        continue
+                    entries.append(entry)
+        except OSError:
+            return
+
+        yield from sorted(entries, key=_timestamp_key, reverse=newest_first)
+
+    # ---- 集計・保守 ----
+
+    def field_counts(self, field: str) -> Dict[str, int]:
+        """インデックスから全セグメントのフィールド値ごとの件数を集計"""
+        totals: Dict[str, int] = {}
+        for name in self._segment_names():
+            try:
+                index = self._summary(name)
+            except OSError:
+                continue
+            for value, count in index.values[field].items():
+                totals[value] = totals.get(value, 0) + count
+        return totals
+
+    def segment_files(self) -> List[Path]:
+        """セグメントファイルの一覧"""
+        return sorted(self.directory.glob(f"*{SEGMENT_SUFFIX}"))
+
+    def remove_before(self, cutoff: datetime) -> int:
+        """
+        指定時刻より前に終わるセグメントを削除
+
+        Returns:
+            削除したセグメント数
+        """
+        cutoff = cutoff.astimezone(timezone.utc)
+        removed = 0
+        with self._lock:
+            for name in self._segment_names():
+                if name.split('.')[0] == self._active_hour:
+                    continue
+                hour_start = datetime.strptime(name.split('.')[0], _HOUR_FORMAT).replace(tzinfo=timezone.utc)
+                if hour_start + timedelta(hours=1) > cutoff:
+                    continue
+                for suffix in (SEGMENT_SUFFIX, INDEX_SUFFIX):
+                    try:
+                        (self.directory / f"{name}{suffix}").unlink()
+                    except FileNotFoundError:
+                        pass
+                self._summaries.pop(name, None)
+                for field in INDEXED_FIELDS:
+                    self._postings_cache.pop((name, field), None)
+                removed += 1
+        return removed
+
+
+def _merge_streams(streams: List[Tuple[str, str, Iterator[Dict[str, Any]]]],
+                   newest_first: bool) -> Iterator[Dict[str, Any]]:
+    """セグメントごとの整列済みストリームをk-wayマージする
+
+    セグメントは境界時刻（昇順なら最小、降順なら最大タイムスタンプ）順に
+    必要になった時点で開くため、時間帯の重ならない多数のセグメントがあっても
+    同時に開くファイルは重なり合うものだけになる。
+    """
+    sign = -1 if newest_first else 1
+    pending = sorted(streams, key=lambda stream: stream[0], reverse=newest_first)
+    heap: List[Tuple[Any, int, Dict[str, Any], Iterator[Dict[str, Any]]]] = []
+    counter = itertools.count()
+
+    def push(iterator: Iterator[Dict[str, Any]]):
+        for entry in iterator:
+            heapq.heappush(heap, (_ordered_key(entry, sign), next(counter), entry, iterator))
+            return
+
+    position = 0
+    while heap or position < len(pending):
+        if not heap:
+            push(pending[position][2])
+            position += 1
+            continue
+
+        # 先頭エントリより前に始まる可能性のあるセグメントをすべて開く
+        while position < len(pending) and _ordered_key({'timestamp': pending[position][0]}, sign) <= heap[0][0]:
+            push(pending[position][2])
+            position += 1
+
+        _, _, entry, iterator = heapq.heappop(heap)
+        yield entry
+        push(iterator)
+
+
+class _Descending:
+    """文字列の大小を反転させる比較キー"""
+    __slots__ = ('value',)
+
+    def __init__(self, value: str):
+        self.value = value
+
+    def __lt__(self, other: '_Descending') -> bool:
+        return self.value > other.value
+
+    def __le__(self, other: '_Descending') -> bool:
+        return self.value >= other.value
+
+
+def _ordered_key(entry: Dict[str, Any], sign: int) -> Any:
+    timestamp = _timestamp_key(entry)
+    return timestamp if sign > 0 else _Descending(timestamp)
+
+
+def _timestamp_key(entry: Dict[str, Any]) -> str:
+    return entry.get('timestamp') or ''
+
+
+def _parse_line(line: bytes) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
+def _delta_encode(offsets: List[int]) -> List[int]:
+    return [offsets[0]] + [b - a for a, b in zip(offsets, offsets[1:])] if offsets else []
+
+
+def _decode_postings(data: Dict[str, List[int]]) -> Dict[str, List[int]]:
+    return {value: list(itertools.accumulate(deltas)) for value, deltas in data.items()}
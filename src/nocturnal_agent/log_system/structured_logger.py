@@ -14,6 +14,8 @@ import shutil
 from dataclasses import dataclass, asdict
 
 from ..core.models import Task, ExecutionResult, QualityScore
+from .log_store import LogStore
+from .async_writer import AsyncLogHandler, BackpressurePolicy
 
 
 class LogLevel(Enum):
@@ -122,6 +124,52 @@ class RotatingJSONLinesHandler(logging.handlers.RotatingFileHandler):
                     pass  # 圧縮失敗時は元ファイルを残す
 
 
+class PartitionedJSONLinesHandler(logging.Handler):
+    """時間分割インデックス付きログストアへ書き込むハンドラー"""
+    
+    def __init__(self, store: LogStore):
+        super().__init__()
+        self.store = store
+    
+    def emit(self, record: logging.LogRecord):
+        """ログレコードをストアに追記"""
+        try:
+            self.store.append(record.created, self.format(record), {
+                'level': record.levelname,
+                'category': getattr(record, 'category', None),
+                'component': record.name,
+                'task_id': getattr(record, 'task_id', None)
+            })
+        except Exception:
+            self.handleError(record)
+    
+    def emit_batch(self, records: List[logging.LogRecord]):
+        """複数のログレコードをまとめてストアに追記"""
+        items = []
+        for record in records:
+            try:
+                items.append((record.created, self.format(record), {
+                    'level': record.levelname,
+                    'category': getattr(record, 'category', None),
+                    'component': record.name,
+                    'task_id': getattr(record, 'task_id', None)
+                }))
+            except Exception:
+                self.handleError(record)
+        try:
+            self.store.append_many(items)
+        except Exception:
+            for record in records:
+                self.handleError(record)
+    
+    def flush(self):
+        self.store.flush()
+    
+    def close(self):
+        self.store.close()
+        super().close()
+
+
 class StructuredLogger:
     """構造化ログマネージャー"""
     
@@ -134,9 +182,24 @@ class StructuredLogger:
         self.file_output = config.get('file_output', True)
         self.log_level = getattr(logging, config.get('level', 'INFO'))
         
+        # 非同期書き込みモード（呼び出し元ではバッファに積むだけにする）
+        self.async_writer = config.get('async_writer', False)
+        self.async_queue_size = config.get('async_queue_size', 10000)
+        self.async_batch_size = config.get('async_batch_size', 256)
+        self.async_flush_interval = config.get('async_flush_interval', 0.5)
+        self.async_backpressure = BackpressurePolicy(config.get('async_backpressure', 'block'))
+        self.async_sample_rate = config.get('async_sample_rate', 0.1)
+        self.async_handler: Optional[AsyncLogHandler] = None
+        
         # ログディレクトリの作成
         self.log_path.mkdir(parents=True, exist_ok=True)
         
+        # 時間分割されたインデックス付きログストア
+        self.store = LogStore(
+            self.log_path / 'segments',
+            index_interval=config.get('index_interval', 1000)
+        )
+        
         # ロガーの設定
         self._setup_loggers()
         
@@ -148,10 +211,13 @@ class StructuredLogger:
         # メインロガー
         self.main_logger = logging.getLogger('nocturnal_agent')
         self.main_logger.setLevel(self.log_level)
+        for handler in self.main_logger.handlers:
+            handler.close()
         self.main_logger.handlers.clear()
         
         # JSON Linesフォーマッター
         json_formatter = JSONLinesFormatter()
+        handlers = []
         
         # コンソールハンドラー
         if self.console_output:
@@ -163,21 +229,15 @@ class StructuredLogger:
                 '%(asctime)s [%(levelname)8s] %(name)s: %(message)s'
             )
             console_handler.setFormatter(console_formatter)
-            self.main_logger.addHandler(console_handler)
+            handlers.append(console_handler)
         
         # ファイルハンドラー
         if self.file_output:
-            # メインログファイル
-            main_log_file = self.log_path / 'nocturnal_agent.jsonl'
-            main_handler = RotatingJSONLinesHandler(
-                str(main_log_file),
-                maxBytes=self.max_file_size_mb * 1024 * 1024,
-                backupCount=5,
-                compress=True
-            )
+            # メインログ（時間単位のセグメント）
+            main_handler = PartitionedJSONLinesHandler(self.store)
             main_handler.setLevel(self.log_level)
             main_handler.setFormatter(json_formatter)
-            self.main_logger.addHandler(main_handler)
+            handlers.append(main_handler)
             
             # エラー専用ログファイル
             error_log_file = self.log_path / 'errors.jsonl'
@@ -189,7 +249,23 @@ class StructuredLogger:
             )
             error_handler.setLevel(logging.ERROR)
             error_handler.setFormatter(json_formatter)
-            self.main_logger.addHandler(error_handler)
+            handlers.append(error_handler)
+        
+        if self.async_writer and handlers:
+            # フォーマット・書き込み・ローテーション圧縮は書き込みスレッドで行う
+            self.async_handler = AsyncLogHandler(
+                handlers,
+                capacity=self.async_queue_size,
+                batch_size=self.async_batch_size,
+                flush_interval=self.async_flush_interval,
+                policy=self.async_backpressure,
+                sample_rate=self.async_sample_rate
+            )
+            self.async_handler.setLevel(self.log_level)
+            handlers = [self.async_handler]
+        
+        for handler in handlers:
+            self.main_logger.addHandler(handler)
     
     def log(self, level: LogLevel, category: LogCategory, message: str,
             component: str = "main", session_id: Optional[str] = None,
@@ -356,71 +432,46 @@ class StructuredLogger:
                   category: Optional[LogCategory] = None,
                   component: Optional[str] = None,
                   task_id: Optional[str] = None,
-                  limit: int = 1000) -> List[Dict[str, Any]]:
-        """ログクエリ"""
-        results = []
-        
-        # ログファイルを読み込んで条件に合致するエントリを抽出
-        log_files = [
-            self.log_path / 'nocturnal_agent.jsonl',
-            self.log_path / 'errors.jsonl'
-        ]
+                  limit: int = 1000,
+                  session_id: Optional[str] = None,
+                  newest_first: bool = False) -> List[Dict[str, Any]]:
+        """
+        ログクエリ
+        
+        時間範囲とインデックスで対象外のセグメントを読み飛ばし、
+        タイムスタンプ順にマージしながらlimit件に達した時点で読み込みを止める。
+        タイムゾーンのない時刻はローカル時刻として扱う。
+        """
+        if self.async_handler is not None:
+            # バッファに残っているログも検索対象にする
+            self.async_handler.flush()
+        
+        filters = {
+            'level': level.value if level else None,
+            'category': category.value if category else None,
+            'component': component,
+            'task_id': task_id
+        }
+        predicate = None
+        if session_id:
+            predicate = lambda entry: entry.get('session_id') == session_id
         
-        # 古いローテーションファイルも含める
-        for log_file in self.log_path.glob('*.jsonl*'):
-            if log_file not in log_files:
-                log_files.append(log_file)
+        # ローテーション形式の旧ログファイルはインデックスなしで走査
+        legacy_files = sorted(self.log_path.glob('nocturnal_agent.jsonl*'))
         
-        for log_file in log_files:
-            if not log_file.exists():
-                continue
-                
-            try:
-                if log_file.suffix == '.gz':
-                    opener = gzip.open
-                else:
-                    opener = open
-                
-                with opener(log_file, 'rt', encoding='utf-8') as f:
-                    for line in f:
-                        if len(results) >= limit:
-                            break
-                        
-                        try:
-                            entry = json.loads(line.strip())
-                            
-                            # フィルター条件チェック
-                            if start_time:
-                                entry_time = datetime.fromisoformat(entry['timestamp'].replace('Z', '+00:00'))
-                                if entry_time < start_time:
-                                    continue
-                            
-                            if end_time:
-                                entry_time = datetime.fromisoformat(entry['timestamp'].replace('Z', '+00:00'))
-                                if entry_time > end_time:
-                                    continue
-                            
-                            if level and entry.get('level') != level.value:
-                                continue
-                            
-                            if category and entry.get('category') != category.value:
-                                continue
-                            
-                            if component and entry.get('component') != component:
-                                continue
-                            
-                            if task_id and entry.get('task_id') != task_id:
-                                continue
-                            
-                            results.append(entry)
-                            
-                        except (json.JSONDecodeError, KeyError, ValueError):
-                            continue
-            
-            except Exception:
-                continue
-        
-        return sorted(results, key=lambda x: x['timestamp'])[:limit]
+        return self.store.query(
+            start_time=start_time,
+            end_time=end_time,
+            filters=filters,
+            predicate=predicate,
+            limit=limit,
+            newest_first=newest_first,
+            extra_sources=legacy_files
+        )
+    
+    def _log_files(self) -> List[Path]:
+        """ログディレクトリ内のログファイル一覧"""
+        return list(self.log_path.glob('*.jsonl*')) + self.store.segment_files()
     
     def cleanup_old_logs(self) -> int:
         """古いログファイルのクリーンアップ"""
@@ -438,6 +489,8 @@ class StructuredLogger:
             except Exception:
                 continue
         
+        deleted_count += self.store.remove_before(datetime.fromtimestamp(cutoff_time, tz=timezone.utc))
+        
         return deleted_count
     
     def get_log_statistics(self) -> Dict[str, Any]:
@@ -451,7 +504,7 @@ class StructuredLogger:
             'category_counts': {}
         }
         
-        for log_file in self.log_path.glob('*.jsonl*'):
+        for log_file in self._log_files():
             if not log_file.exists():
                 continue
             
@@ -464,17 +517,33 @@ class StructuredLogger:
             if not stats['newest_log_date'] or file_mtime > stats['newest_log_date']:
                 stats['newest_log_date'] = file_mtime
         
-        # レベル・カテゴリ別統計（最近のログファイルから）
-        recent_entries = self.query_logs(limit=10000)
-        for entry in recent_entries:
-            level = entry.get('level', 'UNKNOWN')
-            category = entry.get('category', 'unknown')
-            
-            stats['level_counts'][level] = stats['level_counts'].get(level, 0) + 1
-            stats['category_counts'][category] = stats['category_counts'].get(category, 0) + 1
+        # レベル・カテゴリ別統計（セグメントのインデックスから集計）
+        if self.async_handler is not None:
+            self.async_handler.flush()
+        stats['level_counts'] = self.store.field_counts('level')
+        stats['category_counts'] = self.store.field_counts('category')
+        stats['writer'] = self.get_writer_statistics()
         
         return stats
     
+    def get_writer_statistics(self) -> Optional[Dict[str, Any]]:
+        """非同期書き込みのキュー深さ・ドロップ数（同期モードではNone）"""
+        if self.async_handler is None:
+            return None
+        return self.async_handler.get_statistics()
+    
+    def flush(self) -> None:
+        """未書き込みのログをすべて出力"""
+        for handler in self.main_logger.handlers:
+            handler.flush()
+    
+    def close(self) -> None:
+        """ハンドラーを閉じる"""
+        for handler in self.main_logger.handlers:
+            handler.close()
+        self.main_logger.handlers.clear()
+        self.async_handler = None
+    
     def _schedule_cleanup(self):
         """定期クリーンアップのスケジューリング（簡易版）"""
         # 実際の実装では、スケジューラーやバックグラウンドタスクで実行
@@ -495,12 +564,10 @@ class LogAnalyzer:
         logs = self.logger.query_logs(
             start_time=start_time,
             end_time=end_time,
+            session_id=session_id,
             limit=10000
         )
         
-        if session_id:
-            logs = [log for log in logs if log.get('session_id') == session_id]
-        
         # 統計情報の集計
         summary = {
             'session_id': session_id,
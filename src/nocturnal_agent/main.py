@@ -12,6 +12,7 @@ from .log_system.structured_logger import StructuredLogger, LogLevel, LogCategor
 from .log_system.interaction_logger import InteractionLogger, InteractionType, AgentType as InteractionAgentType
 from .scheduler.night_scheduler import NightScheduler
 from .cost.cost_manager import CostManager
+from .llm.response_cache import configure_response_cache
 from .safety.safety_coordinator import SafetyCoordinator
 from .parallel.parallel_executor import ParallelExecutor
 from .reporting.report_generator import ReportGenerator
@@ -64,9 +65,18 @@ class NocturnalAgent:
             'console_output': self.config.logging.console_output,
             'file_output': self.config.logging.file_output,
             'retention_days': self.config.logging.retention_days,
-            'max_file_size_mb': self.config.logging.max_file_size_mb
+            'max_file_size_mb': self.config.logging.max_file_size_mb,
+            'async_writer': self.config.logging.async_writer,
+            'async_queue_size': self.config.logging.async_queue_size,
+            'async_batch_size': self.config.logging.async_batch_size,
+            'async_flush_interval': self.config.logging.async_flush_interval,
+            'async_backpressure': self.config.logging.async_backpressure,
+            'async_sample_rate': self.config.logging.async_sample_rate
         })
         
+        # LLM応答キャッシュ（LLMインターフェースより先に作成する）
+        self.response_cache = configure_response_cache(self.config.llm_cache.__dict__, self.workspace_path)
+        
         # スケジューラー（メインエージェントの参照を渡す）
         scheduler_config = {
             'time_control': {
@@ -86,6 +96,7 @@ class NocturnalAgent:
         
         # コスト管理
         self.cost_manager = CostManager(self.config.cost_management.__dict__)
+        self.cost_manager.attach_response_cache(self.response_cache)
         
         # 安全性コーディネーター
         self.safety_coordinator = SafetyCoordinator(
@@ -1,12 +1,16 @@
 """Knowledge retrieval and search functionality for Obsidian vault."""
 
+import heapq
 import logging
+import os
 import re
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Set, Tuple
 
 from nocturnal_agent.core.models import CodePattern, ConsistencyRule
+from nocturnal_agent.obsidian.search_index import IndexedNote, VaultSearchIndex, parse_frontmatter
 
 
 logger = logging.getLogger(__name__)
@@ -26,9 +30,11 @@ class ObsidianKnowledgeRetriever:
         self.project_name = project_name
         self.project_dir = self.vault_path / project_name
         
-        # Search index cache
-        self._search_index: Dict[str, Dict[str, Any]] = {}
-        self._index_last_updated: Optional[datetime] = None
+        # Persistent inverted index, kept outside the notes so Obsidian ignores it
+        self.index_dir = self.vault_path / ".nocturnal" / "search_index"
+        self._search_index = VaultSearchIndex(self.project_dir, self.index_dir / f"{project_name}.sqlite3")
+        self._project_indexes: Dict[str, VaultSearchIndex] = {project_name: self._search_index}
+        self.index_refresh_seconds = 5.0
         
     async def search_patterns(
         self, 
@@ -51,62 +57,19 @@ class ObsidianKnowledgeRetriever:
         try:
             await self._refresh_search_index()
             
-            results = []
-            query_lower = query.lower()
-            
-            patterns_dir = self.project_dir / "patterns"
-            if not patterns_dir.exists():
-                return results
+            def matches_filters(note: IndexedNote) -> bool:
+                return (
+                    self._is_pattern_note(note) and
+                    (not pattern_type or note.pattern_type == pattern_type) and
+                    note.confidence >= min_confidence
+                )
             
-            for pattern_file in patterns_dir.glob("*.md"):
-                if pattern_file.name.startswith("consistency-rules"):
-                    continue
-                
-                file_content = pattern_file.read_text(encoding='utf-8')
-                frontmatter = self._parse_frontmatter(file_content)
-                
-                if frontmatter.get('type') != 'pattern':
-                    continue
-                
-                # Apply filters
-                if pattern_type and frontmatter.get('pattern_type') != pattern_type:
-                    continue
-                
-                confidence = float(frontmatter.get('confidence', 0.0))
-                if confidence < min_confidence:
-                    continue
-                
-                # Check if query matches
-                title_match = re.search(r'^# (.+)$', file_content, re.MULTILINE)
-                title = title_match.group(1) if title_match else pattern_file.stem
-                
-                # Search in title, description, and content
-                if (query_lower in title.lower() or 
-                    query_lower in file_content.lower()):
-                    
-                    # Extract description
-                    desc_match = re.search(r'## Description\n(.*?)\n##', file_content, re.DOTALL)
-                    description = desc_match.group(1).strip() if desc_match else ""
-                    
-                    # Calculate relevance score
-                    relevance_score = self._calculate_relevance_score(query, title, description, file_content)
-                    
-                    result = {
-                        'title': title,
-                        'pattern_type': frontmatter.get('pattern_type'),
-                        'confidence': confidence,
-                        'usage_count': int(frontmatter.get('usage_count', 0)),
-                        'description': description,
-                        'file_path': str(pattern_file),
-                        'relevance_score': relevance_score
-                    }
-                    
-                    results.append(result)
+            ranked = self._search_index.search(query, predicate=matches_filters)
             
             # Sort by relevance and confidence
-            results.sort(key=lambda x: (x['relevance_score'], x['confidence']), reverse=True)
+            top = heapq.nlargest(limit, ranked, key=lambda item: (item[1], item[0].confidence))
             
-            return results[:limit]
+            return [self._pattern_result(note, score) for note, score in top]
             
         except Exception as e:
             logger.error(f"Pattern search failed: {e}")
@@ -129,34 +92,71 @@ class ObsidianKnowledgeRetriever:
             List of similar patterns
         """
         try:
-            # Search by pattern type first
-            type_matches = await self.search_patterns(
-                query=reference_pattern.pattern_type,
-                pattern_type=reference_pattern.pattern_type,
-                limit=limit * 2
-            )
+            if self._search_index.vectors is None:
+                return await self._search_similar_patterns_by_terms(
+                    reference_pattern, similarity_threshold, limit
+                )
             
-            similar_patterns = []
+            await self._refresh_search_index()
             
-            for match in type_matches:
-                # Calculate similarity based on description and content
-                similarity_score = self._calculate_similarity_score(
-                    reference_pattern, match
-                )
-                
-                if similarity_score >= similarity_threshold:
-                    match['similarity_score'] = similarity_score
-                    similar_patterns.append(match)
+            # Same-type candidates get 0.5 for the type match; the other half
+            # is the cosine similarity of the descriptions
+            min_similarity = max(0.0, (similarity_threshold - 0.5) / 0.5)
+            query_vector = self._search_index.vectors.vectorizer.transform_one(reference_pattern.description)
+            
+            matches = self._search_index.similar(
+                query_vector,
+                limit,
+                predicate=lambda note: (
+                    self._is_pattern_note(note) and note.pattern_type == reference_pattern.pattern_type
+                ),
+                min_score=min_similarity
+            )
             
-            # Sort by similarity
-            similar_patterns.sort(key=lambda x: x['similarity_score'], reverse=True)
+            similar_patterns = []
+            for note, similarity in matches:
+                match = self._pattern_result(note, similarity)
+                match['similarity_score'] = min(0.5 + similarity * 0.5, 1.0)
+                similar_patterns.append(match)
             
-            return similar_patterns[:limit]
+            return similar_patterns
             
         except Exception as e:
             logger.error(f"Similar pattern search failed: {e}")
             return []
     
+    async def _search_similar_patterns_by_terms(
+        self,
+        reference_pattern: CodePattern,
+        similarity_threshold: float,
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """Find similar patterns by word overlap when numpy is not installed."""
+        
+        # Rank patterns of the same type by their description terms
+        type_matches = await self.search_patterns(
+            query=f"{reference_pattern.pattern_type} {reference_pattern.description}",
+            pattern_type=reference_pattern.pattern_type,
+            limit=limit * 2
+        )
+        
+        similar_patterns = []
+        
+        for match in type_matches:
+            # Calculate similarity based on description and content
+            similarity_score = self._calculate_similarity_score(
+                reference_pattern, match
+            )
+            
+            if similarity_score >= similarity_threshold:
+                match['similarity_score'] = similarity_score
+                similar_patterns.append(match)
+        
+        # Sort by similarity
+        similar_patterns.sort(key=lambda x: x['similarity_score'], reverse=True)
+        
+        return similar_patterns[:limit]
+    
     async def search_by_tags(
         self,
         tags: List[str],
@@ -174,59 +174,46 @@ class ObsidianKnowledgeRetriever:
             List of matching content
         """
         try:
+            await self._refresh_search_index()
+            
             results = []
-            search_dirs = []
+            search_dirs = {}
             
             # Determine search directories based on content type
             if content_type in ['all', 'pattern']:
-                search_dirs.append(('patterns', 'pattern'))
+                search_dirs['patterns'] = 'pattern'
             if content_type in ['all', 'history']:
-                search_dirs.append(('history', 'development_history'))
+                search_dirs['history'] = 'development_history'
             if content_type in ['all', 'rule']:
-                search_dirs.append(('patterns/consistency-rules', 'consistency_rule'))
-            
-            for dir_name, expected_type in search_dirs:
-                search_dir = self.project_dir / dir_name
-                if not search_dir.exists():
-                    continue
-                
-                for md_file in search_dir.glob("*.md"):
-                    file_content = md_file.read_text(encoding='utf-8')
-                    frontmatter = self._parse_frontmatter(file_content)
-                    
-                    # Check content type
-                    if expected_type != 'all' and frontmatter.get('type') != expected_type:
-                        continue
-                    
-                    # Check if any tag matches
-                    file_tags = frontmatter.get('tags', [])
-                    if isinstance(file_tags, str):
-                        file_tags = [file_tags]
-                    
-                    matching_tags = set(tags) & set(file_tags)
-                    if not matching_tags:
-                        continue
-                    
-                    # Extract title
-                    title_match = re.search(r'^# (.+)$', file_content, re.MULTILINE)
-                    title = title_match.group(1) if title_match else md_file.stem
-                    
-                    result = {
-                        'title': title,
-                        'type': frontmatter.get('type'),
-                        'tags': file_tags,
-                        'matching_tags': list(matching_tags),
-                        'file_path': str(md_file),
-                        'created': frontmatter.get('created'),
-                        'tag_match_score': len(matching_tags) / len(tags)
-                    }
-                    
-                    results.append(result)
+                search_dirs['patterns/consistency-rules'] = 'consistency_rule'
+            
+            notes = self._search_index.notes
+            matches = [
+                (doc_id, matching_tags)
+                for doc_id, matching_tags in self._search_index.notes_with_tags(tags).items()
+                # Check directory and content type
+                if notes[doc_id].rel_dir in search_dirs and
+                search_dirs[notes[doc_id].rel_dir] == notes[doc_id].doc_type
+            ]
             
             # Sort by tag match score
-            results.sort(key=lambda x: x['tag_match_score'], reverse=True)
+            matches = heapq.nlargest(limit, matches, key=lambda match: len(match[1]))
+            
+            for doc_id, matching_tags in matches:
+                note = notes[doc_id]
+                result = {
+                    'title': note.title,
+                    'type': note.doc_type,
+                    'tags': note.tags,
+                    'matching_tags': matching_tags,
+                    'file_path': note.path,
+                    'created': note.created,
+                    'tag_match_score': len(matching_tags) / len(tags)
+                }
+                
+                results.append(result)
             
-            return results[:limit]
+            return results
             
         except Exception as e:
             logger.error(f"Tag search failed: {e}")
@@ -295,69 +282,109 @@ class ObsidianKnowledgeRetriever:
     async def get_cross_project_knowledge(
         self,
         query: str,
-        exclude_current: bool = True
+        exclude_current: bool = True,
+        limit: int = 20,
+        min_similarity: float = 0.1
     ) -> List[Dict[str, Any]]:
         """Search knowledge across all projects in the vault.
         
         Args:
             query: Search query
             exclude_current: Whether to exclude current project
+            limit: Maximum number of results
+            min_similarity: Minimum cosine similarity between query and pattern
             
         Returns:
             List of cross-project knowledge matches
         """
         try:
-            results = []
-            query_lower = query.lower()
+            if self._search_index.vectors is None:
+                return await self._scan_cross_project_knowledge(query, exclude_current)
             
-            # Find all project directories
-            project_dirs = [
-                d for d in self.vault_path.iterdir()
-                if d.is_dir() and not d.name.startswith('.')
-            ]
+            query_vector = self._search_index.vectors.vectorizer.transform_one(query)
+            ranked = []
             
-            for project_dir in project_dirs:
+            # Score each project's pattern matrix against the query and merge the top-k
+            for project_dir in self._project_dirs():
                 if exclude_current and project_dir.name == self.project_name:
                     continue
                 
-                # Search patterns in this project
-                patterns_dir = project_dir / "patterns"
-                if not patterns_dir.exists():
-                    continue
+                index = self._get_project_index(project_dir.name)
+                self._refresh_index(index)
                 
-                for pattern_file in patterns_dir.glob("*.md"):
-                    if pattern_file.name.startswith("consistency-rules"):
-                        continue
-                    
-                    file_content = pattern_file.read_text(encoding='utf-8')
-                    
-                    # Check if query matches
-                    if query_lower in file_content.lower():
-                        frontmatter = self._parse_frontmatter(file_content)
-                        
-                        title_match = re.search(r'^# (.+)$', file_content, re.MULTILINE)
-                        title = title_match.group(1) if title_match else pattern_file.stem
-                        
-                        result = {
-                            'title': title,
-                            'project': project_dir.name,
-                            'pattern_type': frontmatter.get('pattern_type'),
-                            'confidence': float(frontmatter.get('confidence', 0.0)),
-                            'file_path': str(pattern_file),
-                            'relevance_score': self._calculate_relevance_score(query, title, file_content, file_content)
-                        }
-                        
-                        results.append(result)
+                for note, similarity in index.similar(
+                    query_vector, limit, predicate=self._in_patterns_dir, min_score=min_similarity
+                ):
+                    ranked.append((project_dir.name, note, similarity))
             
             # Sort by relevance and confidence
-            results.sort(key=lambda x: (x['relevance_score'], x['confidence']), reverse=True)
-            
-            return results
+            top = heapq.nlargest(limit, ranked, key=lambda item: (item[2], item[1].confidence))
+            
+            return [
+                {
+                    'title': note.title,
+                    'project': project,
+                    'pattern_type': note.pattern_type,
+                    'confidence': note.confidence,
+                    'file_path': note.path,
+                    'relevance_score': similarity
+                }
+                for project, note, similarity in top
+            ]
             
         except Exception as e:
             logger.error(f"Cross-project search failed: {e}")
             return []
     
+    async def _scan_cross_project_knowledge(
+        self,
+        query: str,
+        exclude_current: bool
+    ) -> List[Dict[str, Any]]:
+        """Search other projects by substring match when numpy is not installed."""
+        
+        results = []
+        query_lower = query.lower()
+        
+        # Find all project directories
+        for project_dir in self._project_dirs():
+            if exclude_current and project_dir.name == self.project_name:
+                continue
+            
+            # Search patterns in this project
+            patterns_dir = project_dir / "patterns"
+            if not patterns_dir.exists():
+                continue
+            
+            for pattern_file in patterns_dir.glob("*.md"):
+                if pattern_file.name.startswith("consistency-rules"):
+                    continue
+                
+                file_content = pattern_file.read_text(encoding='utf-8')
+                
+                # Check if query matches
+                if query_lower in file_content.lower():
+                    frontmatter = self._parse_frontmatter(file_content)
+                    
+                    title_match = re.search(r'^# (.+)$', file_content, re.MULTILINE)
+                    title = title_match.group(1) if title_match else pattern_file.stem
+                    
+                    result = {
+                        'title': title,
+                        'project': project_dir.name,
+                        'pattern_type': frontmatter.get('pattern_type'),
+                        'confidence': float(frontmatter.get('confidence', 0.0)),
+                        'file_path': str(pattern_file),
+                        'relevance_score': self._calculate_relevance_score(query, title, file_content, file_content)
+                    }
+                    
+                    results.append(result)
+        
+        # Sort by relevance and confidence
+        results.sort(key=lambda x: (x['relevance_score'], x['confidence']), reverse=True)
+        
+        return results
+    
     async def get_pattern_usage_statistics(self) -> Dict[str, Any]:
         """Get statistics about pattern usage across the project.
         
@@ -472,27 +499,73 @@ class ObsidianKnowledgeRetriever:
             logger.error(f"Related knowledge suggestion failed: {e}")
             return []
     
-    async def _refresh_search_index(self):
-        """Refresh search index if needed."""
+    async def _refresh_search_index(self, force: bool = False):
+        """Refresh search index if needed.
         
-        if (self._index_last_updated is None or 
-            (datetime.now() - self._index_last_updated).total_seconds() > 300):  # 5 minutes
-            
-            self._search_index.clear()
-            self._index_last_updated = datetime.now()
+        Only notes whose mtime or size changed since the last refresh are
+        re-read, so a refresh costs one stat per note.
+        
+        Args:
+            force: Refresh even if the index was refreshed recently
+        """
+        
+        self._refresh_index(self._search_index, force)
+    
+    def _refresh_index(self, index: VaultSearchIndex, force: bool = False):
+        """Refresh a project index unless it was refreshed recently."""
+        if (force or index.last_refresh is None or
+                time.monotonic() - index.last_refresh > self.index_refresh_seconds):
+            index.refresh()
+    
+    def _project_dirs(self) -> List[Path]:
+        """List project directories in the vault."""
+        return [
+            d for d in self.vault_path.iterdir()
+            if d.is_dir() and not d.name.startswith('.')
+        ]
+    
+    def _get_project_index(self, project_name: str) -> VaultSearchIndex:
+        """Get the search index of a project in the vault, opening it on first use."""
+        index = self._project_indexes.get(project_name)
+        if index is None:
+            index = VaultSearchIndex(
+                self.vault_path / project_name, self.index_dir / f"{project_name}.sqlite3"
+            )
+            self._project_indexes[project_name] = index
+        return index
+    
+    def close(self):
+        """Close the search indexes opened by this retriever."""
+        for index in self._project_indexes.values():
+            index.close()
+    
+    def _is_pattern_note(self, note: IndexedNote) -> bool:
+        """Check if an indexed note is a code pattern in the patterns directory."""
+        return (
+            note.rel_dir == 'patterns' and
+            note.doc_type == 'pattern' and
+            not os.path.basename(note.path).startswith("consistency-rules")
+        )
+    
+    def _in_patterns_dir(self, note: IndexedNote) -> bool:
+        """Check if an indexed note is a pattern file (any type) in the patterns directory."""
+        return note.rel_dir == 'patterns' and not os.path.basename(note.path).startswith("consistency-rules")
+    
+    def _pattern_result(self, note: IndexedNote, score: float) -> Dict[str, Any]:
+        """Build a pattern search result from an indexed note."""
+        return {
+            'title': note.title,
+            'pattern_type': note.pattern_type,
+            'confidence': note.confidence,
+            'usage_count': note.usage_count,
+            'description': note.description,
+            'file_path': note.path,
+            'relevance_score': score
+        }
     
     def _parse_frontmatter(self, content: str) -> Dict[str, Any]:
         """Parse YAML frontmatter from markdown content."""
-        
-        frontmatter_match = re.match(r'^---\n(.*?)\n---', content, re.DOTALL)
-        if not frontmatter_match:
-            return {}
-        
-        import yaml
-        try:
-            return yaml.safe_load(frontmatter_match.group(1)) or {}
-        except yaml.YAMLError:
-            return {}
+        return parse_frontmatter(content)
     
     def _calculate_relevance_score(
         self,
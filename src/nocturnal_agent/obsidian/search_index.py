@@ -0,0 +1,493 @@
+"""Persistent inverted index with BM25 ranking for Obsidian vault notes."""
+
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import yaml
+
+from nocturnal_agent.engines.similarity_engine import NUMPY_AVAILABLE, VectorIndex
+
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r'\w+')
+FRONTMATTER_PATTERN = re.compile(r'^---\n(.*?)\n---', re.DOTALL)
+TITLE_PATTERN = re.compile(r'^# (.+)$', re.MULTILINE)
+DESCRIPTION_PATTERN = re.compile(r'## Description\n(.*?)\n##', re.DOTALL)
+
+INDEX_SCHEMA_VERSION = 1
+
+# libyaml is an order of magnitude faster when indexing large vaults
+_YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def parse_frontmatter(content: str) -> Dict[str, Any]:
+    """Parse YAML frontmatter from markdown content."""
+    frontmatter_match = FRONTMATTER_PATTERN.match(content)
+    if not frontmatter_match:
+        return {}
+
+    try:
+        return yaml.load(frontmatter_match.group(1), Loader=_YAML_LOADER) or {}
+    except yaml.YAMLError:
+        return {}
+
+
+@dataclass
+class IndexedNote:
+    """Metadata of an indexed note kept in memory for filtering and display."""
+    doc_id: int
+    path: str
+    rel_dir: str  # Directory relative to the indexed root ('' for the root)
+    length: int  # Number of tokens
+    title: str
+    description: str
+    doc_type: Optional[str]
+    pattern_type: Optional[str]
+    confidence: float
+    usage_count: int
+    created: Optional[str]
+    tags: List[str] = field(default_factory=list)
+
+
+class VaultSearchIndex:
+    """On-disk inverted index (term -> postings with tf) over one vault directory.
+
+    The index lives in SQLite next to the vault and is updated incrementally:
+    only notes whose mtime or size changed since the last refresh are re-read.
+    When NumPy is available every note's title and description are also
+    embedded into a memory-mapped ``VectorIndex`` for similarity queries.
+    """
+
+    def __init__(
+        self,
+        root_dir: Path,
+        index_path: Path,
+        k1: float = 1.5,
+        b: float = 0.75,
+        enable_vectors: bool = True
+    ):
+        """Initialize the search index.
+
+        Args:
+            root_dir: Directory whose markdown notes are indexed
+            index_path: SQLite file holding the index
+            k1: BM25 term frequency saturation
+            b: BM25 length normalization
+            enable_vectors: Maintain note vectors for similarity search (needs numpy)
+        """
+        self.root_dir = Path(root_dir)
+        self.index_path = Path(index_path)
+        self.k1 = k1
+        self.b = b
+        self.last_refresh: Optional[float] = None  # time.monotonic() of the last refresh
+
+        self.vectors: Optional[VectorIndex] = None
+        if enable_vectors and NUMPY_AVAILABLE:
+            self.vectors = VectorIndex(path=self.index_path.with_suffix('.vectors.npy'))
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self.notes: Dict[int, IndexedNote] = {}
+        self._notes_by_path: Dict[str, IndexedNote] = {}
+        self._file_state: Dict[str, Tuple[int, int]] = {}  # path -> (mtime_ns, size)
+        self._total_length = 0
+        self._loaded = False
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the index database, creating the schema if needed."""
+        if self._conn is not None:
+            return self._conn
+
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.index_path), check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != INDEX_SCHEMA_VERSION:
+            conn.executescript("""
+                DROP TABLE IF EXISTS documents;
+                DROP TABLE IF EXISTS postings;
+                DROP TABLE IF EXISTS tags;
+            """)
+
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS documents (
+                doc_id INTEGER PRIMARY KEY,
+                path TEXT UNIQUE NOT NULL,
+                rel_dir TEXT NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                title TEXT,
+                description TEXT,
+                doc_type TEXT,
+                pattern_type TEXT,
+                confidence REAL,
+                usage_count INTEGER,
+                created TEXT,
+                frontmatter TEXT
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                doc_id INTEGER NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (term, doc_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_postings_doc ON postings(doc_id);
+            CREATE TABLE IF NOT EXISTS tags (
+                tag TEXT NOT NULL,
+                doc_id INTEGER NOT NULL,
+                PRIMARY KEY (tag, doc_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_tags_doc ON tags(doc_id);
+        """)
+        conn.execute(f"PRAGMA user_version = {INDEX_SCHEMA_VERSION}")
+        conn.commit()
+
+        self._conn = conn
+        return conn
+
+    def _load(self):
+        """Load note metadata from the index into memory."""
+        conn = self._connect()
+
+        tags_by_doc: Dict[int, List[str]] = {}
+        for tag, doc_id in conn.execute("SELECT tag, doc_id FROM tags"):
+            tags_by_doc.setdefault(doc_id, []).append(tag)
+
+        for row in conn.execute("""
+            SELECT doc_id, path, rel_dir, mtime_ns, size, length, title, description,
+                   doc_type, pattern_type, confidence, usage_count, created
+            FROM documents
+        """):
+            note = IndexedNote(
+                doc_id=row[0], path=row[1], rel_dir=row[2], length=row[5],
+                title=row[6], description=row[7], doc_type=row[8], pattern_type=row[9],
+                confidence=row[10], usage_count=row[11], created=row[12],
+                tags=tags_by_doc.get(row[0], [])
+            )
+            self._add_note(note)
+            self._file_state[note.path] = (row[3], row[4])
+
+        self._loaded = True
+
+    def _add_note(self, note: IndexedNote):
+        """Register note metadata in memory."""
+        self.notes[note.doc_id] = note
+        self._notes_by_path[note.path] = note
+        self._total_length += note.length
+
+    def _drop_note(self, conn: sqlite3.Connection, path: str):
+        """Remove a note and its postings from the index."""
+        note = self._notes_by_path.pop(path, None)
+        self._file_state.pop(path, None)
+        if note is None:
+            return
+
+        del self.notes[note.doc_id]
+        self._total_length -= note.length
+        if self.vectors is not None:
+            self.vectors.remove(path)
+        conn.execute("DELETE FROM postings WHERE doc_id = ?", (note.doc_id,))
+        conn.execute("DELETE FROM tags WHERE doc_id = ?", (note.doc_id,))
+        conn.execute("DELETE FROM documents WHERE doc_id = ?", (note.doc_id,))
+
+    def _scan_files(self) -> Dict[str, Tuple[int, int]]:
+        """Stat every markdown note under the root directory."""
+        found: Dict[str, Tuple[int, int]] = {}
+        if not self.root_dir.exists():
+            return found
+
+        stack = [str(self.root_dir)]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.name.startswith('.'):
+                            continue
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.name.endswith('.md'):
+                            stat = entry.stat()
+                            found[entry.path] = (stat.st_mtime_ns, stat.st_size)
+            except OSError as e:
+                logger.warning(f"Cannot scan {directory}: {e}")
+
+        return found
+
+    def refresh(self) -> Dict[str, int]:
+        """Bring the index up to date with the notes on disk.
+
+        Returns:
+            Counts of added/updated and removed notes
+        """
+        if not self._loaded:
+            self._load()
+
+        conn = self._connect()
+        current = self._scan_files()
+        self.last_refresh = time.monotonic()
+
+        removed = [path for path in self._file_state if path not in current]
+        changed = [path for path, state in current.items() if self._file_state.get(path) != state]
+
+        if removed or changed:
+            with conn:
+                for path in removed:
+                    self._drop_note(conn, path)
+                for path in changed:
+                    self._drop_note(conn, path)
+                    self._index_file(conn, path, current[path])
+
+        if self.vectors is not None:
+            self._sync_vectors()
+
+        if not removed and not changed:
+            return {'updated': 0, 'removed': 0}
+
+        logger.debug(f"Search index refreshed: {len(changed)} updated, {len(removed)} removed")
+        return {'updated': len(changed), 'removed': len(removed)}
+
+    def _index_file(self, conn: sqlite3.Connection, path: str, state: Tuple[int, int]):
+        """Parse one note and write its postings."""
+        try:
+            content = Path(path).read_text(encoding='utf-8')
+        except (OSError, UnicodeDecodeError) as e:
+            logger.warning(f"Cannot index {path}: {e}")
+            return
+
+        frontmatter = parse_frontmatter(content)
+        title_match = TITLE_PATTERN.search(content)
+        title = title_match.group(1) if title_match else Path(path).stem
+        desc_match = DESCRIPTION_PATTERN.search(content)
+        description = desc_match.group(1).strip() if desc_match else ""
+
+        tags = frontmatter.get('tags', [])
+        if isinstance(tags, str):
+            tags = [tags]
+        tags = [str(tag) for tag in (tags or [])]
+
+        try:
+            confidence = float(frontmatter.get('confidence', 0.0))
+        except (TypeError, ValueError):
+            confidence = 0.0
+        try:
+            usage_count = int(frontmatter.get('usage_count', 0))
+        except (TypeError, ValueError):
+            usage_count = 0
+
+        term_counts = Counter(tokenize(content))
+        length = sum(term_counts.values())
+        rel_dir = os.path.relpath(os.path.dirname(path), self.root_dir)
+        rel_dir = '' if rel_dir == '.' else Path(rel_dir).as_posix()
+        created = frontmatter.get('created')
+        if self.vectors is not None:
+            self.vectors.upsert(path, _vector_text(title, description, content), state)
+
+        # Another retriever sharing this index file may have indexed the path already
+        for (stale_id,) in conn.execute("SELECT doc_id FROM documents WHERE path = ?", (path,)).fetchall():
+            for table in ('postings', 'tags', 'documents'):
+                conn.execute(f"DELETE FROM {table} WHERE doc_id = ?", (stale_id,))
+
+        cursor = conn.execute(
+            """
+            INSERT INTO documents (path, rel_dir, mtime_ns, size, length, title, description,
+                                   doc_type, pattern_type, confidence, usage_count, created, frontmatter)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                path, rel_dir, state[0], state[1], length, title, description,
+                frontmatter.get('type'), _optional_str(frontmatter.get('pattern_type')),
+                confidence, usage_count, _optional_str(created),
+                json.dumps(frontmatter, ensure_ascii=False, default=str)
+            )
+        )
+        doc_id = cursor.lastrowid
+        conn.executemany(
+            "INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)",
+            ((term, doc_id, tf) for term, tf in term_counts.items())
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO tags (tag, doc_id) VALUES (?, ?)",
+            ((tag, doc_id) for tag in tags)
+        )
+
+        self._add_note(IndexedNote(
+            doc_id=doc_id, path=path, rel_dir=rel_dir, length=length,
+            title=title, description=description, doc_type=frontmatter.get('type'),
+            pattern_type=_optional_str(frontmatter.get('pattern_type')),
+            confidence=confidence, usage_count=usage_count,
+            created=_optional_str(created), tags=tags
+        ))
+        self._file_state[path] = state
+
+    def _sync_vectors(self):
+        """Re-embed notes whose vectors are missing or older than the indexed file.
+
+        Vectors are flushed after the SQLite commit, so after a crash the two
+        can disagree; the per-note state stored with each vector detects that.
+        """
+        vectors = self.vectors
+        for path in [key for key in vectors.states if key not in self._file_state]:
+            vectors.remove(path)
+
+        stale = [path for path, state in self._file_state.items() if vectors.states.get(path) != state]
+        for path in stale:
+            note = self._notes_by_path[path]
+            content = ""
+            if not note.description:
+                try:
+                    content = Path(path).read_text(encoding='utf-8')
+                except (OSError, UnicodeDecodeError) as e:
+                    logger.warning(f"Cannot embed {path}: {e}")
+                    continue
+            vectors.upsert(path, _vector_text(note.title, note.description, content), self._file_state[path])
+
+        vectors.flush()
+
+    def similar(
+        self,
+        query_vector: Any,
+        limit: int,
+        predicate: Optional[Callable[[IndexedNote], bool]] = None,
+        min_score: float = 0.0
+    ) -> List[Tuple[IndexedNote, float]]:
+        """Rank notes by cosine similarity to an embedded query.
+
+        Args:
+            query_vector: Query embedded with ``self.vectors.vectorizer``
+            limit: Maximum number of results
+            predicate: Only return notes for which this returns True
+            min_score: Minimum cosine similarity
+
+        Returns:
+            List of (note, similarity) sorted by descending similarity
+        """
+        if self.vectors is None:
+            return []
+
+        notes_by_path = self._notes_by_path
+
+        def accept(path: str) -> bool:
+            note = notes_by_path.get(path)
+            return note is not None and (predicate is None or predicate(note))
+
+        matches = self.vectors.search_vectors([query_vector], limit, accept, min_score)[0]
+        return [(notes_by_path[path], score) for path, score in matches]
+
+    def search(
+        self,
+        query: str,
+        predicate: Optional[Callable[[IndexedNote], bool]] = None,
+        limit: Optional[int] = None
+    ) -> List[Tuple[IndexedNote, float]]:
+        """Rank notes against a query with BM25.
+
+        Args:
+            query: Free-text query
+            predicate: Only score notes for which this returns True
+            limit: Maximum number of results
+
+        Returns:
+            List of (note, score) sorted by descending score
+        """
+        terms = set(tokenize(query))
+        if not terms or not self.notes:
+            return []
+
+        conn = self._connect()
+        rejected = set()
+        total_docs = len(self.notes)
+        avg_length = self._total_length / total_docs if total_docs else 0.0
+
+        scores: Dict[int, float] = {}
+        for term in terms:
+            postings = conn.execute(
+                "SELECT doc_id, tf FROM postings WHERE term = ?", (term,)
+            ).fetchall()
+            if not postings:
+                continue
+
+            doc_freq = len(postings)
+            idf = math.log(1 + (total_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+
+            for doc_id, tf in postings:
+                if doc_id in rejected:
+                    continue
+                note = self.notes.get(doc_id)
+                if note is None or (predicate is not None and doc_id not in scores and not predicate(note)):
+                    rejected.add(doc_id)
+                    continue
+                norm = 1 - self.b + self.b * (note.length / avg_length if avg_length else 0.0)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+
+        if limit is not None:
+            ranked = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        else:
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+        return [(self.notes[doc_id], score) for doc_id, score in ranked]
+
+    def notes_with_tags(self, tags: Iterable[str]) -> Dict[int, List[str]]:
+        """Find notes carrying any of the given tags.
+
+        Args:
+            tags: Tags to look up
+
+        Returns:
+            Mapping of document ID to the matching tags
+        """
+        tags = list(tags)
+        if not tags:
+            return {}
+
+        conn = self._connect()
+        placeholders = ','.join('?' * len(tags))
+        matches: Dict[int, List[str]] = {}
+        for tag, doc_id in conn.execute(
+            f"SELECT tag, doc_id FROM tags WHERE tag IN ({placeholders})", tags
+        ):
+            if doc_id in self.notes:
+                matches.setdefault(doc_id, []).append(tag)
+
+        return matches
+
+    def close(self):
+        """Close the index database."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        if self.vectors is not None:
+            self.vectors.flush()
+
+
+def _vector_text(title: str, description: str, content: str) -> str:
+    """Text a note is embedded from: its title and description summary, or the
+    whole note when it has no description section."""
+    return f"{title}\n{description}" if description else content
+
+
+def _optional_str(value: Any) -> Optional[str]:
+    """Convert frontmatter scalars (dates, numbers) to strings, keeping None."""
+    if value is None:
+        return None
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
@@ -6,6 +6,10 @@ from nocturnal_agent.parallel.branch_manager import (
     BranchInfo,
     MergeConflict
 )
+from nocturnal_agent.parallel.worktree_pool import (
+    WorktreePool,
+    WorktreeLease
+)
 from nocturnal_agent.parallel.quality_controller import (
     QualityController,
     QualityTier,
@@ -31,5 +35,7 @@ __all__ = [
     'ExecutionPlan',
     'QualityMetrics',
     'ParallelExecutionTask',
-    'ExecutionSession'
+    'ExecutionSession',
+    'WorktreePool',
+    'WorktreeLease'
 ]
\ No newline at end of file
@@ -9,6 +9,8 @@ from typing import Dict, List, Optional, Any, Set
 from dataclasses import dataclass, field
 from enum import Enum
 
+from nocturnal_agent.parallel.worktree_pool import WorktreePool
+
 logger = logging.getLogger(__name__)
 
 
@@ -76,6 +78,12 @@ class BranchManager:
         self.auto_merge_high_quality = config.get('auto_merge_high_quality', True)
         self.conflict_detection_enabled = config.get('conflict_detection_enabled', True)
         
+        # worktree分離設定: 有効時はプロジェクトのチェックアウトを切り替えず、
+        # ブランチごとに貸し出したworktreeで作業・マージする
+        self.worktree_pool: Optional[WorktreePool] = (
+            WorktreePool(project_path, config) if config.get('use_worktrees', False) else None
+        )
+        
         # 現在のブランチ状態
         self.active_branches: Dict[str, BranchInfo] = {}
         self.current_night_session: Optional[str] = None
@@ -112,6 +120,9 @@ class BranchManager:
             # 夜間メインブランチを作成
             self._create_branch(night_main_branch, current_commit)
             
+            if self.worktree_pool is not None:
+                self.worktree_pool.warm()
+            
             # ブランチ情報を記録
             self.active_branches[night_main_branch] = BranchInfo(
                 name=night_main_branch,
@@ -222,8 +233,46 @@ class BranchManager:
             logger.error(f"ブランチ切り替えエラー ({branch_name}): {e.stderr}")
             return False
     
+    def lease_worktree(self, branch_name: str, timeout: Optional[float] = None) -> Path:
+        """
+        ブランチ用のworktreeを借りる
+        
+        worktree分離が無効な場合はプロジェクトのチェックアウトを切り替え、
+        プロジェクトパスを返す。
+        
+        Args:
+            branch_name: 作業するブランチ名
+            timeout: 同じブランチの返却を待つ最大秒数
+            
+        Returns:
+            作業ディレクトリのパス
+        """
+        if self.worktree_pool is None:
+            if not self.switch_to_branch(branch_name):
+                raise RuntimeError(f"ブランチ切り替え失敗: {branch_name}")
+            return self.project_path
+        
+        path = self.worktree_pool.lease(branch_name, timeout)
+        if branch_name in self.active_branches:
+            self.active_branches[branch_name].last_activity = datetime.now()
+        return path
+    
+    def release_worktree(self, branch_name: str) -> bool:
+        """ブランチ用に借りたworktreeを返却"""
+        if self.worktree_pool is None:
+            return False
+        return self.worktree_pool.release(branch_name)
+    
+    def has_uncommitted_changes(self, working_directory: Optional[Path] = None) -> bool:
+        """作業ディレクトリに未コミットの変更があるか"""
+        result = subprocess.run([
+            'git', 'status', '--porcelain'
+        ], cwd=working_directory or self.project_path, capture_output=True, text=True, check=True)
+        return bool(result.stdout.strip())
+    
     def commit_task_result(self, task_id: str, commit_message: str, 
-                          files_changed: List[str]) -> Optional[str]:
+                          files_changed: List[str],
+                          working_directory: Optional[Path] = None) -> Optional[str]:
         """
         タスク結果をコミット
         
@@ -231,34 +280,36 @@ class BranchManager:
             task_id: タスクID
             commit_message: コミットメッセージ
             files_changed: 変更されたファイル一覧
+            working_directory: コミットする作業ディレクトリ（既定: プロジェクト）
             
         Returns:
             コミットハッシュ
         """
+        cwd = working_directory or self.project_path
         try:
             # 変更されたファイルをステージング
             if files_changed:
                 subprocess.run([
                     'git', 'add'
-                ] + files_changed, cwd=self.project_path, check=True)
+                ] + files_changed, cwd=cwd, check=True)
             else:
                 # すべての変更をステージング
                 subprocess.run([
                     'git', 'add', '-A'
-                ], cwd=self.project_path, check=True)
+                ], cwd=cwd, check=True)
             
             # コミット実行
             full_commit_message = f"{commit_message}\n\nTask-ID: {task_id}\nNocturnal-Agent: automated-commit"
             
             result = subprocess.run([
                 'git', 'commit', '-m', full_commit_message
-            ], cwd=self.project_path, capture_output=True, text=True, check=True)
+            ], cwd=cwd, capture_output=True, text=True, check=True)
             
             # コミットハッシュを取得
-            commit_hash = self._get_current_commit()
+            commit_hash = self._get_current_commit(cwd)
             
             # 現在のブランチの情報を更新
-            current_branch = self._get_current_branch()
+            current_branch = self._get_current_branch(cwd)
             if current_branch in self.active_branches:
                 branch_info = self.active_branches[current_branch]
                 branch_info.last_activity = datetime.now()
@@ -369,20 +420,25 @@ class BranchManager:
                     return merge_result
             
             # 実際のマージ実行
-            current_branch = self._get_current_branch()
-            
-            # ターゲットブランチに切り替え
-            self.switch_to_branch(target_branch)
+            if self.worktree_pool is not None:
+                # ターゲットブランチのworktreeでマージし、プロジェクト側は切り替えない
+                merge_directory = self.lease_worktree(target_branch)
+            else:
+                current_branch = self._get_current_branch()
+                
+                # ターゲットブランチに切り替え
+                self.switch_to_branch(target_branch)
+                merge_directory = self.project_path
             
             try:
                 # マージ実行
                 result = subprocess.run([
                     'git', 'merge', '--no-ff', source_branch,
                     '-m', f"Auto-merge: {source_branch} (quality: {quality_score:.2f})"
-                ], cwd=self.project_path, capture_output=True, text=True, check=True)
+                ], cwd=merge_directory, capture_output=True, text=True, check=True)
                 
                 merge_result['success'] = True
-                merge_result['commit_hash'] = self._get_current_commit()
+                merge_result['commit_hash'] = self._get_current_commit(merge_directory)
                 merge_result['strategy_used'] = 'fast_forward_merge'
                 
                 # 統計更新
@@ -398,10 +454,15 @@ class BranchManager:
             except subprocess.CalledProcessError as e:
                 logger.error(f"マージ実行エラー: {e.stderr}")
                 merge_result['strategy_used'] = 'merge_failed'
+                if self.worktree_pool is not None:
+                    subprocess.run(['git', 'merge', '--abort'], cwd=merge_directory, capture_output=True, text=True)
                 
             finally:
-                # 元のブランチに戻る
-                self.switch_to_branch(current_branch)
+                if self.worktree_pool is not None:
+                    self.release_worktree(target_branch)
+                else:
+                    # 元のブランチに戻る
+                    self.switch_to_branch(current_branch)
         
         except Exception as e:
             logger.error(f"自動マージエラー: {e}")
@@ -427,6 +488,10 @@ class BranchManager:
                 branch_info.last_activity < cutoff_time and
                 branch_info.branch_type != BranchType.NIGHT_MAIN):
                 
+                # 作業中のworktreeがあるブランチは削除できない
+                if self.worktree_pool is not None and self.worktree_pool.is_leased(branch_name):
+                    continue
+                
                 try:
                     # ブランチ削除
                     subprocess.run([
@@ -441,6 +506,10 @@ class BranchManager:
                 except subprocess.CalledProcessError as e:
                     logger.warning(f"ブランチ削除エラー ({branch_name}): {e.stderr}")
         
+        # 余剰の待機worktreeを削除
+        if self.worktree_pool is not None:
+            self.worktree_pool.collect_garbage()
+        
         return deleted_branches
     
     def get_branch_status(self) -> Dict[str, Any]:
@@ -454,6 +523,7 @@ class BranchManager:
                 for branch_type in BranchType
             },
             'statistics': self.branch_stats,
+            'worktrees': self.worktree_pool.get_pool_status() if self.worktree_pool is not None else None,
             'recent_activity': [
                 {
                     'name': info.name,
@@ -465,18 +535,18 @@ class BranchManager:
             ]
         }
     
-    def _get_current_branch(self) -> str:
+    def _get_current_branch(self, cwd: Optional[Path] = None) -> str:
         """現在のブランチ名を取得"""
         result = subprocess.run([
             'git', 'branch', '--show-current'
-        ], cwd=self.project_path, capture_output=True, text=True, check=True)
+        ], cwd=cwd or self.project_path, capture_output=True, text=True, check=True)
         return result.stdout.strip()
     
-    def _get_current_commit(self) -> str:
+    def _get_current_commit(self, cwd: Optional[Path] = None) -> str:
         """現在のコミットハッシュを取得"""
         result = subprocess.run([
             'git', 'rev-parse', 'HEAD'
-        ], cwd=self.project_path, capture_output=True, text=True, check=True)
+        ], cwd=cwd or self.project_path, capture_output=True, text=True, check=True)
         return result.stdout.strip()
     
     def _get_branch_commit(self, branch_name: str) -> str:
@@ -488,6 +558,12 @@ class BranchManager:
     
     def _create_branch(self, branch_name: str, base_commit: str):
         """新しいブランチを作成"""
+        if self.worktree_pool is not None:
+            # worktreeで使うためプロジェクト側ではチェックアウトしない
+            subprocess.run([
+                'git', 'branch', branch_name, base_commit
+            ], cwd=self.project_path, capture_output=True, text=True, check=True)
+            return
         subprocess.run([
             'git', 'checkout', '-b', branch_name, base_commit
         ], cwd=self.project_path, capture_output=True, text=True, check=True)
@@ -2,8 +2,9 @@
 
 import logging
 import asyncio
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Callable, Tuple
+from typing import Deque, Dict, List, Optional, Any, Callable, Tuple
 from dataclasses import dataclass, field
 import concurrent.futures
 
@@ -24,6 +25,9 @@ class ParallelExecutionTask:
     executor_id: str
     future: Optional[asyncio.Future] = None
     estimated_completion: Optional[datetime] = None
+    queued_at: Optional[datetime] = None
+    slot_acquired_at: Optional[datetime] = None
+    slot_released: bool = False
 
 
 @dataclass
@@ -53,16 +57,31 @@ class ParallelExecutor:
         self.project_path = project_path
         self.config = config
         
+        # 実行設定
+        self.max_parallel_executions = config.get('max_parallel_executions', 3)
+        
         # サブシステムを初期化
-        self.branch_manager = BranchManager(project_path, config.get('branch_config', {}))
+        # 並行タスクが作業ツリーを奪い合わないよう、既定でタスクごとにworktreeを貸し出す
+        branch_config = dict(config.get('branch_config', {}))
+        branch_config.setdefault('use_worktrees', config.get('use_worktrees', True))
+        branch_config.setdefault('worktree_pool_size', self.max_parallel_executions)
+        self.branch_manager = BranchManager(project_path, branch_config)
         self.quality_controller = QualityController(self.branch_manager, config.get('quality_config', {}))
         
-        # 実行設定
-        self.max_parallel_executions = config.get('max_parallel_executions', 3)
         self.execution_timeout = config.get('execution_timeout_seconds', 1800)  # 30分
         self.quality_assessment_enabled = config.get('quality_assessment_enabled', True)
         self.progressive_rollout_enabled = config.get('progressive_rollout_enabled', True)
         
+        # 品質階層ごとの同時実行上限（既定: 実験的タスクで全スロットを埋めない）
+        self.tier_limits: Dict[QualityTier, int] = {
+            QualityTier.LOW: max(1, self.max_parallel_executions - 1)
+        }
+        for tier_name, limit in config.get('tier_limits', {}).items():
+            self.tier_limits[QualityTier(tier_name)] = limit
+        # スロット待ちタスクの上限。超えるとexecute_task_parallelの呼び出し側が待機する
+        self.max_pending_tasks = config.get('max_pending_tasks', self.max_parallel_executions * 2)
+        self._reset_slots()
+        
         # セッション管理
         self.current_session: Optional[ExecutionSession] = None
         self.executor_pool = concurrent.futures.ThreadPoolExecutor(
@@ -108,6 +127,7 @@ class ParallelExecutor:
             )
             
             self.executor_stats['sessions_started'] += 1
+            self._reset_slots()
             
             logger.info(f"並行実行セッション開始完了: {session_id}")
             return session_id
@@ -134,12 +154,13 @@ class ParallelExecutor:
         
         logger.debug(f"並行実行タスク追加: {task.id}")
         
+        # スロット待ちが上限に達している間は投入を待たせる（バックプレッシャー）
+        if self._submission_semaphore.locked():
+            self.slot_stats['backpressure_waits'] += 1
+        await self._submission_semaphore.acquire()
+        enqueued = False
+        
         try:
-            # 並行実行数の制限チェック
-            if len(self.current_session.active_tasks) >= self.current_session.max_parallel_limit:
-                # 完了待ち
-                await self._wait_for_execution_slot()
-            
             # 品質評価と実行方針決定
             if self.quality_assessment_enabled:
                 quality_decision = await self.quality_controller.evaluate_task_quality(
@@ -149,6 +170,7 @@ class ParallelExecutor:
                 if quality_decision.action == "reject":
                     logger.warning(f"品質評価によりタスク拒否: {task.id}")
                     self.current_session.failed_tasks.append(task.id)
+                    self._submission_semaphore.release()
                     return task.id
             else:
                 # 品質評価無効時はデフォルト設定
@@ -161,35 +183,35 @@ class ParallelExecutor:
                 quality_tier=quality_decision.quality_tier if quality_decision else QualityTier.MEDIUM,
                 started_at=datetime.now(),
                 executor_id=f"exec-{task.id}-{int(datetime.now().timestamp())}",
-                estimated_completion=datetime.now() + timedelta(seconds=self.execution_timeout)
+                estimated_completion=datetime.now() + timedelta(seconds=self.execution_timeout),
+                queued_at=datetime.now()
             )
             
-            # 非同期実行を開始
+            # 非同期実行を開始（スロットが割り当てられるまでタスク内で待機する）
             future = asyncio.create_task(
                 self._execute_task_with_quality_control(
                     parallel_task, executor_func, quality_decision
                 )
             )
             parallel_task.future = future
+            enqueued = True
             
             # アクティブタスクリストに追加
             self.current_session.active_tasks[task.id] = parallel_task
             self.current_session.total_tasks_processed += 1
-            
-            # 統計更新
-            current_parallel = len(self.current_session.active_tasks)
-            if current_parallel > self.executor_stats['parallel_executions_peak']:
-                self.executor_stats['parallel_executions_peak'] = current_parallel
+            self._idle_event.clear()
             
             # 実行コールバックを通知
             await self._notify_execution_callbacks('task_started', task, parallel_task)
             
-            logger.debug(f"並行実行開始: {task.id} ({current_parallel}/{self.max_parallel_executions})")
+            logger.debug(f"並行実行投入: {task.id} (実行中 {self._running_count()}/{self.max_parallel_executions})")
             return task.id
             
         except Exception as e:
             logger.error(f"並行実行追加エラー ({task.id}): {e}")
             self.current_session.failed_tasks.append(task.id)
+            if not enqueued:
+                self._submission_semaphore.release()
             raise
     
     async def wait_for_completion(self, task_id: Optional[str] = None,
@@ -228,31 +250,24 @@ class ParallelExecutor:
                 return {'status': 'completed', 'task_id': task_id, 'result': result}
                 
             else:
-                # 全タスクの完了を待機
-                active_futures = [
-                    task.future for task in self.current_session.active_tasks.values()
-                    if task.future and not task.future.done()
-                ]
-                
-                if not active_futures:
+                # 全タスクの完了を待機（待機中に投入されたタスクも含む）
+                if not self.current_session.active_tasks:
                     return {'status': 'all_completed', 'active_count': 0}
                 
-                logger.info(f"全タスク完了待機中: {len(active_futures)}個のタスク")
+                logger.info(f"全タスク完了待機中: {len(self.current_session.active_tasks)}個のタスク")
+                completed_before = len(self.current_session.completed_tasks) + len(self.current_session.failed_tasks)
                 
-                if timeout:
-                    done, pending = await asyncio.wait(
-                        active_futures, timeout=timeout, return_when=asyncio.ALL_COMPLETED
-                    )
-                    
-                    if pending:
-                        logger.warning(f"タイムアウト: {len(pending)}個のタスクが未完了")
-                        return {
-                            'status': 'timeout',
-                            'completed_count': len(done),
-                            'pending_count': len(pending)
-                        }
-                else:
-                    await asyncio.gather(*active_futures, return_exceptions=True)
+                try:
+                    await asyncio.wait_for(self._idle_event.wait(), timeout=timeout or None)
+                except asyncio.TimeoutError:
+                    pending = len(self.current_session.active_tasks)
+                    logger.warning(f"タイムアウト: {pending}個のタスクが未完了")
+                    return {
+                        'status': 'timeout',
+                        'completed_count': (len(self.current_session.completed_tasks) +
+                                            len(self.current_session.failed_tasks) - completed_before),
+                        'pending_count': pending
+                    }
                 
                 return {
                     'status': 'all_completed',
@@ -331,13 +346,15 @@ class ParallelExecutor:
         
         active_tasks = []
         for task_id, parallel_task in self.current_session.active_tasks.items():
-            status = "running"
+            status = "running" if parallel_task.slot_acquired_at else "queued"
             if parallel_task.future and parallel_task.future.done():
                 status = "completed" if not parallel_task.future.exception() else "failed"
             
+            plan = self.quality_controller.active_executions.get(task_id)
             active_tasks.append({
                 'task_id': task_id,
-                'branch': parallel_task.branch_name,
+                'branch': plan.target_branch if plan else parallel_task.branch_name,
+                'worktree': plan.worktree_path if plan else None,
                 'quality_tier': parallel_task.quality_tier.value,
                 'status': status,
                 'duration': str(datetime.now() - parallel_task.started_at),
@@ -353,30 +370,151 @@ class ParallelExecutor:
             'failed_count': len(self.current_session.failed_tasks),
             'total_processed': self.current_session.total_tasks_processed,
             'parallel_limit': self.current_session.max_parallel_limit,
+            'slots': self._get_slot_status(),
             'branch_status': self.branch_manager.get_branch_status(),
             'quality_status': self.quality_controller.get_controller_status()
         }
     
-    async def _wait_for_execution_slot(self):
-        """実行スロットが空くまで待機"""
-        logger.debug("実行スロット待機中")
+    def _reset_slots(self):
+        """スロット管理の状態を初期化"""
+        self._running_by_tier: Dict[QualityTier, int] = {tier: 0 for tier in QualityTier}
+        self._slot_waiters: Deque[Tuple[ParallelExecutionTask, asyncio.Future]] = deque()
+        self._submission_semaphore = asyncio.Semaphore(self.max_pending_tasks)
+        self._idle_event = asyncio.Event()
+        self._idle_event.set()
+        self.slot_stats = {
+            'tracking_since': datetime.now(),
+            'slots_acquired': 0,
+            'wait_seconds_total': 0.0,
+            'wait_seconds_max': 0.0,
+            'busy_slot_seconds': 0.0,
+            'backpressure_waits': 0
+        }
+    
+    def _running_count(self) -> int:
+        """スロットを保持している実行中タスク数"""
+        return sum(self._running_by_tier.values())
+    
+    def _slot_limit(self) -> int:
+        """全体の同時実行上限"""
+        return self.current_session.max_parallel_limit if self.current_session else self.max_parallel_executions
+    
+    def _can_start(self, tier: QualityTier) -> bool:
+        """全体と品質階層の両方に空きスロットがあるか"""
+        limit = self._slot_limit()
+        if self._running_count() >= limit:
+            return False
+        return self._running_by_tier[tier] < self.tier_limits.get(tier, limit)
+    
+    async def _wait_for_execution_slot(self, parallel_task: ParallelExecutionTask):
+        """
+        実行スロットが割り当てられるまで待機
         
-        while len(self.current_session.active_tasks) >= self.current_session.max_parallel_limit:
-            # 完了したタスクをクリーンアップ
-            await self._cleanup_completed_tasks()
-            
-            if len(self.current_session.active_tasks) >= self.current_session.max_parallel_limit:
-                # まだ満杯の場合は少し待機
-                await asyncio.sleep(1.0)
+        待機中のタスクは投入順に並び、スロットは追加直後と完了時の
+        _release_slotに割り当てられる。上限に達した品質階層の
+        タスクは飛ばし、他の階層のタスクを先に開始する。
+        """
+        if not self._slot_waiters and self._can_start(parallel_task.quality_tier):
+            self._grant_slot(parallel_task)
+            return
+        
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (parallel_task, waiter)
+        self._slot_waiters.append(entry)
+        # 先行の待機タスクが階層上限で止まっているだけなら空きスロットを使う
+        self._grant_waiting_slots()
+        if waiter.done():
+            return
+        
+        logger.debug(f"実行スロット待機中: {parallel_task.task.id}")
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # 割り当て直後にキャンセルされた
+                self._release_slot(parallel_task)
+            else:
+                self._slot_waiters.remove(entry)
+                self._submission_semaphore.release()
+            raise
+    
+    def _grant_slot(self, parallel_task: ParallelExecutionTask):
+        """タスクにスロットを割り当てる"""
+        now = datetime.now()
+        self._running_by_tier[parallel_task.quality_tier] += 1
+        parallel_task.slot_acquired_at = now
+        parallel_task.started_at = now
+        # 待機枠を空け、バックプレッシャーで止まっている投入を再開させる
+        self._submission_semaphore.release()
+        
+        wait_seconds = (now - (parallel_task.queued_at or now)).total_seconds()
+        self.slot_stats['slots_acquired'] += 1
+        self.slot_stats['wait_seconds_total'] += wait_seconds
+        self.slot_stats['wait_seconds_max'] = max(self.slot_stats['wait_seconds_max'], wait_seconds)
+        
+        current_parallel = self._running_count()
+        if current_parallel > self.executor_stats['parallel_executions_peak']:
+            self.executor_stats['parallel_executions_peak'] = current_parallel
+    
+    def _release_slot(self, parallel_task: ParallelExecutionTask):
+        """タスクのスロットを解放し、待機中のタスクに割り当てる"""
+        if parallel_task.slot_acquired_at is None or parallel_task.slot_released:
+            return
+        parallel_task.slot_released = True
+        self._running_by_tier[parallel_task.quality_tier] -= 1
+        self.slot_stats['busy_slot_seconds'] += (datetime.now() - parallel_task.slot_acquired_at).total_seconds()
+        self._grant_waiting_slots()
+    
+    def _grant_waiting_slots(self):
+        """開始できる待機中のタスクに投入順でスロットを割り当てる"""
+        for entry in list(self._slot_waiters):
+            waiting_task, waiter = entry
+            if self._running_count() >= self._slot_limit():
+                break
+            if not self._can_start(waiting_task.quality_tier):
+                continue
+            self._slot_waiters.remove(entry)
+            self._grant_slot(waiting_task)
+            waiter.set_result(None)
+    
+    def _get_slot_status(self) -> Dict[str, Any]:
+        """スロットの使用状況と待機時間の指標を取得"""
+        now = datetime.now()
+        limit = self._slot_limit()
+        busy_seconds = self.slot_stats['busy_slot_seconds']
+        if self.current_session:
+            busy_seconds += sum(
+                (now - parallel_task.slot_acquired_at).total_seconds()
+                for parallel_task in self.current_session.active_tasks.values()
+                if parallel_task.slot_acquired_at and not parallel_task.slot_released
+            )
+        elapsed = (now - self.slot_stats['tracking_since']).total_seconds()
+        acquired = self.slot_stats['slots_acquired']
+        
+        return {
+            'limit': limit,
+            'running': self._running_count(),
+            'queued': len(self._slot_waiters),
+            'max_pending': self.max_pending_tasks,
+            'running_by_tier': {tier.value: count for tier, count in self._running_by_tier.items() if count},
+            'tier_limits': {tier.value: tier_limit for tier, tier_limit in self.tier_limits.items()},
+            'slots_acquired': acquired,
+            'wait_seconds_avg': self.slot_stats['wait_seconds_total'] / acquired if acquired else 0.0,
+            'wait_seconds_max': self.slot_stats['wait_seconds_max'],
+            'backpressure_waits': self.slot_stats['backpressure_waits'],
+            'utilization': busy_seconds / (limit * elapsed) if elapsed > 0 and limit else 0.0
+        }
     
     async def _execute_task_with_quality_control(self, parallel_task: ParallelExecutionTask,
                                                executor_func: Callable,
                                                quality_decision) -> ExecutionResult:
         """品質制御下でタスクを実行"""
         task = parallel_task.task
-        logger.debug(f"品質制御実行開始: {task.id}")
         
         try:
+            await self._wait_for_execution_slot(parallel_task)
+            logger.debug(f"品質制御実行開始: {task.id}")
+            
             if self.quality_assessment_enabled and quality_decision:
                 # 品質コントローラー経由で実行
                 result = await self.quality_controller.execute_with_quality_control(
@@ -407,6 +545,15 @@ class ParallelExecutor:
             await self._handle_task_completion(parallel_task, error_result, success=False)
             
             return error_result
+        
+        finally:
+            # キャンセル時も含めスロットを必ず解放する
+            self._release_slot(parallel_task)
+            if self.current_session and self.current_session.active_tasks.get(task.id) is parallel_task:
+                del self.current_session.active_tasks[task.id]
+                self.current_session.failed_tasks.append(task.id)
+                if not self.current_session.active_tasks:
+                    self._idle_event.set()
     
     async def _handle_task_completion(self, parallel_task: ParallelExecutionTask,
                                     result: ExecutionResult, success: bool):
@@ -414,9 +561,14 @@ class ParallelExecutor:
         task_id = parallel_task.task.id
         
         try:
+            # スロットを解放し、待機中のタスクを開始させる
+            self._release_slot(parallel_task)
+            
             # セッションから移動
             if task_id in self.current_session.active_tasks:
                 del self.current_session.active_tasks[task_id]
+            if not self.current_session.active_tasks:
+                self._idle_event.set()
             
             if success:
                 self.current_session.completed_tasks.append(task_id)
@@ -431,31 +583,6 @@ class ParallelExecutor:
         except Exception as e:
             logger.error(f"完了処理エラー ({task_id}): {e}")
     
-    async def _cleanup_completed_tasks(self):
-        """完了したタスクをクリーンアップ"""
-        completed_task_ids = []
-        
-        for task_id, parallel_task in self.current_session.active_tasks.items():
-            if parallel_task.future and parallel_task.future.done():
-                completed_task_ids.append(task_id)
-        
-        for task_id in completed_task_ids:
-            parallel_task = self.current_session.active_tasks[task_id]
-            
-            try:
-                result = parallel_task.future.result()
-                await self._handle_task_completion(parallel_task, result, success=True)
-            except Exception as e:
-                logger.error(f"タスク結果取得エラー ({task_id}): {e}")
-                error_result = ExecutionResult(
-                    task_id=task_id,
-                    success=False,
-                    quality_score=None,
-                    generated_code="",
-                    errors=[str(e)]
-                )
-                await self._handle_task_completion(parallel_task, error_result, success=False)
-    
     async def _notify_execution_callbacks(self, event_type: str, task: Task,
                                         parallel_task: ParallelExecutionTask):
         """実行コールバックを通知"""
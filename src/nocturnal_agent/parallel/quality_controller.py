@@ -6,6 +6,7 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Callable
 from dataclasses import dataclass, field
 from enum import Enum
+from pathlib import Path
 
 from nocturnal_agent.parallel.branch_manager import BranchManager, BranchType
 import subprocess
@@ -44,6 +45,7 @@ class ExecutionPlan:
     post_execution_action: str
     review_criteria: List[str] = field(default_factory=list)
     rollback_strategy: Optional[str] = None
+    worktree_path: Optional[str] = None  # worktree分離時の作業ディレクトリ
 
 
 @dataclass
@@ -160,15 +162,25 @@ class QualityController:
         # 実行プランを作成
         execution_plan = await self._create_execution_plan(task, decision)
         self.active_executions[task.id] = execution_plan
+        original_working_directory = getattr(task, 'working_directory', None)
         
         try:
             # ブランチ準備
             await self._prepare_execution_branch(execution_plan, decision)
             
-            # タスク実行
-            execution_result = await self._execute_task_with_monitoring(
-                task, execution_plan, executor
-            )
+            try:
+                # タスク実行
+                execution_result = await self._execute_task_with_monitoring(
+                    task, execution_plan, executor
+                )
+                
+                if execution_plan.worktree_path and execution_result.success:
+                    await self._commit_worktree_changes(task, execution_plan)
+            finally:
+                # マージ前にworktreeを返却し、ターゲットブランチを解放する
+                if execution_plan.worktree_path:
+                    await self._run_git(self.branch_manager.release_worktree, execution_plan.target_branch)
+                    task.working_directory = original_working_directory
             
             # 実行後品質評価
             quality_metrics = await self._assess_execution_quality(
@@ -223,7 +235,8 @@ class QualityController:
                         
                         # 自動マージを試行
                         if review_result.get('auto_merge_eligible', False):
-                            merge_result = self.branch_manager.attempt_auto_merge(
+                            merge_result = await self._run_git(
+                                self.branch_manager.attempt_auto_merge,
                                 branch_info['name'],
                                 self.branch_manager.current_night_session,
                                 review_result.get('quality_score', 0.7)
@@ -432,12 +445,40 @@ class QualityController:
     
     async def _prepare_execution_branch(self, plan: ExecutionPlan, decision: QualityDecision):
         """実行用ブランチを準備"""
+        if self.branch_manager.worktree_pool is not None:
+            # ブランチ専用のworktreeを借り、タスクの作業ディレクトリにする
+            worktree = await self._run_git(self.branch_manager.lease_worktree, plan.target_branch)
+            plan.worktree_path = str(worktree)
+            plan.task.working_directory = plan.worktree_path
+            logger.debug(f"実行ブランチ準備完了: {plan.target_branch} ({worktree})")
+            return
+        
         # ブランチに切り替え
         if not self.branch_manager.switch_to_branch(plan.target_branch):
             raise RuntimeError(f"ブランチ切り替え失敗: {plan.target_branch}")
         
         logger.debug(f"実行ブランチ準備完了: {plan.target_branch}")
     
+    async def _commit_worktree_changes(self, task: Task, plan: ExecutionPlan):
+        """worktreeに残った変更をタスクのブランチにコミット"""
+        worktree = Path(plan.worktree_path)
+        if not await self._run_git(self.branch_manager.has_uncommitted_changes, worktree):
+            return
+        await self._run_git(
+            self.branch_manager.commit_task_result,
+            task.id, task.description[:72] or task.id, [], worktree
+        )
+    
+    async def _run_git(self, func: Callable, *args):
+        """Git操作を実行
+        
+        worktree分離時はworktreeの返却待ちでブロックしうるため、
+        イベントループを止めないよう別スレッドで実行する。
+        """
+        if self.branch_manager.worktree_pool is None:
+            return func(*args)
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+    
     async def _execute_task_with_monitoring(self, task: Task, plan: ExecutionPlan,
                                           executor: Callable) -> ExecutionResult:
         """監視下でタスクを実行"""
@@ -516,7 +557,8 @@ class QualityController:
         if plan.post_execution_action == "auto_merge_if_successful":
             if metrics.overall_score >= self.high_quality_threshold:
                 # 自動マージを試行
-                merge_result = self.branch_manager.attempt_auto_merge(
+                merge_result = await self._run_git(
+                    self.branch_manager.attempt_auto_merge,
                     plan.target_branch,
                     self.branch_manager.current_night_session,
                     metrics.overall_score
@@ -556,9 +598,10 @@ class QualityController:
         if plan.rollback_strategy == "branch_deletion":
             try:
                 # ブランチを削除（危険な変更を含む可能性があるため）
-                subprocess.run([
-                    'git', 'checkout', self.branch_manager.current_night_session
-                ], cwd=self.branch_manager.project_path, check=True)
+                if self.branch_manager.worktree_pool is None:
+                    subprocess.run([
+                        'git', 'checkout', self.branch_manager.current_night_session
+                    ], cwd=self.branch_manager.project_path, check=True)
                 
                 subprocess.run([
                     'git', 'branch', '-D', plan.target_branch
@@ -0,0 +1,328 @@
+"""Git worktreeプール - 並行タスクごとに独立した作業ツリーを貸し出す"""
+
+import logging
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WorktreeLease:
+    """貸し出し中のworktree情報"""
+    branch_name: str
+    path: Optional[Path] = None  # 準備中はNone
+    leased_at: datetime = field(default_factory=datetime.now)
+
+
+class WorktreePool:
+    """事前作成したgit worktreeをブランチ単位で貸し出すプール
+
+    プロジェクトの作業ツリーは1つしかないため、ブランチ切り替えで並行
+    タスクを分けると互いの変更を上書きしてしまう。プールは
+    ``.nocturnal/worktrees`` 以下にdetached HEADのworktreeを用意しておき、
+    貸し出し時に ``checkout -f`` と ``clean`` だけで対象ブランチの状態に
+    戻す。チェックアウト済みのworktreeを使い回すので、変更のあるファイル
+    だけが書き換えられ、新規作成よりはるかに安い。
+
+    gitは同じブランチを複数のworktreeでチェックアウトできないため、
+    同一ブランチへの貸し出しは返却まで待機する。
+    """
+
+    def __init__(self, project_path: str, config: Optional[Dict[str, Any]] = None):
+        """
+        worktreeプールを初期化
+
+        Args:
+            project_path: プロジェクトのパス
+            config: プール設定
+        """
+        config = config or {}
+        self.project_path = Path(project_path)
+        self.root = Path(config.get('worktree_root', self.project_path / '.nocturnal' / 'worktrees'))
+        self.pool_size = config.get('worktree_pool_size', 3)
+        self.max_worktrees = config.get('max_worktrees', max(self.pool_size, 8))
+        self.lease_timeout = config.get('worktree_lease_timeout_seconds', 1800)
+        # 無視ファイル（ビルドキャッシュ等）も削除するか
+        self.clean_ignored = config.get('worktree_clean_ignored', False)
+
+        self._condition = threading.Condition()
+        self._idle: List[Path] = []
+        self._leases: Dict[str, WorktreeLease] = {}
+        self._creating = 0
+        self._sequence = 0
+
+        self.pool_stats = {
+            'worktrees_created': 0,
+            'worktrees_removed': 0,
+            'leases': 0,
+            'lease_waits': 0,
+            'reset_seconds_total': 0.0
+        }
+
+        self._exclude_root()
+        self._adopt_existing()
+
+    def warm(self, count: Optional[int] = None) -> int:
+        """
+        貸し出し前にworktreeを作成しておく
+
+        Args:
+            count: 待機させておくworktree数（既定: pool_size）
+
+        Returns:
+            新たに作成したworktree数
+        """
+        target = self.pool_size if count is None else count
+        created = 0
+        while True:
+            with self._condition:
+                if len(self._idle) + len(self._leases) + self._creating >= min(target, self.max_worktrees):
+                    break
+                self._creating += 1
+            try:
+                path = self._create_worktree()
+            finally:
+                with self._condition:
+                    self._creating -= 1
+            with self._condition:
+                self._idle.append(path)
+                self._condition.notify_all()
+            created += 1
+        if created:
+            logger.info(f"worktreeプール準備完了: {created}個作成 ({self.root})")
+        return created
+
+    def lease(self, branch_name: str, timeout: Optional[float] = None) -> Path:
+        """
+        ブランチをチェックアウトしたworktreeを貸し出す
+
+        Args:
+            branch_name: チェックアウトするブランチ名
+            timeout: 空きを待つ最大秒数（既定: worktree_lease_timeout_seconds）
+
+        Returns:
+            worktreeのパス
+        """
+        timeout = self.lease_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        create = False
+
+        with self._condition:
+            waited = False
+            while True:
+                if branch_name not in self._leases:
+                    if self._idle:
+                        path = self._idle.pop()
+                        break
+                    if len(self._leases) + self._creating < self.max_worktrees:
+                        create = True
+                        self._creating += 1
+                        path = None
+                        break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"worktreeの貸し出し待ちがタイムアウトしました: {branch_name}")
+                if not waited:
+                    self.pool_stats['lease_waits'] += 1
+                    waited = True
+                self._condition.wait(remaining)
+            # 作成・リセット中に同じブランチを貸し出さないよう先に予約する
+            self._leases[branch_name] = WorktreeLease(branch_name=branch_name)
+
+        try:
+            if create:
+                try:
+                    path = self._create_worktree()
+                finally:
+                    with self._condition:
+                        self._creating -= 1
+            self._reset(path, branch_name)
+        except Exception:
+            with self._condition:
+                del self._leases[branch_name]
+                if path is not None and path.exists():
+                    self._idle.append(path)
+                self._condition.notify_all()
+            raise
+
+        with self._condition:
+            self._leases[branch_name] = WorktreeLease(path=path, branch_name=branch_name)
+            self.pool_stats['leases'] += 1
+        logger.debug(f"worktree貸し出し: {branch_name} -> {path}")
+        return path
+
+    def release(self, branch_name: str) -> bool:
+        """
+        worktreeをプールに返却
+
+        ブランチを解放するためHEADをdetachする。作業内容は次の貸し出し時に
+        破棄される。
+
+        Args:
+            branch_name: 返却するブランチ名
+
+        Returns:
+            返却したかどうか
+        """
+        with self._condition:
+            lease = self._leases.get(branch_name)
+            if lease is None or lease.path is None:
+                return False
+
+        try:
+            self._git(['checkout', '--detach'], cwd=lease.path)
+        except subprocess.CalledProcessError as e:
+            logger.warning(f"worktreeのdetachに失敗したため破棄します ({lease.path}): {e.stderr}")
+            self._remove_worktree(lease.path)
+            with self._condition:
+                del self._leases[branch_name]
+                self._condition.notify_all()
+            return True
+
+        with self._condition:
+            del self._leases[branch_name]
+            self._idle.append(lease.path)
+            self._condition.notify_all()
+        logger.debug(f"worktree返却: {branch_name}")
+        return True
+
+    def path_for(self, branch_name: str) -> Optional[Path]:
+        """ブランチを貸し出し中のworktreeパスを取得"""
+        with self._condition:
+            lease = self._leases.get(branch_name)
+            return lease.path if lease else None
+
+    def is_leased(self, branch_name: str) -> bool:
+        """ブランチが貸し出し中かどうか"""
+        with self._condition:
+            return branch_name in self._leases
+
+    def collect_garbage(self, keep_idle: Optional[int] = None) -> List[str]:
+        """
+        余剰の待機worktreeを削除し、消えたworktreeの管理情報を整理
+
+        Args:
+            keep_idle: 残す待機worktree数（既定: pool_size）
+
+        Returns:
+            削除したworktreeのパス
+        """
+        keep_idle = self.pool_size if keep_idle is None else keep_idle
+        with self._condition:
+            # 手動で消されたworktreeはプールから外す
+            self._idle = [path for path in self._idle if path.exists()]
+            surplus = self._idle[keep_idle:]
+            self._idle = self._idle[:keep_idle]
+
+        removed = []
+        for path in surplus:
+            if self._remove_worktree(path):
+                removed.append(str(path))
+
+        try:
+            self._git(['worktree', 'prune'], cwd=self.project_path)
+        except subprocess.CalledProcessError as e:
+            logger.warning(f"worktree prune失敗: {e.stderr}")
+
+        if removed:
+            logger.debug(f"余剰worktree削除: {len(removed)}個")
+        return removed
+
+    def close(self) -> List[str]:
+        """貸し出し中でないworktreeをすべて削除"""
+        return self.collect_garbage(keep_idle=0)
+
+    def get_pool_status(self) -> Dict[str, Any]:
+        """プールの状態を取得"""
+        with self._condition:
+            return {
+                'root': str(self.root),
+                'idle': len(self._idle),
+                'leased': {name: str(lease.path) for name, lease in self._leases.items() if lease.path},
+                'pool_size': self.pool_size,
+                'max_worktrees': self.max_worktrees,
+                'statistics': dict(self.pool_stats)
+            }
+
+    def _reset(self, path: Path, branch_name: str):
+        """worktreeをブランチの最新コミットの状態に戻す"""
+        started = time.perf_counter()
+        self._git(['checkout', '-f', branch_name], cwd=path)
+        self._git(['clean', '-fdx' if self.clean_ignored else '-fd'], cwd=path)
+        self.pool_stats['reset_seconds_total'] += time.perf_counter() - started
+
+    def _create_worktree(self) -> Path:
+        """detached HEADのworktreeを新規作成"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        with self._condition:
+            while True:
+                self._sequence += 1
+                path = self.root / f"wt-{self._sequence:03d}"
+                if not path.exists():
+                    break
+        self._git(['worktree', 'add', '--detach', str(path), 'HEAD'], cwd=self.project_path)
+        self.pool_stats['worktrees_created'] += 1
+        return path
+
+    def _remove_worktree(self, path: Path) -> bool:
+        """worktreeを削除"""
+        try:
+            self._git(['worktree', 'remove', '--force', str(path)], cwd=self.project_path)
+            self.pool_stats['worktrees_removed'] += 1
+            return True
+        except subprocess.CalledProcessError as e:
+            logger.warning(f"worktree削除エラー ({path}): {e.stderr}")
+            return False
+
+    def _adopt_existing(self):
+        """前回のセッションで作成されたworktreeを待機プールに取り込む"""
+        try:
+            result = self._git(['worktree', 'list', '--porcelain'], cwd=self.project_path)
+        except (subprocess.CalledProcessError, FileNotFoundError) as e:
+            logger.warning(f"worktree一覧の取得に失敗: {e}")
+            return
+
+        root = self.root.resolve()
+        for line in result.stdout.splitlines():
+            if not line.startswith('worktree '):
+                continue
+            path = Path(line[len('worktree '):])
+            if path.resolve().parent == root and path.exists():
+                self._idle.append(path)
+        self._idle.sort()
+        if self._idle:
+            logger.debug(f"既存worktreeを再利用: {len(self._idle)}個")
+
+    def _exclude_root(self):
+        """worktreeディレクトリがプロジェクト側でステージされないよう除外設定する"""
+        try:
+            root = self.root.resolve().relative_to(self.project_path.resolve())
+        except ValueError:
+            return  # プロジェクト外に置かれている
+
+        pattern = f"/{root.as_posix()}/"
+        try:
+            result = self._git(['rev-parse', '--git-path', 'info/exclude'], cwd=self.project_path)
+            exclude_file = Path(result.stdout.strip())
+            if not exclude_file.is_absolute():
+                exclude_file = self.project_path / exclude_file
+            existing = exclude_file.read_text(encoding='utf-8') if exclude_file.exists() else ''
+            if pattern not in existing.splitlines():
+                exclude_file.parent.mkdir(parents=True, exist_ok=True)
+                with open(exclude_file, 'a', encoding='utf-8') as f:
+                    if existing and not existing.endswith('\n'):
+                        f.write('\n')
+                    f.write(pattern + '\n')
+        except (subprocess.CalledProcessError, FileNotFoundError, OSError) as e:
+            logger.warning(f"worktreeディレクトリの除外設定に失敗: {e}")
+
+    @staticmethod
+    def _git(args: List[str], cwd: Path) -> subprocess.CompletedProcess:
+        """gitコマンドを実行"""
+        return subprocess.run(['git'] + args, cwd=cwd, capture_output=True, text=True, check=True)
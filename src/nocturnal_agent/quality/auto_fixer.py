@@ -11,7 +11,11 @@ from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 
-from code_validator import ValidationResult, CodeValidator
+try:
+    from .code_validator import ValidationResult, CodeValidator
+except ImportError:
+    # スクリプトとして直接実行された場合
+    from code_validator import ValidationResult, CodeValidator
 
 
 @dataclass
@@ -28,9 +32,11 @@ class FixResult:
 class AutoFixer:
     """自動コード修正システム"""
     
-    def __init__(self):
+    def __init__(self, validator: Optional[CodeValidator] = None):
         self.logger = logging.getLogger(__name__)
         self.fix_patterns = self._initialize_fix_patterns()
+        # 検証結果のキャッシュと常駐ワーカーを共有するため同じ検証器を使う
+        self.validator = validator or CodeValidator()
     
     def _initialize_fix_patterns(self) -> Dict[str, Dict]:
         """修正パターンの初期化"""
@@ -160,8 +166,8 @@ class AutoFixer:
         """プロジェクト全体の自動修正"""
         self.logger.info(f"🔧 プロジェクト自動修正開始: {project_path}")
         
-        # 最初に品質検証を実行
-        validator = CodeValidator()
+        # 最初に品質検証を実行（変更のないファイルはキャッシュから）
+        validator = self.validator
         validation_report = await validator.validate_generated_project(project_path)
         
         fix_results = {}
@@ -232,15 +238,22 @@ class AutoFixer:
 class IntegratedQualityAssurance:
     """統合品質保証システム"""
     
-    def __init__(self):
-        self.validator = CodeValidator()
-        self.auto_fixer = AutoFixer()
+    def __init__(self, validator: Optional[CodeValidator] = None):
+        self.validator = validator or CodeValidator()
+        self.auto_fixer = AutoFixer(self.validator)
         self.logger = logging.getLogger(__name__)
     
     async def ensure_code_quality(self, project_path: str, max_iterations: int = 3) -> Dict:
         """コード品質保証（検証→修正→再検証のループ）"""
         self.logger.info(f"🎯 統合品質保証開始: {project_path}")
         
+        try:
+            return await self._run_quality_cycles(project_path, max_iterations)
+        finally:
+            await self.validator.close()
+    
+    async def _run_quality_cycles(self, project_path: str, max_iterations: int) -> Dict:
+        """検証→修正→再検証のループ（修正していないファイルは検証結果を再利用）"""
         iteration = 0
         results = []
         
@@ -319,7 +332,10 @@ async def main():
     else:
         # 自動修正のみ
         auto_fixer = AutoFixer()
-        fix_results = await auto_fixer.auto_fix_project(args.project_path)
+        try:
+            fix_results = await auto_fixer.auto_fix_project(args.project_path)
+        finally:
+            await auto_fixer.validator.close()
         
         success_count = len([r for r in fix_results.values() if r.success])
         total_fixes = sum(len(r.fixes_applied) for r in fix_results.values())
@@ -6,16 +6,24 @@ Code Validator - 生成コードの品質検証システム
 
 import ast
 import asyncio
-import importlib.util
+import hashlib
+import json
 import logging
+import os
 import subprocess
 import sys
 import tempfile
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from datetime import datetime
 
+# 常駐ワーカーのスクリプト（パス指定で起動するため標準ライブラリのみ）
+WORKER_SCRIPT = Path(__file__).with_name('validation_worker.py')
+
+# これを含むファイルだけ実行テストを行う
+MAIN_GUARD = 'if __name__ == "__main__"'
+
 
 @dataclass
 class ValidationResult:
@@ -43,12 +51,134 @@ class ValidationReport:
     validation_time: float
 
 
+class ValidationWorkerPool:
+    """検証用の常駐インタープリタのプール
+    
+    各ワーカーは validation_worker.py を実行するPythonプロセスで、要求ごとに
+    子プロセスをforkしてインポート解決やスクリプト実行を行う。ワーカーは
+    必要になった時点で最大 size 個まで起動し、使い回す。
+    """
+    
+    def __init__(self, size: int):
+        self.size = max(1, size)
+        self.logger = logging.getLogger(__name__)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._idle: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.subprocess.Process] = []
+        self.stats = {'workers_started': 0, 'requests': 0}
+    
+    async def request(self, payload: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        """
+        空いているワーカーに要求を送って結果を受け取る
+        
+        Args:
+            payload: 要求（op と各操作の引数）
+            timeout: 子プロセスの制限時間（ワーカー側で強制終了する）
+        
+        Raises:
+            RuntimeError: ワーカーが応答しなかった場合
+        """
+        worker = await self._acquire()
+        try:
+            worker.stdin.write(json.dumps({**payload, 'timeout': timeout}).encode('utf-8') + b"\n")
+            await worker.stdin.drain()
+            line = await asyncio.wait_for(worker.stdout.readline(), timeout + 10)
+            if not line:
+                raise RuntimeError("検証ワーカーが予期せず終了しました")
+            result = json.loads(line)
+        except BaseException:
+            self._discard(worker)
+            raise
+        
+        self.stats['requests'] += 1
+        self._idle.put_nowait(worker)
+        if 'error' in result:
+            raise RuntimeError(f"検証ワーカーエラー: {result['error']}")
+        return result
+    
+    async def close(self):
+        """すべてのワーカーを終了"""
+        workers, self._workers = self._workers, []
+        self._idle = None
+        self._loop = None
+        for worker in workers:
+            if worker.returncode is None:
+                worker.stdin.close()
+        for worker in workers:
+            try:
+                await asyncio.wait_for(worker.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                worker.kill()
+                await worker.wait()
+    
+    async def _acquire(self) -> asyncio.subprocess.Process:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # 別のイベントループで作ったワーカーは使えない
+            self._abandon()
+            self._loop = loop
+            self._idle = asyncio.Queue()
+        
+        if self._idle.empty() and len(self._workers) < self.size:
+            worker = await asyncio.create_subprocess_exec(
+                sys.executable, str(WORKER_SCRIPT),
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+            self._workers.append(worker)
+            self.stats['workers_started'] += 1
+            return worker
+        return await self._idle.get()
+    
+    def _discard(self, worker: asyncio.subprocess.Process):
+        if worker in self._workers:
+            self._workers.remove(worker)
+        if worker.returncode is None:
+            worker.kill()
+    
+    def _abandon(self):
+        for worker in self._workers:
+            try:
+                os.kill(worker.pid, 9)
+            except OSError:
+                pass
+        self._workers = []
+
+
 class CodeValidator:
     """生成コード品質検証システム"""
     
-    def __init__(self):
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        検証システムを初期化
+        
+        Args:
+            config: 検証設定
+                - max_workers: 同時に検証するファイル数・常駐ワーカー数
+                - execution_timeout: 実行テストの制限時間（秒）
+                - import_timeout: インポート解決の制限時間（秒）
+                - use_cache: 内容が変わっていないファイルの結果を再利用するか
+        """
+        config = config or {}
         self.logger = logging.getLogger(__name__)
         self.validation_history: List[ValidationReport] = []
+        
+        self.max_workers = config.get('max_workers', min(4, os.cpu_count() or 1))
+        self.execution_timeout = config.get('execution_timeout', 10.0)
+        self.import_timeout = config.get('import_timeout', 30.0)
+        self.use_cache = config.get('use_cache', True)
+        # fork できない環境ではファイルごとにインタープリタを起動する
+        self.workers = ValidationWorkerPool(self.max_workers) if hasattr(os, 'fork') else None
+        
+        # ファイルパス -> (キャッシュキー, 検証結果)
+        self._result_cache: Dict[str, Tuple[str, ValidationResult]] = {}
+        self.stats = {'files_validated': 0, 'cache_hits': 0}
+    
+    async def close(self):
+        """常駐ワーカーを終了"""
+        if self.workers is not None:
+            await self.workers.close()
     
     async def validate_generated_project(self, project_path: str) -> ValidationReport:
         """生成されたプロジェクト全体の検証"""
@@ -56,16 +186,46 @@ class CodeValidator:
         start_time = datetime.now()
         
         project_path = Path(project_path)
-        python_files = list(project_path.rglob("*.py"))
+        python_files = sorted(project_path.rglob("*.py"))
+        
+        # 構文チェックと品質評価はファイル自身、インポート解決はプロジェクトの
+        # モジュール構成、実行テストはプロジェクト全体の内容に依存する
+        states = {py_file: self._file_state(py_file) for py_file in python_files}
+        modules_digest = hashlib.sha256("\n".join(
+            str(py_file.relative_to(project_path)) for py_file in python_files
+        ).encode('utf-8')).hexdigest()
+        project_digest = hashlib.sha256("\n".join(
+            f"{py_file.relative_to(project_path)}:{digest}" for py_file, (digest, _) in states.items()
+        ).encode('utf-8')).hexdigest()
+        
+        limit = asyncio.Semaphore(self.max_workers)
+        
+        async def validate(py_file: Path) -> ValidationResult:
+            digest, runnable = states[py_file]
+            key = f"{digest}:{modules_digest}"
+            if runnable:
+                key += f":{project_digest}"
+            cached = self._result_cache.get(str(py_file)) if self.use_cache else None
+            if cached is not None and cached[0] == key:
+                self.stats['cache_hits'] += 1
+                return replace(cached[1])
+            async with limit:
+                self.logger.info(f"📝 ファイル検証: {py_file.name}")
+                result = await self._validate_single_file(py_file, project_root=project_path)
+            self.stats['files_validated'] += 1
+            if self.use_cache:
+                self._result_cache[str(py_file)] = (key, result)
+            return result
+        
+        validation_results = list(await asyncio.gather(*(validate(py_file) for py_file in python_files)))
+        
+        # 消えたファイルのキャッシュは捨てる
+        current = {str(py_file) for py_file in python_files}
+        for path in [path for path in self._result_cache if path.startswith(str(project_path)) and path not in current]:
+            del self._result_cache[path]
         
-        validation_results = []
         critical_issues = []
-        
-        for py_file in python_files:
-            self.logger.info(f"📝 ファイル検証: {py_file.name}")
-            result = await self._validate_single_file(py_file)
-            validation_results.append(result)
-            
+        for result in validation_results:
             if not result.is_valid:
                 critical_issues.extend(result.syntax_errors)
                 critical_issues.extend(result.import_errors)
@@ -96,7 +256,16 @@ class CodeValidator:
         self.logger.info(f"✅ プロジェクト検証完了: 品質スコア {overall_quality:.2f}")
         return report
     
-    async def _validate_single_file(self, file_path: Path) -> ValidationResult:
+    @staticmethod
+    def _file_state(file_path: Path) -> Tuple[str, bool]:
+        """ファイル内容のハッシュ（読めない場合は空文字）と実行テストの対象か"""
+        try:
+            data = file_path.read_bytes()
+        except OSError:
+            return "", False
+        return hashlib.sha256(data).hexdigest(), MAIN_GUARD.encode('utf-8') in data
+    
+    async def _validate_single_file(self, file_path: Path, project_root: Optional[Path] = None) -> ValidationResult:
         """単一ファイルの詳細検証"""
         syntax_errors = []
         import_errors = []
@@ -111,7 +280,7 @@ class CodeValidator:
             
             # Step 2: インポートチェック
             if not syntax_errors:
-                import_errors = await self._check_imports(file_path)
+                import_errors = await self._check_imports(file_path, project_root)
             
             # Step 3: 実行テスト（メイン実行可能ファイルのみ）
             if not syntax_errors and not import_errors:
@@ -162,8 +331,14 @@ class CodeValidator:
         
         return errors
     
-    async def _check_imports(self, file_path: Path) -> List[str]:
-        """インポートエラーチェック"""
+    async def _check_imports(self, file_path: Path, project_root: Optional[Path] = None) -> List[str]:
+        """インポートエラーチェック
+        
+        モジュールは読み込まず、使い捨ての子プロセスで importlib.util.find_spec
+        により解決できるかだけを調べる。検索パスにはファイルのディレクトリと
+        プロジェクトのルートを加える。相対インポートはファイルの位置から
+        解決する。
+        """
         errors = []
         
         try:
@@ -173,28 +348,78 @@ class CodeValidator:
             # ASTを使ってインポート文を抽出
             tree = ast.parse(source_code)
             
+            modules = []
             for node in ast.walk(tree):
                 if isinstance(node, ast.Import):
-                    for alias in node.names:
-                        try:
-                            importlib.import_module(alias.name)
-                        except ImportError as e:
-                            errors.append(f"インポートエラー: {alias.name} - {e}")
+                    modules.extend(alias.name for alias in node.names)
                 
                 elif isinstance(node, ast.ImportFrom):
-                    if node.module:
-                        try:
-                            importlib.import_module(node.module)
-                        except ImportError as e:
-                            errors.append(f"インポートエラー: {node.module} - {e}")
+                    if node.level:
+                        error = self._check_relative_import(file_path, node)
+                        if error:
+                            errors.append(error)
+                    elif node.module:
+                        modules.append(node.module)
+            
+            modules = list(dict.fromkeys(modules))
+            if modules:
+                search_paths = [str(file_path.parent)]
+                if project_root is not None and project_root != file_path.parent:
+                    search_paths.append(str(project_root))
+                unresolved = await self._resolve_modules(modules, search_paths, file_path.parent)
+                for name in modules:
+                    if name in unresolved:
+                        errors.append(f"インポートエラー: {name} - {unresolved[name]}")
         
         except Exception as e:
             errors.append(f"インポートチェックエラー: {e}")
         
         return errors
     
+    @staticmethod
+    def _check_relative_import(file_path: Path, node: ast.ImportFrom) -> Optional[str]:
+        """相対インポートの参照先がファイルとして存在するかを確認"""
+        if not node.module:
+            return None
+        base = file_path.parent
+        for _ in range(node.level - 1):
+            base = base.parent
+        target = base.joinpath(*node.module.split('.'))
+        if target.with_suffix('.py').exists() or target.is_dir():
+            return None
+        return f"インポートエラー: {'.' * node.level}{node.module} - 参照先が見つかりません"
+    
+    async def _resolve_modules(self, modules: List[str], search_paths: List[str], cwd: Path) -> Dict[str, str]:
+        """解決できないモジュールとその理由を取得"""
+        request = {'op': 'resolve', 'modules': modules, 'search_paths': search_paths}
+        if self.workers is not None:
+            result = await self.workers.request(request, self.import_timeout)
+        else:
+            result = await self._run_cold(request, cwd, self.import_timeout)
+        if result['timed_out']:
+            raise RuntimeError(f"インポート解決がタイムアウトしました ({self.import_timeout:g}秒)")
+        if result['returncode'] != 0:
+            raise RuntimeError(f"インポート解決に失敗しました (終了コード {result['returncode']})")
+        return json.loads(result['output'])
+    
+    async def _run_cold(self, request: Dict[str, Any], cwd: Path, timeout: float) -> Dict[str, Any]:
+        """ワーカーを使わず、要求1件のために検証ワーカーを起動して処理する"""
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, str(WORKER_SCRIPT),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            cwd=cwd
+        )
+        line = json.dumps({**request, 'timeout': timeout}).encode('utf-8') + b"\n"
+        stdout, _ = await asyncio.wait_for(process.communicate(line), timeout + 10)
+        result = json.loads(stdout)
+        if 'error' in result:
+            raise RuntimeError(f"検証ワーカーエラー: {result['error']}")
+        return result
+    
     async def _test_execution(self, file_path: Path) -> Tuple[bool, List[str]]:
-        """実行テスト（安全な環境で）"""
+        """実行テスト（使い捨ての子プロセスで）"""
         errors = []
         
         # メイン実行ブロックがある場合のみテスト
@@ -202,36 +427,54 @@ class CodeValidator:
             with open(file_path, 'r', encoding='utf-8') as f:
                 content = f.read()
             
-            if 'if __name__ == "__main__"' not in content:
+            if MAIN_GUARD not in content:
                 return True, []  # メインブロックがない場合はスキップ
             
-            # 一時的な実行環境でテスト
-            process = await asyncio.create_subprocess_exec(
-                sys.executable, str(file_path),
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=file_path.parent
-            )
+            if self.workers is None:
+                return await self._test_execution_cold(file_path)
             
-            try:
-                stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=10.0)
-                
-                if process.returncode != 0:
-                    error_output = stderr.decode('utf-8')
-                    errors.append(f"実行エラー (終了コード {process.returncode}): {error_output}")
-                    return False, errors
-                
-                return True, []
-                
-            except asyncio.TimeoutError:
-                process.kill()
-                errors.append("実行タイムアウト (10秒)")
+            # 常駐ワーカーからforkした子プロセスで実行
+            result = await self.workers.request(
+                {'op': 'run', 'path': str(file_path.resolve()), 'cwd': str(file_path.parent.resolve())},
+                self.execution_timeout
+            )
+            if result['timed_out']:
+                errors.append(f"実行タイムアウト ({self.execution_timeout:g}秒)")
+                return False, errors
+            if result['returncode'] != 0:
+                errors.append(f"実行エラー (終了コード {result['returncode']}): {result['output']}")
                 return False, errors
+            return True, []
         
         except Exception as e:
             errors.append(f"実行テストエラー: {e}")
             return False, errors
     
+    async def _test_execution_cold(self, file_path: Path) -> Tuple[bool, List[str]]:
+        """実行テスト（インタープリタを新たに起動）"""
+        errors = []
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, str(file_path),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=file_path.parent
+        )
+        
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=self.execution_timeout)
+            
+            if process.returncode != 0:
+                error_output = stderr.decode('utf-8')
+                errors.append(f"実行エラー (終了コード {process.returncode}): {error_output}")
+                return False, errors
+            
+            return True, []
+            
+        except asyncio.TimeoutError:
+            process.kill()
+            errors.append(f"実行タイムアウト ({self.execution_timeout:g}秒)")
+            return False, errors
+    
     def _calculate_quality_score(
         self, 
         file_path: Path, 
@@ -410,7 +653,10 @@ class CodeValidator:
 async def validate_project(project_path: str) -> ValidationReport:
     """プロジェクト検証のメイン関数"""
     validator = CodeValidator()
-    return await validator.validate_generated_project(project_path)
+    try:
+        return await validator.validate_generated_project(project_path)
+    finally:
+        await validator.close()
 
 
 # CLI実行用
@@ -428,7 +674,10 @@ async def main():
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     
     validator = CodeValidator()
-    report = await validator.validate_generated_project(args.project_path)
+    try:
+        report = await validator.validate_generated_project(args.project_path)
+    finally:
+        await validator.close()
     
     # レポート生成
     report_path = await validator.generate_validation_report(report, args.output)
@@ -13,6 +13,7 @@ from nocturnal_agent.core.models import (
 )
 from nocturnal_agent.core.config import LLMConfig
 from nocturnal_agent.agents.local_llm import LocalLLMAgent
+from nocturnal_agent.llm.response_cache import bypass_response_cache
 
 
 logger = logging.getLogger(__name__)
@@ -316,12 +317,13 @@ class QualityImprovementCycle:
         """
         
         try:
-            # Use local LLM to improve the code
-            improved_response = await self.llm_agent.generate_code(
-                task.description,
-                improved_prompt,
-                task.project_context
-            )
+            # Use local LLM to improve the code (never replay a cached generation)
+            with bypass_response_cache():
+                improved_response = await self.llm_agent.generate_code(
+                    task.description,
+                    improved_prompt,
+                    task.project_context
+                )
             
             # Create new execution result
             improved_result = ExecutionResult(
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Validation Worker - 生成コード検証用の常駐ワーカー
+CodeValidator がパス指定で起動する。標準入力で1行1件のJSON要求を受け取り、
+要求ごとに子プロセスをforkしてインポート解決・スクリプト実行を行い、
+結果を標準出力に1行のJSONで返す。
+
+起動済みのインタープリタからforkするため、ファイルごとにPythonを
+起動し直すコストがかからない。生成コードは使い捨ての子プロセスで
+動くので、ワーカー自身の状態は汚れない。標準ライブラリだけを使い、
+エージェント本体のモジュールは読み込まない。
+"""
+
+import importlib.util
+import json
+import os
+import runpy
+import select
+import signal
+import sys
+import time
+import traceback
+
+# 子プロセスから見えるsys.path（先頭のワーカー自身のディレクトリは除く）
+_BASE_PATH = sys.path[1:]
+
+
+def _resolve_imports(request, result_fd):
+    """find_spec でモジュールが見つかるかを調べ、見つからないものを書き込む"""
+    sys.path[:] = list(request.get('search_paths', [])) + _BASE_PATH
+    errors = {}
+    for name in request['modules']:
+        try:
+            if importlib.util.find_spec(name) is None:
+                errors[name] = f"No module named '{name}'"
+        except Exception as e:
+            errors[name] = f"{type(e).__name__}: {e}"
+    os.write(result_fd, json.dumps(errors).encode('utf-8'))
+    return 0
+
+
+def _run_script(request, result_fd):
+    """スクリプトを __main__ として実行する（標準エラーは結果パイプへ）"""
+    path = request['path']
+    os.dup2(result_fd, 2)
+    os.chdir(request.get('cwd') or os.path.dirname(path))
+    sys.argv = [path]
+    sys.path[:] = [os.path.dirname(path)] + _BASE_PATH
+    try:
+        runpy.run_path(path, run_name='__main__')
+        return 0
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, file=sys.stderr)
+        return 1
+    except BaseException:
+        traceback.print_exc()
+        return 1
+
+
+def _child(request, result_fd):
+    """forkした子プロセスの処理（戻らない）"""
+    code = 1
+    try:
+        os.setpgid(0, 0)
+        devnull = os.open(os.devnull, os.O_RDWR)
+        for fd in (0, 1, 2):
+            os.dup2(devnull, fd)
+        if request['op'] == 'resolve':
+            code = _resolve_imports(request, result_fd)
+        else:
+            code = _run_script(request, result_fd)
+    except BaseException:
+        pass
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code if isinstance(code, int) else 1)
+
+
+def _kill(pid):
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except OSError:
+        pass
+
+
+def handle(request):
+    """1件の要求を処理して結果を返す"""
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        _child(request, write_fd)
+    os.close(write_fd)
+
+    deadline = time.monotonic() + request.get('timeout', 10.0)
+    chunks = []
+    timed_out = False
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            timed_out = True
+            break
+        ready, _, _ = select.select([read_fd], [], [], remaining)
+        if ready:
+            data = os.read(read_fd, 65536)
+            if not data:
+                break
+            chunks.append(data)
+    os.close(read_fd)
+
+    # 出力を閉じた後も動き続ける子は期限まで待つ
+    status = None
+    while status is None and not timed_out:
+        finished, wait_status = os.waitpid(pid, os.WNOHANG)
+        if finished:
+            status = wait_status
+        elif time.monotonic() >= deadline:
+            timed_out = True
+        else:
+            time.sleep(0.005)
+    if status is None:
+        _kill(pid)
+        _, status = os.waitpid(pid, 0)
+    else:
+        _kill(pid)  # 残った孫プロセスを片付ける
+
+    return {
+        'returncode': os.waitstatus_to_exitcode(status),
+        'output': b''.join(chunks).decode('utf-8', errors='replace'),
+        'timed_out': timed_out,
+    }
+
+
+def main():
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            response = handle(json.loads(line))
+        except Exception as e:
+            response = {'error': f"{type(e).__name__}: {e}"}
+        sys.stdout.write(json.dumps(response) + '\n')
+        sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
@@ -14,7 +14,7 @@ import pandas as pd
 from io import BytesIO
 import base64
 
-from ..log_system.structured_logger import StructuredLogger, LogAnalyzer
+from ..log_system.structured_logger import StructuredLogger, LogAnalyzer, LogCategory
 from ..core.models import QualityScore
 
 
@@ -457,19 +457,17 @@ class ReportGenerator:
     
     def _create_task_timeline_section(self, summary: Dict[str, Any], session_id: str) -> ReportSection:
         """タスクタイムラインセクション"""
-        # ログからタスク実行タイムラインを取得
+        # ログからセッションの最新10件のタスク実行ログを取得
         logs = self.logger.query_logs(
-            category=self.logger.LogCategory.TASK_EXECUTION,
-            limit=100
+            category=LogCategory.TASK_EXECUTION,
+            session_id=session_id,
+            newest_first=True,
+            limit=10
         )
         
-        # セッションIDでフィルタ
-        if session_id:
-            logs = [log for log in logs if log.get('session_id') == session_id]
-        
         content = "## タスクタイムライン\n\n"
         
-        for log in logs[-10:]:  # 最新10件
+        for log in reversed(logs):
             timestamp = log.get('timestamp', 'N/A')
             message = log.get('message', 'N/A')
             task_id = log.get('task_id', 'N/A')
@@ -229,8 +229,7 @@ class ContinuousExecutionManager:
                         if dep_id in task_id_mapping:
                             valid_dependencies.append(task_id_mapping[dep_id])
                     
-                    if task_id in self.task_manager.tasks:
-                        self.task_manager.tasks[task_id].dependencies = valid_dependencies
+                    self.task_manager.set_task_dependencies(task_id, valid_dependencies)
             
             self.logger.log(LogLevel.INFO, LogCategory.SYSTEM,
                            f"✅ {len(created_task_ids)}個のタスクを登録・承認完了 ({agent_name})")
@@ -1,6 +1,7 @@
 """Automatic backup management for safe night execution."""
 
 import logging
+import os
 import subprocess
 import shutil
 import json
@@ -11,6 +12,11 @@ from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 
+from nocturnal_agent.safety.backup_store import (
+    ContentStore, manifest_hash, read_manifest, write_manifest
+)
+from nocturnal_agent.safety.file_state import FileStateCache
+
 
 logger = logging.getLogger(__name__)
 
@@ -92,6 +98,10 @@ class BackupManager:
         self.backup_root.mkdir(parents=True, exist_ok=True)
         self.backups_index_file = self.backup_root / "backups_index.json"
         
+        # Deduplicated file contents shared by all manifest-based backups
+        self.file_state = FileStateCache.for_project(self.project_path)
+        self.content_store = ContentStore(self.backup_root / "store", self.file_state)
+        
         # Backup history
         self.backup_history: List[BackupInfo] = []
         self._load_backup_history()
@@ -212,33 +222,7 @@ class BackupManager:
         Returns:
             Tuple of (file_count, total_size_bytes)
         """
-        file_count = 0
-        total_size = 0
-        
-        for item in self.project_path.rglob('*'):
-            # Skip if item should be excluded
-            if self._should_exclude_path(item):
-                continue
-            
-            # Calculate relative path
-            rel_path = item.relative_to(self.project_path)
-            backup_item = backup_dir / rel_path
-            
-            try:
-                if item.is_file():
-                    # Copy file
-                    backup_item.parent.mkdir(parents=True, exist_ok=True)
-                    shutil.copy2(item, backup_item)
-                    file_count += 1
-                    total_size += item.stat().st_size
-                elif item.is_dir():
-                    # Create directory
-                    backup_item.mkdir(parents=True, exist_ok=True)
-                    
-            except (OSError, PermissionError) as e:
-                logger.warning(f"Failed to backup {item}: {e}")
-        
-        return file_count, total_size
+        return self._store_files(backup_dir, self._iter_project_files(self.project_path))
     
     async def _create_git_backup(self, backup_dir: Path) -> Tuple[int, int]:
         """Create a git state backup.
@@ -305,27 +289,26 @@ class BackupManager:
             return await self._create_full_backup(backup_dir)
         
         # Get files changed since last backup
-        changed_files = await self._get_changed_files_since(last_backup.timestamp)
+        changed_files = await self._get_changed_files_since(last_backup.timestamp, last_backup.git_commit)
         
-        file_count = 0
-        total_size = 0
+        # Drop candidates whose content still matches the last backup
+        try:
+            previous = read_manifest(Path(last_backup.backup_path)) or {}
+        except (OSError, ValueError, KeyError):
+            previous = {}
         
-        for file_path in changed_files:
-            if not file_path.exists() or self._should_exclude_path(file_path):
-                continue
-            
-            rel_path = file_path.relative_to(self.project_path)
-            backup_file = backup_dir / rel_path
-            
+        def modified(path: Path) -> bool:
+            entry = previous.get(path.relative_to(self.project_path).as_posix())
             try:
-                backup_file.parent.mkdir(parents=True, exist_ok=True)
-                shutil.copy2(file_path, backup_file)
-                file_count += 1
-                total_size += file_path.stat().st_size
-            except (OSError, PermissionError) as e:
-                logger.warning(f"Failed to backup {file_path}: {e}")
+                return entry is None or self.file_state.digest(path) != entry[0]
+            except OSError:
+                return False
         
-        return file_count, total_size
+        return self._store_files(
+            backup_dir,
+            (path for path in changed_files
+             if path.exists() and not self._should_exclude_path(path) and modified(path))
+        )
     
     async def _create_critical_backup(self, backup_dir: Path) -> Tuple[int, int]:
         """Create a backup of critical files only.
@@ -336,39 +319,68 @@ class BackupManager:
         Returns:
             Tuple of (file_count, total_size_bytes)
         """
-        file_count = 0
-        total_size = 0
+        def critical_files():
+            for critical_path in self.critical_paths:
+                src_path = self.project_path / critical_path
+                if src_path.is_file():
+                    yield src_path
+                elif src_path.is_dir():
+                    yield from self._iter_project_files(src_path)
         
-        for critical_path in self.critical_paths:
-            src_path = self.project_path / critical_path
-            
-            if not src_path.exists():
-                continue
+        return self._store_files(backup_dir, critical_files())
+    
+    def _iter_project_files(self, root: Path):
+        """Walk files under root, pruning excluded directories.
+        
+        Args:
+            root: Directory to walk
             
-            dst_path = backup_dir / critical_path
+        Yields:
+            Paths of files that are not excluded
+        """
+        for dirpath, dirnames, filenames in os.walk(root):
+            current = Path(dirpath)
+            dirnames[:] = sorted(d for d in dirnames if not self._should_exclude_path(current / d))
+            for filename in sorted(filenames):
+                path = current / filename
+                if not self._should_exclude_path(path) and not path.is_symlink():
+                    yield path
+    
+    def _store_files(self, backup_dir: Path, paths) -> Tuple[int, int]:
+        """Store files in the content store and write the backup manifest.
+        
+        Files whose contents are already stored cost neither a copy nor
+        storage; unchanged files are not even rehashed.
+        
+        Args:
+            backup_dir: Directory to store the manifest in
+            paths: Files to include
             
+        Returns:
+            Tuple of (file_count, total_size_bytes)
+        """
+        files = {}
+        total_size = 0
+        new_blobs = 0
+        
+        for path in paths:
             try:
-                if src_path.is_file():
-                    dst_path.parent.mkdir(parents=True, exist_ok=True)
-                    shutil.copy2(src_path, dst_path)
-                    file_count += 1
-                    total_size += src_path.stat().st_size
-                elif src_path.is_dir():
-                    for item in src_path.rglob('*'):
-                        if self._should_exclude_path(item) or not item.is_file():
-                            continue
-                        
-                        rel_item_path = item.relative_to(self.project_path)
-                        backup_item = backup_dir / rel_item_path
-                        backup_item.parent.mkdir(parents=True, exist_ok=True)
-                        shutil.copy2(item, backup_item)
-                        file_count += 1
-                        total_size += item.stat().st_size
-                        
+                digest, size, stored = self.content_store.put_file(path)
+                stat = path.stat()
             except (OSError, PermissionError) as e:
-                logger.warning(f"Failed to backup critical path {src_path}: {e}")
+                logger.warning(f"Failed to backup {path}: {e}")
+                continue
+            
+            rel_path = path.relative_to(self.project_path).as_posix()
+            files[rel_path] = [digest, size, stat.st_mode & 0o7777, stat.st_mtime_ns]
+            total_size += size
+            new_blobs += stored
         
-        return file_count, total_size
+        write_manifest(backup_dir, files)
+        self.content_store.save_index()
+        logger.debug(f"Stored {len(files)} files in {backup_dir.name} ({new_blobs} new blobs)")
+        
+        return len(files), total_size
     
     def _should_exclude_path(self, path: Path) -> bool:
         """Check if a path should be excluded from backup.
@@ -438,6 +450,11 @@ class BackupManager:
         Returns:
             SHA256 hash of backup contents
         """
+        files = read_manifest(backup_dir)
+        if files is not None:
+            # Blob contents are covered by their digests in the manifest
+            return manifest_hash(files)
+        
         hasher = hashlib.sha256()
         
         # Sort files for consistent hashing
@@ -485,6 +502,15 @@ class BackupManager:
                 logger.error(f"Backup integrity check failed: {backup_info.backup_id}")
                 return False
             
+            # Check the referenced blobs; unchanged blobs are not rehashed
+            files = read_manifest(backup_dir)
+            if files is not None:
+                failed = self.content_store.verify(entry[0] for entry in files.values())
+                self.content_store.save_index()
+                if failed:
+                    logger.error(f"Backup {backup_info.backup_id} has {len(failed)} missing or corrupt blobs")
+                    return False
+            
             # Additional checks based on backup type
             if backup_info.backup_type == BackupType.GIT:
                 # Verify git bundle
@@ -509,6 +535,48 @@ class BackupManager:
             logger.error(f"Backup verification failed: {e}")
             return False
     
+    def restore_files(
+        self,
+        backup_info: BackupInfo,
+        destination: Optional[Path] = None
+    ) -> Tuple[List[str], List[str]]:
+        """Restore the files of a backup.
+        
+        Args:
+            backup_info: Backup to restore
+            destination: Directory to restore into (defaults to the project)
+            
+        Returns:
+            Tuple of (restored_relative_paths, error_messages)
+        """
+        backup_dir = Path(backup_info.backup_path)
+        destination = Path(destination) if destination else self.project_path
+        restored = []
+        errors = []
+        
+        files = read_manifest(backup_dir)
+        if files is None:
+            # Plain-copy backup from before manifests were introduced
+            files = {
+                path.relative_to(backup_dir).as_posix(): None
+                for path in backup_dir.rglob('*') if path.is_file()
+            }
+        
+        for rel_path, entry in files.items():
+            target_file = destination / rel_path
+            try:
+                if entry is None:
+                    target_file.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copy2(backup_dir / rel_path, target_file)
+                else:
+                    digest, _, mode, mtime_ns = entry
+                    self.content_store.restore_file(digest, target_file, mode, mtime_ns)
+                restored.append(rel_path)
+            except (OSError, PermissionError) as e:
+                errors.append(f"Failed to restore {rel_path}: {e}")
+        
+        return restored, errors
+    
     def _get_latest_backup(self, backup_type: Optional[BackupType] = None) -> Optional[BackupInfo]:
         """Get the most recent backup.
         
@@ -528,21 +596,36 @@ class BackupManager:
         
         return max(filtered_backups, key=lambda b: b.timestamp)
     
-    async def _get_changed_files_since(self, since_time: datetime) -> List[Path]:
+    async def _get_changed_files_since(
+        self,
+        since_time: datetime,
+        since_commit: Optional[str] = None
+    ) -> List[Path]:
         """Get files changed since a specific time.
         
+        In a git repository the candidates come from ``git status`` and the
+        files changed between since_commit and HEAD instead of a stat of
+        every file; changes to ignored files are left to full backups.
+        
         Args:
             since_time: Time threshold
+            since_commit: Commit that was checked out at since_time
             
         Returns:
             List of changed file paths
         """
+        git_state = self.file_state.git_state() if since_commit else None
+        committed = self._get_git_changed_files(since_commit) if git_state else None
+        if committed is not None:
+            candidates = sorted(git_state[1] | set(committed))
+            return [
+                self.project_path / rel_path for rel_path in candidates
+                if (self.project_path / rel_path).is_file()
+            ]
+        
         changed_files = []
         
-        for item in self.project_path.rglob('*'):
-            if not item.is_file() or self._should_exclude_path(item):
-                continue
-            
+        for item in self._iter_project_files(self.project_path):
             try:
                 # Check file modification time
                 mtime = datetime.fromtimestamp(item.stat().st_mtime)
@@ -553,11 +636,30 @@ class BackupManager:
         
         return changed_files
     
+    def _get_git_changed_files(self, since_commit: str) -> Optional[List[str]]:
+        """Get files changed between a commit and HEAD.
+        
+        Args:
+            since_commit: Base commit
+            
+        Returns:
+            Paths relative to the project, or None if git cannot tell
+        """
+        try:
+            result = subprocess.run([
+                'git', 'diff', '--name-only', '--relative', '-z', since_commit, 'HEAD'
+            ], cwd=self.project_path, capture_output=True, check=True)
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        return [os.fsdecode(path) for path in result.stdout.split(b'\0') if path]
+    
     async def _cleanup_old_backups(self):
         """Clean up old backups based on retention policy."""
         if len(self.backup_history) <= self.max_backups:
             return
         
+        history_size = len(self.backup_history)
+        
         # Sort backups by timestamp (oldest first)
         sorted_backups = sorted(self.backup_history, key=lambda b: b.timestamp)
         
@@ -592,9 +694,32 @@ class BackupManager:
             except Exception as e:
                 logger.error(f"Failed to remove expired backup {backup_info.backup_id}: {e}")
         
+        # Drop blobs no longer referenced by any retained backup
+        if len(self.backup_history) < history_size:
+            self._collect_garbage()
+        
         # Save updated history
         await self._save_backup_history()
     
+    def _collect_garbage(self):
+        """Remove content store blobs unreferenced by retained backups."""
+        live_digests = set()
+        for backup_info in self.backup_history:
+            try:
+                files = read_manifest(Path(backup_info.backup_path))
+            except (OSError, ValueError, KeyError) as e:
+                # Keep everything rather than risk deleting live blobs
+                logger.error(f"Skipping blob garbage collection, unreadable manifest for "
+                             f"{backup_info.backup_id}: {e}")
+                return
+            if files:
+                live_digests.update(entry[0] for entry in files.values())
+        
+        removed, freed = self.content_store.collect_garbage(live_digests)
+        self.content_store.save_index()
+        if removed:
+            logger.info(f"Removed {removed} unreferenced backup blobs ({freed} bytes)")
+    
     async def _save_backup_history(self):
         """Save backup history to disk."""
         try:
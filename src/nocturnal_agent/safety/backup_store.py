@@ -0,0 +1,219 @@
+"""Content-addressed blob store for project backups."""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from nocturnal_agent.safety.file_state import FileStateCache
+
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+class ContentStore:
+    """Deduplicating store of file contents keyed by SHA-256.
+
+    Blobs live under ``objects/<2 hex>/<62 hex>`` and are never modified
+    after being written, so a backup is only a manifest mapping relative
+    paths to digests. The project's :class:`FileStateCache` means a file is
+    hashed only when its stat tuple changed since it was last hashed, and a
+    record of verified blobs lets verification skip blobs whose on-disk
+    stat has not changed since they were last hashed.
+    """
+
+    def __init__(self, root: Path, file_state: FileStateCache):
+        """Initialize the content store.
+
+        Args:
+            root: Directory holding the objects and the store index
+            file_state: Stat cache of the files being backed up
+        """
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.index_file = self.root / "store_index.json"
+        self.file_state = file_state
+
+        # digest -> [size, mtime_ns] of the blob when it was last hashed
+        self.verified: Dict[str, List[int]] = {}
+        self._load_index()
+
+    def _load_index(self):
+        """Load the verification records."""
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.verified = data.get('verified', {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable backup store index: {e}")
+
+    def save_index(self):
+        """Persist the verification records and the file state cache."""
+        tmp_path = self.index_file.with_name(self.index_file.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'verified': self.verified}))
+        os.replace(tmp_path, self.index_file)
+        self.file_state.save()
+
+    def blob_path(self, digest: str) -> Path:
+        """Location of the blob for digest."""
+        return self.objects_dir / digest[:2] / digest[2:]
+
+    def put_file(self, path: Path) -> Tuple[str, int, bool]:
+        """Store the contents of a file.
+
+        Args:
+            path: File to store
+
+        Returns:
+            Tuple of (digest, size, stored) where stored is False when the
+            contents were already present and nothing was copied
+        """
+        stat = path.stat()
+        digest = self.file_state.lookup(path, stat)
+        if digest is not None and self.blob_path(digest).exists():
+            return digest, stat.st_size, False
+
+        # Hash and copy in one pass; the copy is discarded if the blob exists
+        hasher = hashlib.sha256()
+        fd, tmp_name = tempfile.mkstemp(dir=self.objects_dir, prefix='.incoming-')
+        try:
+            with open(path, 'rb') as src, os.fdopen(fd, 'wb') as dst:
+                for chunk in iter(lambda: src.read(_CHUNK_SIZE), b""):
+                    hasher.update(chunk)
+                    dst.write(chunk)
+            digest = hasher.hexdigest()
+
+            blob = self.blob_path(digest)
+            stored = not blob.exists()
+            if stored:
+                blob.parent.mkdir(exist_ok=True)
+                os.replace(tmp_name, blob)
+                os.chmod(blob, 0o444)
+                blob_stat = blob.stat()
+                self.verified[digest] = [blob_stat.st_size, blob_stat.st_mtime_ns]
+        finally:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+
+        self.file_state.record(path, stat, digest)
+        return digest, stat.st_size, stored
+
+    def restore_file(self, digest: str, destination: Path, mode: Optional[int] = None,
+                     mtime_ns: Optional[int] = None):
+        """Write the blob for digest to destination."""
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(self.blob_path(digest), destination)
+        if mode is not None:
+            os.chmod(destination, mode)
+        if mtime_ns is not None:
+            os.utime(destination, ns=(mtime_ns, mtime_ns))
+
+    def verify(self, digests: Iterable[str]) -> List[str]:
+        """Check that blobs exist and are intact.
+
+        Blobs whose size and mtime match the last successful check are
+        trusted without rehashing.
+
+        Args:
+            digests: Digests to check
+
+        Returns:
+            Digests that are missing or corrupt
+        """
+        failed = []
+        for digest in set(digests):
+            blob = self.blob_path(digest)
+            try:
+                stat = blob.stat()
+            except FileNotFoundError:
+                failed.append(digest)
+                continue
+
+            if self.verified.get(digest) == [stat.st_size, stat.st_mtime_ns]:
+                continue
+
+            hasher = hashlib.sha256()
+            with open(blob, 'rb') as f:
+                for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+                    hasher.update(chunk)
+            if hasher.hexdigest() == digest:
+                self.verified[digest] = [stat.st_size, stat.st_mtime_ns]
+            else:
+                self.verified.pop(digest, None)
+                failed.append(digest)
+        return failed
+
+    def collect_garbage(self, live_digests: Set[str]) -> Tuple[int, int]:
+        """Delete blobs that no manifest references.
+
+        Args:
+            live_digests: Digests referenced by retained backups
+
+        Returns:
+            Tuple of (removed_blob_count, freed_bytes)
+        """
+        removed = 0
+        freed = 0
+        for prefix_dir in self.objects_dir.iterdir():
+            if not prefix_dir.is_dir():
+                continue
+            for blob in prefix_dir.iterdir():
+                digest = prefix_dir.name + blob.name
+                if digest in live_digests:
+                    continue
+                try:
+                    freed += blob.stat().st_size
+                    blob.unlink()
+                    removed += 1
+                except OSError as e:
+                    logger.warning(f"Failed to remove unreferenced blob {digest}: {e}")
+                self.verified.pop(digest, None)
+
+        return removed, freed
+
+
+def write_manifest(backup_dir: Path, files: Dict[str, List]):
+    """Write a backup manifest.
+
+    Args:
+        backup_dir: Backup directory
+        files: Relative path -> [digest, size, mode, mtime_ns]
+    """
+    manifest = {'version': MANIFEST_VERSION, 'files': files}
+    tmp_path = backup_dir / (MANIFEST_FILE + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(manifest, ensure_ascii=False, sort_keys=True))
+    os.replace(tmp_path, backup_dir / MANIFEST_FILE)
+
+
+def read_manifest(backup_dir: Path) -> Optional[Dict[str, List]]:
+    """Read the manifest of a backup, or None for a plain-copy backup."""
+    manifest_path = backup_dir / MANIFEST_FILE
+    if not manifest_path.exists():
+        return None
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        return json.load(f)['files']
+
+
+def manifest_hash(files: Dict[str, List]) -> str:
+    """Integrity hash over the paths and digests of a manifest."""
+    hasher = hashlib.sha256()
+    for rel_path in sorted(files):
+        hasher.update(rel_path.encode('utf-8'))
+        hasher.update(b'\0')
+        hasher.update(files[rel_path][0].encode('ascii'))
+        hasher.update(b'\n')
+    return hasher.hexdigest()
@@ -1,5 +1,6 @@
 """Danger detection system to prevent harmful operations."""
 
+import functools
 import logging
 import re
 import subprocess
@@ -8,6 +9,14 @@ from typing import Dict, List, Optional, Any, Set, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 
+from nocturnal_agent.core.analysis_service import AnalysisRequest, AnalysisService, get_analysis_service
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
+
 
 logger = logging.getLogger(__name__)
 
@@ -47,13 +56,15 @@ class DangerDetection:
 class DangerDetector:
     """Detects and prevents dangerous operations during autonomous execution."""
     
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any], analysis_service: Optional[AnalysisService] = None):
         """Initialize danger detector.
         
         Args:
             config: Danger detection configuration
+            analysis_service: Process pool for scanning large code (default: the shared service)
         """
         self.config = config
+        self.analysis_service = analysis_service or get_analysis_service()
         
         # Protection settings
         self.block_on_high_danger = config.get('block_on_high_danger', True)
@@ -269,19 +280,49 @@ class DangerDetector:
         Returns:
             Danger detection result
         """
+        patterns = [pattern for pattern in self.danger_patterns if pattern.enabled]
+        scanner = compile_danger_patterns(self._pattern_signature(patterns))
+        return self._build_detection(patterns, scanner.scan(code))
+    
+    async def analyze_code_async(self, code: str, context: Optional[Dict[str, Any]] = None) -> DangerDetection:
+        """Analyze code for dangerous patterns without blocking the event loop.
+        
+        Large code is scanned in an analysis worker; the result is the same
+        as analyze_code().
+        
+        Args:
+            code: Code to analyze
+            context: Optional context information
+            
+        Returns:
+            Danger detection result
+        """
+        patterns = [pattern for pattern in self.danger_patterns if pattern.enabled]
+        response = await self.analysis_service.run(match_danger_patterns, self._scan_request(code, patterns))
+        if not response.ok:
+            # Fail closed: never skip the safety scan because a worker failed
+            logger.warning(f"Danger scan failed in worker, scanning inline: {response.error}")
+            return self.analyze_code(code, context)
+        return self._build_detection(patterns, response.result)
+    
+    def _scan_request(self, code: str, patterns: List[DangerPattern]) -> AnalysisRequest:
+        """Build a picklable scan job for the given patterns."""
+        return AnalysisRequest(code=code, options={'patterns': self._pattern_signature(patterns)})
+    
+    def _pattern_signature(self, patterns: List[DangerPattern]) -> Tuple[Tuple[str, str, int], ...]:
+        """Key identifying a pattern set; the compiled scanner is cached by it."""
+        return tuple((p.name, p.pattern, p.regex_flags) for p in patterns)
+    
+    def _build_detection(self, patterns: List[DangerPattern], matches_by_name: Dict[str, List[Any]]) -> DangerDetection:
+        """Turn per-pattern matches into a detection result and update statistics."""
         self.detection_stats['total_checks'] += 1
         
         detected_patterns = []
         max_danger_level = DangerLevel.SAFE
         blocked_operations = []
         
-        # Check each pattern
-        for pattern in self.danger_patterns:
-            if not pattern.enabled:
-                continue
-            
-            regex = re.compile(pattern.pattern, pattern.regex_flags)
-            matches = regex.findall(code)
+        for pattern in patterns:
+            matches = matches_by_name.get(pattern.name)
             
             if matches:
                 detected_patterns.append(pattern)
@@ -717,4 +758,227 @@ class DangerDetector:
         # - Adjust pattern sensitivity
         # - Generate training data for ML-based improvements
         
-        return True
\ No newline at end of file
+        return True
+
+
+# Non-ASCII characters IGNORECASE matches to ASCII letters, which str.lower() misses or expands
+_CASE_FOLD_TABLE = {**{code: code + 32 for code in range(ord('A'), ord('Z') + 1)},
+                    0x130: ord('i'), 0x131: ord('i'), 0x17f: ord('s'), 0x212a: ord('k')}
+
+
+def _fold_case(text: str) -> str:
+    """Lower-case ASCII letters without moving any character position.
+    
+    Every position where an ASCII literal matches under IGNORECASE holds
+    the lower-cased literal in the result.
+    """
+    lowered = text.lower()
+    if text.isascii():
+        return lowered
+    if len(lowered) != len(text) or '\u0131' in lowered or '\u017f' in lowered:
+        return text.translate(_CASE_FOLD_TABLE)
+    return lowered
+
+
+@dataclass
+class _ScanEntry:
+    """One compiled pattern of a DangerPatternScanner."""
+    name: str
+    regex: re.Pattern
+    anchors: Optional[List[str]]  # literals one of which starts every match
+    required: Optional[List[str]]  # literals one of which occurs in every match
+
+
+class DangerPatternScanner:
+    """Compiled matcher for a fixed set of danger patterns.
+    
+    Running findall once per pattern costs a full regex pass per pattern,
+    and with IGNORECASE each pass is slow. The scanner instead derives
+    literals from each parsed regex:
+    
+    - If every match must start with one of a few literals, candidate
+      positions are found with plain substring search, and the regex is
+      only tried, anchored, at those positions.
+    - Otherwise, if every match must contain one of a few literals, the
+      regex only runs when one of them occurs in the text.
+    - Patterns without usable literals run findall as before.
+    
+    Literal search is case-insensitive, so it finds a superset of
+    candidates, and every result comes from the pattern's own regex. The
+    output is the same as findall per pattern.
+    """
+    
+    # Shorter literals occur everywhere and filter out nothing
+    MIN_LITERAL_LENGTH = 2
+    
+    def __init__(self, patterns: Tuple[Tuple[str, str, int], ...]):
+        """Compile the pattern set.
+        
+        Args:
+            patterns: (name, regex, flags) tuples
+        """
+        self.entries = []
+        for name, pattern, flags in patterns:
+            regex = re.compile(pattern, flags)
+            anchors = required = None
+            try:
+                parsed = sre_parse.parse(pattern, flags)
+                anchors = self._usable(self._leading_literals(parsed))
+                if anchors is None:
+                    required = self._usable(self._required_literals(parsed))
+            except Exception as e:
+                logger.debug(f"No literal prefilter for pattern {name}: {e}")
+            self.entries.append(_ScanEntry(name=name, regex=regex, anchors=anchors, required=required))
+
+    
+    def scan(self, text: str) -> Dict[str, List[Any]]:
+        """Find matches of every pattern in the text.
+        
+        Args:
+            text: Code or command to scan
+            
+        Returns:
+            findall results by pattern name, for patterns with matches
+        """
+        lowered = _fold_case(text)
+        positions = {}
+        
+        def find_all(literal: str) -> List[int]:
+            if literal not in positions:
+                found, index = [], lowered.find(literal)
+                while index != -1:
+                    found.append(index)
+                    index = lowered.find(literal, index + 1)
+                positions[literal] = found
+            return positions[literal]
+        
+        def occurs(literal: str) -> bool:
+            if literal in positions:
+                return bool(positions[literal])
+            return literal in lowered
+        
+        matches = {}
+        for entry in self.entries:
+            if entry.anchors is not None:
+                found = self._match_at(entry.regex, text, sorted({
+                    position for literal in entry.anchors for position in find_all(literal)
+                }))
+            elif entry.required is not None and not any(occurs(literal) for literal in entry.required):
+                found = []
+            else:
+                found = entry.regex.findall(text)
+            if found:
+                matches[entry.name] = found
+        return matches
+    
+    @staticmethod
+    def _match_at(regex: re.Pattern, text: str, candidates: List[int]) -> List[Any]:
+        """findall restricted to matches starting at candidate positions."""
+        found = []
+        end = 0
+        for position in candidates:
+            if position < end:
+                continue  # findall does not return overlapping matches
+            match = regex.match(text, position)
+            if match is None:
+                continue
+            if regex.groups == 0:
+                found.append(match.group(0))
+            elif regex.groups == 1:
+                found.append(match.group(1) or '')
+            else:
+                found.append(match.groups(default=''))
+            end = match.end()
+        return found
+    
+    def _usable(self, literals: Optional[Set[str]]) -> Optional[List[str]]:
+        """Lower-cased literals if all are long enough and ASCII."""
+        if not literals:
+            return None
+        if any(len(literal) < self.MIN_LITERAL_LENGTH or not literal.isascii() for literal in literals):
+            return None
+        return sorted({literal.lower() for literal in literals})
+    
+    def _leading_literals(self, items) -> Optional[Set[str]]:
+        """Literals one of which every match of the subpattern starts with."""
+        items = list(items)
+        index = 0
+        # Zero-width assertions do not consume the literal
+        while index < len(items) and items[index][0] in (
+            sre_constants.AT, sre_constants.ASSERT, sre_constants.ASSERT_NOT
+        ):
+            index += 1
+        if index == len(items):
+            return None
+        
+        op, av = items[index]
+        if op is sre_constants.LITERAL:
+            run = []
+            while index < len(items) and items[index][0] is sre_constants.LITERAL:
+                run.append(chr(items[index][1]))
+                index += 1
+            return {''.join(run)}
+        if op is sre_constants.SUBPATTERN:
+            return self._leading_literals(av[-1])
+        if op is sre_constants.BRANCH:
+            return self._union(self._leading_literals(branch) for branch in av[1])
+        if op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) and av[0] >= 1:
+            return self._leading_literals(av[2])
+        return None
+    
+    def _required_literals(self, items) -> Optional[Set[str]]:
+        """Literals one of which occurs in every match of the subpattern."""
+        candidates = []
+        run = []
+        
+        for op, av in items:
+            if op is sre_constants.LITERAL:
+                run.append(chr(av))
+                continue
+            if run:
+                candidates.append({''.join(run)})
+                run = []
+            
+            if op is sre_constants.SUBPATTERN:
+                literals = self._required_literals(av[-1])
+            elif op is sre_constants.BRANCH:
+                literals = self._union(self._required_literals(branch) for branch in av[1])
+            elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) and av[0] >= 1:
+                literals = self._required_literals(av[2])
+            else:
+                literals = None
+            if literals:
+                candidates.append(literals)
+        
+        if run:
+            candidates.append({''.join(run)})
+        if not candidates:
+            return None
+        # The most selective choice: the one whose shortest literal is longest
+        return max(candidates, key=lambda literals: min(len(literal) for literal in literals))
+    
+    @staticmethod
+    def _union(parts) -> Optional[Set[str]]:
+        """Union of per-branch literal sets, or None if any branch has none."""
+        result = set()
+        for part in parts:
+            if not part:
+                return None
+            result |= part
+        return result
+
+
+@functools.lru_cache(maxsize=16)
+def compile_danger_patterns(patterns: Tuple[Tuple[str, str, int], ...]) -> DangerPatternScanner:
+    """Get the compiled scanner for a pattern set, building it on first use."""
+    return DangerPatternScanner(patterns)
+
+
+def match_danger_patterns(request: AnalysisRequest) -> Dict[str, List[Any]]:
+    """Analysis job: find matches of each danger pattern in the code.
+    
+    ``request.options['patterns']`` holds ``(name, regex, flags)`` tuples.
+    Only patterns with at least one match appear in the result.
+    """
+    patterns = tuple(tuple(pattern) for pattern in request.options.get('patterns', ()))
+    return compile_danger_patterns(patterns).scan(request.code)
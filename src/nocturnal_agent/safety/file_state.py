@@ -0,0 +1,238 @@
+"""Persistent stat cache of file content hashes."""
+
+import hashlib
+import json
+import logging
+import os
+import stat as stat_module
+import subprocess
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+
+_CHUNK_SIZE = 1024 * 1024
+# Files modified this recently may change again within the same mtime tick,
+# so their hashes are not trusted on the next lookup (git's "racy" files).
+_RACY_WINDOW_NS = 2_000_000_000
+
+
+class FileStateCache:
+    """SHA-256 of project files keyed by (path, inode, size, mtime_ns).
+
+    A file is only rehashed when its stat tuple changed since it was last
+    hashed. In git repositories, files that ``git status`` reports clean
+    and whose index blob is unchanged reuse their cached hash without even
+    being stat'ed, so a snapshot of a large repository costs little more
+    than ``git ls-files`` and ``git status``.
+
+    One instance is shared per project (see :meth:`for_project`) and the
+    cache is persisted under ``.nocturnal/`` between runs.
+    """
+
+    _instances: Dict[Path, 'FileStateCache'] = {}
+
+    def __init__(self, root: Path, cache_file: Optional[Path] = None):
+        """Initialize the cache.
+
+        Args:
+            root: Project root; entries are keyed by paths relative to it
+            cache_file: Where to persist the cache
+        """
+        self.root = Path(root).resolve()
+        self._given_root = Path(os.path.abspath(root))
+        self.cache_file = Path(cache_file) if cache_file else self.root / ".nocturnal" / "file_state.json"
+
+        # relative path -> [inode, size, mtime_ns, sha256 or None, git blob id or None]
+        self.entries: Dict[str, List] = {}
+        self.hashed_files = 0
+        self._dirty = False
+        self._load()
+
+    @classmethod
+    def for_project(cls, root: Path) -> 'FileStateCache':
+        """Return the cache shared by every component working on root."""
+        key = Path(root).resolve()
+        instance = cls._instances.get(key)
+        if instance is None:
+            instance = cls._instances[key] = cls(key)
+        return instance
+
+    def _load(self):
+        """Load the persisted cache, starting empty if it is unusable."""
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == CACHE_VERSION:
+                self.entries = data['entries']
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Discarding unreadable file state cache {self.cache_file}: {e}")
+
+    def save(self):
+        """Persist the cache if it changed."""
+        if not self._dirty:
+            return
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_file.with_name(self.cache_file.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'version': CACHE_VERSION, 'entries': self.entries}, ensure_ascii=False))
+        os.replace(tmp_path, self.cache_file)
+        self._dirty = False
+
+    def relative(self, path: Path) -> str:
+        """Cache key of an absolute path."""
+        path = Path(os.path.abspath(path))
+        try:
+            return path.relative_to(self.root).as_posix()
+        except ValueError:
+            # Path spelled through a symlinked project directory
+            return path.relative_to(self._given_root).as_posix()
+
+    def lookup(self, path: Path, stat: os.stat_result) -> Optional[str]:
+        """Return the cached hash of path if its stat tuple is unchanged."""
+        entry = self.entries.get(self.relative(path))
+        if (entry and entry[3] and entry[0] == stat.st_ino and entry[1] == stat.st_size and
+                entry[2] == stat.st_mtime_ns):
+            return entry[3]
+        return None
+
+    def record(self, path: Path, stat: os.stat_result, digest: str, git_oid: Optional[str] = None):
+        """Remember the hash of path for its current stat tuple."""
+        if time.time_ns() - stat.st_mtime_ns < _RACY_WINDOW_NS:
+            digest = None
+        self.entries[self.relative(path)] = [stat.st_ino, stat.st_size, stat.st_mtime_ns, digest, git_oid]
+        self._dirty = True
+
+    def digest(self, path: Path, stat: Optional[os.stat_result] = None, git_oid: Optional[str] = None) -> str:
+        """Return the SHA-256 of path, hashing it only if its stat changed."""
+        stat = stat or os.stat(path)
+        digest = self.lookup(path, stat)
+        if digest is None:
+            hasher = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+                    hasher.update(chunk)
+            digest = hasher.hexdigest()
+            self.hashed_files += 1
+            self.record(path, stat, digest, git_oid)
+        elif git_oid is not None and self.entries[self.relative(path)][4] != git_oid:
+            self.entries[self.relative(path)][4] = git_oid
+            self._dirty = True
+        return digest
+
+    def snapshot(self, include: Callable[[str], bool]) -> Dict[str, str]:
+        """Hash every project file accepted by include.
+
+        In a git repository the snapshot covers tracked and untracked files
+        that are not ignored; otherwise the whole tree is walked, skipping
+        directories rejected by include.
+
+        Args:
+            include: Predicate on relative paths (directories end with '/')
+
+        Returns:
+            Relative path -> SHA-256
+        """
+        git_state = self.git_state()
+        if git_state is None:
+            paths = self._walk(include)
+            index_oids, changed = {}, None
+        else:
+            index_oids, changed = git_state
+            paths = sorted(path for path in set(index_oids) | changed if include(path))
+
+        try:
+            own_file = self.relative(self.cache_file)
+        except ValueError:
+            own_file = None
+
+        snapshot = {}
+        for rel_path in paths:
+            if rel_path == own_file:
+                continue
+            oid = index_oids.get(rel_path)
+            if changed is not None and rel_path not in changed:
+                # Clean in git: same content as the index blob we hashed before
+                entry = self.entries.get(rel_path)
+                if entry and entry[3] and entry[4] == oid:
+                    snapshot[rel_path] = entry[3]
+                    continue
+            else:
+                oid = None
+
+            path = self.root / rel_path
+            try:
+                stat = os.stat(path)
+                if not stat_module.S_ISREG(stat.st_mode):
+                    continue
+                snapshot[rel_path] = self.digest(path, stat, oid)
+            except (OSError, PermissionError):
+                continue
+
+        self.save()
+        return snapshot
+
+    def _walk(self, include: Callable[[str], bool]) -> List[str]:
+        """List files below the root, pruning rejected directories."""
+        paths = []
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            rel_dir = Path(dirpath).relative_to(self.root).as_posix()
+            prefix = '' if rel_dir == '.' else rel_dir + '/'
+            dirnames[:] = [d for d in dirnames if include(f"{prefix}{d}/")]
+            paths.extend(prefix + name for name in filenames if include(prefix + name))
+        return sorted(paths)
+
+    def git_state(self) -> Optional[Tuple[Dict[str, str], Set[str]]]:
+        """Read the git index and working tree status.
+
+        Returns:
+            Tuple of (path -> index blob id, paths that are modified, staged,
+            deleted or untracked), or None outside a git repository
+        """
+        try:
+            prefix = subprocess.run(
+                ['git', 'rev-parse', '--show-prefix'],
+                cwd=self.root, capture_output=True, text=True, check=True
+            ).stdout.strip()
+            ls_files = subprocess.run(
+                ['git', 'ls-files', '--stage', '-z'],
+                cwd=self.root, capture_output=True, check=True
+            )
+            status = subprocess.run(
+                ['git', 'status', '--porcelain', '-z', '--untracked-files=all'],
+                cwd=self.root, capture_output=True, check=True
+            )
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+        index_oids = {}
+        for record in ls_files.stdout.split(b'\0'):
+            if not record:
+                continue
+            info, _, path = record.partition(b'\t')
+            mode, oid, stage = info.split(b' ')
+            if stage == b'0' and mode != b'160000':  # skip conflicts and submodules
+                index_oids[os.fsdecode(path)] = oid.decode('ascii')
+
+        # Status paths are relative to the top of the work tree
+        changed = {
+            path[len(prefix):] for path in self._parse_status(status.stdout) if path.startswith(prefix)
+        }
+        return index_oids, changed
+
+    @staticmethod
+    def _parse_status(output: bytes) -> Iterable[str]:
+        """Yield the paths of ``git status --porcelain -z`` records."""
+        records = iter(output.split(b'\0'))
+        for record in records:
+            if len(record) < 4:
+                continue
+            yield os.fsdecode(record[3:])
+            if record[0:1] in (b'R', b'C'):
+                next(records, None)  # the original path of a rename or copy
@@ -3,7 +3,6 @@
 import logging
 import subprocess
 import json
-import shutil
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Tuple
@@ -11,6 +10,7 @@ from dataclasses import dataclass, field
 from enum import Enum
 
 from nocturnal_agent.safety.backup_manager import BackupManager, BackupInfo, BackupType
+from nocturnal_agent.safety.file_state import FileStateCache
 
 
 logger = logging.getLogger(__name__)
@@ -83,6 +83,9 @@ class RollbackManager:
         self.require_confirmation = config.get('require_confirmation', True)
         self.create_rollback_backup = config.get('create_rollback_backup', True)
         
+        # Hashes are shared with the backup manager and reused while files are unchanged
+        self.file_state = FileStateCache.for_project(self.project_path)
+        
         # Storage
         self.rollback_dir = self.project_path / ".nocturnal" / "rollbacks"
         self.rollback_dir.mkdir(parents=True, exist_ok=True)
@@ -301,22 +304,9 @@ class RollbackManager:
         if not backup_dir.exists():
             raise FileNotFoundError(f"Backup directory not found: {backup_dir}")
         
-        restored_files = []
-        
-        # Restore all files from backup
-        for backup_file in backup_dir.rglob('*'):
-            if not backup_file.is_file():
-                continue
-            
-            rel_path = backup_file.relative_to(backup_dir)
-            target_file = self.project_path / rel_path
-            
-            try:
-                target_file.parent.mkdir(parents=True, exist_ok=True)
-                shutil.copy2(backup_file, target_file)
-                restored_files.append(str(rel_path))
-            except (OSError, PermissionError) as e:
-                operation.errors.append(f"Failed to restore {rel_path}: {e}")
+        # Restore all files from backup (manifest blobs or plain copies)
+        restored_files, errors = self.backup_manager.restore_files(backup_info, self.project_path)
+        operation.errors.extend(errors)
         
         operation.files_affected = restored_files
         
@@ -453,36 +443,19 @@ class RollbackManager:
     async def _create_files_snapshot(self) -> Dict[str, str]:
         """Create a snapshot of current file hashes.
         
+        Only files whose stat changed since they were last hashed are read.
+        
         Returns:
             Dictionary mapping file paths to hashes
         """
-        import hashlib
-        
-        snapshot = {}
-        
-        for file_path in self.project_path.rglob('*'):
-            if not file_path.is_file():
-                continue
-            
-            # Skip certain files/directories
-            if any(part.startswith('.') for part in file_path.parts):
-                if not file_path.name in ['.gitignore', '.env.example']:
-                    continue
-            
-            try:
-                rel_path = str(file_path.relative_to(self.project_path))
-                
-                hasher = hashlib.sha256()
-                with open(file_path, 'rb') as f:
-                    for chunk in iter(lambda: f.read(8192), b""):
-                        hasher.update(chunk)
-                
-                snapshot[rel_path] = hasher.hexdigest()
-                
-            except (OSError, PermissionError):
-                continue
-        
-        return snapshot
+        def include(rel_path: str) -> bool:
+            # Skip hidden files/directories
+            parts = rel_path.rstrip('/').split('/')
+            if any(part.startswith('.') for part in parts):
+                return not rel_path.endswith('/') and parts[-1] in ['.gitignore', '.env.example']
+            return True
+        
+        return self.file_state.snapshot(include)
     
     def _find_rollback_point(self, rollback_id: str) -> Optional[RollbackPoint]:
         """Find a rollback point by ID.
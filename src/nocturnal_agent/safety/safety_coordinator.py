@@ -187,7 +187,7 @@ class SafetyCoordinator:
         
         # Analyze planned code for dangers
         if planned_code:
-            danger_analysis = self.danger_detector.analyze_code(planned_code)
+            danger_analysis = await self.danger_detector.analyze_code_async(planned_code)
             
             safety_result['danger_analysis'] = {
                 'is_dangerous': danger_analysis.is_dangerous,
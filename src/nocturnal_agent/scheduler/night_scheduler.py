@@ -2,6 +2,9 @@
 
 import logging
 import asyncio
+import time
+from collections import deque
+from contextlib import nullcontext
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from pathlib import Path
@@ -10,7 +13,9 @@ from nocturnal_agent.core.models import Task, ExecutionResult, TaskPriority, Tas
 from nocturnal_agent.scheduler.time_controller import TimeController, ExecutionWindow
 from nocturnal_agent.scheduler.task_queue import TaskQueue, QueuedTask
 from nocturnal_agent.scheduler.resource_monitor import ResourceMonitor, ResourceStatus
+from nocturnal_agent.scheduler.task_resource_model import TaskResourceEstimate, TaskResourceModel
 from nocturnal_agent.quality.quality_manager import QualityManager
+from nocturnal_agent.llm.response_cache import bypass_response_cache
 # from nocturnal_agent.agents.claude_agent import ClaudeAgent  # Disabled for testing
 
 
@@ -44,9 +49,19 @@ class NightScheduler:
         # Initialize components with safe config access
         self.time_controller = TimeController(safe_get(config, 'time_control', {}))
         self.task_queue = TaskQueue(str(self.project_path), safe_get(config, 'task_queue', {}))
-        self.resource_monitor = ResourceMonitor(safe_get(config, 'resource_monitoring', {}))
+        self.resource_monitor = ResourceMonitor({
+            'history_dir': str(self.project_path / ".nocturnal" / "resource_history"),
+            **safe_get(config, 'resource_monitoring', {})
+        })
         self.quality_manager = QualityManager(str(self.project_path), safe_get(config, 'quality_management', {}))
         
+        # Learned per-task resource usage for admission decisions
+        self.resource_model = TaskResourceModel(
+            self.project_path / ".nocturnal" / "task_resources.json",
+            safe_get(config, 'resource_model', {})
+        )
+        self.running_estimates: Dict[str, TaskResourceEstimate] = {}
+        
         # Execution agents (disabled for testing)
         self.claude_agent = None  # ClaudeAgent(safe_get(config, 'claude', {}))
         
@@ -54,6 +69,14 @@ class NightScheduler:
         self.is_running = False
         self.current_task: Optional[QueuedTask] = None
         self.emergency_shutdown = False
+        self.running_executions: Dict[str, asyncio.Task] = {}
+        
+        # Event-driven dispatch: components signal the loop instead of it polling.
+        # The recheck interval only bounds how long a missed signal can stall it.
+        self.idle_recheck_seconds = safe_get(config, 'idle_recheck_seconds', 60)
+        self._wakeup_event: Optional[asyncio.Event] = None
+        self._wakeup_requested_at: Optional[float] = None
+        self.dispatch_latencies: deque = deque(maxlen=1000)  # Seconds from wakeup to dispatch
         
         # Statistics
         self.session_stats = {
@@ -93,6 +116,7 @@ class NightScheduler:
         await self.resource_monitor.start_monitoring()
         
         # Start main execution loop
+        self._wakeup_event = asyncio.Event()
         asyncio.create_task(self._execution_loop())
         
         logger.info("Night scheduler started successfully")
@@ -101,6 +125,7 @@ class NightScheduler:
         """Stop the night scheduler."""
         logger.info("Stopping night scheduler")
         self.is_running = False
+        self._notify_scheduler("stop")
         
         # Stop current task if running
         if self.current_task:
@@ -124,35 +149,88 @@ class NightScheduler:
         await self.stop()
     
     async def _execution_loop(self):
-        """Main execution loop."""
+        """Main execution loop.
+        
+        Sleeps until a task completes, a task is enqueued, or the time window or
+        resource status changes, then fills every free execution slot.
+        """
         while self.is_running and not self.emergency_shutdown:
             try:
-                # Check if execution is allowed
-                if not self._can_execute():
-                    await asyncio.sleep(60)  # Check again in 1 minute
-                    continue
-                
-                # Get next task
-                next_task = await self.task_queue.get_next_task()
-                if not next_task:
-                    await asyncio.sleep(30)  # No tasks available, wait
-                    continue
+                requested_at = self._wakeup_requested_at
+                self._wakeup_requested_at = None
+                self._wakeup_event.clear()
                 
-                # Check if we can safely execute this task
-                can_execute, reason = await self._can_execute_task(next_task)
-                if not can_execute:
-                    logger.warning(f"Cannot execute task {next_task.task.id}: {reason}")
-                    # Put task back in queue with lower priority
-                    await self.task_queue.complete_task(next_task.task.id, success=False)
-                    continue
+                # Fill free slots if execution is allowed
+                if self._can_execute():
+                    dispatched = await self._dispatch_ready_tasks()
+                    if dispatched and requested_at is not None:
+                        self.dispatch_latencies.append(time.perf_counter() - requested_at)
                 
-                # Execute the task
-                await self._execute_task(next_task)
+                # Wait for the next signal
+                try:
+                    await asyncio.wait_for(self._wakeup_event.wait(), timeout=self.idle_recheck_seconds)
+                except asyncio.TimeoutError:
+                    pass
                 
             except Exception as e:
                 logger.error(f"Error in execution loop: {e}")
                 await asyncio.sleep(60)  # Wait before retrying
     
+    async def _dispatch_ready_tasks(self) -> int:
+        """Start ready tasks until the queue has no free slots or no ready tasks.
+        
+        Returns:
+            Number of tasks started
+        """
+        dispatched = 0
+        deferred = set()
+        
+        while self._can_execute():
+            # Get next task (None when no task is ready or all slots are busy)
+            next_task = await self.task_queue.get_next_task(exclude=deferred)
+            if not next_task:
+                break
+            
+            # Tasks that do not fit right now wait without using up a retry,
+            # and smaller tasks behind them get a chance to fill the gap
+            estimate = self.resource_model.predict(next_task.task)
+            admitted, reason = self._admit_task(next_task, estimate)
+            if not admitted:
+                logger.info(f"Deferring task {next_task.task.id}: {reason}")
+                await self.task_queue.defer_task(next_task.task.id)
+                deferred.add(next_task.task.id)
+                continue
+            
+            # Check if we can safely execute this task
+            can_execute, reason = await self._can_execute_task(next_task)
+            if not can_execute:
+                logger.warning(f"Cannot execute task {next_task.task.id}: {reason}")
+                # A temporary "not now", so wait for the next round like admission does
+                await self.task_queue.defer_task(next_task.task.id)
+                deferred.add(next_task.task.id)
+                continue
+            
+            # Execute the task
+            self.running_estimates[next_task.task.id] = estimate
+            self.running_executions[next_task.task.id] = asyncio.create_task(self._execute_task(next_task))
+            dispatched += 1
+        
+        return dispatched
+    
+    def _notify_scheduler(self, reason: str):
+        """Wake the execution loop.
+        
+        Args:
+            reason: What changed (for debugging)
+        """
+        if self._wakeup_requested_at is None:
+            self._wakeup_requested_at = time.perf_counter()
+        
+        if self._wakeup_event is not None:
+            self._wakeup_event.set()
+        
+        logger.debug(f"Scheduler wakeup: {reason}")
+    
     def _can_execute(self) -> bool:
         """Check if execution is currently allowed.
         
@@ -184,7 +262,8 @@ class NightScheduler:
             Tuple of (can_execute, reason)
         """
         # Check time constraints
-        can_start, reason = self.time_controller.can_start_task(queued_task.estimated_duration)
+        estimate = self.resource_model.predict(queued_task.task)
+        can_start, reason = self.time_controller.can_start_task(self._predicted_duration(queued_task, estimate))
         if not can_start:
             return False, reason
         
@@ -195,6 +274,29 @@ class NightScheduler:
         
         return True, "Task can be executed"
     
+    def _predicted_duration(self, queued_task: QueuedTask, estimate: TaskResourceEstimate) -> timedelta:
+        """Learned duration of a task, or its queued estimate before enough runs."""
+        if estimate.samples:
+            return timedelta(seconds=estimate.wall_seconds)
+        return queued_task.estimated_duration
+    
+    def _admit_task(self, queued_task: QueuedTask, estimate: TaskResourceEstimate) -> tuple[bool, str]:
+        """Check if a task fits the remaining window and the resource headroom.
+        
+        Args:
+            queued_task: Task to check
+            estimate: Predicted resource usage of the task
+            
+        Returns:
+            Tuple of (admitted, reason)
+        """
+        duration = self._predicted_duration(queued_task, estimate)
+        remaining_time = self.time_controller.get_remaining_window_time()
+        if remaining_time and duration > remaining_time:
+            return False, f"Predicted duration {duration} exceeds remaining window {remaining_time}"
+        
+        return self.resource_monitor.can_admit_task(estimate, list(self.running_estimates.values()))
+    
     async def _execute_task(self, queued_task: QueuedTask):
         """Execute a single task.
         
@@ -209,11 +311,13 @@ class NightScheduler:
         execution_start = datetime.now()
         
         try:
-            # Execute task using appropriate agent
-            result = await self._run_task_with_agent(task)
-            
-            # Process result through quality management
-            final_result = await self.quality_manager.process_task_result(task, result)
+            # A retry must not replay the cached output that failed last time
+            with bypass_response_cache() if queued_task.retry_count else nullcontext():
+                # Execute task using appropriate agent
+                result = await self._run_task_with_agent(task)
+                
+                # Process result through quality management
+                final_result = await self.quality_manager.process_task_result(task, result)
             
             # Determine success
             success = final_result.success and final_result.quality_score.overall >= 0.85
@@ -225,6 +329,14 @@ class NightScheduler:
             execution_time = datetime.now() - execution_start
             self.session_stats['total_execution_time'] += execution_time
             
+            # Learn the task's actual resource usage
+            self.resource_model.record(
+                task,
+                execution_time.total_seconds(),
+                cpu_seconds=final_result.cpu_seconds,
+                peak_rss_mb=final_result.peak_memory_mb
+            )
+            
             if success:
                 self.session_stats['tasks_completed'] += 1
                 logger.info(f"Task completed successfully: {task.id}")
@@ -246,7 +358,11 @@ class NightScheduler:
             self.session_stats['tasks_failed'] += 1
             
         finally:
-            self.current_task = None
+            if self.current_task is queued_task:
+                self.current_task = None
+            self.running_executions.pop(task.id, None)
+            self.running_estimates.pop(task.id, None)
+            self._notify_scheduler("task_completed")
     
     async def _run_task_with_agent(self, task: Task) -> ExecutionResult:
         """Run a task with the appropriate agent.
@@ -354,6 +470,8 @@ class NightScheduler:
             if self.task_queue.status.value == 'paused':
                 await self.task_queue.resume_queue()
                 logger.info("Time window opened - resuming task queue")
+        
+        self._notify_scheduler("time_window_change")
     
     async def _on_resource_status_change(self, old_status: ResourceStatus, new_status: ResourceStatus, snapshot):
         """Handle resource status changes.
@@ -375,6 +493,8 @@ class NightScheduler:
             if self.time_controller.is_execution_allowed():
                 await self.task_queue.resume_queue()
                 logger.info("Resource status recovered - resuming task queue")
+        
+        self._notify_scheduler("resource_status_change")
     
     async def _on_resource_emergency(self, snapshot):
         """Handle resource emergency conditions.
@@ -395,7 +515,10 @@ class NightScheduler:
         Returns:
             True if task was added successfully
         """
-        return await self.task_queue.add_task(task, priority_override)
+        added = await self.task_queue.add_task(task, priority_override)
+        if added:
+            self._notify_scheduler("task_enqueued")
+        return added
     
     async def remove_task(self, task_id: str) -> bool:
         """Remove a task from the scheduler.
@@ -523,6 +646,7 @@ class NightScheduler:
         logger.info("Resuming night scheduler")
         await self.time_controller.resume_execution()
         await self.task_queue.resume_queue()
+        self._notify_scheduler("resume")
     
     async def enter_maintenance(self):
         """Enter maintenance mode."""
@@ -535,6 +659,7 @@ class NightScheduler:
         logger.info("Exiting maintenance mode")
         await self.time_controller.exit_maintenance_mode()
         await self.task_queue.resume_queue()
+        self._notify_scheduler("exit_maintenance")
     
     def get_performance_metrics(self) -> Dict[str, Any]:
         """Get detailed performance metrics.
@@ -550,6 +675,8 @@ class NightScheduler:
                 'average_task_time': str(self.session_stats['total_execution_time'] / self.session_stats['tasks_attempted']) if self.session_stats['tasks_attempted'] > 0 else None
             },
             'queue_metrics': self.task_queue.get_performance_metrics(),
+            'dispatch_metrics': self._get_dispatch_metrics(),
+            'resource_model': self.resource_model.get_statistics(),
             'resource_metrics': {
                 'monitoring_uptime': str(datetime.now() - self.resource_monitor.stats['monitoring_start_time']) if self.resource_monitor.stats['monitoring_start_time'] else None,
                 'status_changes': self.resource_monitor.stats['status_changes'],
@@ -559,4 +686,28 @@ class NightScheduler:
                     'memory': self.resource_monitor.stats['max_memory_seen']
                 }
             }
-        }
\ No newline at end of file
+        }
+    
+    def _get_dispatch_metrics(self) -> Dict[str, Any]:
+        """Get slot refill latency metrics.
+        
+        Returns:
+            Dispatch latency statistics in milliseconds
+        """
+        latencies = sorted(self.dispatch_latencies)
+        if not latencies:
+            return {
+                'samples': 0,
+                'average_ms': None,
+                'p95_ms': None,
+                'max_ms': None,
+                'running_executions': len(self.running_executions)
+            }
+        
+        return {
+            'samples': len(latencies),
+            'average_ms': sum(latencies) / len(latencies) * 1000,
+            'p95_ms': latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)] * 1000,
+            'max_ms': latencies[-1] * 1000,
+            'running_executions': len(self.running_executions)
+        }
@@ -0,0 +1,287 @@
+"""Multi-resolution ring buffer of resource samples.
+
+Samples are folded into fixed-capacity tiers of time buckets (1 second,
+1 minute and 1 hour by default), each bucket keeping the count, sum,
+minimum, maximum and last value of every metric. Memory use is fixed at
+construction, and a windowed query scans at most one tier, so its cost
+does not grow with how long the monitor has been running.
+
+NumPy is optional; ResourceMonitor checks ``NUMPY_AVAILABLE`` and keeps
+its pure-Python history when it is missing.
+"""
+
+import logging
+import math
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None
+
+
+logger = logging.getLogger(__name__)
+
+NUMPY_AVAILABLE = np is not None
+
+# ResourceSnapshot attributes recorded for every sample
+METRICS = (
+    'cpu_percent',
+    'memory_percent',
+    'memory_used_gb',
+    'memory_available_gb',
+    'disk_percent',
+    'disk_free_gb',
+    'network_sent_mbps',
+    'network_recv_mbps',
+    'open_files',
+    'process_count',
+)
+
+# (name, bucket seconds, bucket count): 1 hour of seconds, 1 day of
+# minutes and 30 days of hours
+DEFAULT_TIERS = (
+    ('1s', 1, 3600),
+    ('1m', 60, 1440),
+    ('1h', 3600, 720),
+)
+
+# Column layout of a tier: bucket start, sample count, then one block of
+# len(METRICS) columns each for sum, min, max and last value
+_TS, _COUNT, _BLOCKS = 0, 1, 2
+
+
+class _Tier:
+    """Ring of time buckets at one resolution."""
+
+    def __init__(self, name: str, bucket_seconds: int, capacity: int, data: 'np.ndarray'):
+        self.name = name
+        self.bucket_seconds = bucket_seconds
+        self.capacity = capacity
+        self.data = data
+
+        n = self._n = len(METRICS)
+        self.sums = data[:, _BLOCKS:_BLOCKS + n]
+        self.mins = data[:, _BLOCKS + n:_BLOCKS + 2 * n]
+        self.maxs = data[:, _BLOCKS + 2 * n:_BLOCKS + 3 * n]
+        self.lasts = data[:, _BLOCKS + 3 * n:_BLOCKS + 4 * n]
+
+        # The newest bucket has the largest start time
+        starts = data[:, _TS]
+        self.head = int(np.nanargmax(starts)) if not np.isnan(starts).all() else -1
+        self._head_start = float(starts[self.head]) if self.head >= 0 else -math.inf
+        # Samples currently held
+        self.total = int(data[~np.isnan(starts), _COUNT].sum())
+
+    @property
+    def span_seconds(self) -> int:
+        return self.bucket_seconds * self.capacity
+
+    def add(self, timestamp: float, values: 'np.ndarray'):
+        """Fold one sample into its bucket."""
+        start = math.floor(timestamp / self.bucket_seconds) * self.bucket_seconds
+        n = self._n
+        # A clock stepping backwards folds into the newest bucket
+        if start > self._head_start:
+            self.head = (self.head + 1) % self.capacity
+            self._head_start = start
+            bucket = self.data[self.head]
+            if bucket[_COUNT] and not math.isnan(bucket[_TS]):
+                self.total -= int(bucket[_COUNT])
+            # First sample of the bucket: sum, min, max and last all equal it
+            bucket[_TS] = start
+            bucket[_COUNT] = 1
+            bucket[_BLOCKS:].reshape(4, n)[:] = values
+        else:
+            bucket = self.data[self.head]
+            bucket[_COUNT] += 1
+            blocks = bucket[_BLOCKS:].reshape(4, n)
+            blocks[0] += values
+            np.minimum(blocks[1], values, out=blocks[1])
+            np.maximum(blocks[2], values, out=blocks[2])
+            blocks[3] = values
+        self.total += 1
+
+    def rows_since(self, cutoff: float) -> 'np.ndarray':
+        """Indices of buckets overlapping [cutoff, now], oldest first."""
+        starts = self.data[:, _TS]
+        with np.errstate(invalid='ignore'):
+            rows = np.flatnonzero(starts + self.bucket_seconds > cutoff)
+        return rows[np.argsort(starts[rows], kind='stable')]
+
+    def clear_before(self, cutoff: float) -> int:
+        """Empty buckets that end before cutoff.
+
+        Returns:
+            Number of samples dropped
+        """
+        starts = self.data[:, _TS]
+        with np.errstate(invalid='ignore'):
+            stale = starts + self.bucket_seconds <= cutoff
+        dropped = int(self.data[stale, _COUNT].sum())
+        self.total -= dropped
+        self.data[stale, _TS] = np.nan
+        self.data[stale, _COUNT] = 0
+        if self.head >= 0 and np.isnan(self.data[self.head, _TS]):
+            # Keep the ring position so new buckets still overwrite the oldest
+            self._head_start = -math.inf
+        return dropped
+
+
+class ResourceHistory:
+    """Fixed-size, multi-resolution history of resource snapshots.
+
+    Every sample is added to all tiers. Queries are answered from the
+    finest tier whose span covers the requested window; minimum, maximum,
+    average and the current value are exact, while percentiles and the
+    trend slope are computed over bucket averages.
+
+    When ``path`` is given each tier is a memory-mapped ``.npy`` file in
+    that directory, so history survives restarts.
+    """
+
+    def __init__(self, path: Optional[Path] = None, tiers: Sequence[Tuple[str, int, int]] = DEFAULT_TIERS):
+        """Initialize the history.
+
+        Args:
+            path: Directory for the memory-mapped tiers, or None to keep them in memory
+            tiers: (name, bucket seconds, bucket count) from finest to coarsest
+        """
+        if not NUMPY_AVAILABLE:
+            raise ImportError("numpy is required for the resource history: pip install numpy")
+
+        self.path = Path(path) if path is not None else None
+        self._columns = _BLOCKS + 4 * len(METRICS)
+        self._metric_index = {metric: i for i, metric in enumerate(METRICS)}
+
+        if self.path is not None:
+            self.path.mkdir(parents=True, exist_ok=True)
+        self.tiers: List[_Tier] = [
+            _Tier(name, bucket_seconds, capacity, self._open(name, capacity))
+            for name, bucket_seconds, capacity in sorted(tiers, key=lambda tier: tier[1])
+        ]
+
+    def __len__(self) -> int:
+        """Number of samples held at the finest resolution."""
+        return self.tiers[0].total
+
+    def _open(self, name: str, capacity: int) -> 'np.ndarray':
+        """Open or create the storage of one tier."""
+        shape = (capacity, self._columns)
+        if self.path is None:
+            data = np.zeros(shape, dtype=np.float64)
+            data[:, _TS] = np.nan
+            return data
+
+        tier_file = self.path / f"{name}.npy"
+        if tier_file.exists():
+            try:
+                data = np.lib.format.open_memmap(str(tier_file), mode='r+')
+                if data.shape == shape and data.dtype == np.float64:
+                    return data
+                logger.info(f"Resource history {tier_file} has a different layout, rebuilding")
+                del data
+            except (OSError, ValueError) as e:
+                logger.warning(f"Discarding unreadable resource history {tier_file}: {e}")
+
+        data = np.lib.format.open_memmap(str(tier_file), mode='w+', dtype=np.float64, shape=shape)
+        data[:] = 0.0
+        data[:, _TS] = np.nan
+        return data
+
+    def append(self, snapshot: Any):
+        """Record a ResourceSnapshot."""
+        values = np.array([float(getattr(snapshot, metric)) for metric in METRICS], dtype=np.float64)
+        timestamp = snapshot.timestamp.timestamp()
+        for tier in self.tiers:
+            tier.add(timestamp, values)
+
+    def _tier_for(self, seconds: float) -> _Tier:
+        """Finest tier covering a window of the given length."""
+        for tier in self.tiers:
+            if tier.span_seconds >= seconds:
+                return tier
+        return self.tiers[-1]
+
+    def window_stats(self, metric: str, seconds: float, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Summarize one metric over the trailing window.
+
+        Args:
+            metric: Name of a ResourceSnapshot metric
+            seconds: Window length
+            now: End of the window as a Unix timestamp (default: current time)
+
+        Returns:
+            Dictionary with samples, min, max, avg, current, p50, p95,
+            slope_per_hour and trend, or None if the window holds no samples
+        """
+        column = self._metric_index[metric]
+        now = time.time() if now is None else now
+        tier = self._tier_for(seconds)
+        rows = tier.rows_since(now - seconds)
+        if rows.size == 0:
+            return None
+
+        counts = tier.data[rows, _COUNT]
+        sums = tier.sums[rows, column]
+        means = sums / counts
+        slope = self._slope(tier.data[rows, _TS] + tier.bucket_seconds / 2, means)
+        p50, p95 = np.percentile(means, [50, 95])
+
+        return {
+            'resolution': tier.name,
+            'samples': int(counts.sum()),
+            'min': float(tier.mins[rows, column].min()),
+            'max': float(tier.maxs[rows, column].max()),
+            'avg': float(sums.sum() / counts.sum()),
+            'current': float(tier.lasts[rows[-1], column]),
+            'p50': float(p50),
+            'p95': float(p95),
+            'slope_per_hour': slope,
+            'trend': self._trend(slope, seconds, means),
+        }
+
+    @staticmethod
+    def _slope(times: 'np.ndarray', values: 'np.ndarray') -> float:
+        """Least-squares slope of values per hour."""
+        if len(values) < 2:
+            return 0.0
+        times = times - times.mean()
+        denominator = float(np.dot(times, times))
+        if denominator == 0:
+            return 0.0
+        return float(np.dot(times, values - values.mean()) / denominator * 3600)
+
+    @staticmethod
+    def _trend(slope_per_hour: float, seconds: float, means: 'np.ndarray') -> str:
+        """Classify a slope as rising, falling or stable.
+
+        A trend counts when the fitted change over the window exceeds the
+        larger of 1 unit and 5% of the window average.
+        """
+        change = slope_per_hour * seconds / 3600
+        threshold = max(1.0, 0.05 * abs(float(means.mean())))
+        if change > threshold:
+            return 'rising'
+        if change < -threshold:
+            return 'falling'
+        return 'stable'
+
+    def discard_before(self, cutoff: float) -> int:
+        """Drop samples older than a Unix timestamp.
+
+        Returns:
+            Number of samples dropped from the finest tier
+        """
+        dropped = self.tiers[0].clear_before(cutoff)
+        for tier in self.tiers[1:]:
+            tier.clear_before(cutoff)
+        return dropped
+
+    def flush(self):
+        """Write memory-mapped tiers to disk."""
+        for tier in self.tiers:
+            if isinstance(tier.data, np.memmap):
+                tier.data.flush()
@@ -2,12 +2,19 @@
 
 import logging
 import asyncio
+import threading
+import time
 import psutil
+from collections import deque
 from datetime import datetime, timedelta
+from pathlib import Path
 from typing import Dict, List, Optional, Any, Callable, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 
+from nocturnal_agent.scheduler.resource_history import NUMPY_AVAILABLE, ResourceHistory
+from nocturnal_agent.scheduler.task_resource_model import TaskResourceEstimate
+
 
 logger = logging.getLogger(__name__)
 
@@ -52,6 +59,214 @@ class ResourceSnapshot:
     load_average: List[float] = field(default_factory=list)
 
 
+class ResourceSampler:
+    """Samples system resources on a dedicated thread.
+
+    CPU usage and network throughput are computed from the counter deltas
+    between two samples, so taking a sample never sleeps. Disk usage and
+    the process count are comparatively expensive and only refreshed every
+    ``slow_interval`` seconds.
+
+    Each sample is published by replacing a single ``(sequence, snapshot)``
+    tuple, so readers on the event loop never take a lock and never see a
+    partially built snapshot. ``on_publish``, when set, is called on the
+    sampling thread after every publish.
+    """
+
+    def __init__(self, interval: float = 1.0, slow_interval: float = 10.0, disk_path: str = '/'):
+        """Initialize the sampler.
+
+        Args:
+            interval: Seconds between samples; may be below one second
+            slow_interval: Seconds between disk usage and process count refreshes
+            disk_path: Path whose file system is reported as disk usage
+        """
+        self.interval = interval
+        self.slow_interval = slow_interval
+        self.disk_path = disk_path
+
+        self._published: Tuple[int, Optional[ResourceSnapshot]] = (0, None)
+        self.on_publish: Optional[Callable[[], None]] = None
+        self._sample_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._process = psutil.Process()
+
+        # Counters of the previous sample
+        self._last_time = time.monotonic()
+        self._last_cpu = self._read_cpu_times()
+        self._last_net = self._read_net_counters()
+
+        self._slow_time = 0.0
+        self._slow_values: Dict[str, Any] = {}
+
+        self.stats = {
+            'samples': 0,
+            'errors': 0,
+            'last_sample_ms': 0.0,
+            'max_sample_ms': 0.0
+        }
+
+    @property
+    def latest(self) -> Optional[ResourceSnapshot]:
+        """Most recently published snapshot, or None before the first sample."""
+        return self._published[1]
+
+    @property
+    def sequence(self) -> int:
+        """Number of snapshots published so far."""
+        return self._published[0]
+
+    def read(self) -> Tuple[int, Optional[ResourceSnapshot]]:
+        """Return (sequence, snapshot) of the latest sample as one consistent pair."""
+        return self._published
+
+    def start(self):
+        """Start sampling on a daemon thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="resource-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        """Stop the sampling thread."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        """Sampling thread main loop."""
+        while not self._stop_event.is_set():
+            try:
+                self.sample()
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.error(f"Error sampling resources: {e}")
+            self._stop_event.wait(self.interval)
+
+    def sample(self) -> ResourceSnapshot:
+        """Take and publish a snapshot.
+
+        Safe to call from any thread; CPU and network figures cover the
+        time since the previous sample.
+
+        Returns:
+            The published snapshot
+        """
+        started = time.perf_counter()
+        with self._sample_lock:
+            now = time.monotonic()
+            elapsed = now - self._last_time
+
+            cpu = self._read_cpu_times()
+            cpu_percent = self._cpu_percent(self._last_cpu, cpu)
+
+            net = self._read_net_counters()
+            sent_mbps, recv_mbps = 0.0, 0.0
+            if net is not None and self._last_net is not None and elapsed > 0:
+                sent_mbps = max(0, net[0] - self._last_net[0]) * 8 / 1_000_000 / elapsed
+                recv_mbps = max(0, net[1] - self._last_net[1]) * 8 / 1_000_000 / elapsed
+
+            self._last_time, self._last_cpu, self._last_net = now, cpu, net
+
+            if not self._slow_values or now - self._slow_time >= self.slow_interval:
+                self._slow_values = self._read_slow_values()
+                self._slow_time = now
+
+            memory = psutil.virtual_memory()
+            snapshot = ResourceSnapshot(
+                timestamp=datetime.now(),
+                cpu_percent=cpu_percent,
+                memory_percent=memory.percent,
+                memory_used_gb=memory.used / (1024**3),
+                memory_available_gb=memory.available / (1024**3),
+                disk_percent=self._slow_values['disk_percent'],
+                disk_free_gb=self._slow_values['disk_free_gb'],
+                network_sent_mbps=sent_mbps,
+                network_recv_mbps=recv_mbps,
+                open_files=self._count_open_files(),
+                process_count=self._slow_values['process_count'],
+                load_average=self._read_load_average()
+            )
+
+            self._published = (self._published[0] + 1, snapshot)
+
+        if self.on_publish is not None:
+            self.on_publish()
+        duration_ms = (time.perf_counter() - started) * 1000
+        self.stats['samples'] += 1
+        self.stats['last_sample_ms'] = duration_ms
+        self.stats['max_sample_ms'] = max(self.stats['max_sample_ms'], duration_ms)
+        return snapshot
+
+    @staticmethod
+    def _read_cpu_times() -> Tuple[float, float]:
+        """Return (busy, total) CPU seconds since boot."""
+        times = psutil.cpu_times()
+        total = sum(times)
+        idle = times.idle + getattr(times, 'iowait', 0.0)
+        return total - idle, total
+
+    @staticmethod
+    def _cpu_percent(previous: Tuple[float, float], current: Tuple[float, float]) -> float:
+        """CPU utilization between two cpu time readings."""
+        busy = current[0] - previous[0]
+        total = current[1] - previous[1]
+        if total <= 0:
+            return 0.0
+        return min(100.0, max(0.0, busy / total * 100))
+
+    @staticmethod
+    def _read_net_counters() -> Optional[Tuple[int, int]]:
+        """Return (bytes_sent, bytes_recv) over all interfaces."""
+        try:
+            counters = psutil.net_io_counters()
+        except (OSError, RuntimeError):
+            return None
+        if counters is None:
+            return None
+        return counters.bytes_sent, counters.bytes_recv
+
+    def _read_slow_values(self) -> Dict[str, Any]:
+        """Read the metrics that are refreshed less often."""
+        values = {'disk_percent': 0.0, 'disk_free_gb': 0.0, 'process_count': 0}
+        try:
+            disk = psutil.disk_usage(self.disk_path)
+            values['disk_percent'] = (disk.used / disk.total) * 100
+            values['disk_free_gb'] = disk.free / (1024**3)
+        except OSError as e:
+            logger.warning(f"Failed to read disk usage of {self.disk_path}: {e}")
+        values['process_count'] = len(psutil.pids())
+        return values
+
+    def _count_open_files(self) -> int:
+        """Number of file descriptors (handles on Windows) held by this process."""
+        try:
+            if hasattr(self._process, 'num_fds'):
+                return self._process.num_fds()
+            return self._process.num_handles()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return 0
+
+    @staticmethod
+    def _read_load_average() -> List[float]:
+        """Load average, or an empty list where unavailable."""
+        try:
+            return list(psutil.getloadavg())
+        except (AttributeError, OSError):
+            return []
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get sampler statistics."""
+        return {
+            **self.stats,
+            'interval_seconds': self.interval,
+            'running': self._thread is not None and self._thread.is_alive()
+        }
+
+
 class ResourceMonitor:
     """Monitors system resources and enforces safety limits."""
     
@@ -79,12 +294,34 @@ class ResourceMonitor:
         self.is_monitoring = False
         self.current_status = ResourceStatus.HEALTHY
         self.last_snapshot: Optional[ResourceSnapshot] = None
-        self.history: List[ResourceSnapshot] = []
         self.max_history_size = config.get('max_history_size', 1000)
         
+        # Fixed-size multi-resolution history, persisted when history_dir is set;
+        # without NumPy only the most recent snapshots are kept
+        if NUMPY_AVAILABLE:
+            history_dir = config.get('history_dir')
+            self.history = ResourceHistory(Path(history_dir) if history_dir else None)
+        else:
+            self.history = deque(maxlen=self.max_history_size)
+        
+        # Predictive admission: pack tasks by their learned CPU and memory use
+        self.admission_control = config.get('admission_control', True)
+        self.cpu_count = psutil.cpu_count() or 1
+        self.memory_total_gb = psutil.virtual_memory().total / (1024**3)
+        
         # Monitoring interval
         self.monitor_interval = config.get('monitor_interval_seconds', 30)
         
+        # Sampling runs on its own thread so it never blocks the event loop
+        self.sampler = ResourceSampler(
+            interval=config.get('sample_interval_seconds', self.monitor_interval),
+            slow_interval=config.get('slow_sample_interval_seconds', 10.0),
+            disk_path=config.get('disk_path', '/')
+        )
+        self._monitoring_task: Optional[asyncio.Task] = None
+        self._last_sequence = 0
+        self._sample_published: Optional[asyncio.Event] = None
+        
         # Callbacks for status changes
         self.status_change_callbacks: List[Callable] = []
         self.emergency_callbacks: List[Callable] = []
@@ -110,25 +347,56 @@ class ResourceMonitor:
         self.is_monitoring = True
         self.stats['monitoring_start_time'] = datetime.now()
         
-        # Start monitoring loop
-        asyncio.create_task(self._monitoring_loop())
+        # Wake the monitoring loop whenever the sampler thread publishes
+        loop = asyncio.get_running_loop()
+        self._sample_published = asyncio.Event()
+        self.sampler.on_publish = lambda: self._notify_sample_published(loop)
+        
+        # Start sampler thread and monitoring loop
+        self.sampler.start()
+        self._monitoring_task = asyncio.create_task(self._monitoring_loop())
     
     async def stop_monitoring(self):
         """Stop resource monitoring."""
         logger.info("Stopping resource monitoring")
         self.is_monitoring = False
+        self.sampler.stop()
+        self.sampler.on_publish = None
+        if isinstance(self.history, ResourceHistory):
+            self.history.flush()
+        if self._monitoring_task is not None:
+            self._monitoring_task.cancel()
+            self._monitoring_task = None
+    
+    def _notify_sample_published(self, loop: asyncio.AbstractEventLoop):
+        """Set the publish event from the sampler thread."""
+        event = self._sample_published
+        if event is None:
+            return
+        try:
+            loop.call_soon_threadsafe(event.set)
+        except RuntimeError:
+            # Event loop already closed
+            pass
     
     async def _monitoring_loop(self):
-        """Main monitoring loop."""
+        """Main monitoring loop.
+        
+        Each sample is evaluated as soon as the sampler publishes it rather
+        than after a fixed sleep, so a snapshot is never acted on late.
+        """
         while self.is_monitoring:
             try:
-                # Take resource snapshot
-                snapshot = await self._take_resource_snapshot()
+                # Clear before reading so a publish in between is not missed
+                self._sample_published.clear()
+                sequence, snapshot = self.sampler.read()
+                if snapshot is None or sequence == self._last_sequence:
+                    await self._sample_published.wait()
+                    continue
+                self._last_sequence = sequence
                 
                 # Update history
                 self.history.append(snapshot)
-                if len(self.history) > self.max_history_size:
-                    self.history.pop(0)
                 
                 self.last_snapshot = snapshot
                 
@@ -143,9 +411,11 @@ class ResourceMonitor:
                 # Update statistics
                 self._update_statistics(snapshot)
                 
-                # Sleep until next check
-                await asyncio.sleep(self.monitor_interval)
+                # Samples taken more often than monitor_interval are skipped
+                await asyncio.sleep(max(0.0, self.monitor_interval - self.sampler.interval))
                 
+            except asyncio.CancelledError:
+                break
             except Exception as e:
                 logger.error(f"Error in monitoring loop: {e}")
                 await asyncio.sleep(10)  # Short sleep before retry
@@ -153,58 +423,13 @@ class ResourceMonitor:
     async def _take_resource_snapshot(self) -> ResourceSnapshot:
         """Take a snapshot of current resource usage.
         
+        CPU and network figures cover the time since the previous sample;
+        nothing here sleeps.
+        
         Returns:
             Resource snapshot
         """
-        # CPU usage
-        cpu_percent = psutil.cpu_percent(interval=1)
-        
-        # Memory usage
-        memory = psutil.virtual_memory()
-        memory_percent = memory.percent
-        memory_used_gb = memory.used / (1024**3)
-        memory_available_gb = memory.available / (1024**3)
-        
-        # Disk usage (for current directory)
-        disk = psutil.disk_usage('/')
-        disk_percent = (disk.used / disk.total) * 100
-        disk_free_gb = disk.free / (1024**3)
-        
-        # Network usage (approximate)
-        network_stats = psutil.net_io_counters()
-        network_sent_mbps = 0.0  # Would need to calculate delta
-        network_recv_mbps = 0.0
-        
-        # Process information
-        try:
-            open_files = len(psutil.Process().open_files())
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            open_files = 0
-        
-        process_count = len(psutil.pids())
-        
-        # Load average (Unix only)
-        load_average = []
-        try:
-            load_average = list(psutil.getloadavg())
-        except (AttributeError, OSError):
-            # Not available on Windows
-            pass
-        
-        return ResourceSnapshot(
-            timestamp=datetime.now(),
-            cpu_percent=cpu_percent,
-            memory_percent=memory_percent,
-            memory_used_gb=memory_used_gb,
-            memory_available_gb=memory_available_gb,
-            disk_percent=disk_percent,
-            disk_free_gb=disk_free_gb,
-            network_sent_mbps=network_sent_mbps,
-            network_recv_mbps=network_recv_mbps,
-            open_files=open_files,
-            process_count=process_count,
-            load_average=load_average
-        )
+        return self.sampler.sample()
     
     def _evaluate_resource_status(self, snapshot: ResourceSnapshot) -> ResourceStatus:
         """Evaluate overall resource status from snapshot.
@@ -289,12 +514,41 @@ class ResourceMonitor:
         self.stats['max_memory_seen'] = max(self.stats['max_memory_seen'], snapshot.memory_percent)
         
         # Calculate hourly averages
-        one_hour_ago = datetime.now() - timedelta(hours=1)
-        recent_snapshots = [s for s in self.history if s.timestamp >= one_hour_ago]
+        cpu = self.get_window_stats('cpu_percent', 3600)
+        memory = self.get_window_stats('memory_percent', 3600)
+        
+        if cpu and memory:
+            self.stats['avg_cpu_last_hour'] = cpu['avg']
+            self.stats['avg_memory_last_hour'] = memory['avg']
+    
+    def get_window_stats(self, metric: str, seconds: float) -> Optional[Dict[str, Any]]:
+        """Summarize a ResourceSnapshot metric over the trailing window.
+        
+        Args:
+            metric: Snapshot attribute such as 'cpu_percent'
+            seconds: Window length
+            
+        Returns:
+            Dictionary with samples, min, max, avg, current and trend (plus
+            percentiles and slope when NumPy is available), or None if the
+            window holds no samples
+        """
+        if isinstance(self.history, ResourceHistory):
+            return self.history.window_stats(metric, seconds)
+        
+        cutoff_time = datetime.now() - timedelta(seconds=seconds)
+        values = [getattr(s, metric) for s in self.history if s.timestamp >= cutoff_time]
+        if not values:
+            return None
         
-        if recent_snapshots:
-            self.stats['avg_cpu_last_hour'] = sum(s.cpu_percent for s in recent_snapshots) / len(recent_snapshots)
-            self.stats['avg_memory_last_hour'] = sum(s.memory_percent for s in recent_snapshots) / len(recent_snapshots)
+        return {
+            'samples': len(values),
+            'min': min(values),
+            'max': max(values),
+            'avg': sum(values) / len(values),
+            'current': values[-1],
+            'trend': 'rising' if values[-1] > values[0] else 'falling'
+        }
     
     def is_safe_to_execute(self) -> Tuple[bool, str]:
         """Check if it's safe to execute tasks.
@@ -348,6 +602,51 @@ class ResourceMonitor:
             'disk_gb_free': snapshot.disk_free_gb
         }
     
+    def can_admit_task(self, estimate: TaskResourceEstimate,
+                       running: List[TaskResourceEstimate]) -> Tuple[bool, str]:
+        """Check if a task fits next to the tasks already running.
+        
+        Load not explained by the running tasks' predictions is treated as
+        background load; the task is admitted if background load, the
+        running tasks and the new task together stay below the critical
+        CPU and memory limits. A task is always admitted when nothing else
+        is running so the queue cannot stall.
+        
+        Args:
+            estimate: Predicted usage of the task
+            running: Predicted usage of the tasks already running
+            
+        Returns:
+            Tuple of (can_admit, reason)
+        """
+        if not self.admission_control:
+            return True, "Admission control disabled"
+        if not running:
+            return True, "No other tasks running"
+        if not self.last_snapshot:
+            return True, "No resource data available"
+        
+        # CPU in cores, averaged over the last minute to ride out spikes
+        recent_cpu = self.get_window_stats('cpu_percent', 60)
+        cpu_percent = recent_cpu['avg'] if recent_cpu else self.last_snapshot.cpu_percent
+        reserved_cores = sum(e.cpu_cores for e in running)
+        background_cores = max(0.0, self.cpu_count * cpu_percent / 100 - reserved_cores)
+        cpu_capacity = self.cpu_count * self.limits.cpu_critical_percent / 100
+        needed_cores = background_cores + reserved_cores + estimate.cpu_cores
+        if needed_cores > cpu_capacity:
+            return False, f"Predicted CPU load {needed_cores:.1f} cores exceeds {cpu_capacity:.1f}"
+        
+        # Memory in GB, from the same measure as memory_percent
+        reserved_gb = sum(e.peak_rss_mb for e in running) / 1024
+        used_gb = self.memory_total_gb * self.last_snapshot.memory_percent / 100
+        background_gb = max(0.0, used_gb - reserved_gb)
+        memory_capacity = self.memory_total_gb * self.limits.memory_critical_percent / 100
+        needed_gb = background_gb + reserved_gb + estimate.peak_rss_mb / 1024
+        if needed_gb > memory_capacity:
+            return False, f"Predicted memory use {needed_gb:.1f}GB exceeds {memory_capacity:.1f}GB"
+        
+        return True, "Task fits predicted resource headroom"
+    
     def estimate_task_resource_impact(self, task_type: str = "default") -> Dict[str, float]:
         """Estimate resource impact of running a task.
         
@@ -462,6 +761,7 @@ class ResourceMonitor:
                 'reason': self.is_safe_to_execute()[1]
             },
             'statistics': self.stats.copy(),
+            'sampler': self.sampler.get_statistics(),
             'history_size': len(self.history)
         }
     
@@ -474,36 +774,20 @@ class ResourceMonitor:
         Returns:
             Trend analysis
         """
-        if not self.history:
-            return {}
+        cpu = self.get_window_stats('cpu_percent', hours * 3600)
+        memory = self.get_window_stats('memory_percent', hours * 3600)
         
-        cutoff_time = datetime.now() - timedelta(hours=hours)
-        recent_history = [s for s in self.history if s.timestamp >= cutoff_time]
+        if not cpu or not memory:
+            return {}
         
-        if len(recent_history) < 2:
+        if cpu['samples'] < 2:
             return {'error': 'Insufficient data for trend analysis'}
         
-        # Calculate trends
-        cpu_values = [s.cpu_percent for s in recent_history]
-        memory_values = [s.memory_percent for s in recent_history]
-        
         return {
             'period_hours': hours,
-            'data_points': len(recent_history),
-            'cpu': {
-                'min': min(cpu_values),
-                'max': max(cpu_values),
-                'avg': sum(cpu_values) / len(cpu_values),
-                'current': cpu_values[-1],
-                'trend': 'rising' if cpu_values[-1] > cpu_values[0] else 'falling'
-            },
-            'memory': {
-                'min': min(memory_values),
-                'max': max(memory_values),
-                'avg': sum(memory_values) / len(memory_values),
-                'current': memory_values[-1],
-                'trend': 'rising' if memory_values[-1] > memory_values[0] else 'falling'
-            }
+            'data_points': cpu['samples'],
+            'cpu': cpu,
+            'memory': memory
         }
     
     def cleanup_history(self, keep_hours: int = 24):
@@ -513,11 +797,16 @@ class ResourceMonitor:
             keep_hours: Hours of history to keep
         """
         cutoff_time = datetime.now() - timedelta(hours=keep_hours)
-        original_count = len(self.history)
         
-        self.history = [s for s in self.history if s.timestamp >= cutoff_time]
+        if isinstance(self.history, ResourceHistory):
+            cleaned_count = self.history.discard_before(cutoff_time.timestamp())
+        else:
+            original_count = len(self.history)
+            self.history = deque(
+                (s for s in self.history if s.timestamp >= cutoff_time), maxlen=self.max_history_size
+            )
+            cleaned_count = original_count - len(self.history)
         
-        cleaned_count = original_count - len(self.history)
         if cleaned_count > 0:
             logger.info(f"Cleaned up {cleaned_count} old resource history entries")
     
@@ -537,4 +826,5 @@ class ResourceMonitor:
             await self._update_status(old_status, new_status, snapshot)
         
         self.last_snapshot = snapshot
+        self._last_sequence = self.sampler.sequence
         return snapshot
\ No newline at end of file
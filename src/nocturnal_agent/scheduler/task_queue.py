@@ -4,10 +4,11 @@ import logging
 import asyncio
 import heapq
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Set, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 import json
+import os
 from pathlib import Path
 
 from nocturnal_agent.core.models import Task, TaskPriority, TaskStatus
@@ -36,8 +37,8 @@ class QueuedTask:
     max_retries: int = 3
     
     def __lt__(self, other):
-        """Priority queue comparison."""
-        return self.priority_score < other.priority_score
+        """Priority queue comparison (FIFO among equal priority scores)."""
+        return (self.priority_score, self.queued_at) < (other.priority_score, other.queued_at)
 
 
 class TaskQueue:
@@ -65,15 +66,29 @@ class TaskQueue:
         
         # Queue state
         self.status = QueueStatus.ACTIVE
-        self.pending_queue: List[QueuedTask] = []  # Priority queue
+        self.pending_queue: List[QueuedTask] = []  # Ready heap (all dependencies resolved)
+        self.blocked_tasks: Dict[str, QueuedTask] = {}  # Waiting on unresolved dependencies
         self.running_tasks: Dict[str, QueuedTask] = {}
         self.completed_tasks: List[QueuedTask] = []
         self.failed_tasks: List[QueuedTask] = []
         
+        # Dependency graph: reverse edges (dependency -> waiting task IDs) and
+        # in-degree counters, so readiness is resolved on completion instead of
+        # being rescanned on every dispatch
+        self.completed_task_ids: Set[str] = set()
+        self.dependents: Dict[str, Set[str]] = {}
+        self.unresolved_dependency_counts: Dict[str, int] = {}
+        
         # Queue persistence
         self.queue_dir = self.project_path / ".nocturnal" / "queue"
         self.queue_dir.mkdir(parents=True, exist_ok=True)
-        self.queue_file = self.queue_dir / "task_queue.json"
+        self.queue_file = self.queue_dir / "task_queue.json"  # Compacted snapshot
+        self.wal_file = self.queue_dir / "task_queue.wal"  # Append-only event log
+        self.snapshot_interval = config.get('snapshot_interval', 1000)
+        self.wal_fsync = config.get('wal_fsync', True)
+        self._wal_handle = None
+        self._wal_seq = 0  # Sequence number of the last logged event
+        self._wal_events = 0  # Events logged since the last snapshot
         
         # Statistics
         self.stats = {
@@ -109,7 +124,7 @@ class TaskQueue:
             logger.warning("Cannot add task - queue is stopped")
             return False
         
-        if len(self.pending_queue) >= self.max_queue_size:
+        if self._pending_count() >= self.max_queue_size:
             logger.warning("Cannot add task - queue is full")
             return False
         
@@ -125,14 +140,14 @@ class TaskQueue:
             dependencies=dependencies or []
         )
         
-        # Add to priority queue
-        heapq.heappush(self.pending_queue, queued_task)
+        # Add to ready heap, or park until its dependencies complete
+        self._enqueue(queued_task)
         self.stats['tasks_queued'] += 1
         
         logger.info(f"Added task to queue: {task.id} (priority: {priority_score:.2f})")
         
         # Persist queue
-        await self._save_queue()
+        self._append_event('enqueue', task=_queued_task_to_dict(queued_task))
         
         return True
     
@@ -164,9 +179,12 @@ class TaskQueue:
         # Ensure minimum score
         return max(base_score, 0.1)
     
-    async def get_next_task(self) -> Optional[QueuedTask]:
+    async def get_next_task(self, exclude: Optional[Set[str]] = None) -> Optional[QueuedTask]:
         """Get the next task to execute.
         
+        Args:
+            exclude: IDs of ready tasks to pass over (e.g. just deferred)
+            
         Returns:
             Next task or None if no tasks available
         """
@@ -176,34 +194,63 @@ class TaskQueue:
         if len(self.running_tasks) >= self.max_concurrent_tasks:
             return None
         
-        # Find next executable task (no unresolved dependencies)
-        available_tasks = []
-        
-        while self.pending_queue:
-            candidate = heapq.heappop(self.pending_queue)
-            
-            # Check dependencies
-            if self._has_unresolved_dependencies(candidate):
-                # Put back in queue with slightly lower priority
-                candidate.priority_score += 0.1
-                heapq.heappush(self.pending_queue, candidate)
-                continue
-            
-            # Task is ready to run
-            available_tasks.append(candidate)
-            break
+        if not self.pending_queue:
+            return None
         
-        if not available_tasks:
+        # Only ready tasks live in the heap, so the top is always executable
+        skipped = []
+        while self.pending_queue and exclude and self.pending_queue[0].task.id in exclude:
+            skipped.append(heapq.heappop(self.pending_queue))
+        next_task = heapq.heappop(self.pending_queue) if self.pending_queue else None
+        for queued_task in skipped:
+            heapq.heappush(self.pending_queue, queued_task)
+        if next_task is None:
             return None
         
-        # Start the task
-        next_task = available_tasks[0]
         self.running_tasks[next_task.task.id] = next_task
         next_task.task.start_execution()
         
+        self._append_event(
+            'start',
+            task_id=next_task.task.id,
+            started_at=next_task.task.started_at.isoformat()
+        )
+        
         logger.info(f"Starting task: {next_task.task.id}")
         return next_task
     
+    def _enqueue(self, queued_task: QueuedTask):
+        """Place a pending task in the ready heap or the blocked set.
+        
+        Args:
+            queued_task: Task to enqueue
+        """
+        task_id = queued_task.task.id
+        unresolved = self._unresolved_dependencies(queued_task)
+        
+        if not unresolved:
+            heapq.heappush(self.pending_queue, queued_task)
+            return
+        
+        for dep_id in unresolved:
+            self.dependents.setdefault(dep_id, set()).add(task_id)
+        self.unresolved_dependency_counts[task_id] = len(unresolved)
+        self.blocked_tasks[task_id] = queued_task
+    
+    def _unresolved_dependencies(self, queued_task: QueuedTask) -> Set[str]:
+        """Get the dependencies of a task that have not completed yet.
+        
+        Args:
+            queued_task: Task to check
+            
+        Returns:
+            Set of unresolved dependency task IDs
+        """
+        return {
+            dep_id for dep_id in queued_task.dependencies
+            if dep_id not in self.completed_task_ids and dep_id != queued_task.task.id
+        }
+    
     def _has_unresolved_dependencies(self, queued_task: QueuedTask) -> bool:
         """Check if a task has unresolved dependencies.
         
@@ -213,19 +260,31 @@ class TaskQueue:
         Returns:
             True if task has unresolved dependencies
         """
-        if not queued_task.dependencies:
-            return False
-        
-        # Check if all dependencies are completed
-        completed_task_ids = {t.task.id for t in self.completed_tasks}
+        return self.unresolved_dependency_counts.get(queued_task.task.id, 0) > 0
+    
+    def _resolve_dependents(self, task_id: str):
+        """Release tasks whose last unresolved dependency just completed.
         
-        for dep_id in queued_task.dependencies:
-            if dep_id not in completed_task_ids:
-                # Check if dependency is currently running
-                if dep_id not in self.running_tasks:
-                    return True  # Dependency not found
+        Args:
+            task_id: ID of the successfully completed task
+        """
+        self.completed_task_ids.add(task_id)
         
-        return False
+        for dependent_id in self.dependents.pop(task_id, set()):
+            remaining = self.unresolved_dependency_counts.get(dependent_id, 0) - 1
+            if remaining > 0:
+                self.unresolved_dependency_counts[dependent_id] = remaining
+                continue
+            
+            self.unresolved_dependency_counts.pop(dependent_id, None)
+            dependent = self.blocked_tasks.pop(dependent_id, None)
+            if dependent:
+                heapq.heappush(self.pending_queue, dependent)
+                logger.debug(f"Dependencies resolved, task ready: {dependent_id}")
+    
+    def _pending_count(self) -> int:
+        """Get the number of pending (ready and blocked) tasks."""
+        return len(self.pending_queue) + len(self.blocked_tasks)
     
     async def complete_task(self, task_id: str, success: bool = True) -> bool:
         """Mark a task as completed.
@@ -241,11 +300,66 @@ class TaskQueue:
             logger.warning(f"Task {task_id} not found in running tasks")
             return False
         
+        queued_task = self._finish_task(task_id, success)
+        
+        # Persist queue
+        self._append_event(
+            'complete',
+            task_id=task_id,
+            success=success,
+            completed_at=queued_task.task.completed_at.isoformat()
+        )
+        
+        return True
+    
+    async def defer_task(self, task_id: str) -> bool:
+        """Return a started task to the ready heap without counting a retry.
+        
+        Args:
+            task_id: ID of a running task that has not actually run
+            
+        Returns:
+            True if the task was deferred
+        """
+        if task_id not in self.running_tasks:
+            logger.warning(f"Task {task_id} not found in running tasks")
+            return False
+        
+        self._defer_task(task_id)
+        self._append_event('defer', task_id=task_id)
+        return True
+    
+    def _defer_task(self, task_id: str):
+        """Move a running task back to the ready heap."""
+        queued_task = self.running_tasks.pop(task_id)
+        queued_task.task.status = TaskStatus.PENDING
+        queued_task.task.started_at = None
+        heapq.heappush(self.pending_queue, queued_task)
+    
+    def _finish_task(
+        self,
+        task_id: str,
+        success: bool,
+        completed_at: Optional[datetime] = None
+    ) -> QueuedTask:
+        """Move a running task to completed, failed or back to pending for retry.
+        
+        Args:
+            task_id: ID of the running task
+            success: Whether task completed successfully
+            completed_at: Completion time (defaults to now)
+            
+        Returns:
+            The finished task
+        """
         queued_task = self.running_tasks.pop(task_id)
         queued_task.task.complete_execution(success)
+        if completed_at:
+            queued_task.task.completed_at = completed_at
         
         if success:
             self.completed_tasks.append(queued_task)
+            self._resolve_dependents(task_id)
             self.stats['tasks_completed'] += 1
             logger.info(f"Task completed successfully: {task_id}")
         else:
@@ -265,10 +379,7 @@ class TaskQueue:
             completion_time = (queued_task.task.completed_at - queued_task.task.started_at).total_seconds()
             self._update_average_completion_time(completion_time)
         
-        # Persist queue
-        await self._save_queue()
-        
-        return True
+        return queued_task
     
     def _update_average_completion_time(self, new_time: float):
         """Update average completion time with new data point.
@@ -295,7 +406,9 @@ class TaskQueue:
         """
         return {
             'status': self.status.value,
-            'pending_tasks': len(self.pending_queue),
+            'pending_tasks': self._pending_count(),
+            'ready_tasks': len(self.pending_queue),
+            'blocked_tasks': len(self.blocked_tasks),
             'running_tasks': len(self.running_tasks),
             'completed_tasks': len(self.completed_tasks),
             'failed_tasks': len(self.failed_tasks),
@@ -326,19 +439,19 @@ class TaskQueue:
         """Pause the queue (no new tasks will be started)."""
         logger.info("Pausing task queue")
         self.status = QueueStatus.PAUSED
-        await self._save_queue()
+        self._append_event('status', status=self.status.value)
     
     async def resume_queue(self):
         """Resume the queue."""
         logger.info("Resuming task queue")
         self.status = QueueStatus.ACTIVE
-        await self._save_queue()
+        self._append_event('status', status=self.status.value)
     
     async def drain_queue(self):
         """Drain the queue (finish running tasks, don't start new ones)."""
         logger.info("Draining task queue")
         self.status = QueueStatus.DRAINING
-        await self._save_queue()
+        self._append_event('status', status=self.status.value)
     
     async def stop_queue(self):
         """Stop the queue completely."""
@@ -346,12 +459,18 @@ class TaskQueue:
         self.status = QueueStatus.STOPPED
         
         # Move running tasks back to pending
-        for task_id, queued_task in self.running_tasks.items():
+        self._requeue_running_tasks()
+        
+        self._append_event('status', status=self.status.value)
+        self._save_queue()
+    
+    def _requeue_running_tasks(self):
+        """Move all running tasks back to the ready heap."""
+        for queued_task in self.running_tasks.values():
             queued_task.task.status = TaskStatus.PENDING
             heapq.heappush(self.pending_queue, queued_task)
         
         self.running_tasks.clear()
-        await self._save_queue()
     
     def remove_task(self, task_id: str) -> bool:
         """Remove a task from the queue.
@@ -367,19 +486,43 @@ class TaskQueue:
             logger.warning(f"Cannot remove running task: {task_id}")
             return False
         
-        # Remove from pending queue
-        original_queue = self.pending_queue[:]
-        self.pending_queue = []
+        if not self._remove_pending(task_id):
+            return False
+        
+        logger.info(f"Removed task from queue: {task_id}")
+        self._append_event('remove', task_id=task_id)
+        return True
+    
+    def _remove_pending(self, task_id: str) -> Optional[QueuedTask]:
+        """Remove a pending task from the blocked set or the ready heap.
         
-        removed = False
-        for queued_task in original_queue:
+        Args:
+            task_id: ID of task to remove
+            
+        Returns:
+            The removed task or None if it was not pending
+        """
+        # Remove from blocked set, dropping its reverse edges
+        if task_id in self.blocked_tasks:
+            queued_task = self.blocked_tasks.pop(task_id)
+            self.unresolved_dependency_counts.pop(task_id, None)
+            for dep_id in self._unresolved_dependencies(queued_task):
+                waiting = self.dependents.get(dep_id)
+                if waiting is not None:
+                    waiting.discard(task_id)
+                    if not waiting:
+                        del self.dependents[dep_id]
+            return queued_task
+        
+        # Remove from ready heap
+        for index, queued_task in enumerate(self.pending_queue):
             if queued_task.task.id == task_id:
-                removed = True
-                logger.info(f"Removed task from queue: {task_id}")
-            else:
-                heapq.heappush(self.pending_queue, queued_task)
+                self.pending_queue[index] = self.pending_queue[-1]
+                self.pending_queue.pop()
+                heapq.heapify(self.pending_queue)
+                return queued_task
         
-        return removed
+        return None
     
     def get_task_position(self, task_id: str) -> Optional[int]:
         """Get position of task in queue.
@@ -390,7 +533,8 @@ class TaskQueue:
         Returns:
             Position in queue (0-based) or None if not found
         """
-        sorted_queue = sorted(self.pending_queue)
+        # Ready tasks run first; blocked tasks follow in priority order
+        sorted_queue = sorted(self.pending_queue) + sorted(self.blocked_tasks.values())
         
         for i, queued_task in enumerate(sorted_queue):
             if queued_task.task.id == task_id:
@@ -422,23 +566,64 @@ class TaskQueue:
         logger.info("Optimizing task queue")
         
         # Re-calculate priorities for all pending tasks
-        tasks_to_requeue = []
-        
-        while self.pending_queue:
-            queued_task = heapq.heappop(self.pending_queue)
-            # Re-calculate priority
+        tasks_to_requeue = self.pending_queue + list(self.blocked_tasks.values())
+        for queued_task in tasks_to_requeue:
             queued_task.priority_score = self._calculate_priority_score(queued_task.task)
-            tasks_to_requeue.append(queued_task)
         
-        # Re-add all tasks
-        for queued_task in tasks_to_requeue:
-            heapq.heappush(self.pending_queue, queued_task)
+        heapq.heapify(self.pending_queue)
         
-        await self._save_queue()
+        self._append_event(
+            'reprioritize',
+            scores={qt.task.id: qt.priority_score for qt in tasks_to_requeue}
+        )
         logger.info(f"Queue optimized - {len(tasks_to_requeue)} tasks reordered")
     
-    async def _save_queue(self):
-        """Save queue state to disk."""
+    def _append_event(self, event: str, **payload):
+        """Append a queue event to the write-ahead log.
+        
+        Each change costs one appended line instead of a full rewrite; the
+        log is folded into a snapshot once it outgrows the live queue state.
+        
+        Args:
+            event: Event type (enqueue, start, complete, remove, reprioritize, status)
+            **payload: Event data
+        """
+        try:
+            self._wal_seq += 1
+            record = {
+                'seq': self._wal_seq,
+                'event': event,
+                'timestamp': datetime.now().isoformat(),
+                **payload
+            }
+            
+            if self._wal_handle is None:
+                self._wal_handle = open(self.wal_file, 'a', encoding='utf-8')
+            
+            self._wal_handle.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+            self._wal_handle.flush()
+            if self.wal_fsync:
+                os.fsync(self._wal_handle.fileno())
+            
+            self._wal_events += 1
+            
+            # Compact once replaying the log would cost more than reading a
+            # snapshot, keeping the amortized cost per event constant
+            if self._wal_events >= max(self.snapshot_interval, self._snapshot_size()):
+                self._save_queue()
+                
+        except Exception as e:
+            logger.error(f"Failed to append queue event: {e}")
+    
+    def _snapshot_size(self) -> int:
+        """Get the number of task records a snapshot would contain."""
+        return (
+            self._pending_count() + len(self.running_tasks) +
+            len(self.completed_tasks) + len(self.failed_tasks)
+        )
+    
+    def _save_queue(self):
+        """Write a compacted snapshot of the queue and truncate the log."""
         try:
             # Convert datetime to ISO string for JSON serialization
             stats_serializable = self.stats.copy()
@@ -448,62 +633,191 @@ class TaskQueue:
             queue_data = {
                 'status': self.status.value,
                 'stats': stats_serializable,
+                'wal_seq': self._wal_seq,
+                'completed_task_ids': sorted(self.completed_task_ids),
                 'pending_tasks': [
-                    {
-                        'task_id': qt.task.id,
-                        'priority_score': qt.priority_score,
-                        'queued_at': qt.queued_at.isoformat(),
-                        'estimated_duration': qt.estimated_duration.total_seconds(),
-                        'dependencies': qt.dependencies,
-                        'retry_count': qt.retry_count
-                    }
-                    for qt in self.pending_queue
+                    _queued_task_to_dict(qt)
+                    for qt in self.pending_queue + list(self.blocked_tasks.values())
                 ],
-                'running_tasks': [
-                    {
-                        'task_id': qt.task.id,
-                        'priority_score': qt.priority_score,
-                        'started_at': qt.task.started_at.isoformat() if qt.task.started_at else None
-                    }
-                    for qt in self.running_tasks.values()
-                ]
+                'running_tasks': [_queued_task_to_dict(qt) for qt in self.running_tasks.values()],
+                'completed_tasks': [_queued_task_to_dict(qt) for qt in self.completed_tasks],
+                'failed_tasks': [_queued_task_to_dict(qt) for qt in self.failed_tasks]
             }
             
-            with open(self.queue_file, 'w', encoding='utf-8') as f:
-                json.dump(queue_data, f, indent=2, ensure_ascii=False)
-                
+            # Atomic replace so a crash never leaves a torn snapshot
+            temp_file = self.queue_file.with_suffix('.json.tmp')
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(queue_data, ensure_ascii=False, separators=(',', ':')))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, self.queue_file)
+            
+            # Events up to wal_seq are now in the snapshot
+            if self._wal_handle is not None:
+                self._wal_handle.close()
+                self._wal_handle = None
+            with open(self.wal_file, 'w', encoding='utf-8'):
+                pass
+            self._wal_events = 0
+            
         except Exception as e:
             logger.error(f"Failed to save queue: {e}")
     
     def _load_queue(self):
-        """Load queue state from disk."""
+        """Recover queue state from the snapshot plus the write-ahead log."""
         try:
-            if not self.queue_file.exists():
-                return
+            snapshot_seq = 0
             
-            with open(self.queue_file, 'r', encoding='utf-8') as f:
-                queue_data = json.load(f)
+            if self.queue_file.exists():
+                with open(self.queue_file, 'r', encoding='utf-8') as f:
+                    queue_data = json.load(f)
+                snapshot_seq = self._restore_snapshot(queue_data)
             
-            # Restore status
-            self.status = QueueStatus(queue_data.get('status', 'active'))
+            replayed = self._replay_wal(snapshot_seq)
             
-            # Restore statistics
-            if 'stats' in queue_data:
-                self.stats.update(queue_data['stats'])
-                # Convert ISO string back to datetime
-                if isinstance(self.stats['queue_start_time'], str):
-                    self.stats['queue_start_time'] = datetime.fromisoformat(self.stats['queue_start_time'])
+            # Nothing survives a restart in the running state
+            self._requeue_running_tasks()
             
-            # Note: Tasks themselves would need to be reconstructed from a task store
-            # This is a simplified version that only preserves metadata
-            
-            logger.info(f"Loaded queue state: {len(queue_data.get('pending_tasks', []))} pending tasks")
+            if replayed or self.queue_file.exists():
+                logger.info(
+                    f"Loaded queue state: {self._pending_count()} pending tasks "
+                    f"({replayed} events replayed)"
+                )
+                self._save_queue()
             
         except Exception as e:
             logger.error(f"Failed to load queue: {e}")
     
+    def _restore_snapshot(self, queue_data: Dict[str, Any]) -> int:
+        """Rebuild queue state from a snapshot.
+        
+        Args:
+            queue_data: Parsed snapshot data
+            
+        Returns:
+            Sequence number of the last event included in the snapshot
+        """
+        # Restore status
+        self.status = QueueStatus(queue_data.get('status', 'active'))
+        
+        # Restore statistics
+        if 'stats' in queue_data:
+            self.stats.update(queue_data['stats'])
+            # Convert ISO string back to datetime
+            if isinstance(self.stats['queue_start_time'], str):
+                self.stats['queue_start_time'] = datetime.fromisoformat(self.stats['queue_start_time'])
+        
+        self.completed_task_ids = set(queue_data.get('completed_task_ids', []))
+        self.completed_tasks = [
+            _queued_task_from_dict(data) for data in queue_data.get('completed_tasks', [])
+        ]
+        self.failed_tasks = [
+            _queued_task_from_dict(data) for data in queue_data.get('failed_tasks', [])
+        ]
+        
+        skipped = 0
+        for data in queue_data.get('pending_tasks', []) + queue_data.get('running_tasks', []):
+            # Snapshots written before the event log only kept task metadata
+            if 'task' not in data:
+                skipped += 1
+                continue
+            queued_task = _queued_task_from_dict(data)
+            queued_task.task.status = TaskStatus.PENDING
+            self._enqueue(queued_task)
+        
+        if skipped:
+            logger.warning(f"Skipped {skipped} queued tasks without task data (legacy queue file)")
+        
+        self._wal_seq = queue_data.get('wal_seq', 0)
+        return self._wal_seq
+    
+    def _replay_wal(self, after_seq: int) -> int:
+        """Replay logged events newer than the snapshot.
+        
+        Args:
+            after_seq: Sequence number already covered by the snapshot
+            
+        Returns:
+            Number of events replayed
+        """
+        if not self.wal_file.exists():
+            return 0
+        
+        replayed = 0
+        with open(self.wal_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn trailing write from a crash; everything before it is intact
+                    logger.warning("Ignoring truncated queue log entry")
+                    break
+                
+                if record['seq'] <= after_seq:
+                    continue
+                
+                try:
+                    self._apply_event(record)
+                except Exception as e:
+                    logger.warning(f"Failed to replay queue event {record['seq']} ({record['event']}): {e}")
+                
+                self._wal_seq = record['seq']
+                replayed += 1
+        
+        return replayed
+    
+    def _apply_event(self, record: Dict[str, Any]):
+        """Apply a single logged event to the in-memory queue state.
+        
+        Args:
+            record: Logged event
+        """
+        event = record['event']
+        
+        if event == 'enqueue':
+            self._enqueue(_queued_task_from_dict(record['task']))
+            self.stats['tasks_queued'] += 1
+        
+        elif event == 'start':
+            # The logged start was the heap top at the time, so avoid a scan
+            if self.pending_queue and self.pending_queue[0].task.id == record['task_id']:
+                queued_task = heapq.heappop(self.pending_queue)
+            else:
+                queued_task = self._remove_pending(record['task_id'])
+            if queued_task:
+                queued_task.task.start_execution()
+                queued_task.task.started_at = datetime.fromisoformat(record['started_at'])
+                self.running_tasks[queued_task.task.id] = queued_task
+        
+        elif event == 'complete':
+            if record['task_id'] in self.running_tasks:
+                self._finish_task(
+                    record['task_id'],
+                    record['success'],
+                    datetime.fromisoformat(record['completed_at'])
+                )
+        
+        elif event == 'defer':
+            if record['task_id'] in self.running_tasks:
+                self._defer_task(record['task_id'])
+        
+        elif event == 'remove':
+            self._remove_pending(record['task_id'])
+        
+        elif event == 'reprioritize':
+            scores = record['scores']
+            for queued_task in self.pending_queue + list(self.blocked_tasks.values()):
+                if queued_task.task.id in scores:
+                    queued_task.priority_score = scores[queued_task.task.id]
+            heapq.heapify(self.pending_queue)
+        
+        elif event == 'status':
+            self.status = QueueStatus(record['status'])
+            if self.status == QueueStatus.STOPPED:
+                self._requeue_running_tasks()
+    
     def cleanup_completed_tasks(self, keep_count: int = 100):
-        """Clean up old completed tasks.
+        """Clean up old completed tasks and completed IDs no task depends on.
         
         Args:
             keep_count: Number of completed tasks to keep
@@ -516,6 +830,20 @@ class TaskQueue:
         if len(self.failed_tasks) > keep_count:
             self.failed_tasks = self.failed_tasks[-keep_count:]
             logger.info(f"Cleaned up failed tasks, kept {keep_count}")
+        
+        # Forget completed IDs nothing refers to any more, so snapshots stay bounded.
+        # A task added later that depends on a forgotten ID waits for it like an unknown task.
+        referenced = {
+            dep_id
+            for qt in self.pending_queue + list(self.blocked_tasks.values()) + list(self.running_tasks.values())
+            for dep_id in qt.dependencies
+        }
+        referenced.update(qt.task.id for qt in self.completed_tasks)
+        pruned = len(self.completed_task_ids)
+        self.completed_task_ids &= referenced
+        pruned -= len(self.completed_task_ids)
+        if pruned:
+            logger.info(f"Pruned {pruned} completed task IDs")
     
     def get_performance_metrics(self) -> Dict[str, Any]:
         """Get queue performance metrics.
@@ -540,8 +868,69 @@ class TaskQueue:
             'capacity': {
                 'max_concurrent': self.max_concurrent_tasks,
                 'current_utilization': len(self.running_tasks) / self.max_concurrent_tasks,
-                'queue_size': len(self.pending_queue),
+                'queue_size': self._pending_count(),
+                'ready_tasks': len(self.pending_queue),
+                'blocked_tasks': len(self.blocked_tasks),
                 'queue_capacity': self.max_queue_size,
-                'queue_utilization': len(self.pending_queue) / self.max_queue_size
+                'queue_utilization': self._pending_count() / self.max_queue_size
             }
-        }
\ No newline at end of file
+        }
+
+
+def _task_to_dict(task: Task) -> Dict[str, Any]:
+    """Serialize the persistent fields of a task."""
+    return {
+        'id': task.id,
+        'description': task.description,
+        'priority': task.priority.value if hasattr(task.priority, 'value') else task.priority,
+        'estimated_quality': task.estimated_quality,
+        'requirements': task.requirements,
+        'constraints': task.constraints,
+        'status': task.status.value if hasattr(task.status, 'value') else task.status,
+        'created_at': task.created_at.isoformat() if task.created_at else None,
+        'started_at': task.started_at.isoformat() if task.started_at else None,
+        'completed_at': task.completed_at.isoformat() if task.completed_at else None,
+        'working_directory': task.working_directory,
+        'target_files': task.target_files,
+        'branch_name': task.branch_name,
+        'minimum_quality_threshold': task.minimum_quality_threshold,
+        'consistency_threshold': task.consistency_threshold
+    }
+
+
+def _task_from_dict(data: Dict[str, Any]) -> Task:
+    """Rebuild a task serialized by _task_to_dict."""
+    data = data.copy()
+    data['priority'] = TaskPriority(data['priority'])
+    data['status'] = TaskStatus(data['status'])
+    for key in ('created_at', 'started_at', 'completed_at'):
+        if data.get(key):
+            data[key] = datetime.fromisoformat(data[key])
+    return Task(**data)
+
+
+def _queued_task_to_dict(queued_task: QueuedTask) -> Dict[str, Any]:
+    """Serialize a queued task including its task data."""
+    return {
+        'task_id': queued_task.task.id,
+        'task': _task_to_dict(queued_task.task),
+        'priority_score': queued_task.priority_score,
+        'queued_at': queued_task.queued_at.isoformat(),
+        'estimated_duration': queued_task.estimated_duration.total_seconds(),
+        'dependencies': queued_task.dependencies,
+        'retry_count': queued_task.retry_count,
+        'max_retries': queued_task.max_retries
+    }
+
+
+def _queued_task_from_dict(data: Dict[str, Any]) -> QueuedTask:
+    """Rebuild a queued task serialized by _queued_task_to_dict."""
+    return QueuedTask(
+        task=_task_from_dict(data['task']),
+        priority_score=data['priority_score'],
+        queued_at=datetime.fromisoformat(data['queued_at']),
+        estimated_duration=timedelta(seconds=data['estimated_duration']),
+        dependencies=data.get('dependencies', []),
+        retry_count=data.get('retry_count', 0),
+        max_retries=data.get('max_retries', 3)
+    )
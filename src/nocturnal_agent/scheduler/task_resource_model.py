@@ -0,0 +1,188 @@
+"""Learned resource usage of night tasks."""
+
+import json
+import logging
+import math
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from nocturnal_agent.core.models import Task
+
+
+logger = logging.getLogger(__name__)
+
+MODEL_VERSION = 1
+
+# Metrics learned per task kind
+METRICS = ('wall_seconds', 'cpu_seconds', 'peak_rss_mb')
+
+# Keyword classes checked in order; the first match is the task type
+TASK_TYPE_KEYWORDS = (
+    ('bug_fixing', ('fix', 'bug', 'error', 'crash')),
+    ('testing', ('test', 'coverage')),
+    ('refactoring', ('refactor', 'cleanup', 'clean up', 'rename')),
+    ('documentation', ('doc', 'readme', 'comment')),
+    ('class_creation', ('class',)),
+    ('function_creation', ('function', 'method')),
+)
+
+_WORD_PATTERN = re.compile(r'\w+')
+
+
+@dataclass
+class TaskResourceEstimate:
+    """Predicted resource usage of one task run."""
+    wall_seconds: float
+    cpu_seconds: float
+    peak_rss_mb: float
+    samples: int = 0
+    basis: str = "default"
+
+    @property
+    def cpu_cores(self) -> float:
+        """Average number of cores busy while the task runs."""
+        return self.cpu_seconds / max(self.wall_seconds, 1.0)
+
+
+class TaskResourceModel:
+    """Learns wall time, CPU seconds and peak RSS of tasks from past runs.
+
+    Runs are grouped from specific to general: task type plus description
+    size, task type, and all tasks. A prediction comes from the most
+    specific group with enough runs, as an exponentially weighted mean
+    plus a safety margin of standard deviations, so admission decisions
+    follow how tasks behave on this machine instead of fixed guesses.
+    """
+
+    def __init__(self, path: Optional[Path] = None, config: Optional[Dict[str, Any]] = None):
+        """Initialize the model.
+
+        Args:
+            path: JSON file the model is persisted to, or None to keep it in memory
+            config: Model configuration
+        """
+        config = config or {}
+        self.path = Path(path) if path is not None else None
+        self.min_samples = config.get('min_samples', 3)
+        self.safety_margin = config.get('safety_margin_sigma', 1.0)
+        # Weight of a new run once a group has more than 1 / min_weight runs
+        self.min_weight = config.get('min_weight', 0.2)
+        self.defaults = {
+            'wall_seconds': config.get('default_wall_seconds', 900.0),
+            'cpu_seconds': config.get('default_cpu_seconds', 450.0),
+            'peak_rss_mb': config.get('default_peak_rss_mb', 1024.0),
+        }
+
+        # group key -> metric -> [count, mean, variance]
+        self.groups: Dict[str, Dict[str, List[float]]] = {}
+        self._load()
+
+    def _load(self):
+        """Load the persisted model, starting empty if it is unusable."""
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == MODEL_VERSION:
+                self.groups = data['groups']
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Discarding unreadable task resource model {self.path}: {e}")
+
+    def save(self):
+        """Persist the model."""
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'version': MODEL_VERSION, 'groups': self.groups}, ensure_ascii=False))
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def classify(task: Task) -> str:
+        """Task type inferred from the description."""
+        description = task.description.lower()
+        for task_type, keywords in TASK_TYPE_KEYWORDS:
+            if any(keyword in description for keyword in keywords):
+                return task_type
+        return 'general_development'
+
+    @staticmethod
+    def _size_class(task: Task) -> str:
+        """Coarse size of a task from its description and targets."""
+        words = len(_WORD_PATTERN.findall(task.description)) + 10 * len(task.target_files)
+        words += 5 * len(task.requirements)
+        if words < 20:
+            return 'small'
+        if words < 80:
+            return 'medium'
+        return 'large'
+
+    def group_keys(self, task: Task) -> List[str]:
+        """Groups a task belongs to, most specific first."""
+        task_type = self.classify(task)
+        return [f"{task_type}:{self._size_class(task)}", task_type, '*']
+
+    def record(self, task: Task, wall_seconds: float, cpu_seconds: Optional[float] = None,
+               peak_rss_mb: Optional[float] = None):
+        """Learn from a finished run.
+
+        Args:
+            task: Task that ran
+            wall_seconds: Elapsed time of the run
+            cpu_seconds: CPU time of its processes, if measured
+            peak_rss_mb: Peak resident memory of its processes, if measured
+        """
+        observed = {'wall_seconds': wall_seconds, 'cpu_seconds': cpu_seconds, 'peak_rss_mb': peak_rss_mb}
+        for key in self.group_keys(task):
+            group = self.groups.setdefault(key, {})
+            for metric, value in observed.items():
+                if value is None:
+                    continue
+                count, mean, variance = group.get(metric, [0, 0.0, 0.0])
+                count += 1
+                weight = max(1.0 / count, self.min_weight)
+                diff = value - mean
+                mean += weight * diff
+                variance = (1 - weight) * (variance + weight * diff * diff)
+                group[metric] = [count, mean, variance]
+        self.save()
+
+    def predict(self, task: Task) -> TaskResourceEstimate:
+        """Predict the resource usage of a task.
+
+        Each metric comes from the most specific group with at least
+        min_samples runs of it, or from the configured default.
+        """
+        values = dict(self.defaults)
+        samples = 0
+        basis = 'default'
+        for metric in METRICS:
+            for key in self.group_keys(task):
+                stats = self.groups.get(key, {}).get(metric)
+                if stats and stats[0] >= self.min_samples:
+                    count, mean, variance = stats
+                    values[metric] = mean + self.safety_margin * math.sqrt(max(variance, 0.0))
+                    if metric == 'wall_seconds':
+                        samples, basis = int(count), key
+                    break
+
+        return TaskResourceEstimate(
+            wall_seconds=values['wall_seconds'],
+            cpu_seconds=values['cpu_seconds'],
+            peak_rss_mb=values['peak_rss_mb'],
+            samples=samples,
+            basis=basis
+        )
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get learned means per group."""
+        return {
+            key: {metric: {'runs': int(stats[0]), 'mean': stats[1], 'stddev': math.sqrt(max(stats[2], 0.0))}
+                  for metric, stats in group.items()}
+            for key, group in self.groups.items()
+        }
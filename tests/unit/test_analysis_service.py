@@ -0,0 +1,128 @@
+"""解析プロセスプールの単体テスト"""
+
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from nocturnal_agent.core.analysis_service import AnalysisRequest, AnalysisService
+from nocturnal_agent.engines.pattern_extractor import PatternExtractor
+from nocturnal_agent.engines.quality_evaluator import score_performance, score_security
+from nocturnal_agent.safety.danger_detector import DangerDetector
+
+
+pytestmark = pytest.mark.skipif(
+    'fork' not in multiprocessing.get_all_start_methods(),
+    reason="テスト用ジョブをワーカーへ渡すためforkが必要"
+)
+
+SAMPLE_CODE = '''
+import os
+import subprocess
+
+
+class ReportBuilder:
+    """Builds reports."""
+
+    def build_report(self, items):
+        result = []
+        for i in range(len(items)):
+            result.append(items[i])
+        os.system("rm -rf /tmp/report")
+        return result
+
+
+def load_config(path):
+    password = os.environ.get("PASSWORD")
+    return eval(open(path).read())
+'''
+
+
+def _slow_job(request):
+    time.sleep(request.options['seconds'])
+    return os.getpid()
+
+
+def _failing_job(request):
+    raise ValueError("broken input")
+
+
+@pytest.fixture
+def service():
+    """常にワーカーへ送る設定の解析サービス"""
+    service = AnalysisService({'max_workers': 2, 'min_offload_chars': 0, 'start_method': 'fork'})
+    yield service
+    service.shutdown()
+
+
+class TestAnalysisService:
+    """AnalysisServiceのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_job_runs_in_worker_process(self, service):
+        """ジョブがワーカープロセスで実行されることのテスト"""
+        response = await service.run(_slow_job, AnalysisRequest(code="x", options={'seconds': 0}))
+
+        assert response.ok
+        assert response.offloaded
+        assert response.result != os.getpid()
+        assert service.get_status()['statistics']['offloaded_jobs'] == 1
+
+    @pytest.mark.asyncio
+    async def test_small_input_runs_inline(self):
+        """閾値未満の入力がインライン実行されることのテスト"""
+        service = AnalysisService({'min_offload_chars': 100, 'start_method': 'fork'})
+        response = await service.run(_slow_job, AnalysisRequest(code="x", options={'seconds': 0}))
+
+        assert response.ok
+        assert not response.offloaded
+        assert response.result == os.getpid()
+        assert not service.get_status()['running']
+
+    @pytest.mark.asyncio
+    async def test_timeout_restarts_pool(self, service):
+        """タイムアウトしたジョブがプールの再起動で打ち切られることのテスト"""
+        started = time.monotonic()
+        response = await service.run(_slow_job, AnalysisRequest(code="x", options={'seconds': 30}), timeout=0.5)
+
+        assert not response.ok
+        assert "timed out" in response.error
+        assert time.monotonic() - started < 10
+        assert service.stats['pool_restarts'] == 1
+
+        # 再起動後も次のジョブを受け付ける
+        response = await service.run(_slow_job, AnalysisRequest(code="x", options={'seconds': 0}))
+        assert response.ok
+
+    @pytest.mark.asyncio
+    async def test_job_error_is_reported(self, service):
+        """ジョブ内の例外がレスポンスで返ることのテスト"""
+        response = await service.run(_failing_job, AnalysisRequest(code="x"))
+
+        assert not response.ok
+        assert "ValueError: broken input" in response.error
+        assert service.stats['failed_jobs'] == 1
+
+    @pytest.mark.asyncio
+    async def test_engine_results_match_inline(self, service):
+        """ワーカーでの解析結果がインライン実行と一致することのテスト"""
+        inline = AnalysisService({'enabled': False})
+
+        offloaded = await PatternExtractor(service)._analyze_python_file(SAMPLE_CODE, "report.py")
+        expected = await PatternExtractor(inline)._analyze_python_file(SAMPLE_CODE, "report.py")
+        assert offloaded == expected
+        assert expected['statistics']['function_count'] == 2
+
+        request = AnalysisRequest(code=SAMPLE_CODE, options={'file_extension': '.py'})
+        for job in (score_security, score_performance):
+            response = await service.run(job, request)
+            assert response.offloaded
+            assert response.result == job(request) < 1.0
+
+        detector = DangerDetector({}, analysis_service=service)
+        detection = await detector.analyze_code_async(SAMPLE_CODE)
+        expected_detection = DangerDetector({}).analyze_code(SAMPLE_CODE)
+        assert [p.name for p in detection.detected_patterns] == [p.name for p in expected_detection.detected_patterns]
+        assert detection.danger_level == expected_detection.danger_level
+        assert detection.is_dangerous
@@ -0,0 +1,138 @@
+"""生成コード検証システムの単体テスト"""
+
+import os
+import sys
+
+import pytest
+
+from nocturnal_agent.quality.auto_fixer import IntegratedQualityAssurance
+from nocturnal_agent.quality.code_validator import CodeValidator
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'fork'), reason="forkが必要")
+
+
+def _write_project(root):
+    (root / "localpkg").mkdir()
+    (root / "localpkg" / "__init__.py").write_text("STATE = 'loaded'\n")
+    (root / "localpkg" / "models.py").write_text("class Item:\n    pass\n")
+    (root / "service.py").write_text("import json\nimport localpkg\nfrom .models import Item\n")
+    (root / "broken.py").write_text("def f(:\n    pass\n")
+    (root / "missing.py").write_text("import definitely_not_installed_pkg\n")
+    (root / "main.py").write_text(
+        "import localpkg\n\nif __name__ == \"__main__\":\n    print('ok')\n"
+    )
+    (root / "crash.py").write_text(
+        "if __name__ == \"__main__\":\n    raise ValueError('boom')\n"
+    )
+
+
+def _by_name(report):
+    return {os.path.basename(result.file_path): result for result in report.validation_results}
+
+
+class TestCodeValidator:
+    """CodeValidatorのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_project_validation_in_workers(self, temp_dir):
+        """検証結果が正しく、エージェントのプロセスにモジュールが読み込まれないことのテスト"""
+        _write_project(temp_dir)
+        validator = CodeValidator({'max_workers': 2})
+        try:
+            report = await validator.validate_generated_project(str(temp_dir))
+        finally:
+            await validator.close()
+
+        results = _by_name(report)
+        assert report.total_files == 7
+        assert results['service.py'].import_errors == [
+            "インポートエラー: .models - 参照先が見つかりません"
+        ]
+        assert results['broken.py'].syntax_errors
+        assert results['missing.py'].import_errors[0].startswith("インポートエラー: definitely_not_installed_pkg")
+        assert results['main.py'].is_valid and results['main.py'].execution_test_passed
+        assert "ValueError: boom" in results['crash.py'].runtime_errors[0]
+
+        # 実行テストは子プロセスで動くので、エージェント側には影響しない
+        assert 'localpkg' not in sys.modules
+        assert 'definitely_not_installed_pkg' not in sys.modules
+        assert validator.workers.stats['workers_started'] <= 2
+
+    @pytest.mark.asyncio
+    async def test_unchanged_files_are_served_from_cache(self, temp_dir):
+        """変更のないファイルは再検証せず、実行テストはプロジェクトの変更で再実行されることのテスト"""
+        (temp_dir / "lib.py").write_text("VALUE = 1\n")
+        (temp_dir / "util.py").write_text("import os\n")
+        (temp_dir / "main.py").write_text(
+            "import lib\n\nif __name__ == \"__main__\":\n    assert lib.VALUE == 1\n"
+        )
+        validator = CodeValidator()
+        try:
+            first = await validator.validate_generated_project(str(temp_dir))
+            requests = validator.workers.stats['requests']
+            again = await validator.validate_generated_project(str(temp_dir))
+            assert validator.workers.stats['requests'] == requests
+            assert validator.stats['cache_hits'] == 3
+
+            (temp_dir / "lib.py").write_text("VALUE = 2\n")
+            changed = await validator.validate_generated_project(str(temp_dir))
+        finally:
+            await validator.close()
+
+        assert first.valid_files == again.valid_files == 3
+        # 変更したlib.pyと、実行テストのあるmain.pyだけが再検証される
+        assert validator.stats['files_validated'] == 3 + 2
+        assert "AssertionError" in _by_name(changed)['main.py'].runtime_errors[0]
+
+    @pytest.mark.asyncio
+    async def test_edit_keeps_other_files_cached(self, temp_dir):
+        """1ファイルの編集で他のファイルの検証結果が破棄されず、モジュールの追加ではインポートが再検証されることのテスト"""
+        for name in ("a", "b", "c"):
+            (temp_dir / f"{name}.py").write_text(f"import os\n\nNAME = '{name}'\n")
+        (temp_dir / "uses_new.py").write_text("import newmod\n")
+        validator = CodeValidator()
+        try:
+            await validator.validate_generated_project(str(temp_dir))
+            assert validator.stats == {'files_validated': 4, 'cache_hits': 0}
+
+            (temp_dir / "a.py").write_text("import os\n\nNAME = 'A'\n")
+            await validator.validate_generated_project(str(temp_dir))
+            assert validator.stats == {'files_validated': 5, 'cache_hits': 3}
+
+            (temp_dir / "newmod.py").write_text("VALUE = 1\n")
+            report = await validator.validate_generated_project(str(temp_dir))
+        finally:
+            await validator.close()
+
+        assert validator.stats == {'files_validated': 10, 'cache_hits': 3}
+        assert _by_name(report)['uses_new.py'].is_valid
+
+    @pytest.mark.asyncio
+    async def test_execution_timeout_kills_child(self, temp_dir):
+        """制限時間を超えた実行が打ち切られ、ワーカーは使い続けられることのテスト"""
+        (temp_dir / "hang.py").write_text(
+            "import time\n\nif __name__ == \"__main__\":\n    while True:\n        time.sleep(0.1)\n"
+        )
+        (temp_dir / "ok.py").write_text("if __name__ == \"__main__\":\n    pass\n")
+        validator = CodeValidator({'max_workers': 1, 'execution_timeout': 0.5})
+        try:
+            report = await validator.validate_generated_project(str(temp_dir))
+        finally:
+            await validator.close()
+
+        results = _by_name(report)
+        assert results['hang.py'].runtime_errors == ["実行タイムアウト (0.5秒)"]
+        assert results['ok.py'].is_valid
+        assert validator.workers.stats['workers_started'] == 1
+
+    @pytest.mark.asyncio
+    async def test_quality_assurance_reuses_results(self, temp_dir):
+        """統合品質保証の反復で変更のないファイルを再検証しないことのテスト"""
+        (temp_dir / "app.py").write_text("def main():\n    return 1\n")
+        qa_system = IntegratedQualityAssurance()
+
+        summary = await qa_system.ensure_code_quality(str(temp_dir))
+
+        assert summary['quality_target_met']
+        assert qa_system.validator.stats['files_validated'] == 1
+        assert qa_system.validator.stats['cache_hits'] == 1
@@ -13,6 +13,7 @@ from nocturnal_agent.cost.cost_optimizer import (
     CostOptimizer, PriorityLevel, CostEstimate
 )
 from nocturnal_agent.cost.cost_manager import CostManager
+from nocturnal_agent.llm.response_cache import LLMResponseCache
 
 
 class TestUsageTracker:
@@ -245,6 +246,28 @@ class TestCostManager:
         assert 'remaining_budget' in budget_overview
         assert 'utilization_percentage' in budget_overview
     
+    def test_llm_cache_savings_on_dashboard(self, cost_manager, temp_dir):
+        """LLM応答キャッシュのヒットが節約額としてダッシュボードに載ることのテスト"""
+        cache = LLMResponseCache({'storage_path': str(temp_dir / 'llm_cache')})
+        cost_manager.attach_response_cache(cache)
+        
+        assert cache.lookup('claude', {}, '仕様書を作成', service='claude_api') is None
+        cache.store('claude', {}, '仕様書を作成', '# 仕様書', service='claude_api', tokens=2000, latency=12.5)
+        cache.lookup('claude', {}, '仕様書を作成', service='claude_api')
+        cache.store('local', {}, '分析して', '{}', service='local_llm', tokens=500, latency=3.0)
+        cache.lookup('local', {}, '分析して')
+        
+        llm_cache = cost_manager.get_cost_dashboard()['llm_cache']
+        assert llm_cache['hits'] == 2
+        assert llm_cache['misses'] == 1
+        assert llm_cache['hit_rate'] == pytest.approx(2 / 3)
+        assert llm_cache['saved_seconds'] == pytest.approx(15.5)
+        # 有料APIは1kトークンあたりの単価で換算し、ローカルLLMは無料
+        expected = cost_manager.cost_optimizer._estimate_api_cost(ServiceType.CLAUDE_API, {'estimated_tokens': 2000})
+        assert expected > 0
+        assert llm_cache['saved_cost'] == pytest.approx(expected)
+        assert cost_manager.manager_stats['cost_savings_achieved'] == pytest.approx(expected)
+    
     def test_get_detailed_usage_report(self, cost_manager):
         """詳細使用量レポートのテスト"""
         # テストデータを追加
@@ -363,4 +386,103 @@ class TestDataPersistence:
         assert month_usage.total_cost == 0.08  # 0.0 + 0.05 + 0.03
         assert month_usage.total_tokens == 450  # 100 + 200 + 150
         assert month_usage.total_requests == 3
-        assert len(month_usage.service_breakdown) == 3
\ No newline at end of file
+        assert len(month_usage.service_breakdown) == 3
+
+
+class TestUsageLedger:
+    """追記専用台帳のテスト"""
+    
+    @pytest.fixture
+    def tracker_config(self, temp_dir):
+        """台帳付きUsageTrackerの設定を提供"""
+        return {
+            'storage_path': str(temp_dir / 'usage'),
+            'monthly_budget': 10.0,
+            'free_tools': ['local_llm'],
+            'index_checkpoint_interval': 1000
+        }
+    
+    def test_records_appended_not_rewritten(self, tracker_config):
+        """記録ごとに日次・月次ファイルを書き直さないことのテスト"""
+        tracker = UsageTracker(tracker_config)
+        for i in range(5):
+            tracker.record_usage(ServiceType.CLAUDE_API, 'chat_completion', 0.01, 100, task_id=f't{i}')
+        
+        segment = tracker.ledger.segment_name(datetime.now())
+        lines = (tracker.ledger.directory / segment).read_text(encoding='utf-8').splitlines()
+        
+        assert len(lines) == 5
+        assert not list(tracker.storage_path.glob('daily_*.json'))
+        assert not list(tracker.storage_path.glob('monthly_*.json'))
+    
+    def test_aggregates_recovered_from_ledger(self, tracker_config):
+        """インデックス未保存のレコードが台帳から復元されることのテスト"""
+        tracker = UsageTracker(tracker_config)
+        tracker.record_usage(ServiceType.LOCAL_LLM, 'generate', 0.0, 100)
+        tracker.flush()
+        tracker.record_usage(ServiceType.CLAUDE_API, 'chat_completion', 0.05, 200)
+        tracker.record_usage(ServiceType.CLAUDE_API, 'review', 0.03, 150)
+        
+        recovered = UsageTracker(tracker_config)
+        month_usage = recovered.get_current_month_usage()
+        
+        assert month_usage.total_requests == 3
+        assert month_usage.total_tokens == 450
+        assert month_usage.total_cost == pytest.approx(0.08)
+        assert month_usage.operation_breakdown['review'] == pytest.approx(0.03)
+        assert month_usage.free_tool_usage_rate == pytest.approx(1 / 3)
+        assert recovered.get_service_breakdown(days=1)['claude_api'] == pytest.approx(0.08)
+    
+    def test_truncated_row_is_ignored(self, tracker_config):
+        """途切れた台帳行を無視して切り詰めることのテスト"""
+        tracker = UsageTracker(tracker_config)
+        tracker.record_usage(ServiceType.CLAUDE_API, 'chat_completion', 0.05, 200)
+        tracker.ledger.close()
+        
+        segment = tracker.ledger.directory / tracker.ledger.segment_name(datetime.now())
+        with open(segment, 'a', encoding='utf-8') as f:
+            f.write('["2024-01-01T00:00:00", "claude_api"')
+        
+        recovered = UsageTracker(tracker_config)
+        
+        assert recovered.get_current_month_usage().total_requests == 1
+        assert segment.read_text(encoding='utf-8').count('\n') == 1
+    
+    def test_date_range_with_records(self, tracker_config):
+        """日付範囲の検索と個別レコードの読み込みテスト"""
+        tracker = UsageTracker(tracker_config)
+        tracker.record_usage(ServiceType.OPENAI_API, 'embedding', 0.01, 10, metadata={'model': 'small'})
+        tracker.record_usage(ServiceType.LOCAL_LLM, 'generate', 0.0, 20)
+        
+        today = date.today()
+        summary = tracker.get_usage_by_date_range(today - timedelta(days=7), today)
+        detailed = tracker.get_usage_by_date_range(today, today, include_records=True)
+        
+        assert summary[str(today)].total_requests == 2
+        assert summary[str(today)].records == []
+        records = detailed[str(today)].records
+        assert [r.operation_type for r in records] == ['embedding', 'generate']
+        assert records[0].metadata == {'model': 'small'}
+        assert tracker.get_usage_by_date_range(today - timedelta(days=7), today - timedelta(days=1)) == {}
+    
+    def test_legacy_daily_files_imported(self, tracker_config, temp_dir):
+        """旧形式の日次ファイルが台帳に取り込まれることのテスト"""
+        storage = temp_dir / 'usage'
+        storage.mkdir()
+        (storage / 'daily_2024-03-01.json').write_text(json.dumps({
+            'date': '2024-03-01',
+            'records': [{
+                'timestamp': '2024-03-01T10:00:00',
+                'service_type': 'claude_api',
+                'operation_type': 'chat_completion',
+                'cost': 0.2,
+                'tokens_used': 1000
+            }]
+        }), encoding='utf-8')
+        
+        tracker = UsageTracker(tracker_config)
+        
+        report = tracker.get_monthly_report(2024, 3)
+        assert report.total_cost == pytest.approx(0.2)
+        assert report.daily_usage['2024-03-01'].total_tokens == 1000
+        assert UsageTracker(tracker_config).get_monthly_report(2024, 3).total_requests == 1
@@ -0,0 +1,169 @@
+"""LLM共通HTTPトランスポートの単体テスト"""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+from aiohttp import web
+
+from nocturnal_agent.llm.claude_code_interface import ClaudeCodeConfig, ClaudeCodeInterface
+from nocturnal_agent.llm.llm_transport import LLMTransport
+from nocturnal_agent.llm.response_cache import LLMResponseCache
+
+
+class FakeLLMServer:
+    """応答を制御できるローカルHTTPサーバー"""
+
+    def __init__(self):
+        self.calls = []
+        self.failures = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.delay = 0.0
+
+    async def handle(self, request):
+        self.calls.append(request.path)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.failures:
+                self.failures -= 1
+                return web.json_response({'error': 'overloaded'}, status=503)
+            return web.json_response({'content': [{'text': f"reply to {request.path}"}]})
+        finally:
+            self.in_flight -= 1
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_route('*', '/{tail:.*}', self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+@asynccontextmanager
+async def running_server():
+    """起動済みのFakeLLMServer"""
+    server = FakeLLMServer()
+    await server.start()
+    try:
+        yield server
+    finally:
+        await server.stop()
+
+
+def make_transport(**config):
+    return LLMTransport({'backoff_base_seconds': 0.01, 'backoff_max_seconds': 0.05, **config})
+
+
+class TestLLMTransport:
+    """LLMTransportのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_connections_are_reused(self):
+        """連続したリクエストがkeep-alive接続を使い回すことのテスト"""
+        transport = make_transport()
+        async with running_server() as server:
+            try:
+                for i in range(5):
+                    response = await transport.request("POST", f"{server.url}/v1/messages", json={'n': i})
+                    assert response.ok
+                    assert response.json()['content'][0]['text'] == "reply to /v1/messages"
+            finally:
+                await transport.close()
+
+        assert transport.stats['connections_created'] == 1
+        assert transport.stats['connections_reused'] == 4
+
+    @pytest.mark.asyncio
+    async def test_transient_status_is_retried(self):
+        """503が再試行され、再試行回数を超えるとそのまま返ることのテスト"""
+        transport = make_transport(max_retries=2)
+        async with running_server() as server:
+            try:
+                server.failures = 2
+                response = await transport.request("POST", f"{server.url}/api/generate")
+                assert response.status == 200
+                assert response.attempts == 3
+
+                server.failures = 5
+                response = await transport.request("POST", f"{server.url}/api/generate")
+                assert response.status == 503
+                assert transport.stats['retries'] == 4
+            finally:
+                await transport.close()
+
+    @pytest.mark.asyncio
+    async def test_connection_error_is_raised_after_retries(self):
+        """接続できないエンドポイントは再試行後に例外となることのテスト"""
+        transport = make_transport(max_retries=1)
+        try:
+            with pytest.raises(aiohttp.ClientConnectionError):
+                await transport.request("GET", "http://127.0.0.1:9/api/tags", timeout=5)
+        finally:
+            await transport.close()
+
+        assert transport.stats['retries'] == 1
+        assert transport.stats['failures'] == 1
+
+    @pytest.mark.asyncio
+    async def test_endpoint_concurrency_limit(self):
+        """エンドポイントごとの同時リクエスト数が制限されることのテスト"""
+        async with running_server() as server:
+            transport = make_transport(endpoint_limits={server.url: 2})
+            server.delay = 0.05
+            try:
+                await asyncio.gather(*(transport.request("GET", f"{server.url}/api/tags") for _ in range(6)))
+            finally:
+                await transport.close()
+
+        assert server.max_in_flight == 2
+        assert transport.stats['connections_created'] == 2
+
+    @pytest.mark.asyncio
+    async def test_health_check_is_cached(self):
+        """接続確認がTTL内はキャッシュされ、同時呼び出しでも1回だけ実行されることのテスト"""
+        transport = make_transport(health_ttl_seconds=60)
+        probes = []
+
+        async def probe():
+            probes.append(1)
+            await asyncio.sleep(0.01)
+            return True
+
+        results = await asyncio.gather(*(transport.check_health("ollama:test", probe) for _ in range(5)))
+        assert results == [True] * 5
+        assert await transport.check_health("ollama:test", probe)
+        assert len(probes) == 1
+
+        transport.invalidate_health("ollama:test")
+        assert await transport.check_health("ollama:test", probe)
+        assert len(probes) == 2
+
+    @pytest.mark.asyncio
+    async def test_claude_interface_probes_once(self):
+        """ClaudeCodeInterfaceを繰り返し使っても接続テストは1回だけであることのテスト"""
+        transport = make_transport()
+        async with running_server() as server:
+            config = ClaudeCodeConfig(api_key="test-key", api_url=f"{server.url}/v1/messages")
+            try:
+                for _ in range(3):
+                    async with ClaudeCodeInterface(config, transport=transport,
+                                                   response_cache=LLMResponseCache({'enabled': False})) as claude:
+                        reply = await claude._call_claude_api([{"role": "user", "content": "hi"}])
+                        assert reply == "reply to /v1/messages"
+            finally:
+                await transport.close()
+
+        # 接続テスト1回 + 呼び出し3回
+        assert len(server.calls) == 4
+        assert transport.stats['connections_created'] == 1
@@ -0,0 +1,178 @@
+"""ローカルLLMインターフェースのストリーミング生成の単体テスト"""
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+from aiohttp import web
+
+from nocturnal_agent.config.config_manager import LLMConfig
+from nocturnal_agent.llm.command_dispatch_interface import CommandDispatchInterface
+from nocturnal_agent.llm.llm_transport import LLMTransport
+from nocturnal_agent.llm.local_llm_interface import JSONObjectStop, LocalLLMInterface, SectionStop
+from nocturnal_agent.llm.response_cache import LLMResponseCache, set_response_cache
+
+
+class FakeOllama:
+    """トークンをNDJSONで少しずつ返す模擬Ollamaサーバー"""
+
+    def __init__(self, tokens, delay=0.005):
+        self.tokens = tokens
+        self.delay = delay
+        self.sent = 0
+        self.disconnected = asyncio.Event()
+        self.payloads = []
+
+    async def tags(self, request):
+        return web.json_response({'models': []})
+
+    async def generate(self, request):
+        self.payloads.append(await request.json())
+        response = web.StreamResponse(headers={'Content-Type': 'application/x-ndjson'})
+        await response.prepare(request)
+        try:
+            for token in self.tokens:
+                await asyncio.sleep(self.delay)
+                await response.write(json.dumps({'response': token, 'done': False}).encode() + b"\n")
+                self.sent += 1
+            await response.write(json.dumps({
+                'response': '', 'done': True, 'eval_count': len(self.tokens)
+            }).encode() + b"\n")
+        except (ConnectionResetError, asyncio.CancelledError):
+            self.disconnected.set()
+            raise
+        return response
+
+
+@pytest.fixture(autouse=True)
+def response_cache(temp_dir):
+    """テストごとに空の応答キャッシュを使う"""
+    cache = LLMResponseCache({'storage_path': str(temp_dir / 'llm_cache')})
+    set_response_cache(cache)
+    yield cache
+    set_response_cache(None)
+
+
+@asynccontextmanager
+async def running_ollama(tokens):
+    """起動済みのFakeOllamaとLLM設定"""
+    server = FakeOllama(tokens)
+    app = web.Application()
+    app.router.add_get('/api/tags', server.tags)
+    app.router.add_post('/api/generate', server.generate)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        yield server, LLMConfig(api_url=f"http://127.0.0.1:{port}", model_path="test-model")
+    finally:
+        await runner.cleanup()
+
+
+JSON_TOKENS = ['了解', 'です。\n', '{"plan": ', '"a}b", ', '"steps": [{"n": 1}]', '}', '\n補足:', ' 以上'] + ['…'] * 50
+
+
+class TestStopConditions:
+    """早期停止条件のテスト"""
+
+    def test_json_object_stop_ignores_braces_in_strings(self):
+        """文字列中の括弧を無視してJSONの終端を検出することのテスト"""
+        stop = JSONObjectStop()
+        text = ""
+        for token in ['前置き {"a": "}{", ', '"b": "\\"}"', ', "c": {"d": 1}', '} 後書き']:
+            text += token
+            end = stop(text)
+        assert stop.start == 4
+        assert json.loads(text[stop.start:end]) == {'a': '}{', 'b': '"}', 'c': {'d': 1}}
+
+    def test_section_stop_at_next_heading(self):
+        """同じレベル以上の次の見出しでセクションが終わることのテスト"""
+        stop = SectionStop("## 概要")
+        text = "# 仕様書\n## 概要\n説明\n### 詳細\n内容\n## API\n"
+        end = stop(text)
+        assert text[:end] == "# 仕様書\n## 概要\n説明\n### 詳細\n内容\n"
+        assert SectionStop("## 概要")("## 概要\n説明\n## API") is None
+
+
+class TestStreaming:
+    """ストリーミング生成のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_tokens_are_streamed_with_stats(self):
+        """トークンが逐次返り、計測結果が記録されることのテスト"""
+        tokens = ['こん', 'にち', 'は']
+        async with running_ollama(tokens) as (server, config):
+            transport = LLMTransport()
+            llm = LocalLLMInterface(config, transport=transport)
+            try:
+                received = [token async for token in llm.stream_llm("挨拶して", max_tokens=2048)]
+            finally:
+                await transport.close()
+
+        assert received == tokens
+        assert server.payloads[0]['stream'] is True
+        assert server.payloads[0]['options']['num_predict'] == 2048
+        stats = llm.last_stream_stats
+        assert stats.tokens == 3
+        assert not stats.stopped_early
+        assert 0 < stats.time_to_first_token <= stats.duration
+        assert stats.tokens_per_second > 0
+
+    @pytest.mark.asyncio
+    async def test_generation_stops_after_json(self):
+        """JSONが閉じた時点で接続を切り、残りの生成を受け取らないことのテスト"""
+        async with running_ollama(JSON_TOKENS) as (server, config):
+            transport = LLMTransport()
+            try:
+                async with LocalLLMInterface(config, transport=transport) as llm:
+                    response = await llm._call_llm("JSON形式で応答してください", stream=True, stop=JSONObjectStop())
+                await asyncio.wait_for(server.disconnected.wait(), timeout=5)
+            finally:
+                await transport.close()
+
+        assert response == '了解です。\n{"plan": "a}b", "steps": [{"n": 1}]}'
+        assert llm.last_stream_stats.stopped_early
+        assert server.sent < len(JSON_TOKENS)
+
+    @pytest.mark.asyncio
+    async def test_strategic_consultation_uses_streamed_json(self):
+        """戦略相談がストリーミングで得たJSONだけを返すことのテスト"""
+        async with running_ollama(JSON_TOKENS) as (server, config):
+            commander = CommandDispatchInterface(config)
+            response = await commander._strategic_consultation("作戦要求分析")
+
+        assert json.loads(response) == {'plan': 'a}b', 'steps': [{'n': 1}]}
+        assert commander.last_stream_stats.stopped_early
+
+    @pytest.mark.asyncio
+    async def test_strategic_consultation_falls_back_without_json(self):
+        """JSONを含まない応答ではフォールバック応答を返すことのテスト"""
+        async with running_ollama(['JSONは', '出せません']) as (server, config):
+            commander = CommandDispatchInterface(config)
+            response = await commander._strategic_consultation("作戦要求分析")
+
+        assert json.loads(response)['quality_strategy'] == "標準品質管理"
+
+    @pytest.mark.asyncio
+    async def test_repeated_prompt_is_served_from_cache(self, response_cache):
+        """同じプロンプトの2回目はOllamaを呼ばずにキャッシュから返ることのテスト"""
+        async with running_ollama(JSON_TOKENS) as (server, config):
+            transport = LLMTransport()
+            try:
+                async with LocalLLMInterface(config, transport=transport) as llm:
+                    first = await llm._call_llm("タスク分析", stream=True, stop=JSONObjectStop())
+                    second = await llm._call_llm("タスク分析", stream=True, stop=JSONObjectStop())
+                    unstopped = await llm._call_llm("タスク分析", stream=True)
+            finally:
+                await transport.close()
+
+        assert first == second
+        assert unstopped != first
+        assert len(server.payloads) == 2
+        assert response_cache.stats['hits'] == 1
+        assert response_cache.stats['misses'] == 2
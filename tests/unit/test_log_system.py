@@ -0,0 +1,328 @@
+"""ログシステムの単体テスト"""
+
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from nocturnal_agent.log_system.async_writer import AsyncLogHandler, BackpressurePolicy
+from nocturnal_agent.log_system.log_store import LogStore, INDEX_SUFFIX
+from nocturnal_agent.log_system.structured_logger import (
+    StructuredLogger, LogAnalyzer, LogLevel, LogCategory
+)
+
+
+BASE = datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp()
+
+
+def append(store, created, level='INFO', category='system', component='nocturnal_agent', task_id=None, **extra):
+    """テスト用のログ行を追記"""
+    entry = {
+        'timestamp': datetime.fromtimestamp(created, tz=timezone.utc).isoformat(),
+        'level': level,
+        'category': category,
+        'component': component,
+        'task_id': task_id,
+        'message': f"message at {created}",
+        **extra
+    }
+    store.append(created, json.dumps(entry), entry)
+
+
+class TestLogStore:
+    """LogStoreのテスト"""
+
+    def test_segments_partitioned_by_hour(self, temp_dir):
+        """時間単位のセグメントとサイドカーインデックスのテスト"""
+        store = LogStore(temp_dir)
+        for i in range(6):
+            append(store, BASE + i * 1800)
+        store.close()
+
+        segments = sorted(path.name for path in temp_dir.glob('*.jsonl'))
+        assert len(segments) == 3
+        assert segments[0].startswith('20240101-00.')
+        assert len(list(temp_dir.glob(f'*{INDEX_SUFFIX}'))) == 3
+
+    def test_filtered_query_in_timestamp_order(self, temp_dir):
+        """フィルタ付きクエリがタイムスタンプ順に返ることのテスト"""
+        store = LogStore(temp_dir, index_interval=5)
+        for i in range(100):
+            append(store, BASE + i * 300, level='ERROR' if i % 10 == 0 else 'INFO',
+                   task_id=f"task_{i % 3}")
+        store.close()
+
+        reopened = LogStore(temp_dir)
+        results = reopened.query(filters={'level': 'ERROR', 'task_id': 'task_0'}, limit=100)
+
+        assert [r['message'] for r in results] == [f"message at {BASE + i * 300}" for i in (0, 30, 60, 90)]
+
+    def test_time_range_and_limit(self, temp_dir):
+        """時間範囲・件数制限・新しい順のテスト"""
+        store = LogStore(temp_dir)
+        for i in range(48):
+            append(store, BASE + i * 900)
+
+        start = datetime.fromtimestamp(BASE + 3600, tz=timezone.utc)
+        end = datetime.fromtimestamp(BASE + 7200, tz=timezone.utc)
+        results = store.query(start_time=start, end_time=end, limit=100)
+        assert len(results) == 5
+        assert results[0]['timestamp'] == start.isoformat()
+        assert results[-1]['timestamp'] == end.isoformat()
+
+        assert len(store.query(limit=7)) == 7
+        newest = store.query(limit=3, newest_first=True)
+        assert [r['timestamp'] for r in newest] == sorted((r['timestamp'] for r in newest), reverse=True)
+        assert newest[0]['timestamp'] == datetime.fromtimestamp(BASE + 47 * 900, tz=timezone.utc).isoformat()
+
+    def test_segments_from_several_processes_merged(self, temp_dir):
+        """同じ時間帯の複数プロセスのセグメントがマージされることのテスト"""
+        first = LogStore(temp_dir)
+        second = LogStore(temp_dir)
+        second.suffix = '.other'
+        for i in range(20):
+            append(first if i % 2 else second, BASE + i * 60)
+        first.close()
+        second.close()
+
+        results = LogStore(temp_dir).query(limit=100)
+        assert [r['timestamp'] for r in results] == sorted(r['timestamp'] for r in results)
+        assert len(results) == 20
+
+    def test_unindexed_tail_is_scanned(self, temp_dir):
+        """サイドカー保存後に追記された行も検索されることのテスト"""
+        store = LogStore(temp_dir, index_interval=1000)
+        append(store, BASE, level='WARNING')
+        store.flush()
+        append(store, BASE + 1, level='WARNING')
+        # クラッシュを想定してサイドカーを更新せずにファイルを閉じる
+        store._handle.close()
+        store._handle = None
+
+        reader = LogStore(temp_dir)
+        assert len(reader.query(filters={'level': 'WARNING'})) == 2
+        assert reader.field_counts('level') == {'WARNING': 2}
+
+    def test_remove_before(self, temp_dir):
+        """保持期間を過ぎたセグメントの削除テスト"""
+        store = LogStore(temp_dir)
+        for i in range(5):
+            append(store, BASE + i * 3600)
+        store.close()
+
+        removed = store.remove_before(datetime.fromtimestamp(BASE + 2 * 3600, tz=timezone.utc))
+
+        assert removed == 2
+        assert len(store.query()) == 3
+        assert len(list(temp_dir.glob(f'*{INDEX_SUFFIX}'))) == 3
+
+
+class TestStructuredLoggerQuery:
+    """StructuredLoggerのクエリテスト"""
+
+    @pytest.fixture
+    def structured_logger(self, temp_dir):
+        structured_logger = StructuredLogger({
+            'output_path': str(temp_dir),
+            'console_output': False,
+            'level': 'DEBUG'
+        })
+        yield structured_logger
+        structured_logger.close()
+
+    def test_query_and_statistics(self, structured_logger):
+        """構造化ログのクエリと統計のテスト"""
+        for i in range(5):
+            structured_logger.log(
+                LogLevel.INFO, LogCategory.TASK_EXECUTION, f"step {i}",
+                component='nocturnal_agent.executor', session_id='s1' if i < 3 else 's2',
+                task_id=f"task_{i}"
+            )
+        structured_logger.log(LogLevel.ERROR, LogCategory.SAFETY, "blocked",
+                              component='nocturnal_agent.safety', session_id='s1')
+
+        assert [r['message'] for r in structured_logger.query_logs(category=LogCategory.TASK_EXECUTION,
+                                                                     session_id='s1')] == \
+            ['step 0', 'step 1', 'step 2']
+        assert len(structured_logger.query_logs(level=LogLevel.ERROR)) == 1
+        assert structured_logger.query_logs(task_id='task_4')[0]['session_id'] == 's2'
+        assert structured_logger.query_logs(start_time=datetime.now() + timedelta(hours=1)) == []
+
+        stats = structured_logger.get_log_statistics()
+        assert stats['level_counts'] == {'INFO': 5, 'ERROR': 1}
+        assert stats['category_counts']['task_execution'] == 5
+
+        summary = LogAnalyzer(structured_logger).generate_execution_summary(session_id='s1')
+        assert summary['total_log_entries'] == 4
+
+    def test_legacy_log_files_included(self, structured_logger, temp_dir):
+        """旧形式のローテーションログも検索されることのテスト"""
+        (temp_dir / 'nocturnal_agent.jsonl.1').write_text(json.dumps({
+            'timestamp': '2020-01-01T00:00:00+00:00', 'level': 'INFO', 'category': 'system',
+            'component': 'nocturnal_agent', 'message': 'legacy'
+        }) + '\n', encoding='utf-8')
+        logging.getLogger('nocturnal_agent').info("current", extra={'category': 'system'})
+
+        results = structured_logger.query_logs(category=LogCategory.SYSTEM)
+
+        assert [r['message'] for r in results] == ['legacy', 'current']
+
+    def test_loggers_sharing_directory(self, temp_dir):
+        """同じプロセスで同じディレクトリを使う複数のストア・ロガーが互いのログを壊さないことのテスト"""
+        stores = [LogStore(temp_dir / 'segments') for _ in range(2)]
+        for i in range(20):
+            append(stores[i % 2], BASE + i * 60, task_id=f"task_{i % 2}")
+        for store in stores:
+            store.flush()
+
+        for reader in stores + [LogStore(temp_dir / 'segments')]:
+            results = reader.query(limit=100)
+            assert [r['message'] for r in results] == [f"message at {BASE + i * 60}" for i in range(20)]
+            assert len(reader.query(filters={'task_id': 'task_1'})) == 10
+        for store in stores:
+            store.close()
+
+        loggers = [StructuredLogger({'output_path': str(temp_dir), 'console_output': False})
+                   for _ in range(2)]
+        try:
+            for i in range(4):
+                loggers[i % 2].log(LogLevel.INFO, LogCategory.SYSTEM, f"logged {i}",
+                                   component='nocturnal_agent.test')
+            for structured_logger in loggers:
+                results = structured_logger.query_logs(component='nocturnal_agent.test')
+                assert [r['message'] for r in results] == [f"logged {i}" for i in range(4)]
+        finally:
+            for structured_logger in loggers:
+                structured_logger.close()
+
+
+class GateHandler(logging.Handler):
+    """ゲートが開くまで書き込みを止めるテスト用ハンドラー"""
+
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+        self.started = threading.Event()
+        self.messages = []
+
+    def emit(self, record):
+        self.started.set()
+        self.gate.wait(5)
+        self.messages.append(record.getMessage())
+
+
+def make_record(level, message):
+    return logging.LogRecord('nocturnal_agent', level, __file__, 0, message, None, None)
+
+
+class TestAsyncLogHandler:
+    """AsyncLogHandlerのテスト"""
+
+    def fill(self, policy, capacity=4, **kwargs):
+        """書き込みスレッドを止めた状態でバッファを満杯にする"""
+        target = GateHandler()
+        handler = AsyncLogHandler([target], capacity=capacity, batch_size=1, flush_interval=0.01,
+                                  policy=policy, **kwargs)
+        handler.handle(make_record(logging.INFO, "in flight"))
+        assert target.started.wait(5)
+        for i in range(capacity):
+            handler.handle(make_record(logging.INFO, f"queued {i}"))
+        return handler, target
+
+    def test_drop_debug_when_full(self):
+        """満杯時にDEBUGだけが破棄されることのテスト"""
+        handler, target = self.fill(BackpressurePolicy.DROP_DEBUG)
+        handler.handle(make_record(logging.DEBUG, "noise"))
+
+        stats = handler.get_statistics()
+        assert stats['queue_depth'] == 4
+        assert stats['dropped'] == {'debug': 1, 'sampled': 0, 'closed': 0}
+
+        target.gate.set()
+        handler.close()
+        assert target.messages == ["in flight"] + [f"queued {i}" for i in range(4)]
+
+    def test_sample_above_high_watermark(self):
+        """高水位以上でWARNING未満が間引かれることのテスト"""
+        handler, target = self.fill(BackpressurePolicy.SAMPLE, capacity=8, sample_rate=0.5, high_watermark=0.5)
+        stats = handler.get_statistics()
+        assert stats['dropped']['sampled'] == 2
+        assert stats['queue_depth'] == 6
+
+        target.gate.set()
+        handler.close()
+        assert handler.get_statistics()['written'] == 7
+
+    def test_block_waits_for_space(self):
+        """BLOCK方針で空きができるまで待つことのテスト"""
+        handler, target = self.fill(BackpressurePolicy.BLOCK, capacity=2)
+        done = threading.Event()
+        producer = threading.Thread(target=lambda: (handler.handle(make_record(logging.INFO, "late")), done.set()))
+        producer.start()
+
+        assert not done.wait(0.1)
+        target.gate.set()
+        assert done.wait(5)
+        producer.join()
+        handler.close()
+
+        assert target.messages[-1] == "late"
+        assert handler.get_statistics()['blocked'] == 1
+        assert handler.get_statistics()['dropped_total'] == 0
+
+    def test_single_record_written_within_flush_interval(self):
+        """バッチに満たない1件でもflush()なしでflush_interval以内に書き込まれることのテスト"""
+        target = GateHandler()
+        target.gate.set()
+        handler = AsyncLogHandler([target], batch_size=256, flush_interval=0.2)
+        try:
+            started = time.monotonic()
+            handler.handle(make_record(logging.ERROR, "single error"))
+            while handler.get_statistics()['written'] == 0 and time.monotonic() - started < 2:
+                time.sleep(0.01)
+
+            assert time.monotonic() - started < 1
+            assert target.messages == ["single error"]
+        finally:
+            handler.close()
+
+    def test_flush_does_not_wait_for_batch(self):
+        """flush()がバッチ待ちの時間を待たずに返ることのテスト"""
+        target = GateHandler()
+        target.gate.set()
+        handler = AsyncLogHandler([target], batch_size=256, flush_interval=5)
+        try:
+            handler.handle(make_record(logging.INFO, "first"))
+            started = time.monotonic()
+            handler.flush()
+
+            assert time.monotonic() - started < 1
+            assert handler.get_statistics()['written'] == 1
+        finally:
+            handler.close()
+
+    def test_structured_logger_async_mode(self, temp_dir):
+        """非同期モードでバッチ書き込みされたログが検索できることのテスト"""
+        structured_logger = StructuredLogger({
+            'output_path': str(temp_dir),
+            'console_output': False,
+            'async_writer': True,
+            'async_batch_size': 16
+        })
+        try:
+            for i in range(40):
+                structured_logger.log(LogLevel.INFO, LogCategory.SCHEDULER, f"tick {i}",
+                                      component='nocturnal_agent.scheduler')
+
+            results = structured_logger.query_logs(category=LogCategory.SCHEDULER)
+            assert [r['message'] for r in results] == [f"tick {i}" for i in range(40)]
+
+            writer = structured_logger.get_log_statistics()['writer']
+            assert writer['written'] == 40
+            assert writer['queue_depth'] == 0
+            assert writer['batches'] < 40
+        finally:
+            structured_logger.close()
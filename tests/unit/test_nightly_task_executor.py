@@ -0,0 +1,178 @@
+"""夜間タスク実行システムの同時実行の単体テスト"""
+
+import asyncio
+import subprocess
+import sys
+import time
+
+import pytest
+
+from nocturnal_agent.execution.implementation_task_manager import (
+    ClaudeCodeExecutor, NightlyTaskExecutor, TaskStatus
+)
+from nocturnal_agent.log_system.structured_logger import StructuredLogger
+
+
+class FakeClaudeExecutor:
+    """タスクごとに決めた時間だけかかる模擬ClaudeCode実行"""
+
+    def __init__(self, durations, failures=()):
+        self.durations = durations
+        self.failures = set(failures)
+        self.running = 0
+        self.peak = 0
+        self.started = {}
+        self.finished = {}
+
+    async def execute_task_via_claude_code(self, task):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        self.started[task.title] = time.monotonic()
+        try:
+            await asyncio.sleep(self.durations.get(task.title, 0.05))
+        finally:
+            self.running -= 1
+        self.finished[task.title] = time.monotonic()
+        if task.title in self.failures:
+            return {'status': 'error', 'task_id': task.task_id, 'error': 'ビルド失敗'}
+        return {'status': 'success', 'task_id': task.task_id}
+
+
+def make_executor(temp_dir, **kwargs):
+    logger = StructuredLogger({
+        'output_path': str(temp_dir / 'logs'),
+        'console_output': False,
+        'file_output': False,
+    })
+    return NightlyTaskExecutor(str(temp_dir), logger, **kwargs)
+
+
+def add_tasks(executor, titles, dependencies=None):
+    """承認済みタスクを作成し、タイトルからIDを引ける辞書を返す"""
+    dependencies = dependencies or {}
+    manager = executor.task_manager
+    ids = {}
+    for title in titles:
+        ids[title] = manager.create_task_from_specification({'title': title})
+    for title, task_id in ids.items():
+        manager.set_task_dependencies(task_id, [ids[dep] for dep in dependencies.get(title, [])])
+        manager.approve_task(task_id)
+    return ids
+
+
+class TestConcurrentExecution:
+    """実行中タスク数の上限付き同時実行のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_tasks_run_concurrently_up_to_limit(self, temp_dir):
+        """同時実行数が上限を超えず、全タスクが完了することのテスト"""
+        executor = make_executor(temp_dir, max_concurrent=2)
+        ids = add_tasks(executor, [f"タスク{i}" for i in range(5)])
+        fake = executor.claude_executor = FakeClaudeExecutor({f"タスク{i}": 0.2 for i in range(5)})
+
+        summary = await executor.execute_nightly_tasks(max_tasks=5)
+
+        assert fake.peak == 2
+        assert len(summary['executed_tasks']) == 5
+        # 5タスク×0.2秒を2並列で実行: 逐次なら1.0秒
+        assert summary['total_execution_time'] < 0.9
+        assert all(executor.task_manager.tasks[task_id].status == TaskStatus.COMPLETED
+                   for task_id in ids.values())
+
+        # 完了状態はストアに保存されている
+        records, _ = executor.task_manager.store.load()
+        assert {record['status'] for record in records} == {'COMPLETED'}
+
+    @pytest.mark.asyncio
+    async def test_dependent_task_starts_when_dependency_completes(self, temp_dir):
+        """依存先が終わった時点で、他のタスクの完了を待たずに開始されることのテスト"""
+        executor = make_executor(temp_dir, max_concurrent=2)
+        add_tasks(executor, ["設計", "実装", "資料"], dependencies={"実装": ["設計"]})
+        fake = executor.claude_executor = FakeClaudeExecutor({"設計": 0.05, "実装": 0.05, "資料": 0.5})
+
+        summary = await executor.execute_nightly_tasks(max_tasks=None)
+
+        assert len(summary['executed_tasks']) == 3
+        assert fake.started["実装"] >= fake.finished["設計"]
+        assert fake.finished["実装"] < fake.finished["資料"]
+
+    @pytest.mark.asyncio
+    async def test_failed_dependency_blocks_dependents(self, temp_dir):
+        """依存先が失敗したタスクは開始されないことのテスト"""
+        executor = make_executor(temp_dir)
+        ids = add_tasks(executor, ["設計", "実装"], dependencies={"実装": ["設計"]})
+        executor.claude_executor = FakeClaudeExecutor({}, failures={"設計"})
+
+        summary = await executor.execute_nightly_tasks(max_tasks=None)
+
+        assert [task['title'] for task in summary['failed_tasks']] == ["設計"]
+        assert executor.task_manager.tasks[ids["実装"]].status == TaskStatus.APPROVED
+
+    @pytest.mark.asyncio
+    async def test_task_timeout_fails_only_that_task(self, temp_dir):
+        """制限時間を超えたタスクだけが失敗し、他は完了することのテスト"""
+        executor = make_executor(temp_dir, task_timeout=0.2)
+        ids = add_tasks(executor, ["遅いタスク", "速いタスク"])
+        executor.claude_executor = FakeClaudeExecutor({"遅いタスク": 10, "速いタスク": 0.05})
+
+        summary = await executor.execute_nightly_tasks()
+
+        assert [task['title'] for task in summary['failed_tasks']] == ["遅いタスク"]
+        assert executor.task_manager.tasks[ids["遅いタスク"]].status == TaskStatus.FAILED
+        assert executor.task_manager.tasks[ids["遅いタスク"]].execution_log[-1]['error']['type'] == 'timeout'
+        assert executor.task_manager.tasks[ids["速いタスク"]].status == TaskStatus.COMPLETED
+
+    @pytest.mark.asyncio
+    async def test_cancelled_run_requeues_in_flight_tasks(self, temp_dir):
+        """実行全体が中断されたとき、実行中のタスクが承認済みに戻ることのテスト"""
+        executor = make_executor(temp_dir)
+        ids = add_tasks(executor, ["長いタスク"])
+        executor.claude_executor = FakeClaudeExecutor({"長いタスク": 10})
+
+        run = asyncio.create_task(executor.execute_nightly_tasks())
+        await asyncio.sleep(0.1)
+        run.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await run
+
+        task = executor.task_manager.tasks[ids["長いタスク"]]
+        assert task.status == TaskStatus.APPROVED
+        assert task.started_at is None
+
+
+class TestClaudeProcess:
+    """ClaudeCodeプロセス実行のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_timeout_kills_process_without_blocking_loop(self, temp_dir):
+        """タイムアウトしたプロセスが終了され、その間もイベントループが動くことのテスト"""
+        logger = StructuredLogger({'output_path': str(temp_dir / 'logs'),
+                                   'console_output': False, 'file_output': False})
+        claude = ClaudeCodeExecutor(str(temp_dir), logger)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.05)
+                ticks += 1
+
+        ticking = asyncio.create_task(ticker())
+        started = time.monotonic()
+        try:
+            with pytest.raises(subprocess.TimeoutExpired):
+                await claude._run_claude_process(
+                    [sys.executable, '-c', 'import time; time.sleep(30)'], env=None, timeout=0.5
+                )
+        finally:
+            ticking.cancel()
+
+        assert time.monotonic() - started < 5
+        assert ticks >= 5
+
+        result = await claude._run_claude_process(
+            [sys.executable, '-c', 'import sys; print(sys.stdin.read().upper())'],
+            env=None, timeout=10, input_text="ok"
+        )
+        assert result.returncode == 0
+        assert result.stdout.strip() == "OK"
@@ -0,0 +1,148 @@
+"""Obsidian知識検索の単体テスト"""
+
+import pytest
+
+from nocturnal_agent.core.models import CodePattern
+from nocturnal_agent.obsidian.knowledge_retriever import ObsidianKnowledgeRetriever
+
+
+def write_note(path, frontmatter, title, description, body=""):
+    """テスト用のノートを書き込む"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lines = ["---"] + [f"{key}: {value}" for key, value in frontmatter.items()] + ["---", ""]
+    lines += [f"# {title}", "", "## Description", description, "", "## Details", body, ""]
+    path.write_text("\n".join(lines), encoding="utf-8")
+
+
+class TestKnowledgeRetriever:
+    """ObsidianKnowledgeRetrieverのテスト"""
+
+    @pytest.fixture
+    def retriever(self, temp_dir):
+        """パターンと履歴を含むボールトでRetrieverを提供"""
+        patterns = temp_dir / "sample" / "patterns"
+        write_note(
+            patterns / "repository.md",
+            {'type': 'pattern', 'pattern_type': 'architecture', 'confidence': 0.9, 'tags': '[db, cache]'},
+            "Repository", "Database access through repository classes", "repository database cache"
+        )
+        write_note(
+            patterns / "retry.md",
+            {'type': 'pattern', 'pattern_type': 'resilience', 'confidence': 0.6, 'tags': '[network]'},
+            "Retry", "Retry network calls with backoff", "retry backoff database"
+        )
+        write_note(
+            patterns / "consistency-rules" / "naming.md",
+            {'type': 'consistency_rule', 'tags': '[naming, db]'},
+            "Naming", "Database naming rules", ""
+        )
+        write_note(
+            temp_dir / "sample" / "history" / "2024-01-01.md",
+            {'type': 'development_history', 'tags': '[db]'},
+            "History", "Migrated database schema", ""
+        )
+
+        retriever = ObsidianKnowledgeRetriever(str(temp_dir), "sample")
+        yield retriever
+        retriever.close()
+
+    @pytest.mark.asyncio
+    async def test_search_patterns_ranking_and_filters(self, retriever):
+        """BM25ランキングとフィルタのテスト"""
+        results = await retriever.search_patterns("database repository")
+
+        # 整合性ルールと履歴はパターン検索に含まれない
+        assert [r['title'] for r in results] == ["Repository", "Retry"]
+        assert results[0]['relevance_score'] > results[1]['relevance_score']
+        assert results[0]['pattern_type'] == 'architecture'
+
+        filtered = await retriever.search_patterns("database", min_confidence=0.8)
+        assert [r['title'] for r in filtered] == ["Repository"]
+
+        by_type = await retriever.search_patterns("database", pattern_type='resilience')
+        assert [r['title'] for r in by_type] == ["Retry"]
+
+    @pytest.mark.asyncio
+    async def test_index_refresh_after_edit_and_delete(self, temp_dir, retriever):
+        """ノートの編集・削除がインデックスに反映されることのテスト"""
+        assert await retriever.search_patterns("circuit") == []
+
+        write_note(
+            temp_dir / "sample" / "patterns" / "retry.md",
+            {'type': 'pattern', 'pattern_type': 'resilience', 'confidence': 0.6},
+            "Retry", "Retry with circuit breaker", ""
+        )
+        (temp_dir / "sample" / "patterns" / "repository.md").unlink()
+        await retriever._refresh_search_index(force=True)
+
+        assert [r['title'] for r in await retriever.search_patterns("circuit")] == ["Retry"]
+        assert await retriever.search_patterns("repository") == []
+
+    @pytest.mark.asyncio
+    async def test_index_persists_across_instances(self, temp_dir, retriever):
+        """インデックスが再利用され、未変更ノートが再読込されないことのテスト"""
+        await retriever.search_patterns("database")
+
+        reopened = ObsidianKnowledgeRetriever(str(temp_dir), "sample")
+        try:
+            assert reopened._search_index.refresh() == {'updated': 0, 'removed': 0}
+            assert len(await reopened.search_patterns("database")) == 2
+        finally:
+            reopened.close()
+
+    @pytest.mark.asyncio
+    async def test_search_by_tags(self, retriever):
+        """タグ検索のテスト"""
+        results = await retriever.search_by_tags(["db", "cache"])
+
+        assert results[0]['title'] == "Repository"
+        assert results[0]['tag_match_score'] == 1.0
+        assert {r['type'] for r in results} == {'pattern', 'consistency_rule', 'development_history'}
+
+        rules = await retriever.search_by_tags(["db"], content_type='rule')
+        assert [r['title'] for r in rules] == ["Naming"]
+
+    @pytest.mark.asyncio
+    async def test_search_by_tags_skips_untyped_notes_outside_search_dirs(self, temp_dir, retriever):
+        """検索対象外のディレクトリにある種類なしのノートがタグ検索に含まれないことのテスト"""
+        write_note(temp_dir / "sample" / "notes" / "scratch.md", {'tags': '[db, cache]'},
+                   "Scratch", "Untyped note about the database", "")
+
+        results = await retriever.search_by_tags(["db", "cache"])
+        assert "Scratch" not in [r['title'] for r in results]
+
+        suggestions = await retriever.suggest_related_knowledge("db cache")
+        assert "Scratch" not in [s['title'] for s in suggestions]
+
+    @pytest.mark.asyncio
+    async def test_search_similar_patterns(self, retriever):
+        """類似パターン検索のテスト"""
+        reference = CodePattern(
+            name="retry", pattern_type="resilience", description="Retry network calls with exponential backoff"
+        )
+
+        results = await retriever.search_similar_patterns(reference, similarity_threshold=0.6)
+
+        assert [r['title'] for r in results] == ["Retry"]
+        assert 0.6 <= results[0]['similarity_score'] <= 1.0
+
+    @pytest.mark.asyncio
+    async def test_cross_project_knowledge(self, temp_dir, retriever):
+        """プロジェクト横断検索のテスト"""
+        write_note(
+            temp_dir / "other" / "patterns" / "cache.md",
+            {'type': 'pattern', 'pattern_type': 'performance', 'confidence': 0.8},
+            "Cache", "Cache database queries in memory", ""
+        )
+        write_note(
+            temp_dir / "another" / "patterns" / "ui.md",
+            {'type': 'pattern', 'pattern_type': 'ui', 'confidence': 0.8},
+            "Buttons", "Primary buttons use the accent color", ""
+        )
+
+        results = await retriever.get_cross_project_knowledge("cache database queries")
+
+        assert [(r['project'], r['title']) for r in results] == [("other", "Cache")]
+
+        with_current = await retriever.get_cross_project_knowledge("database", exclude_current=False)
+        assert {r['project'] for r in with_current} == {"sample", "other"}
@@ -2,7 +2,9 @@
 
 import pytest
 import asyncio
+import subprocess
 from datetime import datetime, timedelta
+from pathlib import Path
 from unittest.mock import Mock, AsyncMock, patch, MagicMock
 
 from nocturnal_agent.parallel.branch_manager import (
@@ -14,6 +16,9 @@ from nocturnal_agent.parallel.quality_controller import (
 from nocturnal_agent.parallel.parallel_executor import (
     ParallelExecutor, ParallelExecutionTask, ExecutionSession
 )
+from nocturnal_agent.core.models import (
+    Task, TaskPriority, ExecutionResult, QualityScore
+)
 
 
 class TestBranchManager:
@@ -554,4 +559,280 @@ class TestParallelExecutionModels:
         assert session.completed_tasks == []
         assert session.failed_tasks == []
         assert session.max_parallel_limit == 3
-        assert session.total_tasks_processed == 0
\ No newline at end of file
+        assert session.total_tasks_processed == 0
+
+class TestWorktreePool:
+    """worktree分離実行のテスト"""
+    
+    @pytest.fixture
+    def worktree_manager(self, git_repo):
+        """worktree分離を有効にしたBranchManagerを提供"""
+        return BranchManager(str(git_repo), {
+            'branch_prefix': 'test',
+            'use_worktrees': True,
+            'worktree_pool_size': 2
+        })
+    
+    def _git(self, cwd, *args):
+        return subprocess.run(['git'] + list(args), cwd=cwd, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    
+    def test_lease_resets_and_reuses_worktrees(self, git_repo, worktree_manager):
+        """worktreeの貸し出し・返却・再利用のテスト"""
+        original_branch = self._git(git_repo, 'branch', '--show-current')
+        worktree_manager.initialize_night_session()
+        pool = worktree_manager.worktree_pool
+        
+        # 夜間ブランチ作成時もプロジェクトのチェックアウトは変わらない
+        assert self._git(git_repo, 'branch', '--show-current') == original_branch
+        assert pool.get_pool_status()['idle'] == 2
+        
+        branch = worktree_manager.create_quality_branch(0.75, 'task1')
+        path = worktree_manager.lease_worktree(branch)
+        assert path.parent == git_repo / '.nocturnal' / 'worktrees'
+        assert self._git(path, 'branch', '--show-current') == branch
+        (path / 'scratch.txt').write_text('leftover')
+        (path / 'test.py').write_text('# modified')
+        
+        assert worktree_manager.release_worktree(branch) is True
+        assert pool.is_leased(branch) is False
+        
+        # 返却されたworktreeを再利用し、前回の作業内容は破棄される
+        other = worktree_manager.create_quality_branch(0.75, 'task2')
+        reused = worktree_manager.lease_worktree(other)
+        assert reused == path
+        assert not (reused / 'scratch.txt').exists()
+        assert (reused / 'test.py').read_text() == '# Test file'
+        assert pool.pool_stats['worktrees_created'] == 2
+        
+        # worktreeはプロジェクト側の変更として扱われない
+        assert self._git(git_repo, 'status', '--porcelain') == ''
+        worktree_manager.release_worktree(other)
+    
+    def test_same_branch_lease_waits_for_release(self, worktree_manager):
+        """同一ブランチの貸し出しが返却まで待機するテスト"""
+        branch = worktree_manager.initialize_night_session()
+        pool = worktree_manager.worktree_pool
+        pool.lease(branch)
+        
+        with pytest.raises(TimeoutError):
+            pool.lease(branch, timeout=0.1)
+        assert pool.pool_stats['lease_waits'] == 1
+        
+        pool.release(branch)
+        assert pool.lease(branch, timeout=0.1) is not None
+    
+    def test_commit_and_merge_in_worktrees(self, git_repo, worktree_manager):
+        """worktreeでのコミットとプロジェクトを切り替えないマージのテスト"""
+        original_branch = self._git(git_repo, 'branch', '--show-current')
+        night_branch = worktree_manager.initialize_night_session()
+        
+        branches = []
+        for i in range(2):
+            branch = worktree_manager.create_quality_branch(0.9, f'task{i}')
+            path = worktree_manager.lease_worktree(branch)
+            (path / f'feature_{i}.py').write_text(f'value = {i}\n')
+            assert worktree_manager.has_uncommitted_changes(path)
+            assert worktree_manager.commit_task_result(f'task{i}', f'Add feature {i}', [], path)
+            worktree_manager.release_worktree(branch)
+            branches.append(branch)
+        
+        for branch in branches:
+            result = worktree_manager.attempt_auto_merge(branch, night_branch, 0.9)
+            assert result['success'] is True
+        
+        merged_files = self._git(git_repo, 'ls-tree', '--name-only', night_branch).split('\n')
+        assert 'feature_0.py' in merged_files
+        assert 'feature_1.py' in merged_files
+        assert self._git(git_repo, 'branch', '--show-current') == original_branch
+        assert not (git_repo / 'feature_0.py').exists()
+    
+    def test_cleanup_collects_branches_and_surplus_worktrees(self, worktree_manager):
+        """非アクティブブランチとworktreeのガベージコレクションのテスト"""
+        worktree_manager.initialize_night_session()
+        pool = worktree_manager.worktree_pool
+        
+        branches = [worktree_manager.create_quality_branch(0.75, f'task{i}') for i in range(4)]
+        paths = [worktree_manager.lease_worktree(branch) for branch in branches]
+        for branch in branches[:3]:
+            worktree_manager.release_worktree(branch)
+        for branch in branches:
+            info = worktree_manager.active_branches[branch]
+            info.status = 'merged'
+            info.last_activity = datetime.now() - timedelta(hours=48)
+        
+        deleted = worktree_manager.cleanup_inactive_branches()
+        
+        # 作業中のブランチは残し、待機worktreeはプールサイズまで減らす
+        assert set(deleted) == set(branches[:3])
+        assert pool.get_pool_status()['idle'] == 2
+        assert sum(path.exists() for path in paths[:3]) == 2
+        assert paths[3].exists()
+    
+    @pytest.mark.asyncio
+    async def test_parallel_tasks_run_in_separate_worktrees(self, git_repo):
+        """並行タスクがそれぞれのworktreeで同時に実行されるテスト"""
+        executor = ParallelExecutor(str(git_repo), {
+            'max_parallel_executions': 3,
+            'branch_config': {'branch_prefix': 'test'},
+            'quality_config': {'quality_assessment_timeout': 30}
+        })
+        await executor.start_parallel_session()
+        
+        running = []
+        peak = []
+        
+        async def write_executor(task):
+            # 全タスクが同じファイル名に書き込んでも互いに干渉しない
+            workdir = Path(task.working_directory)
+            running.append(task.id)
+            peak.append(len(running))
+            (workdir / 'result.txt').write_text(task.id)
+            await asyncio.sleep(0.2)
+            content = (workdir / 'result.txt').read_text()
+            running.remove(task.id)
+            return ExecutionResult(task_id=task.id, success=content == task.id,
+                                   quality_score=QualityScore(overall=0.75),
+                                   generated_code=content)
+        
+        tasks = [Task(id=f'task_{i}', description=f'Task {i}', priority=TaskPriority.MEDIUM,
+                      estimated_quality=0.75) for i in range(3)]
+        for task in tasks:
+            await executor.execute_task_parallel(task, write_executor, estimated_quality=0.75)
+        await executor.wait_for_completion(timeout=30)
+        
+        assert sorted(executor.current_session.completed_tasks) == [task.id for task in tasks]
+        assert max(peak) == 3
+        for task in tasks:
+            branch = next(name for name, info in executor.branch_manager.active_branches.items()
+                          if task.id in info.associated_tasks and info.branch_type != BranchType.NIGHT_MAIN)
+            assert self._git(git_repo, 'show', f'{branch}:result.txt') == task.id
+            assert task.working_directory is None
+        assert not (git_repo / 'result.txt').exists()
+
+
+class TestExecutionSlots:
+    """完了駆動のスロット管理のテスト"""
+    
+    def _executor(self, git_repo, **config):
+        return ParallelExecutor(str(git_repo), {
+            'quality_assessment_enabled': False,
+            'use_worktrees': False,
+            'branch_config': {'branch_prefix': 'test'},
+            **config
+        })
+    
+    def _tracking_executor(self, running, peak, seconds=0.1):
+        async def execute(task):
+            running.append(task.id)
+            peak.append(len(running))
+            await asyncio.sleep(seconds)
+            running.remove(task.id)
+            return Mock(task_id=task.id, success=True)
+        return execute
+    
+    @pytest.mark.asyncio
+    async def test_slots_turn_over_on_completion(self, git_repo):
+        """スロットが完了時に即座に次のタスクへ渡るテスト"""
+        executor = self._executor(git_repo, max_parallel_executions=2)
+        await executor.start_parallel_session()
+        running, peak = [], []
+        execute = self._tracking_executor(running, peak, seconds=0.1)
+        
+        started = asyncio.get_running_loop().time()
+        for i in range(6):
+            await executor.execute_task_parallel(Mock(id=f'task_{i}', description='t'), execute)
+        result = await executor.wait_for_completion(timeout=10)
+        elapsed = asyncio.get_running_loop().time() - started
+        
+        assert result['status'] == 'all_completed'
+        assert len(executor.current_session.completed_tasks) == 6
+        assert max(peak) == 2
+        # 3ターン分の実行時間のみで、ポーリングによる待ち時間がない
+        assert elapsed < 0.6
+        
+        slots = (await executor.get_execution_status())['slots']
+        assert slots['running'] == 0
+        assert slots['slots_acquired'] == 6
+        assert slots['wait_seconds_max'] > 0
+        assert 0 < slots['utilization'] <= 1
+    
+    @pytest.mark.asyncio
+    async def test_tier_limit_caps_concurrency(self, git_repo):
+        """品質階層ごとの同時実行上限のテスト"""
+        executor = self._executor(git_repo, max_parallel_executions=3,
+                                  tier_limits={'medium': 1})
+        await executor.start_parallel_session()
+        running, peak = [], []
+        execute = self._tracking_executor(running, peak, seconds=0.05)
+        
+        for i in range(3):
+            await executor.execute_task_parallel(Mock(id=f'task_{i}', description='t'), execute)
+        status = await executor.get_execution_status()
+        assert status['slots']['tier_limits']['medium'] == 1
+        
+        await executor.wait_for_completion(timeout=10)
+        assert max(peak) == 1
+        assert len(executor.current_session.completed_tasks) == 3
+    
+    @pytest.mark.asyncio
+    async def test_free_slot_not_idle_behind_tier_limited_waiter(self, git_repo):
+        """階層上限で待つタスクの後ろでも、他階層のタスクが空きスロットで開始されるテスト"""
+        executor = self._executor(git_repo, max_parallel_executions=3, tier_limits={'low': 2})
+        await executor.start_parallel_session()
+        
+        def parallel_task(task_id, tier):
+            return ParallelExecutionTask(task=Mock(id=task_id), branch_name="", quality_tier=tier,
+                                         started_at=datetime.now(), executor_id=f"exec-{task_id}",
+                                         queued_at=datetime.now())
+        
+        low = [parallel_task(f'low_{i}', QualityTier.LOW) for i in range(3)]
+        medium = parallel_task('medium_0', QualityTier.MEDIUM)
+        for task in low[:2]:
+            await executor._wait_for_execution_slot(task)
+        waiting_low = asyncio.create_task(executor._wait_for_execution_slot(low[2]))
+        await asyncio.sleep(0)
+        assert not waiting_low.done()
+        
+        # LOWの待機タスクがいても、MEDIUMは空いている3つ目のスロットで即座に開始する
+        await asyncio.wait_for(executor._wait_for_execution_slot(medium), timeout=1)
+        slots = executor._get_slot_status()
+        assert (slots['running'], slots['queued']) == (3, 1)
+        assert slots['running_by_tier'] == {'medium': 1, 'low': 2}
+        
+        executor._release_slot(medium)
+        await asyncio.sleep(0)
+        assert not waiting_low.done()
+        executor._release_slot(low[0])
+        await asyncio.wait_for(waiting_low, timeout=1)
+        assert executor._get_slot_status()['running_by_tier'] == {'low': 2}
+    
+    @pytest.mark.asyncio
+    async def test_submission_backpressure(self, git_repo):
+        """スロット待ちの上限によるバックプレッシャーのテスト"""
+        executor = self._executor(git_repo, max_parallel_executions=1, max_pending_tasks=1)
+        await executor.start_parallel_session()
+        release = asyncio.Event()
+        
+        async def blocking(task):
+            await release.wait()
+            return Mock(task_id=task.id, success=True)
+        
+        await executor.execute_task_parallel(Mock(id='task_0', description='t'), blocking)
+        await asyncio.sleep(0)  # task_0 がスロットを取得
+        await executor.execute_task_parallel(Mock(id='task_1', description='t'), blocking)
+        
+        # 待機枠が埋まっているため3つ目の投入は待たされる
+        submit = asyncio.create_task(
+            executor.execute_task_parallel(Mock(id='task_2', description='t'), blocking)
+        )
+        await asyncio.sleep(0.05)
+        assert not submit.done()
+        status = await executor.get_execution_status()
+        assert [t['status'] for t in status['active_tasks']] == ['running', 'queued']
+        assert status['slots']['backpressure_waits'] == 1
+        
+        release.set()
+        assert await asyncio.wait_for(submit, timeout=5) == 'task_2'
+        await executor.wait_for_completion(timeout=5)
+        assert sorted(executor.current_session.completed_tasks) == ['task_0', 'task_1', 'task_2']
@@ -0,0 +1,113 @@
+"""パターン抽出エンジンの単体テスト"""
+
+import json
+import multiprocessing
+import os
+
+import pytest
+
+from nocturnal_agent.core.analysis_service import AnalysisService
+from nocturnal_agent.engines.pattern_extractor import PatternExtractor
+
+
+def _write_project(root, count=6):
+    for i in range(count):
+        path = root / "pkg" / f"module_{i}.py"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"class Model{i}:\n    def load_{i}(self):\n        return {i}\n")
+    (root / "app.js").write_text("const loadItems = () => fetch('/items');\n")
+    (root / "node_modules").mkdir()
+    (root / "node_modules" / "dep.js").write_text("module.exports = 1;\n")
+
+
+class TestIncrementalExtraction:
+    """ディレクトリ単位のインクリメンタル抽出のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_only_changed_files_are_parsed(self, temp_dir):
+        """2回目以降は変更したファイルだけ再解析されることのテスト"""
+        _write_project(temp_dir)
+        extractor = PatternExtractor(AnalysisService({'enabled': False}))
+
+        first = await extractor.extract_patterns_from_directory(str(temp_dir))
+        assert first['extraction']['parsed'] == 7
+        assert first['statistics']['class_count'] == 6
+        assert not any('node_modules' in path for path in first['files_analyzed'])
+        assert (temp_dir / '.nocturnal' / 'pattern_cache.json').exists()
+
+        (temp_dir / "pkg" / "module_2.py").write_text("def helper():\n    pass\n")
+        (temp_dir / "pkg" / "module_5.py").unlink()
+        second = await extractor.extract_patterns_from_directory(str(temp_dir))
+
+        assert second['extraction'] == {**second['extraction'], 'files': 6, 'parsed': 1, 'cache_hits': 5}
+        assert second['statistics']['class_count'] == 4
+        assert second['statistics']['function_count'] == 5
+
+        uncached = await extractor.extract_patterns_from_directory(str(temp_dir), use_cache=False)
+        assert uncached['files_analyzed'] == second['files_analyzed']
+        assert uncached['statistics'] == second['statistics']
+        assert uncached['insights'] == second['insights']
+
+        cached_files = json.loads((temp_dir / '.nocturnal' / 'pattern_cache.json').read_text())['files']
+        assert sorted(cached_files) == ['app.js'] + [f"pkg/module_{i}.py" for i in range(5)]
+
+    @pytest.mark.asyncio
+    async def test_touched_file_is_matched_by_content_hash(self, temp_dir):
+        """内容が同じなら更新日時が変わっても再解析しないことのテスト"""
+        _write_project(temp_dir, count=2)
+        extractor = PatternExtractor(AnalysisService({'enabled': False}))
+        await extractor.extract_patterns_from_directory(str(temp_dir))
+
+        path = temp_dir / "pkg" / "module_0.py"
+        path.write_text(path.read_text())
+        result = await extractor.extract_patterns_from_directory(str(temp_dir))
+
+        assert result['extraction']['parsed'] == 0
+        assert result['statistics']['class_count'] == 2
+
+    @pytest.mark.asyncio
+    async def test_same_size_edit_within_mtime_tick_is_parsed(self, temp_dir):
+        """直前に変更されたファイルは同じサイズ・更新日時でも内容で判定されることのテスト"""
+        _write_project(temp_dir, count=2)
+        extractor = PatternExtractor(AnalysisService({'enabled': False}))
+        await extractor.extract_patterns_from_directory(str(temp_dir))
+
+        path = temp_dir / "pkg" / "module_0.py"
+        before = path.stat()
+        path.write_text(path.read_text().replace("Model0", "Item_0"))
+        os.utime(path, ns=(before.st_atime_ns, before.st_mtime_ns))
+        result = await extractor.extract_patterns_from_directory(str(temp_dir))
+
+        assert result['extraction']['parsed'] == 1
+        cached = json.loads((temp_dir / '.nocturnal' / 'pattern_cache.json').read_text())['files']
+        assert 'Item_0' in json.dumps(cached["pkg/module_0.py"]['patterns'])
+
+    @pytest.mark.asyncio
+    async def test_unreadable_cache_is_discarded(self, temp_dir):
+        """壊れたキャッシュを破棄して全件解析することのテスト"""
+        _write_project(temp_dir, count=2)
+        (temp_dir / '.nocturnal').mkdir()
+        (temp_dir / '.nocturnal' / 'pattern_cache.json').write_text("{broken")
+
+        result = await PatternExtractor(AnalysisService({'enabled': False})).extract_patterns_from_directory(str(temp_dir))
+
+        assert result['extraction']['parsed'] == 3
+
+    @pytest.mark.asyncio
+    @pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(), reason="forkが必要")
+    async def test_worker_batches_match_inline(self, temp_dir):
+        """ワーカーでのバッチ解析結果がインライン実行と一致することのテスト"""
+        _write_project(temp_dir, count=20)
+        service = AnalysisService({'max_workers': 2, 'min_offload_chars': 0, 'start_method': 'fork'})
+        try:
+            parallel = await PatternExtractor(service).extract_patterns_from_directory(str(temp_dir), use_cache=False)
+        finally:
+            service.shutdown()
+        inline = await PatternExtractor(AnalysisService({'enabled': False})).extract_patterns_from_directory(
+            str(temp_dir), use_cache=False
+        )
+
+        assert service.stats['offloaded_jobs'] > 1
+        assert parallel['files_analyzed'] == inline['files_analyzed']
+        assert parallel['naming_patterns'] == inline['naming_patterns']
+        assert parallel['insights'] == inline['insights']
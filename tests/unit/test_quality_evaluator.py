@@ -0,0 +1,128 @@
+"""品質評価エンジンの静的解析キャッシュとバッチ実行の単体テスト"""
+
+import json
+import shutil
+
+import pytest
+
+from nocturnal_agent.config.config_manager import QualityConfig
+from nocturnal_agent.core.analysis_service import AnalysisService
+from nocturnal_agent.engines.quality_evaluator import (
+    QualityEvaluator, StaticAnalysisResult, split_tool_output
+)
+
+requires_tools = pytest.mark.skipif(
+    shutil.which('flake8') is None or shutil.which('mypy') is None,
+    reason="flake8とmypyが必要"
+)
+
+CLEAN = "def total(values: list) -> int:\n    return sum(values)\n"
+UNUSED_IMPORT = "import os\n\n\ndef name() -> str:\n    return 'x'\n"
+TYPE_ERROR = "def name() -> str:\n    return 1\n"
+SYNTAX_ERROR = "def broken(:\n    pass\n"
+
+
+def make_evaluator(temp_dir, tools):
+    return QualityEvaluator(
+        QualityConfig(static_analysis_tools=tools),
+        analysis_service=AnalysisService({'enabled': False}),
+        cache_path=str(temp_dir / 'static_analysis_cache.json'),
+    )
+
+
+class TestToolOutputSplitting:
+    """まとめて実行したツール出力のファイル別分割のテスト"""
+
+    def test_pylint_json_is_split_per_file(self):
+        """pylintのJSON出力がファイルごとに分かれ、重大度で採点されることのテスト"""
+        stdout = json.dumps([
+            {'path': 'module_0.py', 'type': 'error', 'message-id': 'E0602', 'message': 'undefined'},
+            {'path': 'module_0.py', 'type': 'warning', 'message-id': 'W0611', 'message': 'unused'},
+            {'path': 'module_2.py', 'type': 'convention', 'message-id': 'C0114', 'message': 'docstring'},
+        ])
+
+        per_file = split_tool_output('pylint', stdout, ['module_0.py', 'module_1.py', 'module_2.py'])
+
+        assert per_file['module_1.py'] == ""
+        result = StaticAnalysisResult('pylint', 2, per_file['module_0.py'], "")
+        assert len(result.issues) == 2
+        assert result.score == pytest.approx(0.85)
+        assert StaticAnalysisResult('pylint', 0, per_file['module_1.py'], "").score == 1.0
+
+    def test_line_output_drops_summary(self):
+        """行形式の出力が分割され、集計行が捨てられることのテスト"""
+        stdout = (
+            "module_1.py:2: error: Incompatible return value type\n"
+            "module_0.py:1: note: See docs\n"
+            "Found 1 error in 1 file (checked 2 source files)\n"
+        )
+
+        per_file = split_tool_output('mypy', stdout, ['module_0.py', 'module_1.py'])
+
+        assert per_file == {
+            'module_0.py': "module_0.py:1: note: See docs",
+            'module_1.py': "module_1.py:2: error: Incompatible return value type",
+        }
+
+
+@requires_tools
+class TestBatchStaticAnalysis:
+    """静的解析のバッチ実行とキャッシュのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_each_tool_runs_once_per_batch(self, temp_dir):
+        """ツールがバッチごとに1回だけ起動され、結果がファイルに振り分けられることのテスト"""
+        evaluator = make_evaluator(temp_dir, ['flake8', 'mypy'])
+        files = [(CLEAN, "clean.py"), (UNUSED_IMPORT, "unused.py"), (TYPE_ERROR, "typed.py"), (CLEAN, "copy.py")]
+
+        scores = await evaluator.batch_evaluate(files)
+
+        assert evaluator.static_analysis_stats['tool_runs'] == 2
+        # 静的解析の平均がcode_qualityになる
+        assert [score.code_quality for score in scores] == pytest.approx([1.0, 0.975, 0.95, 1.0])
+
+        streamed = {index: score async for index, score in evaluator.iter_batch_evaluate(files)}
+        assert sorted(streamed) == [0, 1, 2, 3]
+        assert streamed[2].code_quality == pytest.approx(0.95)
+        assert evaluator.static_analysis_stats['tool_runs'] == 2
+
+    @pytest.mark.asyncio
+    async def test_cache_follows_content_and_survives_restart(self, temp_dir):
+        """内容が変われば再解析され、結果が再起動後も使われることのテスト"""
+        evaluator = make_evaluator(temp_dir, ['flake8'])
+        first = await evaluator._run_static_analysis_batch([(UNUSED_IMPORT, '.py'), (CLEAN, '.py')])
+        assert first == [{'flake8': 0.95}, {'flake8': 1.0}]
+
+        restarted = make_evaluator(temp_dir, ['flake8'])
+        edited = UNUSED_IMPORT.replace("import os\n", "")
+        second = await restarted._run_static_analysis_batch([(edited, '.py'), (CLEAN, '.py')])
+
+        assert second == [{'flake8': 1.0}, {'flake8': 1.0}]
+        assert restarted.static_analysis_stats == {'files_analyzed': 2, 'cache_hits': 1, 'tool_runs': 1}
+
+        restarted.clear_cache()
+        assert not (temp_dir / 'static_analysis_cache.json').exists()
+
+    @pytest.mark.asyncio
+    async def test_mypy_blocking_error_does_not_hide_other_files(self, temp_dir):
+        """構文エラーで止まったmypyが残りのファイルを再実行することのテスト"""
+        evaluator = make_evaluator(temp_dir, ['mypy'])
+
+        scores = await evaluator._run_static_analysis_batch(
+            [(SYNTAX_ERROR, '.py'), (TYPE_ERROR, '.py'), (CLEAN, '.py')]
+        )
+
+        assert scores[0]['mypy'] < 1.0
+        assert scores[1]['mypy'] == pytest.approx(0.9)
+        assert scores[2]['mypy'] == 1.0
+        assert evaluator.static_analysis_stats['tool_runs'] == 2
+
+    @pytest.mark.asyncio
+    async def test_unreadable_cache_is_discarded(self, temp_dir):
+        """壊れたキャッシュファイルを破棄して解析し直すことのテスト"""
+        (temp_dir / 'static_analysis_cache.json').write_text("{broken")
+        evaluator = make_evaluator(temp_dir, ['flake8'])
+
+        assert await evaluator._run_static_analysis_batch([(CLEAN, '.py')]) == [{'flake8': 1.0}]
+        data = json.loads((temp_dir / 'static_analysis_cache.json').read_text())
+        assert len(data['entries']) == 1
